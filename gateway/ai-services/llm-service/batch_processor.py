@@ -101,10 +101,6 @@ class BatchProcessor:
         self._queue_lock = asyncio.Lock()
         self.task_manager = get_task_manager()
         
-        # Load balancing
-        self.model_load: Dict[str, int] = {}  # Track current load per model
-        self.model_performance: Dict[str, List[float]] = {}  # Track performance history
-        
         # Memory management
         self.memory_threshold = 0.8  # Trigger cleanup at 80% memory usage
         self.last_memory_check = time.time()
@@ -331,7 +327,7 @@ class BatchProcessor:
         logger.info(f"Processing batch {batch.id} with {len(batch.requests)} requests")
         
         try:
-            # Group requests by optimal model (load balanced)
+            # Group requests by model (replica routing happens in the engine manager)
             model_groups = {}
             for request in batch.requests:
                 optimal_model = self._select_optimal_model(request.model_name)
@@ -343,14 +339,7 @@ class BatchProcessor:
             
             # Process each model group
             for model_name, requests in model_groups.items():
-                # Update load counter
-                self._update_model_load(model_name, 1)
-                
-                try:
-                    await self._process_model_group(batch, model_name, requests)
-                finally:
-                    # Decrease load counter
-                    self._update_model_load(model_name, -1)
+                await self._process_model_group(batch, model_name, requests)
             
             batch.status = BatchStatus.COMPLETED
             batch.completed_at = time.time()
@@ -392,8 +381,6 @@ class BatchProcessor:
         requests: List[BatchRequest],
     ) -> None:
         """Process requests for a specific model."""
-        start_time = time.time()
-        
         try:
             # Process requests concurrently (up to a limit)
             max_concurrent = min(len(requests), 8)
@@ -409,10 +396,6 @@ class BatchProcessor:
             # Wait for all requests to complete
             await asyncio.gather(*tasks, return_exceptions=True)
             
-            # Record performance for load balancing
-            processing_time = time.time() - start_time
-            self._record_model_performance(model_name, processing_time)
-            
         except Exception as e:
             logger.error(f"Failed to process model group {model_name}", error=str(e))
             raise
@@ -507,50 +490,11 @@ class BatchProcessor:
         }
     
     def _select_optimal_model(self, requested_model: str) -> str:
-        """Select optimal model based on load balancing."""
-        available_models = self.engine_manager.list_models()
-        
-        # If requested model is available and not overloaded, use it
-        if requested_model in available_models:
-            current_load = self.model_load.get(requested_model, 0)
-            if current_load < self.max_concurrent_batches // len(available_models):
-                return requested_model
-        
-        # Find model with lowest load
-        best_model = requested_model
-        lowest_load = float('inf')
-        
-        for model in available_models:
-            load = self.model_load.get(model, 0)
-            performance = self.model_performance.get(model, [])
-            
-            # Calculate weighted load (consider both current load and performance)
-            avg_performance = sum(performance[-10:]) / len(performance[-10:]) if performance else 1.0
-            weighted_load = load + (avg_performance / 10.0)  # Factor in response time
-            
-            if weighted_load < lowest_load:
-                lowest_load = weighted_load
-                best_model = model
-        
-        return best_model
-    
-    def _update_model_load(self, model_name: str, delta: int) -> None:
-        """Update model load counter."""
-        if model_name not in self.model_load:
-            self.model_load[model_name] = 0
-        
-        self.model_load[model_name] = max(0, self.model_load[model_name] + delta)
-    
-    def _record_model_performance(self, model_name: str, response_time: float) -> None:
-        """Record model performance for load balancing."""
-        if model_name not in self.model_performance:
-            self.model_performance[model_name] = []
-        
-        # Keep last 100 performance records
-        perf_list = self.model_performance[model_name]
-        perf_list.append(response_time)
-        if len(perf_list) > 100:
-            perf_list.pop(0)
+        """Keep the requested model unless all of its replicas are ejected."""
+        return self.engine_manager.load_balancer.resolve_model(
+            requested_model,
+            self.engine_manager.list_models(),
+        )
     
     async def _check_memory_usage(self) -> None:
         """Check memory usage and trigger cleanup if needed."""
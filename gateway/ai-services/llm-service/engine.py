@@ -3,12 +3,13 @@ vLLM engine wrapper for LLM inference.
 
 Provides:
 - Multi-model management (gpt-oss-120b, gpt-oss-20b)
-- Load balancing across multiple GPUs
+- Least-loaded routing across local and remote replicas of each model
 - Async streaming and batching support
 - Model hot-swapping capabilities
 """
 
 import asyncio
+import dataclasses
 import gc
 import logging
 from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional, Tuple
@@ -20,15 +21,35 @@ from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_excep
 
 import torch
 import structlog
-from vllm import AsyncLLMEngine, AsyncEngineArgs, SamplingParams
-from vllm.model_executor.parallel_utils.parallel_state import destroy_model_parallel
+
+try:
+    from vllm import AsyncLLMEngine, AsyncEngineArgs, SamplingParams
+    from vllm.model_executor.parallel_utils.parallel_state import destroy_model_parallel
+    VLLM_AVAILABLE = True
+except ImportError:
+    # CPU/dev installs must opt into the stub backend (LLM_ENGINE_BACKEND=stub)
+    AsyncLLMEngine = AsyncEngineArgs = SamplingParams = None
+    destroy_model_parallel = None
+    VLLM_AVAILABLE = False
 
 from shared.config import LLMServiceConfig, ModelConfig
+from shared.exceptions import ConfigurationError
 from shared.monitoring import get_metrics
 
+from .load_balancer import LoadBalancer
+from .remote_engine import RemoteModelInstance
+from .stub_engine import StubModelInstance, StubSamplingParams
+
 logger = structlog.get_logger(__name__)
 
 
+def _vllm_supports_prefix_caching() -> bool:
+    """Whether the installed vLLM accepts enable_prefix_caching."""
+    return VLLM_AVAILABLE and any(
+        field.name == "enable_prefix_caching" for field in dataclasses.fields(AsyncEngineArgs)
+    )
+
+
 class ModelInstance:
     """Single model instance with vLLM engine."""
     
@@ -36,7 +57,7 @@ class ModelInstance:
         self,
         model_name: str,
         model_path: str,
-        engine_args: AsyncEngineArgs,
+        engine_args: "AsyncEngineArgs",
     ):
         self.model_name = model_name
         self.model_path = model_path
@@ -148,7 +169,7 @@ class ModelInstance:
     async def generate(
         self,
         prompt: str,
-        sampling_params: SamplingParams,
+        sampling_params: "SamplingParams",
     ) -> Dict[str, Any]:
         """Generate text completion with retry logic."""
         if not self.is_loaded or not self.engine:
@@ -180,6 +201,9 @@ class ModelInstance:
                 "finish_reason": output.finish_reason.name.lower() if output.finish_reason else "stop",
                 "prompt_tokens": len(result.prompt_token_ids) if result.prompt_token_ids else 0,
                 "completion_tokens": len(output.token_ids) if output.token_ids else 0,
+                # Prompt tokens served from the prefix cache; vLLM 0.2.6 does not
+                # report this, so it stays 0 there (prefix_cache.enabled is False)
+                "cached_tokens": getattr(result, "num_cached_tokens", None) or 0,
                 "generation_time": generation_time,
             }
             
@@ -199,7 +223,7 @@ class ModelInstance:
     async def generate_stream(
         self,
         prompt: str,
-        sampling_params: SamplingParams,
+        sampling_params: "SamplingParams",
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Generate streaming text completion."""
         if not self.is_loaded or not self.engine:
@@ -221,6 +245,7 @@ class ModelInstance:
                         "finish_reason": output.finish_reason.name.lower() if output.finish_reason else None,
                         "prompt_tokens": len(request_output.prompt_token_ids),
                         "completion_tokens": len(output.token_ids),
+                        "cached_tokens": getattr(request_output, "num_cached_tokens", None) or 0,
                     }
                 
         except Exception as e:
@@ -247,8 +272,29 @@ class LLMEngineManager:
         self.llm_config = llm_config
         self.model_config = model_config
         self.models: Dict[str, ModelInstance] = {}
-        self.load_balancer = LoadBalancer()
+        self.load_balancer = LoadBalancer(
+            policy=llm_config.routing_policy,
+            failure_threshold=llm_config.replica_failure_threshold,
+            ejection_seconds=llm_config.replica_ejection_seconds,
+        )
         self.executor = ThreadPoolExecutor(max_workers=2)
+        if llm_config.engine_backend != "stub" and not VLLM_AVAILABLE:
+            # Never fall back to echo completions silently in production
+            raise ConfigurationError(
+                "vLLM is not installed; set LLM_ENGINE_BACKEND=stub to run the CPU stub backend",
+                "LLM_ENGINE_BACKEND",
+            )
+        self.backend = llm_config.engine_backend
+        # vLLM 0.2.6 (the pinned version) has neither automatic prefix caching
+        # nor num_cached_tokens; the flag only takes effect on versions that do
+        self.enable_prefix_caching = llm_config.enable_prefix_caching and (
+            self.backend == "stub" or _vllm_supports_prefix_caching()
+        )
+        if llm_config.enable_prefix_caching and not self.enable_prefix_caching:
+            logger.warning("Installed vLLM has no automatic prefix caching; ENABLE_PREFIX_CACHING ignored")
+        
+        # Prefix cache accounting per model
+        self.prefix_stats: Dict[str, Dict[str, int]] = {}
         
         # Model configurations based on deployment type
         self.deployment_type = os.getenv("DEPLOYMENT_TYPE", "edge")  # "cloud" or "edge"
@@ -298,10 +344,11 @@ class LLMEngineManager:
             # Create model instances
             for model_name, config in self.model_configs.items():
                 await self._create_model_instance(model_name, config)
+            self._add_remote_replicas()
             
-            # Load default model
-            if "gpt-oss-20b" in self.models:
-                await self.models["gpt-oss-20b"].load()
+            # Load default model on every replica
+            for replica in self.load_balancer.replicas("gpt-oss-20b"):
+                await replica.load()
             
             logger.info(f"Initialized {len(self.models)} model instances")
             
@@ -310,7 +357,17 @@ class LLMEngineManager:
             raise
     
     async def _create_model_instance(self, model_name: str, config: Dict[str, Any]) -> None:
-        """Create a model instance."""
+        """Create the local replicas of a model."""
+        if self.backend == "stub":
+            for _ in range(max(self.llm_config.local_replicas, 1)):
+                self._register_replica(model_name, StubModelInstance(
+                    model_name,
+                    config["path"],
+                    enable_prefix_caching=self.enable_prefix_caching,
+                ))
+            logger.info(f"Created stub model instance: {model_name}")
+            return
+        
         try:
             engine_args = AsyncEngineArgs(
                 model=config["path"],
@@ -322,19 +379,36 @@ class LLMEngineManager:
                 trust_remote_code=True,
                 disable_log_stats=False,
                 enforce_eager=self.deployment_type == "edge",  # Use eager mode for edge deployment
-                enable_prefix_caching=True,  # Enable prefix caching for better performance
                 quantization="awq" if self.deployment_type == "edge" else None,  # Quantization for edge
+                # Automatic prefix caching: requests sharing the canonical system
+                # prompt/tool-schema prefix reuse its KV blocks (see prompt_builder)
+                **({"enable_prefix_caching": True} if self.enable_prefix_caching else {}),
             )
             
-            instance = ModelInstance(model_name, config["path"], engine_args)
-            self.models[model_name] = instance
+            for _ in range(max(self.llm_config.local_replicas, 1)):
+                self._register_replica(model_name, ModelInstance(model_name, config["path"], engine_args))
             
-            logger.info(f"Created model instance: {model_name}")
+            logger.info(f"Created model instance: {model_name}", replicas=self.llm_config.local_replicas)
             
         except Exception as e:
             logger.error(f"Failed to create model instance {model_name}", error=str(e))
             raise
     
+    def _add_remote_replicas(self) -> None:
+        """Register remote replicas from LLM_REMOTE_REPLICAS ("model=url,model=url")."""
+        for entry in filter(None, (item.strip() for item in self.llm_config.remote_replicas.split(","))):
+            model_name, _, url = entry.partition("=")
+            if not url:
+                logger.warning("Ignoring malformed remote replica", entry=entry)
+                continue
+            self._register_replica(model_name.strip(), RemoteModelInstance(model_name.strip(), url.strip()))
+            logger.info(f"Registered remote replica for {model_name}", url=url)
+    
+    def _register_replica(self, model_name: str, replica: Any) -> None:
+        """Add a replica to the balancer; the first one also backs self.models."""
+        self.models.setdefault(model_name, replica)
+        self.load_balancer.add_replica(model_name, replica)
+    
     def list_models(self) -> List[str]:
         """List available model names."""
         return list(self.models.keys())
@@ -360,7 +434,7 @@ class LLMEngineManager:
             raise ValueError(f"Model {model_name} not found")
         
         # Create sampling parameters
-        sampling_params = SamplingParams(
+        sampling_params = self._sampling_params(
             temperature=temperature,
             top_p=top_p,
             max_tokens=max_tokens,
@@ -369,13 +443,11 @@ class LLMEngineManager:
             stop=stop,
         )
         
-        # Load balance if multiple instances available
-        model = self.load_balancer.select_model(model_name, self.models)
-        
-        result = await model.generate(prompt, sampling_params)
+        # Route to the least-loaded replica
+        async with self.load_balancer.route(model_name, self._estimate_tokens(prompt, max_tokens)) as model:
+            result = await model.generate(prompt, sampling_params)
         
-        # Update load balancer
-        self.load_balancer.record_request(model_name, result["generation_time"])
+        self._record_prefix_usage(model_name, result)
         
         return result
     
@@ -393,28 +465,71 @@ class LLMEngineManager:
         if not model:
             raise ValueError(f"Model {model_name} not found")
         
-        sampling_params = SamplingParams(
+        sampling_params = self._sampling_params(
             temperature=temperature,
             top_p=top_p,
             max_tokens=max_tokens,
             stop=stop,
         )
         
-        # Load balance
-        model = self.load_balancer.select_model(model_name, self.models)
+        last_chunk: Optional[Dict[str, Any]] = None
         
-        start_time = time.time()
+        # The replica stays accounted as busy until the stream is drained
+        async with self.load_balancer.route(model_name, self._estimate_tokens(prompt, max_tokens)) as model:
+            async for chunk in model.generate_stream(prompt, sampling_params):
+                last_chunk = chunk
+                yield chunk
         
-        async for chunk in model.generate_stream(prompt, sampling_params):
-            yield chunk
+        if last_chunk:
+            self._record_prefix_usage(model_name, last_chunk)
+    
+    @staticmethod
+    def _estimate_tokens(prompt: str, max_tokens: int) -> int:
+        """Rough token cost of a request (~4 characters per prompt token)."""
+        return len(prompt) // 4 + max_tokens
+    
+    def _sampling_params(self, **kwargs: Any) -> Any:
+        """Build sampling parameters for the active backend."""
+        if self.backend == "stub":
+            return StubSamplingParams(**kwargs)
+        return SamplingParams(**kwargs)
+    
+    def _record_prefix_usage(self, model_name: str, result: Dict[str, Any]) -> None:
+        """Accumulate prompt/cached token counts for the prefix hit rate."""
+        stats = self.prefix_stats.setdefault(
+            model_name, {"requests": 0, "hits": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        )
+        cached_tokens = result.get("cached_tokens", 0)
+        stats["requests"] += 1
+        stats["hits"] += 1 if cached_tokens else 0
+        stats["prompt_tokens"] += result.get("prompt_tokens", 0)
+        stats["cached_tokens"] += cached_tokens
+    
+    def get_prefix_cache_stats(self) -> Dict[str, Any]:
+        """Get prefix cache hit rates overall and per model."""
+        totals = {"requests": 0, "hits": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        per_model = {}
+        for model_name, stats in self.prefix_stats.items():
+            for key in totals:
+                totals[key] += stats[key]
+            per_model[model_name] = {
+                **stats,
+                "token_hit_rate": stats["cached_tokens"] / max(stats["prompt_tokens"], 1),
+            }
         
-        # Update load balancer
-        self.load_balancer.record_request(model_name, time.time() - start_time)
+        return {
+            "enabled": self.enable_prefix_caching,
+            **totals,
+            "request_hit_rate": totals["hits"] / max(totals["requests"], 1),
+            "token_hit_rate": totals["cached_tokens"] / max(totals["prompt_tokens"], 1),
+            "models": per_model,
+        }
     
     async def health_check(self) -> bool:
         """Check if at least one model is loaded and healthy."""
         try:
-            for model in self.models.values():
+            await self.load_balancer.check_health()
+            for model in self.load_balancer.all_replicas():
                 if model.is_loaded:
                     return True
             return False
@@ -424,13 +539,19 @@ class LLMEngineManager:
     async def get_stats(self) -> Dict[str, Any]:
         """Get engine manager statistics."""
         stats = {
+            "backend": self.backend,
             "total_models": len(self.models),
             "loaded_models": sum(1 for m in self.models.values() if m.is_loaded),
             "models": {},
+            "prefix_cache": self.get_prefix_cache_stats(),
+            "load_balancer": self.load_balancer.get_stats(),
         }
         
         for model_name, model in self.models.items():
-            stats["models"][model_name] = model.get_stats()
+            stats["models"][model_name] = {
+                **model.get_stats(),
+                "replicas": len(self.load_balancer.replicas(model_name)),
+            }
         
         return stats
     
@@ -441,15 +562,16 @@ class LLMEngineManager:
             raise ValueError(f"Model {model_name} not found")
         
         logger.info(f"Reloading model {model_name}")
-        await model.unload()
-        await model.load()
+        for replica in self.load_balancer.replicas(model_name):
+            await replica.unload()
+            await replica.load()
     
     async def close(self) -> None:
         """Clean up all resources."""
         logger.info("Closing LLM engine manager")
         
-        # Unload all models
-        for model in self.models.values():
+        # Unload all replicas
+        for model in self.load_balancer.all_replicas():
             await model.unload()
         
         # Shutdown executor
@@ -462,50 +584,3 @@ class LLMEngineManager:
         
         logger.info("LLM engine manager closed")
 
-
-class LoadBalancer:
-    """Simple load balancer for model instances."""
-    
-    def __init__(self):
-        self.request_counts: Dict[str, int] = {}
-        self.response_times: Dict[str, List[float]] = {}
-        self._lock = asyncio.Lock()
-    
-    def select_model(self, model_name: str, models: Dict[str, ModelInstance]) -> ModelInstance:
-        """Select best model instance for load balancing."""
-        # For now, just return the model (no multiple instances per model)
-        # In a production setup, you might have multiple instances per model
-        model = models.get(model_name)
-        if not model:
-            raise ValueError(f"Model {model_name} not found")
-        return model
-    
-    async def record_request(self, model_name: str, response_time: float) -> None:
-        """Record request metrics for load balancing."""
-        async with self._lock:
-            if model_name not in self.request_counts:
-                self.request_counts[model_name] = 0
-                self.response_times[model_name] = []
-            
-            self.request_counts[model_name] += 1
-            self.response_times[model_name].append(response_time)
-            
-            # Keep only last 100 response times
-            if len(self.response_times[model_name]) > 100:
-                self.response_times[model_name] = self.response_times[model_name][-100:]
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """Get load balancing statistics."""
-        stats = {}
-        
-        for model_name in self.request_counts:
-            response_times = self.response_times.get(model_name, [])
-            avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-            
-            stats[model_name] = {
-                "request_count": self.request_counts[model_name],
-                "avg_response_time": avg_response_time,
-                "recent_response_times": response_times[-10:],  # Last 10
-            }
-        
-        return stats
\ No newline at end of file
@@ -24,6 +24,8 @@ from shared.exceptions import ValidationError
 from shared.monitoring import get_metrics
 from shared.models import ChatMessage, MessageRole
 
+from .prompt_builder import build_chat_prompt
+
 logger = structlog.get_logger(__name__)
 
 
@@ -172,6 +174,7 @@ class FunctionCallProcessor:
                     "prompt_tokens": result.get("prompt_tokens", 0),
                     "completion_tokens": result.get("completion_tokens", 0),
                     "total_tokens": result.get("prompt_tokens", 0) + result.get("completion_tokens", 0),
+                    "prompt_tokens_details": {"cached_tokens": result.get("cached_tokens", 0)},
                 },
                 "processing_time": processing_time,
             }
@@ -281,54 +284,29 @@ class FunctionCallProcessor:
         functions: List[FunctionDefinition],
         function_call: Optional[Union[str, Dict[str, str]]] = None,
     ) -> str:
-        """Create prompt for function calling."""
-        # System prompt for function calling
-        system_prompt = """You are an AI assistant that can call functions to help answer questions.
-
-Available functions:
-"""
-        
-        # Add function descriptions
-        for func in functions:
-            system_prompt += f"\n{func.name}: {func.description}\n"
-            system_prompt += f"Parameters: {json.dumps(func.parameters, indent=2)}\n"
-        
-        system_prompt += """
-
-To call a function, use this format:
-<function_call>
-{"name": "function_name", "arguments": {"param1": "value1", "param2": "value2"}}
-</function_call>
-
-You can call multiple functions if needed. Always provide the function results in your response.
-"""
+        """Create prompt for function calling.
         
-        # Add function call preference
+        The tool schema is rendered canonically after the leading system
+        messages, so requests with the same tools share a cacheable prefix;
+        the per-request function_call preference goes after it.
+        """
+        extra_turns = []
         if function_call:
             if isinstance(function_call, str):
                 if function_call == "auto":
-                    system_prompt += "\nCall functions when they would be helpful to answer the user's question."
+                    extra_turns.append("System: Call functions when they would be helpful to answer the user's question.")
                 elif function_call == "none":
-                    system_prompt += "\nDo not call any functions unless explicitly requested."
+                    extra_turns.append("System: Do not call any functions unless explicitly requested.")
             elif isinstance(function_call, dict) and "name" in function_call:
-                system_prompt += f"\nPrefer to use the {function_call['name']} function if applicable."
-        
-        # Convert messages to prompt
-        prompt_parts = [system_prompt]
-        
-        for message in messages:
-            if message.role == MessageRole.SYSTEM:
-                prompt_parts.append(f"System: {message.content}")
-            elif message.role == MessageRole.USER:
-                prompt_parts.append(f"User: {message.content}")
-            elif message.role == MessageRole.ASSISTANT:
-                prompt_parts.append(f"Assistant: {message.content}")
-            elif message.role == MessageRole.FUNCTION:
-                prompt_parts.append(f"Function Result: {message.content}")
-        
-        prompt_parts.append("Assistant: I'll help you with that.")
-        
-        return "\n\n".join(prompt_parts)
+                extra_turns.append(f"System: Prefer to use the {function_call['name']} function if applicable.")
+        
+        return build_chat_prompt(
+            messages,
+            functions=functions,
+            extra_turns=extra_turns,
+            reply_prefix="Assistant: I'll help you with that.",
+            include_function_results=True,
+        ).prompt
     
     def _parse_function_calls(self, text: str) -> List[FunctionCall]:
         """Parse function calls from LLM response."""
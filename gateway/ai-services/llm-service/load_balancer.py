@@ -0,0 +1,195 @@
+"""
+Replica routing for the LLM engine manager.
+
+Each model name maps to one or more replicas: local vLLM ModelInstances,
+RemoteModelInstances served over HTTP, or any object with the same
+generate/generate_stream interface (fakes in tests). Requests are routed
+with one of two policies:
+
+- ``least_tokens``: fewest outstanding tokens (prompt estimate + max_tokens),
+  ties broken by EWMA latency;
+- ``ewma``: lowest EWMA latency weighted by in-flight requests.
+
+A replica that fails ``failure_threshold`` requests in a row (or a health
+probe) is ejected for ``ejection_seconds`` and then given another chance.
+Both the direct and batch paths go through this class.
+"""
+
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+ROUTING_POLICIES = ("least_tokens", "ewma")
+
+
+@dataclass
+class ReplicaState:
+    """Routing state for one replica."""
+
+    replica: Any
+    name: str
+    outstanding_requests: int = 0
+    outstanding_tokens: int = 0
+    ewma_latency: Optional[float] = None
+    request_count: int = 0
+    error_count: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+
+    @property
+    def is_ejected(self) -> bool:
+        return self.ejected_until > time.monotonic()
+
+
+class LoadBalancer:
+    """Routes requests across the replicas of each model."""
+
+    def __init__(
+        self,
+        policy: str = "least_tokens",
+        ewma_alpha: float = 0.3,
+        failure_threshold: int = 3,
+        ejection_seconds: float = 30.0,
+    ):
+        if policy not in ROUTING_POLICIES:
+            raise ValueError(f"Unknown routing policy {policy!r}, expected one of {ROUTING_POLICIES}")
+        self.policy = policy
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.ejection_seconds = ejection_seconds
+        self._replicas: Dict[str, List[ReplicaState]] = {}
+
+    def add_replica(self, model_name: str, replica: Any, name: Optional[str] = None) -> None:
+        """Register a replica for a model."""
+        states = self._replicas.setdefault(model_name, [])
+        states.append(ReplicaState(replica=replica, name=name or f"{model_name}-{len(states)}"))
+
+    def replicas(self, model_name: str) -> List[Any]:
+        """Get all replicas registered for a model."""
+        return [state.replica for state in self._replicas.get(model_name, [])]
+
+    def all_replicas(self) -> List[Any]:
+        return [state.replica for states in self._replicas.values() for state in states]
+
+    def has_healthy_replica(self, model_name: str) -> bool:
+        return any(not state.is_ejected for state in self._replicas.get(model_name, []))
+
+    def resolve_model(self, requested_model: str, fallback_models: List[str]) -> str:
+        """Keep the requested model unless every replica of it is ejected."""
+        if self.has_healthy_replica(requested_model):
+            return requested_model
+        for model_name in fallback_models:
+            if self.has_healthy_replica(model_name):
+                logger.warning("All replicas ejected, falling back", requested=requested_model, model=model_name)
+                return model_name
+        return requested_model
+
+    def select_model(self, model_name: str, models: Optional[Dict[str, Any]] = None) -> Any:
+        """Select the best replica for a model."""
+        return self._select(model_name).replica
+
+    @asynccontextmanager
+    async def route(self, model_name: str, estimated_tokens: int = 0) -> AsyncIterator[Any]:
+        """Pick a replica and account for the request while it runs."""
+        state = self._select(model_name)
+        state.outstanding_requests += 1
+        state.outstanding_tokens += estimated_tokens
+        started = time.monotonic()
+        try:
+            yield state.replica
+        except Exception:
+            self._record_failure(model_name, state)
+            raise
+        else:
+            self._record_success(state, time.monotonic() - started)
+        finally:
+            state.outstanding_requests -= 1
+            state.outstanding_tokens -= estimated_tokens
+
+    async def check_health(self) -> None:
+        """Probe replicas that expose health_check and eject unhealthy ones."""
+        for model_name, states in self._replicas.items():
+            for state in states:
+                probe = getattr(state.replica, "health_check", None)
+                if probe is None:
+                    continue
+                try:
+                    healthy = await probe()
+                except Exception:
+                    healthy = False
+                if healthy:
+                    if state.is_ejected and state.consecutive_failures == 0:
+                        state.ejected_until = 0.0
+                elif not state.is_ejected:
+                    self._eject(model_name, state, reason="health check failed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing statistics per model and replica."""
+        return {
+            "policy": self.policy,
+            "models": {
+                model_name: [
+                    {
+                        "replica": state.name,
+                        "outstanding_requests": state.outstanding_requests,
+                        "outstanding_tokens": state.outstanding_tokens,
+                        "ewma_latency": state.ewma_latency,
+                        "request_count": state.request_count,
+                        "error_count": state.error_count,
+                        "ejected": state.is_ejected,
+                    }
+                    for state in states
+                ]
+                for model_name, states in self._replicas.items()
+            },
+        }
+
+    def _select(self, model_name: str) -> ReplicaState:
+        states = self._replicas.get(model_name)
+        if not states:
+            raise ValueError(f"Model {model_name} not found")
+
+        healthy = [state for state in states if not state.is_ejected]
+        if not healthy:
+            # Fail open: retry the replica whose ejection ends first
+            return min(states, key=lambda state: state.ejected_until)
+
+        if self.policy == "ewma":
+            return min(healthy, key=self._ewma_cost)
+        return min(healthy, key=lambda state: (state.outstanding_tokens, self._ewma_cost(state)))
+
+    @staticmethod
+    def _ewma_cost(state: ReplicaState) -> float:
+        # Unmeasured replicas cost nothing so they get sampled first
+        return (state.ewma_latency or 0.0) * (state.outstanding_requests + 1)
+
+    def _record_success(self, state: ReplicaState, latency: float) -> None:
+        state.request_count += 1
+        state.consecutive_failures = 0
+        if state.ewma_latency is None:
+            state.ewma_latency = latency
+        else:
+            state.ewma_latency += self.ewma_alpha * (latency - state.ewma_latency)
+
+    def _record_failure(self, model_name: str, state: ReplicaState) -> None:
+        state.request_count += 1
+        state.error_count += 1
+        state.consecutive_failures += 1
+        if state.consecutive_failures >= self.failure_threshold:
+            self._eject(model_name, state, reason="consecutive failures")
+
+    def _eject(self, model_name: str, state: ReplicaState, reason: str) -> None:
+        state.ejected_until = time.monotonic() + self.ejection_seconds
+        state.consecutive_failures = 0
+        logger.warning(
+            "Ejecting replica",
+            model=model_name,
+            replica=state.name,
+            reason=reason,
+            ejection_seconds=self.ejection_seconds,
+        )
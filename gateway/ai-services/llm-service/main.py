@@ -11,6 +11,7 @@ Provides OpenAI-compatible API endpoints for text generation with:
 
 import asyncio
 import logging
+import os
 import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Dict, List, Optional
@@ -34,6 +35,7 @@ from shared.models import (
     HealthStatus,
     BaseResponse,
     TokenUsage,
+    PromptTokensDetails,
     ChatChoice,
     ChatMessage,
     MessageRole,
@@ -45,6 +47,7 @@ from .engine import LLMEngineManager
 from .billing import BillingTracker
 from .batch_processor import BatchProcessor
 from .function_calling import FunctionCallProcessor, FunctionCallRequest, FunctionDefinition
+from .prompt_builder import build_chat_prompt
 
 logger = structlog.get_logger(__name__)
 
@@ -412,6 +415,7 @@ async def _generate_chat_completion(request: ChatRequest, model_name: str) -> Ch
         prompt_tokens=result.get("prompt_tokens", 0),
         completion_tokens=result.get("completion_tokens", 0),
         total_tokens=result.get("prompt_tokens", 0) + result.get("completion_tokens", 0),
+        prompt_tokens_details=PromptTokensDetails(cached_tokens=result.get("cached_tokens", 0)),
     )
     
     return ChatResponse(
@@ -429,6 +433,7 @@ async def _stream_chat_completion(request: ChatRequest, model_name: str) -> Asyn
     prompt = _messages_to_prompt(request.messages)
     
     chunk_id = generate_uuid()
+    sent_text = ""
     
     try:
         async for chunk_data in engine_manager.generate_stream(
@@ -439,13 +444,30 @@ async def _stream_chat_completion(request: ChatRequest, model_name: str) -> Asyn
             top_p=request.top_p,
             stop=request.stop,
         ):
+            # Engines report the cumulative text so far; send only what's new
+            text = chunk_data.get("text", "")
+            if text.startswith(sent_text):
+                delta = text[len(sent_text):]
+            else:
+                # The engine revised text already streamed; clients can't take
+                # it back, so send only what follows the part both agree on
+                common = len(os.path.commonprefix([sent_text, text]))
+                delta = text[common:]
+                logger.warning(
+                    "Streamed text diverged from engine output",
+                    chunk_id=chunk_id,
+                    sent_length=len(sent_text),
+                    common_prefix_length=common,
+                )
+            sent_text = text
+            
             chunk = StreamChatChunk(
                 id=chunk_id,
                 model=model_name,
                 choices=[{
                     "index": 0,
                     "delta": {
-                        "content": chunk_data.get("text", ""),
+                        "content": delta,
                     },
                     "finish_reason": chunk_data.get("finish_reason"),
                 }],
@@ -478,19 +500,12 @@ async def _stream_chat_completion(request: ChatRequest, model_name: str) -> Asyn
 
 
 def _messages_to_prompt(messages: List[ChatMessage]) -> str:
-    """Convert OpenAI messages format to prompt string."""
-    prompt_parts = []
-    
-    for message in messages:
-        if message.role == MessageRole.SYSTEM:
-            prompt_parts.append(f"System: {message.content}")
-        elif message.role == MessageRole.USER:
-            prompt_parts.append(f"User: {message.content}")
-        elif message.role == MessageRole.ASSISTANT:
-            prompt_parts.append(f"Assistant: {message.content}")
-    
-    prompt_parts.append("Assistant:")
-    return "\n\n".join(prompt_parts)
+    """Convert OpenAI messages format to prompt string.
+    
+    The leading system messages are rendered as a canonical prefix so that
+    vLLM prefix caching can reuse them across turns and requests.
+    """
+    return build_chat_prompt(messages).prompt
 
 
 @app.post("/v1/completions")
@@ -0,0 +1,110 @@
+"""
+Prefix-cache friendly prompt assembly.
+
+vLLM's automatic prefix caching reuses KV-cache blocks for any prompt that
+starts with token-identical text, so every prompt is laid out as
+
+    <stable prefix: leading system messages + tool schema> <conversation turns>
+
+and the prefix is rendered canonically (normalized whitespace, tools sorted
+by name, JSON with sorted keys). Requests that share a system prompt and tool
+set therefore share the same prefix bytes and skip recomputing it.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Sequence
+
+from shared.models import ChatMessage, MessageRole
+
+
+ROLE_PREFIXES = {
+    MessageRole.SYSTEM: "System",
+    MessageRole.USER: "User",
+    MessageRole.ASSISTANT: "Assistant",
+    MessageRole.FUNCTION: "Function Result",
+}
+
+FUNCTION_CALLING_INSTRUCTIONS = """You are an AI assistant that can call functions to help answer questions.
+
+Available functions:"""
+
+FUNCTION_CALL_FORMAT = """To call a function, use this format:
+<function_call>
+{"name": "function_name", "arguments": {"param1": "value1", "param2": "value2"}}
+</function_call>
+
+You can call multiple functions if needed. Always provide the function results in your response."""
+
+
+@dataclass
+class AssembledPrompt:
+    """Prompt text plus the stable prefix it starts with."""
+
+    prompt: str
+    prefix: str
+
+    @property
+    def prefix_hash(self) -> str:
+        return hashlib.sha256(self.prefix.encode("utf-8")).hexdigest()[:16]
+
+
+def canonical_text(text: Optional[str]) -> str:
+    """Normalize line endings and trailing whitespace so equal content renders equally."""
+    if not text:
+        return ""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def render_tool_schema(functions: Iterable[Any]) -> str:
+    """Render function definitions in a canonical order and JSON layout."""
+    entries = []
+    for func in sorted(functions, key=lambda item: item.name):
+        entries.append(
+            f"{func.name}: {canonical_text(func.description)}\n"
+            f"Parameters: {json.dumps(func.parameters, indent=2, sort_keys=True)}"
+        )
+    return "\n\n".join([FUNCTION_CALLING_INSTRUCTIONS, *entries, FUNCTION_CALL_FORMAT])
+
+
+def format_turn(message: ChatMessage, include_function_results: bool = False) -> Optional[str]:
+    """Render one conversation message, or None for roles the prompt skips."""
+    role = ROLE_PREFIXES.get(message.role)
+    if role is None or (message.role == MessageRole.FUNCTION and not include_function_results):
+        return None
+    return f"{role}: {message.content or ''}"
+
+
+def build_chat_prompt(
+    messages: Sequence[ChatMessage],
+    functions: Optional[Sequence[Any]] = None,
+    extra_turns: Optional[List[str]] = None,
+    reply_prefix: str = "Assistant:",
+    include_function_results: bool = False,
+) -> AssembledPrompt:
+    """Assemble a prompt whose stable prefix is reusable across requests.
+
+    Leading system messages and the tool schema form the prefix; system
+    messages that appear later stay in place as turns, since moving them
+    would change the conversation. Function-role messages are rendered only
+    for function-calling prompts, as before.
+    """
+    index = 0
+    prefix_parts: List[str] = []
+    while index < len(messages) and messages[index].role == MessageRole.SYSTEM:
+        prefix_parts.append(f"System: {canonical_text(messages[index].content)}")
+        index += 1
+
+    if functions:
+        prefix_parts.append(render_tool_schema(functions))
+
+    turns = (format_turn(message, include_function_results) for message in messages[index:])
+    turn_parts = [turn for turn in turns if turn is not None]
+    turn_parts.extend(extra_turns or [])
+    turn_parts.append(reply_prefix)
+
+    prefix = "\n\n".join(prefix_parts)
+    prompt = "\n\n".join(prefix_parts + turn_parts)
+    return AssembledPrompt(prompt=prompt, prefix=prefix)
@@ -0,0 +1,146 @@
+"""
+Remote model replica served over HTTP.
+
+Wraps an OpenAI-compatible completions server (e.g. ``vllm serve``) behind
+the same interface as ModelInstance so the load balancer can route to
+replicas on other hosts alongside local ones.
+"""
+
+import json
+import time
+from typing import Any, AsyncGenerator, Dict, Optional
+
+import httpx
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_SAMPLING_FIELDS = ("temperature", "top_p", "max_tokens", "frequency_penalty", "presence_penalty", "stop")
+
+
+class RemoteModelInstance:
+    """Model replica reached through an OpenAI-compatible HTTP endpoint."""
+
+    def __init__(self, model_name: str, base_url: str, timeout: float = 120.0):
+        self.model_name = model_name
+        self.model_path = base_url
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.client: Optional[httpx.AsyncClient] = None
+        self.is_loaded = False
+        self.load_time: Optional[float] = None
+        self.request_count = 0
+        self.error_count = 0
+
+    async def load(self) -> None:
+        """Open the HTTP client; the remote server owns the weights."""
+        if self.client is None:
+            self.client = httpx.AsyncClient(base_url=self.base_url, timeout=httpx.Timeout(self.timeout))
+        self.is_loaded = True
+        self.load_time = 0.0
+
+    async def unload(self) -> None:
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+        self.is_loaded = False
+
+    async def health_check(self) -> bool:
+        if self.client is None:
+            await self.load()
+        try:
+            response = await self.client.get("/health", timeout=5.0)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def generate(self, prompt: str, sampling_params: Any) -> Dict[str, Any]:
+        """Generate a completion on the remote replica."""
+        if self.client is None:
+            await self.load()
+
+        start_time = time.time()
+        self.request_count += 1
+
+        try:
+            response = await self.client.post("/v1/completions", json=self._payload(prompt, sampling_params))
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            self.error_count += 1
+            logger.error(f"Remote generation failed for {self.model_name}", url=self.base_url, error=str(e))
+            raise
+
+        choice = data["choices"][0]
+        usage = data.get("usage") or {}
+        return {
+            "text": choice.get("text", ""),
+            "finish_reason": choice.get("finish_reason") or "stop",
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+            "generation_time": time.time() - start_time,
+        }
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        sampling_params: Any,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream a completion, yielding cumulative text like a local vLLM engine."""
+        if self.client is None:
+            await self.load()
+
+        self.request_count += 1
+        payload = self._payload(prompt, sampling_params)
+        payload["stream"] = True
+        text = ""
+        completion_tokens = 0
+
+        try:
+            async with self.client.stream("POST", "/v1/completions", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    event = json.loads(data)
+                    usage = event.get("usage") or {}
+                    if not event.get("choices"):
+                        continue
+                    choice = event["choices"][0]
+                    text += choice.get("text", "")
+                    completion_tokens = usage.get("completion_tokens", completion_tokens + 1)
+                    yield {
+                        "text": text,
+                        "finish_reason": choice.get("finish_reason"),
+                        "prompt_tokens": usage.get("prompt_tokens", 0),
+                        "completion_tokens": completion_tokens,
+                        "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+                    }
+        except Exception as e:
+            self.error_count += 1
+            logger.error(f"Remote streaming failed for {self.model_name}", url=self.base_url, error=str(e))
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "backend": "remote",
+            "url": self.base_url,
+            "is_loaded": self.is_loaded,
+            "load_time": self.load_time,
+            "request_count": self.request_count,
+            "error_count": self.error_count,
+            "error_rate": self.error_count / max(self.request_count, 1),
+        }
+
+    def _payload(self, prompt: str, sampling_params: Any) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"model": self.model_name, "prompt": prompt}
+        for field in _SAMPLING_FIELDS:
+            value = getattr(sampling_params, field, None)
+            if value is not None:
+                payload[field] = value
+        return payload
@@ -181,12 +181,7 @@ class ConversationManager:
             context = self.conversation_contexts[conversation_id]
             
             # Enhance message with metadata
-            enhanced_message = {
-                **message,
-                'timestamp': message.get('timestamp', time.time()),
-                'message_id': f"{conversation_id}_{context.message_count}",
-                'sequence_number': context.message_count,
-            }
+            enhanced_message = self._enhance_message(context, message)
             
             # Add intent and confidence if provided
             if intent and confidence:
@@ -223,6 +218,38 @@ class ConversationManager:
                         conversation_id=conversation_id, error=str(e))
             raise
     
+    async def add_messages(self, conversation_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Add several messages (e.g. a user turn and its reply) in one store round-trip."""
+        try:
+            if conversation_id not in self.conversation_contexts:
+                await self._create_conversation_context(conversation_id)
+            
+            context = self.conversation_contexts[conversation_id]
+            
+            enhanced_messages = [
+                self._enhance_message(context, message, offset)
+                for offset, message in enumerate(messages)
+            ]
+            await self.conversation_store.add_messages(conversation_id, enhanced_messages)
+            
+            context.message_count += len(messages)
+            context.update_activity()
+            self.total_messages += len(messages)
+            
+            metrics = get_metrics()
+            if metrics:
+                for _ in messages:
+                    metrics.record_counter("conversation_messages_added", "nlu_service")
+            
+            logger.debug("Messages added to conversation",
+                        conversation_id=conversation_id,
+                        message_count=context.message_count)
+            
+        except Exception as e:
+            logger.error("Failed to add messages to conversation",
+                        conversation_id=conversation_id, error=str(e))
+            raise
+    
     async def create_conversation(
         self, 
         conversation_id: str, 
@@ -351,6 +378,21 @@ class ConversationManager:
         }
     
     # Private methods
+    def _enhance_message(
+        self,
+        context: ConversationContext,
+        message: Dict[str, Any],
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """Stamp a message with its timestamp, ID and sequence number."""
+        sequence_number = context.message_count + offset
+        return {
+            **message,
+            'timestamp': message.get('timestamp', time.time()),
+            'message_id': f"{context.conversation_id}_{sequence_number}",
+            'sequence_number': sequence_number,
+        }
+    
     async def _create_conversation_context(self, conversation_id: str) -> ConversationContext:
         """Create new conversation context."""
         context = ConversationContext(conversation_id)
@@ -32,6 +32,7 @@ except ImportError:
 from shared.models import Entity, Language
 from shared.monitoring import get_metrics
 from shared.exceptions import ValidationError, ServiceUnavailableError
+from shared.utils import run_in_executor
 
 logger = structlog.get_logger(__name__)
 
@@ -420,40 +421,45 @@ class EntityExtractor:
     
     async def _extract_with_spacy(self, text: str) -> List[Entity]:
         """Extract entities using spaCy NER."""
+        try:
+            # The pipeline is CPU-bound; run it on a worker thread so the
+            # event loop keeps serving other turns and speculative stages
+            return await run_in_executor(self._run_spacy, text)
+        except Exception as e:
+            logger.warning("spaCy entity extraction failed", error=str(e))
+            return []
+    
+    def _run_spacy(self, text: str) -> List[Entity]:
+        """Run the spaCy pipeline and matcher over text (blocking)."""
         entities = []
+        doc = self.nlp(text)
         
-        try:
-            doc = self.nlp(text)
-            
-            # Named entity recognition
-            for ent in doc.ents:
-                confidence = self._calculate_spacy_confidence(ent)
-                if confidence >= self.confidence_threshold:
-                    entities.append(Entity(
-                        text=ent.text,
-                        label=ent.label_,
-                        start=ent.start_char,
-                        end=ent.end_char,
-                        confidence=confidence
-                    ))
-            
-            # Custom matcher results
-            matches = self.matcher(doc)
-            for match_id, start, end in matches:
-                span = doc[start:end]
-                label = self.nlp.vocab.strings[match_id]
-                confidence = 0.8  # Default confidence for pattern matches
-                
+        # Named entity recognition
+        for ent in doc.ents:
+            confidence = self._calculate_spacy_confidence(ent)
+            if confidence >= self.confidence_threshold:
                 entities.append(Entity(
-                    text=span.text,
-                    label=label,
-                    start=span.start_char,
-                    end=span.end_char,
+                    text=ent.text,
+                    label=ent.label_,
+                    start=ent.start_char,
+                    end=ent.end_char,
                     confidence=confidence
                 ))
-            
-        except Exception as e:
-            logger.warning("spaCy entity extraction failed", error=str(e))
+        
+        # Custom matcher results
+        matches = self.matcher(doc)
+        for match_id, start, end in matches:
+            span = doc[start:end]
+            label = self.nlp.vocab.strings[match_id]
+            confidence = 0.8  # Default confidence for pattern matches
+            
+            entities.append(Entity(
+                text=span.text,
+                label=label,
+                start=span.start_char,
+                end=span.end_char,
+                confidence=confidence
+            ))
         
         return entities
     
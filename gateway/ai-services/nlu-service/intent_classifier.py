@@ -23,6 +23,7 @@ import torch.nn.functional as F
 
 from shared.models import Intent, Language
 from shared.monitoring import get_metrics
+from shared.utils import run_in_executor
 
 logger = structlog.get_logger(__name__)
 
@@ -150,11 +151,17 @@ class IntentClassifier:
     
     async def _classify_with_rules(self, text: str) -> Optional[Intent]:
         """Classify intent using rule-based approach."""
+        # Scoring every intent's patterns is CPU-bound; run it on a worker
+        # thread over a snapshot, so intents registered meanwhile are safe
+        return await run_in_executor(self._match_rules, text, list(self.intent_definitions.items()))
+    
+    def _match_rules(self, text: str, intent_definitions: List[Tuple[str, IntentDefinition]]) -> Optional[Intent]:
+        """Return the best-scoring intent above its threshold (blocking)."""
         text_lower = text.lower()
         best_match = None
         best_score = 0.0
         
-        for intent_name, intent_def in self.intent_definitions.items():
+        for intent_name, intent_def in intent_definitions:
             score = self._calculate_rule_score(text_lower, intent_def)
             
             if score > best_score and score >= intent_def.confidence_threshold:
@@ -7,14 +7,17 @@ Features:
 - Tool execution and reasoning
 - Conditional workflow routing
 - Memory and context management
+- Speculative stage execution with per-stage timelines
+- Token streaming of responses interleaved with progress events
 """
 
 import asyncio
 import json
+import re
 import time
 import httpx
-from typing import Any, AsyncGenerator, Dict, List, Optional, TypedDict
-from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple, TypedDict
+from dataclasses import dataclass, field
 from enum import Enum
 
 import structlog
@@ -22,12 +25,17 @@ from langgraph import StateGraph, END
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.runnables import RunnableLambda
 
+from shared.chunking import TokenChunker, estimate_token_count
 from shared.models import AgentAction, MessageRole, Language, ChatRequest, ChatMessage
 from shared.monitoring import get_metrics
 from shared.exceptions import ServiceUnavailableError, ValidationError
+from shared.utils import generate_id
 
 logger = structlog.get_logger(__name__)
 
+# Don't start a truncated passage with less budget than this left
+MIN_PASSAGE_TOKENS = 32
+
 
 class ConversationState(TypedDict):
     """State for LangGraph conversation workflow."""
@@ -47,6 +55,7 @@ class ConversationState(TypedDict):
     rag_context: List[Dict[str, Any]]
     error_count: int
     processing_stage: str
+    turn_id: str
 
 
 class WorkflowNode(str, Enum):
@@ -83,6 +92,71 @@ class WorkflowResult:
     execution_time: float
 
 
+@dataclass
+class TurnTrace:
+    """Speculative tasks and stage timeline of one in-flight turn."""
+    started: float = field(default_factory=time.perf_counter)
+    speculative: Dict[str, asyncio.Task] = field(default_factory=dict)
+    timeline: List[Dict[str, Any]] = field(default_factory=list)
+    events: Optional[asyncio.Queue] = None  # set while the turn is being streamed
+    
+    def emit(self, event_type: str, **data: Any) -> None:
+        """Queue an event for the stream consumer; a no-op for non-streaming turns."""
+        if self.events is not None:
+            self.events.put_nowait({"type": event_type, **data, "timestamp": time.time()})
+    
+    def record(self, stage: str, started: float, ended: float, **details: Any) -> None:
+        """Record a stage as start/end offsets from the start of the turn."""
+        self.timeline.append({
+            "stage": stage,
+            "start_ms": round((started - self.started) * 1000, 2),
+            "end_ms": round((ended - self.started) * 1000, 2),
+            "duration_ms": round((ended - started) * 1000, 2),
+            **details,
+        })
+
+
+class SentenceBuffer:
+    """Collects streamed text and releases it a complete sentence at a time."""
+    
+    # Sentence punctuation followed by whitespace, so "3.5" or "e.g.," don't split
+    BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+    # Words whose period doesn't end the sentence ("Dr. Lee", "e.g. refunds")
+    ABBREVIATIONS = frozenset({
+        "mr.", "mrs.", "ms.", "dr.", "prof.", "sr.", "jr.", "st.", "vs.",
+        "e.g.", "i.e.", "cf.", "approx.", "dept.", "inc.", "ltd.", "co.",
+    })
+    INITIAL = re.compile(r"[A-Z]\.")
+    
+    def __init__(self):
+        self.pending = ""
+    
+    def feed(self, delta: str) -> List[str]:
+        """Add a delta; return the sentences it completed."""
+        self.pending += delta
+        complete = []
+        start = 0
+        for match in self.BOUNDARY.finditer(self.pending):
+            if self._ends_with_abbreviation(self.pending[start:match.start()]):
+                continue
+            complete.append(self.pending[start:match.start()])
+            start = match.end()
+        self.pending = self.pending[start:]
+        return [sentence.strip() for sentence in complete if sentence.strip()]
+    
+    def _ends_with_abbreviation(self, text: str) -> bool:
+        words = text.split()
+        if not words:
+            return False
+        word = words[-1].lstrip("([\"'")
+        return word.lower() in self.ABBREVIATIONS or bool(self.INITIAL.fullmatch(word))
+    
+    def flush(self) -> List[str]:
+        """Return whatever is left once the stream ends."""
+        rest, self.pending = self.pending.strip(), ""
+        return [rest] if rest else []
+
+
 class LangGraphOrchestrator:
     """LangGraph-based orchestrator for multi-agent conversations."""
     
@@ -95,6 +169,9 @@ class LangGraphOrchestrator:
         llm_service_url: str = "http://localhost:8004",
         rag_service_url: str = "http://localhost:8005",
         max_retries: int = 3,
+        tool_turn_deadline: float = 20.0,
+        speculative_execution: bool = False,
+        rag_context_token_budget: int = 1500,
     ):
         self.intent_classifier = intent_classifier
         self.entity_extractor = entity_extractor
@@ -103,6 +180,9 @@ class LangGraphOrchestrator:
         self.llm_service_url = llm_service_url
         self.rag_service_url = rag_service_url
         self.max_retries = max_retries
+        self.tool_turn_deadline = tool_turn_deadline  # seconds for all tools in a turn, 0 = none
+        self.speculative_execution = speculative_execution
+        self.rag_context_token_budget = rag_context_token_budget
         
         # HTTP client for service communication
         self.http_client = None
@@ -111,6 +191,10 @@ class LangGraphOrchestrator:
         self.workflow: Optional[StateGraph] = None
         self.compiled_workflow = None
         
+        # In-flight turns by turn_id; kept outside the graph state so tasks
+        # never get serialized into workflow updates
+        self.turns: Dict[str, TurnTrace] = {}
+        
         # Agent specializations
         self.agents = {
             AgentType.CRM_AGENT: self._create_crm_agent(),
@@ -123,6 +207,8 @@ class LangGraphOrchestrator:
         self.request_count = 0
         self.error_count = 0
         self.avg_processing_time = 0.0
+        self.speculations_used = 0
+        self.speculations_discarded = 0
     
     async def initialize(self) -> None:
         """Initialize the LangGraph orchestrator."""
@@ -138,16 +224,20 @@ class LangGraphOrchestrator:
             # Create workflow graph
             self.workflow = StateGraph(ConversationState)
             
-            # Add nodes
-            self.workflow.add_node(WorkflowNode.INTENT_CLASSIFICATION, self._classify_intent)
-            self.workflow.add_node(WorkflowNode.ENTITY_EXTRACTION, self._extract_entities)
-            self.workflow.add_node(WorkflowNode.CONTEXT_ANALYSIS, self._analyze_context)
-            self.workflow.add_node(WorkflowNode.TOOL_SELECTION, self._select_tools)
-            self.workflow.add_node(WorkflowNode.TOOL_EXECUTION, self._execute_tools)
-            self.workflow.add_node(WorkflowNode.RAG_RETRIEVAL, self._rag_retrieval)
-            self.workflow.add_node(WorkflowNode.RESPONSE_GENERATION, self._generate_response)
-            self.workflow.add_node(WorkflowNode.CONVERSATION_UPDATE, self._update_conversation)
-            self.workflow.add_node(WorkflowNode.ERROR_HANDLING, self._handle_error)
+            # Add nodes, each timed into the turn's stage timeline
+            nodes = {
+                WorkflowNode.INTENT_CLASSIFICATION: self._classify_intent,
+                WorkflowNode.ENTITY_EXTRACTION: self._extract_entities,
+                WorkflowNode.CONTEXT_ANALYSIS: self._analyze_context,
+                WorkflowNode.TOOL_SELECTION: self._select_tools,
+                WorkflowNode.TOOL_EXECUTION: self._execute_tools,
+                WorkflowNode.RAG_RETRIEVAL: self._rag_retrieval,
+                WorkflowNode.RESPONSE_GENERATION: self._generate_response,
+                WorkflowNode.CONVERSATION_UPDATE: self._update_conversation,
+                WorkflowNode.ERROR_HANDLING: self._handle_error,
+            }
+            for node, handler in nodes.items():
+                self.workflow.add_node(node, self._timed(node, handler))
             
             # Add edges with conditions
             self.workflow.set_entry_point(WorkflowNode.INTENT_CLASSIFICATION)
@@ -158,7 +248,7 @@ class LangGraphOrchestrator:
             # Enhanced conditional routing
             self.workflow.add_conditional_edges(
                 WorkflowNode.CONTEXT_ANALYSIS,
-                self._route_request,
+                self._route_with_speculation,
                 {
                     "use_tools": WorkflowNode.TOOL_SELECTION,
                     "use_rag": WorkflowNode.RAG_RETRIEVAL,
@@ -197,7 +287,7 @@ class LangGraphOrchestrator:
         try:
             # Get conversation history
             history = await self.conversation_manager.get_conversation_history(
-                conversation_id, limit=10
+                conversation_id, limit=10, include_metadata=False
             )
             
             # Create initial state
@@ -224,6 +314,7 @@ class LangGraphOrchestrator:
                 rag_context=[],
                 error_count=0,
                 processing_stage="initializing",
+                turn_id=generate_id(),
             )
             
             # Add conversation history to state
@@ -235,7 +326,11 @@ class LangGraphOrchestrator:
                 })
             
             # Execute workflow
-            result_state = await self._execute_workflow(initial_state)
+            self.turns[initial_state["turn_id"]] = TurnTrace()
+            try:
+                result_state = await self._execute_workflow(initial_state)
+            finally:
+                stage_timeline = self._finish_turn(initial_state["turn_id"])
             
             # Calculate processing time
             processing_time = time.time() - start_time
@@ -250,6 +345,7 @@ class LangGraphOrchestrator:
                 "reasoning": " -> ".join(result_state["reasoning"]) if result_state["reasoning"] else None,
                 "confidence": result_state["confidence_score"],
                 "state": result_state,
+                "stage_timeline": stage_timeline,
             }
             
         except Exception as e:
@@ -268,7 +364,7 @@ class LangGraphOrchestrator:
         try:
             # Create initial state (similar to process_request)
             history = await self.conversation_manager.get_conversation_history(
-                conversation_id, limit=10
+                conversation_id, limit=10, include_metadata=False
             )
             
             initial_state = ConversationState(
@@ -284,11 +380,35 @@ class LangGraphOrchestrator:
                 confidence_score=0.0,
                 next_action=None,
                 completion_status="pending",
+                routing_decision=None,
+                rag_context=[],
+                error_count=0,
+                processing_stage="initializing",
+                turn_id=generate_id(),
             )
             
-            # Stream workflow execution
-            async for update in self._execute_workflow_stream(initial_state):
-                yield json.dumps(update)
+            # Run the workflow in the background and forward its events as they
+            # arrive: node updates, tool/RAG progress and response tokens
+            trace = TurnTrace(events=asyncio.Queue())
+            self.turns[initial_state["turn_id"]] = trace
+            workflow = asyncio.create_task(self._pump_workflow_stream(initial_state, trace))
+            try:
+                while True:
+                    event = await trace.events.get()
+                    if event is None:
+                        break
+                    yield json.dumps(event)
+                await workflow
+            finally:
+                # Also reached when the client disconnects mid-stream
+                workflow.cancel()
+                stage_timeline = self._finish_turn(initial_state["turn_id"])
+            
+            yield json.dumps({
+                "type": "stage_timeline",
+                "data": stage_timeline,
+                "timestamp": time.time(),
+            })
             
         except Exception as e:
             logger.error("Streaming workflow execution failed", error=str(e))
@@ -317,6 +437,9 @@ class LangGraphOrchestrator:
             "error_count": self.error_count,
             "error_rate": self.error_count / max(self.request_count, 1),
             "avg_processing_time": self.avg_processing_time,
+            "speculative_execution": self.speculative_execution,
+            "speculations_used": self.speculations_used,
+            "speculations_discarded": self.speculations_discarded,
             "workflow_nodes": len(self.workflow.nodes) if self.workflow else 0,
             "available_agents": list(self.agents.keys()),
         }
@@ -334,6 +457,11 @@ class LangGraphOrchestrator:
             latest_message = state["messages"][-1]
             text = latest_message["content"]
             
+            if self.speculative_execution:
+                # Extraction and retrieval only need the raw message, so run
+                # them while the intent is being classified
+                self._start_speculation(state, text)
+            
             intent = await self.intent_classifier.classify(text, Language.ENGLISH)
             state["current_intent"] = intent.name if intent else None
             state["reasoning"].append(f"Classified intent: {state['current_intent']}")
@@ -354,7 +482,9 @@ class LangGraphOrchestrator:
             latest_message = state["messages"][-1]
             text = latest_message["content"]
             
-            entities = await self.entity_extractor.extract(text, Language.ENGLISH)
+            speculated, entities = await self._claim_speculation(state, WorkflowNode.ENTITY_EXTRACTION)
+            if not speculated:
+                entities = await self.entity_extractor.extract(text, Language.ENGLISH)
             state["entities"] = [
                 {
                     "text": entity.text,
@@ -480,39 +610,49 @@ class LangGraphOrchestrator:
             return state
     
     async def _execute_tools(self, state: ConversationState) -> ConversationState:
-        """Execute selected tools."""
+        """Execute selected tools, independent ones concurrently."""
         try:
             selected_tools = state["context"].get("selected_tools", [])
-            tool_results = []
+            state["tool_results"] = []
+            deadline = time.monotonic() + self.tool_turn_deadline if self.tool_turn_deadline > 0 else None
             
-            for tool_config in selected_tools:
-                tool_name = tool_config["name"]
-                parameters = tool_config.get("parameters", {})
-                
-                # Execute tool
-                result = await self.tool_dispatcher.execute_tool(tool_name, parameters)
-                
+            # Outcomes arrive in completion order, not selection order
+            async for outcome in self.tool_dispatcher.execute_tools(selected_tools, deadline=deadline):
+                tool_name = outcome["tool_name"]
                 tool_result = {
                     "tool_name": tool_name,
-                    "parameters": parameters,
-                    "result": result,
-                    "success": True,
+                    "parameters": outcome["parameters"],
+                    "result": outcome["result"],
+                    "success": outcome["success"],
+                    "status": outcome["status"],
+                    "execution_time": outcome["execution_time"],
                     "timestamp": time.time(),
                 }
+                if not outcome["success"]:
+                    tool_result["error"] = outcome.get("error")
+                    state["reasoning"].append(f"Tool {tool_name} {outcome['status']}: {outcome.get('error')}")
                 
-                tool_results.append(tool_result)
-                
-                # Record action
-                action = {
-                    "action": f"execute_{tool_name}",
-                    "parameters": parameters,
+                state["tool_results"].append(tool_result)
+                self._emit(state, "tool_result", data={
                     "tool_name": tool_name,
-                    "reasoning": f"Executed {tool_name} to fulfill user request",
-                }
-                state["actions_taken"].append(action)
+                    "status": outcome["status"],
+                    "success": outcome["success"],
+                    "execution_time": outcome["execution_time"],
+                })
+                
+                if outcome["success"]:
+                    # Record action
+                    action = {
+                        "action": f"execute_{tool_name}",
+                        "parameters": outcome["parameters"],
+                        "tool_name": tool_name,
+                        "reasoning": f"Executed {tool_name} to fulfill user request",
+                    }
+                    state["actions_taken"].append(action)
             
-            state["tool_results"] = tool_results
-            state["reasoning"].append(f"Executed {len(tool_results)} tools")
+            completed = sum(1 for result in state["tool_results"] if result["success"])
+            state["context"]["tool_results_partial"] = completed < len(state["tool_results"])
+            state["reasoning"].append(f"Executed {completed}/{len(selected_tools)} tools")
             
             return state
             
@@ -526,29 +666,17 @@ class LangGraphOrchestrator:
         try:
             user_message = state["messages"][-1]["content"]
             
-            # Call RAG service
-            rag_request = {
-                "question": user_message,
-                "top_k": 5,
-                "similarity_threshold": 0.7,
-                "include_sources": True
-            }
+            speculated, sources = await self._claim_speculation(state, WorkflowNode.RAG_RETRIEVAL)
+            if not speculated:
+                sources = await self._fetch_rag_context(user_message)
             
-            if self.http_client:
-                response = await self.http_client.post(
-                    f"{self.rag_service_url}/rag",
-                    json=rag_request,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                rag_result = response.json()
-                
-                # Store RAG context
-                state["rag_context"] = rag_result.get("sources", [])
-                state["reasoning"].append(f"Retrieved {len(state['rag_context'])} relevant documents")
-            else:
-                logger.warning("HTTP client not available for RAG retrieval")
-                state["rag_context"] = []
+            # Store RAG context
+            state["rag_context"] = sources
+            state["reasoning"].append(f"Retrieved {len(state['rag_context'])} relevant documents")
+            self._emit(state, "rag_context", data={
+                "passages": len(sources),
+                "citations": [source.get("citation") for source in sources if source.get("citation")],
+            })
             
             return state
             
@@ -559,6 +687,32 @@ class LangGraphOrchestrator:
             state["rag_context"] = []
             return state
     
+    async def _fetch_rag_context(self, user_message: str) -> List[Dict[str, Any]]:
+        """Retrieve cited passages for a message from the RAG service.
+        
+        Uses the retrieval-only endpoint: the answer is generated once, by
+        _generate_response, rather than also inside the RAG service.
+        """
+        if not self.http_client:
+            logger.warning("HTTP client not available for RAG retrieval")
+            return []
+        
+        # Call RAG service
+        rag_request = {
+            "question": user_message,
+            "top_k": 5,
+            "similarity_threshold": 0.7,
+        }
+        
+        response = await self.http_client.post(
+            f"{self.rag_service_url}/rag/context",
+            json=rag_request,
+            timeout=30.0
+        )
+        response.raise_for_status()
+        rag_result = response.json()
+        return rag_result.get("passages", [])
+    
     async def _generate_response(self, state: ConversationState) -> ConversationState:
         """Generate response using LLM with enhanced context."""
         try:
@@ -579,8 +733,12 @@ class LangGraphOrchestrator:
             # Select agent for response generation
             agent_type = state["context"].get("agent_type", AgentType.GENERAL_ASSISTANT)
             
-            # Generate response using LLM service
-            response = await self._call_llm_service(context_data, agent_type)
+            # Generate response using LLM service, token by token for streamed turns
+            trace = self.turns.get(state.get("turn_id"))
+            if trace and trace.events is not None:
+                response = await self._stream_llm_service(context_data, agent_type, trace)
+            else:
+                response = await self._call_llm_service(context_data, agent_type)
             
             # Add response to messages
             response_message = {
@@ -641,35 +799,7 @@ class LangGraphOrchestrator:
     ) -> str:
         """Call LLM service for response generation."""
         try:
-            # Create system prompt based on agent type
-            system_prompt = self._create_system_prompt(agent_type, context_data)
-            
-            # Prepare messages for LLM
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ]
-            
-            # Add conversation history (last 5 messages to avoid context overflow)
-            history = context_data.get("conversation_history", [])[-5:]
-            for msg in history:
-                messages.append({
-                    "role": msg.get("role", "user"),
-                    "content": msg.get("content", "")
-                })
-            
-            # Add current user message
-            messages.append({
-                "role": "user",
-                "content": context_data["user_message"]
-            })
-            
-            # Create LLM request
-            llm_request = {
-                "model": "gpt-oss-20b",  # or configured model
-                "messages": messages,
-                "temperature": 0.7,
-                "max_tokens": 1024,
-            }
+            llm_request = self._create_llm_request(context_data, agent_type)
             
             if self.http_client:
                 response = await self.http_client.post(
@@ -696,8 +826,105 @@ class LangGraphOrchestrator:
             agent = self.agents[agent_type]
             return await agent.generate_response(context_data)
     
-    def _create_system_prompt(self, agent_type: AgentType, context_data: Dict[str, Any]) -> str:
-        """Create system prompt based on agent type and context."""
+    async def _stream_llm_service(
+        self,
+        context_data: Dict[str, Any],
+        agent_type: AgentType,
+        trace: TurnTrace,
+    ) -> str:
+        """Stream the response from the LLM service, forwarding deltas as they arrive.
+        
+        Emits a ``token`` event per delta and a ``sentence`` event at each
+        sentence boundary, so TTS can start on the first sentence. Returns
+        the full response text.
+        """
+        sentences = SentenceBuffer()
+        parts: List[str] = []
+        
+        def forward(delta: str) -> None:
+            parts.append(delta)
+            trace.emit("token", delta=delta)
+            for sentence in sentences.feed(delta):
+                trace.emit("sentence", text=sentence)
+        
+        try:
+            if not self.http_client:
+                raise ServiceUnavailableError("HTTP client not available for LLM streaming")
+            
+            llm_request = {**self._create_llm_request(context_data, agent_type), "stream": True}
+            async with self.http_client.stream(
+                "POST",
+                f"{self.llm_service_url}/v1/chat/completions",
+                json=llm_request,
+                timeout=60.0
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    chunk = json.loads(data)
+                    if "error" in chunk:
+                        raise ServiceUnavailableError(chunk["error"].get("message", "LLM stream failed"))
+                    for choice in chunk.get("choices", []):
+                        delta = choice.get("delta", {}).get("content")
+                        if delta:
+                            forward(delta)
+            
+        except Exception as e:
+            logger.error("LLM service stream failed", error=str(e))
+            if parts:
+                # Keep what the client has already seen rather than contradicting it
+                trace.emit("error", error="Response stream interrupted")
+        
+        if not parts:
+            # Fallback to simple agent response
+            agent = self.agents[agent_type]
+            forward(await agent.generate_response(context_data))
+        
+        for sentence in sentences.flush():
+            trace.emit("sentence", text=sentence)
+        
+        return "".join(parts)
+    
+    def _create_llm_request(self, context_data: Dict[str, Any], agent_type: AgentType) -> Dict[str, Any]:
+        """Build the chat completion request for a turn."""
+        # Static system prompt first so the LLM service can reuse its KV
+        # cache across turns; per-turn context goes after the history
+        messages = [
+            {"role": "system", "content": self._create_system_prompt(agent_type)}
+        ]
+        
+        # Add conversation history (last 5 messages to avoid context overflow)
+        history = context_data.get("conversation_history", [])[-5:]
+        for msg in history:
+            messages.append({
+                "role": msg.get("role", "user"),
+                "content": msg.get("content", "")
+            })
+        
+        context_prompt = self._create_context_prompt(context_data)
+        if context_prompt:
+            messages.append({"role": "system", "content": context_prompt})
+        
+        # Add current user message
+        messages.append({
+            "role": "user",
+            "content": context_data["user_message"]
+        })
+        
+        return {
+            "model": "gpt-oss-20b",  # or configured model
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 1024,
+        }
+    
+    def _create_system_prompt(self, agent_type: AgentType) -> str:
+        """Create the static system prompt for an agent type (identical every turn)."""
         base_prompt = "You are a helpful AI assistant for WearForce, a business productivity platform."
         
         if agent_type == AgentType.CRM_AGENT:
@@ -707,46 +934,76 @@ class LangGraphOrchestrator:
         elif agent_type == AgentType.TASK_COORDINATOR:
             base_prompt += " You help coordinate and manage tasks across different business systems."
         
+        base_prompt += "\nPlease provide a helpful, accurate, and concise response."
+        
+        return base_prompt
+    
+    def _create_context_prompt(self, context_data: Dict[str, Any]) -> str:
+        """Create the per-turn context (intent, tool and RAG results)."""
+        context_prompt = ""
+        
         # Add context information
         intent = context_data.get("intent")
         if intent:
-            base_prompt += f" The user's intent appears to be: {intent}."
+            context_prompt += f" The user's intent appears to be: {intent}."
         
         # Add tool results context
         tool_results = context_data.get("tool_results", [])
         if tool_results:
-            base_prompt += f" I have executed {len(tool_results)} tool(s) to gather information."
+            context_prompt += f" I have executed {len(tool_results)} tool(s) to gather information."
         
         # Add RAG context
         rag_context = context_data.get("rag_context", [])
         if rag_context:
-            base_prompt += f" I have relevant knowledge from {len(rag_context)} document(s) to help answer."
+            context_prompt += f" I have relevant knowledge from {len(rag_context)} document(s) to help answer."
             
-            # Include actual RAG content in prompt
-            base_prompt += "\n\nRelevant information:\n"
-            for i, doc in enumerate(rag_context[:3]):  # Limit to top 3 documents
-                content = doc.get("content", "")[:500]  # Truncate long content
-                base_prompt += f"\n{i+1}. {content}\n"
+            # Include actual RAG content in prompt, best passages first
+            passages = self._pack_rag_passages(rag_context)
+            if passages:
+                context_prompt += "\n\nRelevant information (cite sources by their [n] label):\n\n" + passages
         
-        base_prompt += "\nPlease provide a helpful, accurate, and concise response."
+        return context_prompt.strip()
+    
+    def _pack_rag_passages(self, passages: List[Dict[str, Any]]) -> str:
+        """Pack cited passages into the prompt's RAG token budget.
         
-        return base_prompt
+        Passages go in whole, in citation order, until one doesn't fit; that
+        one is cut at a sentence boundary if enough budget is left.
+        """
+        packed = []
+        remaining = self.rag_context_token_budget
+        
+        for i, passage in enumerate(passages):
+            label = passage.get("citation") or f"[{i + 1}]"
+            content = (passage.get("content") or "").strip()
+            if not content:
+                continue
+            
+            available = remaining - estimate_token_count(label) - 1
+            if available < MIN_PASSAGE_TOKENS:
+                break
+            
+            tokens = estimate_token_count(content)
+            if tokens > available:
+                first_chunk = next(TokenChunker(max_tokens=available, overlap_tokens=0).iter_chunks(content))
+                packed.append(f"{label}\n{first_chunk.text}")
+                break
+            
+            packed.append(f"{label}\n{content}")
+            remaining = available - tokens
+        
+        return "\n\n".join(packed)
     
     async def _update_conversation(self, state: ConversationState) -> ConversationState:
         """Update conversation history."""
         try:
             conversation_id = state["conversation_id"]
             
-            # Add user message to conversation
+            # Append the user message and the reply in one round-trip
             user_message = state["messages"][-2]  # Second to last (assistant is last)
-            await self.conversation_manager.add_message(
-                conversation_id, user_message
-            )
-            
-            # Add assistant message to conversation
             assistant_message = state["messages"][-1]
-            await self.conversation_manager.add_message(
-                conversation_id, assistant_message
+            await self.conversation_manager.add_messages(
+                conversation_id, [user_message, assistant_message]
             )
             
             state["reasoning"].append("Updated conversation history")
@@ -757,6 +1014,103 @@ class LangGraphOrchestrator:
             state["reasoning"].append(f"Conversation update error: {str(e)}")
             return state
     
+    # Speculative execution and stage timing
+    def _timed(self, stage: WorkflowNode, node):
+        """Wrap a workflow node so its run is recorded in the turn's timeline."""
+        async def run(state: ConversationState) -> ConversationState:
+            started = time.perf_counter()
+            try:
+                return await node(state)
+            finally:
+                trace = self.turns.get(state.get("turn_id"))
+                if trace:
+                    trace.record(stage.value, started, time.perf_counter())
+        
+        return run
+    
+    def _emit(self, state: ConversationState, event_type: str, **data: Any) -> None:
+        """Send a progress event to the client if the turn is being streamed."""
+        trace = self.turns.get(state.get("turn_id"))
+        if trace:
+            trace.emit(event_type, **data)
+    
+    def _start_speculation(self, state: ConversationState, text: str) -> None:
+        """Launch the stages that only need the raw user message."""
+        trace = self.turns.get(state.get("turn_id"))
+        if trace is None:
+            return
+        
+        trace.speculative[WorkflowNode.ENTITY_EXTRACTION] = asyncio.create_task(
+            self._timed_call(self.entity_extractor.extract(text, Language.ENGLISH))
+        )
+        trace.speculative[WorkflowNode.RAG_RETRIEVAL] = asyncio.create_task(
+            self._timed_call(self._fetch_rag_context(text))
+        )
+    
+    @staticmethod
+    async def _timed_call(awaitable) -> Tuple[float, float, Any, Optional[Exception]]:
+        """Await and return (started, ended, result, error); errors surface when claimed."""
+        started = time.perf_counter()
+        try:
+            result = await awaitable
+        except Exception as e:
+            return started, time.perf_counter(), None, e
+        return started, time.perf_counter(), result, None
+    
+    async def _claim_speculation(self, state: ConversationState, stage: WorkflowNode) -> Tuple[bool, Any]:
+        """Return (True, result) of a speculative run of ``stage``, or (False, None) if there is none."""
+        trace = self.turns.get(state.get("turn_id"))
+        task = trace.speculative.pop(stage, None) if trace else None
+        if task is None:
+            return False, None
+        
+        started, ended, result, error = await task
+        trace.record(f"speculative_{stage.value}", started, ended, outcome="failed" if error else "used")
+        self.speculations_used += 1
+        if error:
+            raise error
+        return True, result
+    
+    def _route_with_speculation(self, state: ConversationState) -> str:
+        """Route the request and drop speculative work the route doesn't need."""
+        route = self._route_request(state)
+        trace = self.turns.get(state.get("turn_id"))
+        if trace and route != "use_rag":
+            self._discard_speculation(trace, [WorkflowNode.RAG_RETRIEVAL])
+        return route
+    
+    def _discard_speculation(self, trace: TurnTrace, stages: List[WorkflowNode]) -> None:
+        """Cancel (or, if already finished, throw away) speculative stages."""
+        now = time.perf_counter()
+        for stage in stages:
+            task = trace.speculative.pop(stage, None)
+            if task is None:
+                continue
+            
+            self.speculations_discarded += 1
+            if task.done():
+                started, ended, _, _ = task.result()
+                trace.record(f"speculative_{stage.value}", started, ended, outcome="discarded")
+            else:
+                task.cancel()
+                trace.record(f"speculative_{stage.value}", now, now, outcome="cancelled")
+    
+    def _finish_turn(self, turn_id: str) -> List[Dict[str, Any]]:
+        """Drop the turn's trace, cancel leftover speculation and report stage latencies."""
+        trace = self.turns.pop(turn_id, None)
+        if trace is None:
+            return []
+        
+        self._discard_speculation(trace, list(trace.speculative))
+        
+        metrics = get_metrics()
+        if metrics:
+            for entry in trace.timeline:
+                if entry.get("outcome") in (None, "used"):
+                    metrics.record_inference(f"nlu_stage_{entry['stage']}", entry["duration_ms"] / 1000)
+        
+        return trace.timeline
+    
     # Helper methods
     async def _execute_workflow(self, initial_state: ConversationState) -> ConversationState:
         """Execute the workflow graph."""
@@ -767,6 +1121,14 @@ class LangGraphOrchestrator:
             logger.error("Workflow execution failed", error=str(e))
             raise
     
+    async def _pump_workflow_stream(self, initial_state: ConversationState, trace: TurnTrace) -> None:
+        """Feed workflow updates into the turn's event queue, then mark its end."""
+        try:
+            async for update in self._execute_workflow_stream(initial_state):
+                trace.events.put_nowait(update)
+        finally:
+            trace.events.put_nowait(None)
+    
     async def _execute_workflow_stream(
         self, 
         initial_state: ConversationState
@@ -80,7 +80,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         # Initialize conversation store
         conversation_store = ConversationStore(
             redis_manager, 
-            ttl=nlu_config.conversation_ttl
+            ttl=nlu_config.conversation_ttl,
+            max_messages=nlu_config.conversation_max_messages,
         )
         
         # Initialize intent classifier
@@ -113,6 +114,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             entity_extractor=entity_extractor,
             tool_dispatcher=tool_dispatcher,
             conversation_manager=conversation_manager,
+            tool_turn_deadline=nlu_config.tool_turn_deadline,
+            speculative_execution=nlu_config.speculative_execution,
+            rag_context_token_budget=nlu_config.rag_context_token_budget,
         )
         await orchestrator.initialize()
         logger.info("LangGraph orchestrator initialized")
@@ -273,6 +277,7 @@ async def process_agent_request(
             reasoning=result.get("reasoning"),
             confidence=result.get("confidence"),
             processing_time=processing_time,
+            stage_timeline=result.get("stage_timeline", []),
         )
         
     except Exception as e:
@@ -7,12 +7,13 @@ Features:
 - Rate limiting and retries
 - Response caching
 - Error handling and fallbacks
+- Dependency-aware concurrent execution of tool plans
 """
 
 import asyncio
 import json
 import time
-from typing import Dict, List, Any, Optional, Union, Callable
+from typing import AsyncGenerator, Dict, List, Any, Optional, Set, Union, Callable
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import httpx
@@ -39,12 +40,21 @@ class ToolDefinition:
     retry_count: int = 3
     cache_ttl: int = 0  # seconds, 0 = no cache
     rate_limit_per_minute: int = 100
+    inputs: List[str] = None  # parameters that can be bound from earlier tools' outputs
+    outputs: Dict[str, str] = None  # output name -> response data field, exposed to later tools
     
     def __post_init__(self):
         if self.parameters_schema is None:
             self.parameters_schema = {}
         if self.required_parameters is None:
             self.required_parameters = []
+        if self.inputs is None:
+            self.inputs = []
+        if self.outputs is None:
+            self.outputs = {}
+        elif not isinstance(self.outputs, dict):
+            # Plain names are read from response fields of the same name
+            self.outputs = {name: name for name in self.outputs}
 
 
 class ToolCache:
@@ -300,6 +310,106 @@ class ToolDispatcher:
             
             raise
     
+    async def execute_tools(
+        self,
+        calls: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Execute a plan of tool calls, yielding each outcome as it completes.
+        
+        A call waits for every earlier call whose tool declares an output
+        among the inputs it doesn't already supply, and those outputs are
+        bound into its parameters; all other calls run concurrently,
+        bounded by the request semaphore.
+        Calls still running at ``deadline`` (a ``time.monotonic()`` value)
+        are cancelled, and calls that cannot run are reported as skipped.
+        """
+        calls = list(calls)
+        dependencies = self._tool_dependencies(calls)
+        waiting = set(range(len(calls)))
+        finished: Set[int] = set()
+        succeeded: Set[int] = set()
+        outputs: Dict[int, Dict[str, Any]] = {}
+        running: Dict[asyncio.Task, int] = {}
+        started_at: Dict[int, float] = {}
+        
+        try:
+            while waiting or running:
+                # Launch every call whose dependencies have finished; skipping a
+                # call can unblock (and skip) its dependents in the same pass
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for index in sorted(waiting):
+                        if not dependencies[index] <= finished:
+                            continue
+                        waiting.discard(index)
+                        progressed = True
+                        
+                        failed = dependencies[index] - succeeded
+                        if failed:
+                            finished.add(index)
+                            yield self._tool_outcome(
+                                index, calls[index], "skipped",
+                                error=f"Depends on failed tool(s): {[calls[i]['name'] for i in sorted(failed)]}",
+                            )
+                            continue
+                        
+                        parameters = self._bind_inputs(calls[index], [outputs[i] for i in sorted(dependencies[index])])
+                        started_at[index] = time.monotonic()
+                        task = asyncio.create_task(self.execute_tool(calls[index]["name"], dict(parameters), context))
+                        running[task] = index
+                        calls[index] = {**calls[index], "parameters": parameters}
+                
+                if not running:
+                    break
+                
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    # Turn deadline reached: cancel stragglers and report what never ran
+                    for task, index in running.items():
+                        task.cancel()
+                        yield self._tool_outcome(
+                            index, calls[index], "cancelled",
+                            error="Turn deadline exceeded",
+                            execution_time=time.monotonic() - started_at[index],
+                        )
+                    await asyncio.gather(*running, return_exceptions=True)
+                    running.clear()
+                    for index in sorted(waiting):
+                        yield self._tool_outcome(
+                            index, calls[index], "skipped",
+                            error="Turn deadline exceeded", error_type="DeadlineExceeded",
+                        )
+                    waiting.clear()
+                    break
+                
+                for task in done:
+                    index = running.pop(task)
+                    finished.add(index)
+                    execution_time = time.monotonic() - started_at[index]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        yield self._tool_outcome(
+                            index, calls[index], "failed",
+                            error=str(e), error_type=type(e).__name__, execution_time=execution_time,
+                        )
+                        continue
+                    
+                    succeeded.add(index)
+                    outputs[index] = self._extract_outputs(calls[index]["name"], result)
+                    yield self._tool_outcome(
+                        index, calls[index], "completed", result=result, execution_time=execution_time
+                    )
+        finally:
+            # The consumer stopped early; don't leave calls running in the background
+            for task in running:
+                task.cancel()
+    
     def list_tools(self) -> List[Dict[str, Any]]:
         """List all available tools with their definitions."""
         return [
@@ -311,6 +421,8 @@ class ToolDispatcher:
                 "required_parameters": tool.required_parameters,
                 "rate_limit_per_minute": tool.rate_limit_per_minute,
                 "cache_ttl": tool.cache_ttl,
+                "inputs": tool.inputs,
+                "outputs": list(tool.outputs),
             }
             for tool in self.tools.values()
         ]
@@ -409,6 +521,7 @@ class ToolDispatcher:
                 required_parameters=["name"],
                 timeout=30,
                 retry_count=3,
+                outputs={"contact_id": "id"},
                 rate_limit_per_minute=60
             ),
             
@@ -425,6 +538,7 @@ class ToolDispatcher:
                 },
                 required_parameters=["query"],
                 cache_ttl=300,  # 5 minutes
+                outputs={"contact_id": "id"},
                 rate_limit_per_minute=120
             ),
             
@@ -443,6 +557,7 @@ class ToolDispatcher:
                     "notes": {"type": "string", "required": False}
                 },
                 required_parameters=["contact_id"],
+                inputs=["contact_id"],
                 rate_limit_per_minute=60
             ),
             
@@ -481,6 +596,7 @@ class ToolDispatcher:
                     "notes": {"type": "string", "required": False}
                 },
                 required_parameters=["customer_id", "items"],
+                outputs={"order_id": "id"},
                 rate_limit_per_minute=60
             ),
             
@@ -499,6 +615,7 @@ class ToolDispatcher:
                     "limit": {"type": "integer", "required": False, "default": 10}
                 },
                 cache_ttl=60,  # 1 minute
+                outputs={"order_id": "id"},
                 rate_limit_per_minute=120
             ),
             
@@ -515,6 +632,7 @@ class ToolDispatcher:
                     "low_stock_only": {"type": "boolean", "required": False}
                 },
                 cache_ttl=300,  # 5 minutes
+                outputs={"product_id": "id"},
                 rate_limit_per_minute=100
             ),
             
@@ -531,6 +649,7 @@ class ToolDispatcher:
                     "reason": {"type": "string", "required": False}
                 },
                 required_parameters=["product_id", "quantity"],
+                inputs=["product_id"],
                 rate_limit_per_minute=60
             ),
             
@@ -581,6 +700,75 @@ class ToolDispatcher:
                 elif expected_type == "object" and not isinstance(param_value, dict):
                     raise ValidationError(f"Parameter '{param_name}' should be object, got {type(param_value)}")
     
+    def _tool_dependencies(self, calls: List[Dict[str, Any]]) -> List[Set[int]]:
+        """For each call, the earlier calls producing one of its tool's inputs that the call leaves empty."""
+        dependencies = []
+        for index, call in enumerate(calls):
+            tool = self.tools.get(call["name"])
+            parameters = call.get("parameters") or {}
+            inputs = {
+                name for name in (tool.inputs if tool else [])
+                if parameters.get(name) in (None, "")
+            }
+            dependencies.append({
+                earlier for earlier in range(index)
+                if calls[earlier]["name"] in self.tools
+                and inputs & set(self.tools[calls[earlier]["name"]].outputs)
+            })
+        return dependencies
+    
+    def _bind_inputs(self, call: Dict[str, Any], upstream: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Fill a call's missing input parameters from its dependencies' outputs."""
+        parameters = dict(call.get("parameters") or {})
+        tool = self.tools.get(call["name"])
+        for produced in upstream:
+            for name in tool.inputs:
+                if name in produced and parameters.get(name) in (None, ""):
+                    value = produced[name]
+                    if tool.parameters_schema.get(name, {}).get("type") == "string" and not isinstance(value, str):
+                        # Read models return integer IDs; the tool schemas take strings
+                        value = str(value)
+                    parameters[name] = value
+        return parameters
+    
+    def _extract_outputs(self, tool_name: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Read a tool's declared outputs from the mapped fields of its response data."""
+        data = result.get("data") if isinstance(result, dict) else None
+        if isinstance(data, list) and data:
+            # Search endpoints return matches; bind the best one
+            data = data[0]
+        if not isinstance(data, dict):
+            return {}
+        return {
+            name: data[field]
+            for name, field in self.tools[tool_name].outputs.items()
+            if field in data
+        }
+    
+    @staticmethod
+    def _tool_outcome(
+        index: int,
+        call: Dict[str, Any],
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        error_type: Optional[str] = None,
+        execution_time: float = 0.0,
+    ) -> Dict[str, Any]:
+        outcome = {
+            "index": index,
+            "tool_name": call["name"],
+            "parameters": call.get("parameters", {}),
+            "status": status,
+            "success": status == "completed",
+            "result": result,
+            "execution_time": execution_time,
+        }
+        if error is not None:
+            outcome["error"] = error
+            outcome["error_type"] = error_type or ("DeadlineExceeded" if status == "cancelled" else status.title())
+        return outcome
+    
     def _generate_cache_key(self, tool_name: str, parameters: Dict[str, Any]) -> str:
         """Generate cache key for tool execution."""
         param_str = json.dumps(parameters, sort_keys=True)
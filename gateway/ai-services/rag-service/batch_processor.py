@@ -2,13 +2,16 @@
 
 import asyncio
 import json
+import re
 import time
 import uuid
+from collections import deque
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Set, Tuple
+from typing import List, Dict, Any, AsyncIterator, Deque, Optional, Set, Tuple
 from enum import Enum
 from dataclasses import dataclass, asdict
 import structlog
+from sqlalchemy import text
 from shared.models import Document
 from shared.database import RedisManager, DatabaseManager
 from .document_processor import DocumentProcessor, DataFormat
@@ -17,6 +20,10 @@ from .embeddings import EmbeddingEngine
 
 logger = structlog.get_logger(__name__)
 
+DEFAULT_TABLES = {"crm": "crm_contacts", "erp": "erp_products"}
+DATA_SOURCES_KEY = "rag:data_sources"
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+
 class BatchJobType(str, Enum):
     """Batch job types."""
     FULL_SYNC = "full_sync"
@@ -49,6 +56,18 @@ class BatchJob:
     failed_records: int = 0
     error_messages: List[str] = None
     last_sync_timestamp: Optional[datetime] = None
+    checkpoint: Optional[Dict[str, Any]] = None  # last fully indexed key, for resuming syncs
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BatchJob":
+        """Rebuild a job saved with asdict/json.dumps (enums and datetimes as strings)."""
+        data = dict(data)
+        data["job_type"] = BatchJobType(data["job_type"])
+        data["status"] = BatchJobStatus(data.get("status", BatchJobStatus.SCHEDULED))
+        for field in ("scheduled_time", "started_time", "completed_time", "last_sync_timestamp"):
+            if isinstance(data.get(field), str):
+                data[field] = datetime.fromisoformat(data[field])
+        return cls(**data)
 
 @dataclass
 class DataSourceConfig:
@@ -62,6 +81,87 @@ class DataSourceConfig:
     enabled: bool = True
     last_sync: Optional[datetime] = None
 
+
+def records_to_documents(
+    records: List[Dict[str, Any]],
+    source_config: DataSourceConfig,
+) -> List[Document]:
+    """Convert source records to Document objects.
+    
+    Shared by batch syncs and the CDC consumer so that both produce the same
+    document IDs and metadata for a record.
+    """
+    documents = []
+    
+    for record in records:
+        try:
+            # Create document ID
+            record_id = record.get('id') or str(uuid.uuid4())
+            doc_id = f"{source_config.name}_{record_id}"
+            
+            # Convert record to JSON string for content
+            content = json.dumps(record, default=str, indent=2)
+            
+            # Create metadata
+            metadata = {
+                "source_system": source_config.name,
+                "source_type": source_config.type,
+                "record_type": source_config.connection_params.get("record_type", "unknown"),
+                "table_name": source_config.connection_params.get("table_name"),
+                "record_id": record_id,
+                "last_updated": record.get(source_config.incremental_field),
+                "format": "database_record",
+            }
+            
+            # Create document
+            document = Document(
+                id=doc_id,
+                content=content,
+                source=f"{source_config.type}://{source_config.name}",
+                metadata=metadata
+            )
+            
+            documents.append(document)
+            
+        except Exception as e:
+            logger.error(
+                "Failed to convert record to document", 
+                error=str(e), 
+                record_id=record.get('id')
+            )
+            continue
+    
+    logger.debug(
+        "Converted records to documents",
+        source=source_config.name,
+        records=len(records),
+        documents=len(documents)
+    )
+    
+    return documents
+
+
+async def load_data_sources(
+    redis_manager: RedisManager,
+    sources_key: str = DATA_SOURCES_KEY,
+) -> Dict[str, DataSourceConfig]:
+    """Load the registered data source configurations from Redis."""
+    data_sources = {}
+    sources_data = await redis_manager.hgetall(sources_key)
+    
+    for name, config_json in sources_data.items():
+        try:
+            config_data = json.loads(config_json)
+            if isinstance(config_data.get("last_sync"), str):
+                config_data["last_sync"] = datetime.fromisoformat(config_data["last_sync"])
+            data_sources[name] = DataSourceConfig(**config_data)
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            logger.warning("Invalid data source config", name=name, error=str(e))
+            continue
+    
+    return data_sources
+
+
 class BatchProcessor:
     """Batch processing service for CRM/ERP data ingestion."""
     
@@ -74,7 +174,11 @@ class BatchProcessor:
         database_manager: DatabaseManager,
         batch_size: int = 1000,
         max_concurrent_jobs: int = 3,
-        cleanup_retention_days: int = 30
+        cleanup_retention_days: int = 30,
+        max_inflight_batches: int = 2,
+        max_queue_depth: int = 10,
+        page_batches: int = 10,
+        poll_interval: float = 0.5,
     ):
         self.indexing_manager = indexing_manager
         self.embedding_engine = embedding_engine
@@ -85,10 +189,16 @@ class BatchProcessor:
         self.max_concurrent_jobs = max_concurrent_jobs
         self.cleanup_retention_days = cleanup_retention_days
         
+        # Sync pipeline backpressure
+        self.max_inflight_batches = max_inflight_batches
+        self.max_queue_depth = max_queue_depth
+        self.page_batches = page_batches
+        self.poll_interval = poll_interval
+        
         # Redis keys
         self.jobs_key = "rag:batch_jobs"
         self.schedule_key = "rag:batch_schedule"
-        self.sources_key = "rag:data_sources"
+        self.sources_key = DATA_SOURCES_KEY
         self.sync_state_key = "rag:sync_state"
         
         # Runtime state
@@ -118,6 +228,7 @@ class BatchProcessor:
         # Load configuration
         await self._load_data_sources()
         await self._load_stats()
+        await self._requeue_interrupted_jobs()
         
         # Start scheduler
         self.scheduler_task = asyncio.create_task(self._scheduler_loop())
@@ -311,14 +422,14 @@ class BatchProcessor:
             for job_id, job_json in all_jobs_data.items():
                 try:
                     job_data = json.loads(job_json)
-                    job = BatchJob(**job_data)
+                    job = BatchJob.from_dict(job_data)
                     
                     if (job.status == BatchJobStatus.SCHEDULED and 
                         job.scheduled_time <= current_time and
                         len(self.active_jobs) < self.max_concurrent_jobs):
                         ready_jobs.append(job)
                         
-                except (json.JSONDecodeError, TypeError) as e:
+                except (json.JSONDecodeError, TypeError, ValueError) as e:
                     logger.warning("Invalid job data", job_id=job_id, error=str(e))
                     continue
             
@@ -413,67 +524,19 @@ class BatchProcessor:
     
     async def _execute_full_sync(self, job: BatchJob) -> None:
         """Execute full synchronization."""
-        source_name = job.source_system
-        source_config = self.data_sources.get(source_name)
+        source_config = self._get_source(job.source_system)
         
-        if not source_config:
-            raise ValueError(f"Data source '{source_name}' not found")
-        
-        if not source_config.enabled:
-            raise ValueError(f"Data source '{source_name}' is disabled")
+        logger.info("Starting full sync", source=source_config.name, checkpoint=job.checkpoint)
         
-        logger.info("Starting full sync", source=source_name)
-        
-        # Get all records from source
-        records = await self._fetch_all_records(source_config)
-        job.total_records = len(records)
-        
-        # Process in batches
-        batch_size = source_config.batch_size
-        total_batches = (len(records) + batch_size - 1) // batch_size
-        
-        for batch_idx in range(0, len(records), batch_size):
-            batch = records[batch_idx:batch_idx + batch_size]
-            
-            try:
-                # Convert records to documents
-                documents = await self._records_to_documents(batch, source_config)
-                
-                # Index documents
-                if documents:
-                    job_id = await self.indexing_manager.index_documents_bulk(documents)
-                    
-                    # Wait for indexing to complete (simplified)
-                    await asyncio.sleep(1)  # In practice, monitor the indexing job
-                
-                job.processed_records += len(batch)
-                job.progress = int((job.processed_records / job.total_records) * 100)
-                
-                # Update job progress
-                await self._save_job(job)
-                
-                logger.debug(
-                    "Batch processed",
-                    source=source_name,
-                    batch_idx=batch_idx // batch_size + 1,
-                    total_batches=total_batches,
-                    records=len(batch)
-                )
-                
-            except Exception as e:
-                job.failed_records += len(batch)
-                if not job.error_messages:
-                    job.error_messages = []
-                job.error_messages.append(f"Batch {batch_idx//batch_size + 1}: {str(e)}")
-                logger.error("Batch processing failed", error=str(e))
+        await self._run_sync(job, source_config, key_columns=["id"])
         
         # Update last sync time
-        source_config.last_sync = datetime.utcnow()
+        source_config.last_sync = job.started_time or datetime.utcnow()
         await self._save_data_source(source_config)
         
         logger.info(
             "Full sync completed",
-            source=source_name,
+            source=source_config.name,
             total_records=job.total_records,
             processed=job.processed_records,
             failed=job.failed_records
@@ -481,7 +544,31 @@ class BatchProcessor:
     
     async def _execute_incremental_sync(self, job: BatchJob) -> None:
         """Execute incremental synchronization."""
-        source_name = job.source_system
+        source_config = self._get_source(job.source_system)
+        
+        logger.info("Starting incremental sync", source=source_config.name, checkpoint=job.checkpoint)
+        
+        # Get records modified since last sync
+        since = source_config.last_sync or datetime.utcnow() - timedelta(days=1)
+        if job.checkpoint and job.checkpoint.get("since"):
+            since = datetime.fromisoformat(job.checkpoint["since"])
+        
+        await self._run_sync(job, source_config, key_columns=[source_config.incremental_field, "id"], since=since)
+        
+        if job.total_records == 0:
+            logger.info("No new records to sync", source=source_config.name)
+        
+        # Records changed while the sync ran are picked up next time
+        source_config.last_sync = job.started_time or datetime.utcnow()
+        await self._save_data_source(source_config)
+        
+        logger.info(
+            "Incremental sync completed",
+            source=source_config.name,
+            records_processed=job.processed_records
+        )
+    
+    def _get_source(self, source_name: str) -> DataSourceConfig:
         source_config = self.data_sources.get(source_name)
         
         if not source_config:
@@ -490,35 +577,124 @@ class BatchProcessor:
         if not source_config.enabled:
             raise ValueError(f"Data source '{source_name}' is disabled")
         
-        logger.info("Starting incremental sync", source=source_name)
+        return source_config
+    
+    async def _run_sync(
+        self,
+        job: BatchJob,
+        source_config: DataSourceConfig,
+        key_columns: List[str],
+        since: Optional[datetime] = None,
+    ) -> None:
+        """Stream records into the indexing queue with bounded in-flight batches.
         
-        # Get records modified since last sync
-        last_sync = source_config.last_sync or datetime.utcnow() - timedelta(days=1)
-        records = await self._fetch_incremental_records(source_config, last_sync)
+        Batches are handed to the indexing manager as bulk jobs. At most
+        max_inflight_batches are outstanding and no new batch is queued while
+        the indexing queue is deeper than max_queue_depth. The job checkpoint
+        only advances past a batch once it and every batch before it finished
+        indexing, so a resumed sync never skips records.
+        """
+        checkpoint = job.checkpoint or {}
+        after = self._decode_key(checkpoint.get("last_key"), key_columns, source_config)
+        if since is not None:
+            checkpoint["since"] = since.isoformat()
         
-        job.total_records = len(records)
+        if not checkpoint.get("last_key"):
+            job.processed_records = job.failed_records = 0
+        job.total_records = job.processed_records + await self._count_records(source_config, since, key_columns, after)
         
-        if job.total_records == 0:
-            logger.info("No new records to sync", source=source_name)
-            return
+        # (last key, indexing job id, record count) in fetch order
+        inflight: Deque[Tuple[List[Any], Optional[str], int]] = deque()
         
-        # Process records
-        documents = await self._records_to_documents(records, source_config)
+        async for batch in self._stream_records(source_config, key_columns, since=since, after=after):
+            if job.status == BatchJobStatus.CANCELLED:
+                break
+            
+            await self._wait_for_capacity(job, inflight, checkpoint)
+            
+            last_key = [batch[-1].get(column) for column in key_columns]
+            try:
+                documents = await self._records_to_documents(batch, source_config)
+                indexing_job_id = None
+                if documents:
+                    indexing_job_id = await self.indexing_manager.index_documents_bulk(documents)
+                inflight.append((last_key, indexing_job_id, len(batch)))
+            except Exception as e:
+                job.failed_records += len(batch)
+                job.error_messages = (job.error_messages or []) + [f"Batch ending at {last_key}: {str(e)}"]
+                logger.error("Batch processing failed", error=str(e), source=source_config.name)
+                # Skip the batch, but keep the watermark contiguous
+                inflight.append((last_key, None, 0))
         
-        if documents:
-            # Index documents
-            indexing_job_id = await self.indexing_manager.index_documents_bulk(documents)
-            job.processed_records = len(documents)
+        # Drain remaining batches
+        while inflight:
+            await self._complete_head_batch(job, inflight, checkpoint)
+    
+    async def _wait_for_capacity(
+        self,
+        job: BatchJob,
+        inflight: Deque[Tuple[List[Any], Optional[str], int]],
+        checkpoint: Dict[str, Any],
+    ) -> None:
+        """Block until there is room for another batch."""
+        while inflight:
+            # Retire finished batches from the head without blocking
+            while inflight and await self._batch_done(inflight[0][1]):
+                await self._complete_head_batch(job, inflight, checkpoint)
+            
+            if len(inflight) < self.max_inflight_batches:
+                queue_depth = await self.indexing_manager.get_queue_depth()
+                if queue_depth <= self.max_queue_depth:
+                    return
+            
+            await asyncio.sleep(self.poll_interval)
+    
+    async def _complete_head_batch(
+        self,
+        job: BatchJob,
+        inflight: Deque[Tuple[List[Any], Optional[str], int]],
+        checkpoint: Dict[str, Any],
+    ) -> None:
+        """Wait for the oldest batch, then advance the checkpoint past it."""
+        last_key, indexing_job_id, record_count = inflight[0]
+        while not await self._batch_done(indexing_job_id):
+            await asyncio.sleep(self.poll_interval)
+        inflight.popleft()
         
-        # Update last sync time
-        source_config.last_sync = datetime.utcnow()
-        await self._save_data_source(source_config)
+        if indexing_job_id:
+            indexing_job = await self.indexing_manager.get_job_status(indexing_job_id)
+            failures = min(indexing_job.failure_count, record_count) if indexing_job else 0
+            job.failed_records += failures
+            job.processed_records += record_count - failures
         
-        logger.info(
-            "Incremental sync completed",
-            source=source_name,
-            records_processed=job.processed_records
-        )
+        checkpoint["last_key"] = [value.isoformat() if isinstance(value, datetime) else value for value in last_key]
+        job.checkpoint = checkpoint
+        job.progress = min(99, int(((job.processed_records + job.failed_records) / max(job.total_records, 1)) * 100))
+        await self._save_job(job)
+    
+    async def _batch_done(self, indexing_job_id: Optional[str]) -> bool:
+        if indexing_job_id is None:
+            return True
+        indexing_job = await self.indexing_manager.get_job_status(indexing_job_id)
+        # A job missing from the registry can no longer be tracked
+        return indexing_job is None or indexing_job.status in (IndexingStatus.COMPLETED, IndexingStatus.FAILED)
+    
+    async def _requeue_interrupted_jobs(self) -> None:
+        """Reschedule sync jobs left running by a previous process; they resume from their checkpoint."""
+        try:
+            all_jobs_data = await self.redis_manager.hgetall(self.jobs_key)
+            for job_id, job_json in all_jobs_data.items():
+                try:
+                    job = BatchJob.from_dict(json.loads(job_json))
+                except (json.JSONDecodeError, TypeError, ValueError):
+                    continue
+                if job.status == BatchJobStatus.RUNNING:
+                    job.status = BatchJobStatus.SCHEDULED
+                    job.scheduled_time = datetime.utcnow()
+                    await self._save_job(job)
+                    logger.info("Requeued interrupted batch job", job_id=job_id, checkpoint=job.checkpoint)
+        except Exception as e:
+            logger.error("Failed to requeue interrupted jobs", error=str(e))
     
     async def _execute_cleanup(self, job: BatchJob) -> None:
         """Execute cleanup of old documents."""
@@ -551,108 +727,109 @@ class BatchProcessor:
         
         logger.info("Reindex completed")
     
-    async def _fetch_all_records(self, source_config: DataSourceConfig) -> List[Dict[str, Any]]:
-        """Fetch all records from data source."""
-        try:
-            if source_config.type == "crm":
-                return await self._fetch_crm_records(source_config)
-            elif source_config.type == "erp":
-                return await self._fetch_erp_records(source_config)
-            else:
-                raise ValueError(f"Unknown source type: {source_config.type}")
-                
-        except Exception as e:
-            logger.error("Failed to fetch records", error=str(e), source=source_config.name)
-            raise
+    def _table_name(self, source_config: DataSourceConfig) -> str:
+        """Get the validated source table name."""
+        if source_config.type not in DEFAULT_TABLES:
+            raise ValueError(f"Unknown source type: {source_config.type}")
+        
+        table_name = source_config.connection_params.get("table_name", DEFAULT_TABLES[source_config.type])
+        if not _IDENTIFIER.match(table_name):
+            raise ValueError(f"Invalid table name: {table_name}")
+        return table_name
     
-    async def _fetch_incremental_records(
-        self, 
-        source_config: DataSourceConfig, 
-        since: datetime
-    ) -> List[Dict[str, Any]]:
-        """Fetch records modified since given timestamp."""
-        try:
-            if source_config.type == "crm":
-                return await self._fetch_crm_records(source_config, since=since)
-            elif source_config.type == "erp":
-                return await self._fetch_erp_records(source_config, since=since)
-            else:
-                raise ValueError(f"Unknown source type: {source_config.type}")
-                
-        except Exception as e:
-            logger.error("Failed to fetch incremental records", error=str(e))
-            raise
+    def _keyset_clause(
+        self,
+        key_columns: List[str],
+        since: Optional[datetime],
+        after: Optional[List[Any]],
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build the WHERE clause for a keyset page and its bind parameters."""
+        for column in key_columns:
+            if not _IDENTIFIER.match(column):
+                raise ValueError(f"Invalid key column: {column}")
+        
+        conditions, params = [], {}
+        if since is not None:
+            conditions.append(f"{key_columns[0]} > :since")
+            params["since"] = since
+        if after is not None:
+            placeholders = ", ".join(f":after_{i}" for i in range(len(key_columns)))
+            conditions.append(f"({', '.join(key_columns)}) > ({placeholders})")
+            params.update({f"after_{i}": value for i, value in enumerate(after)})
+        
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
     
-    async def _fetch_crm_records(
-        self, 
-        source_config: DataSourceConfig, 
-        since: Optional[datetime] = None
-    ) -> List[Dict[str, Any]]:
-        """Fetch records from CRM system."""
-        try:
-            # This would connect to the actual CRM system
-            # For now, we'll simulate fetching from a database table
-            
-            conn_params = source_config.connection_params
-            table_name = conn_params.get("table_name", "crm_contacts")
-            
-            async with self.database_manager.get_session() as session:
-                # Build query
-                if since:
-                    # Incremental query
-                    query = f"SELECT * FROM {table_name} WHERE updated_at > '{since.isoformat()}' ORDER BY updated_at"
-                else:
-                    # Full query
-                    query = f"SELECT * FROM {table_name} ORDER BY id"
-                
-                result = await session.execute(query)
-                records = [dict(row) for row in result.fetchall()]
-                
-                logger.debug(
-                    "Fetched CRM records",
-                    table=table_name,
-                    count=len(records),
-                    incremental=since is not None
-                )
-                
-                return records
-                
-        except Exception as e:
-            logger.error("Failed to fetch CRM records", error=str(e))
-            raise
+    async def _count_records(
+        self,
+        source_config: DataSourceConfig,
+        since: Optional[datetime],
+        key_columns: List[str],
+        after: Optional[List[Any]],
+    ) -> int:
+        """Count records left to sync, for progress reporting."""
+        where, params = self._keyset_clause(key_columns, since, after)
+        async with self.database_manager.get_session() as session:
+            result = await session.execute(
+                text(f"SELECT COUNT(*) FROM {self._table_name(source_config)}{where}"), params
+            )
+            return int(result.scalar() or 0)
     
-    async def _fetch_erp_records(
-        self, 
-        source_config: DataSourceConfig, 
-        since: Optional[datetime] = None
-    ) -> List[Dict[str, Any]]:
-        """Fetch records from ERP system."""
-        try:
-            conn_params = source_config.connection_params
-            table_name = conn_params.get("table_name", "erp_products")
+    async def _stream_records(
+        self,
+        source_config: DataSourceConfig,
+        key_columns: List[str],
+        since: Optional[datetime] = None,
+        after: Optional[List[Any]] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield batches of records in key order using keyset pagination.
+        
+        Each page of batch_size * page_batches rows is read in its own short
+        transaction, which is closed before the page's batches are yielded,
+        so backpressure in the consumer never holds a connection or snapshot
+        open. The next page starts after the last key seen.
+        """
+        table_name = self._table_name(source_config)
+        batch_size = source_config.batch_size
+        page_size = batch_size * self.page_batches
+        order_by = ", ".join(key_columns)
+        
+        while True:
+            where, params = self._keyset_clause(key_columns, since, after)
+            query = text(f"SELECT * FROM {table_name}{where} ORDER BY {order_by} LIMIT :page_size")
+            params["page_size"] = page_size
             
             async with self.database_manager.get_session() as session:
-                # Build query
-                if since:
-                    query = f"SELECT * FROM {table_name} WHERE updated_at > '{since.isoformat()}' ORDER BY updated_at"
-                else:
-                    query = f"SELECT * FROM {table_name} ORDER BY id"
-                
-                result = await session.execute(query)
-                records = [dict(row) for row in result.fetchall()]
-                
-                logger.debug(
-                    "Fetched ERP records",
-                    table=table_name,
-                    count=len(records),
-                    incremental=since is not None
-                )
-                
-                return records
-                
-        except Exception as e:
-            logger.error("Failed to fetch ERP records", error=str(e))
-            raise
+                result = await session.execute(query, params)
+                page = [dict(row) for row in result.mappings().all()]
+            
+            logger.debug("Fetched keyset page", table=table_name, rows=len(page), after=after)
+            if page:
+                after = [page[-1].get(column) for column in key_columns]
+            for i in range(0, len(page), batch_size):
+                yield page[i:i + batch_size]
+            
+            if len(page) < page_size:
+                return
+    
+    def _decode_key(
+        self,
+        encoded: Optional[List[Any]],
+        key_columns: List[str],
+        source_config: DataSourceConfig,
+    ) -> Optional[List[Any]]:
+        """Restore checkpointed key values (timestamps are stored as ISO strings)."""
+        if not encoded:
+            return None
+        
+        decoded = []
+        for column, value in zip(key_columns, encoded):
+            if column == source_config.incremental_field and isinstance(value, str):
+                try:
+                    value = datetime.fromisoformat(value)
+                except ValueError:
+                    pass
+            decoded.append(value)
+        return decoded
     
     async def _records_to_documents(
         self, 
@@ -660,54 +837,7 @@ class BatchProcessor:
         source_config: DataSourceConfig
     ) -> List[Document]:
         """Convert database records to Document objects."""
-        documents = []
-        
-        for record in records:
-            try:
-                # Create document ID
-                record_id = record.get('id') or str(uuid.uuid4())
-                doc_id = f"{source_config.name}_{record_id}"
-                
-                # Convert record to JSON string for content
-                content = json.dumps(record, default=str, indent=2)
-                
-                # Create metadata
-                metadata = {
-                    "source_system": source_config.name,
-                    "source_type": source_config.type,
-                    "record_type": source_config.connection_params.get("record_type", "unknown"),
-                    "table_name": source_config.connection_params.get("table_name"),
-                    "record_id": record_id,
-                    "last_updated": record.get(source_config.incremental_field),
-                    "format": "database_record",
-                }
-                
-                # Create document
-                document = Document(
-                    id=doc_id,
-                    content=content,
-                    source=f"{source_config.type}://{source_config.name}",
-                    metadata=metadata
-                )
-                
-                documents.append(document)
-                
-            except Exception as e:
-                logger.error(
-                    "Failed to convert record to document", 
-                    error=str(e), 
-                    record_id=record.get('id')
-                )
-                continue
-        
-        logger.debug(
-            "Converted records to documents",
-            source=source_config.name,
-            records=len(records),
-            documents=len(documents)
-        )
-        
-        return documents
+        return records_to_documents(records, source_config)
     
     async def _schedule_periodic_jobs(self) -> None:
         """Schedule periodic jobs based on data source configurations."""
@@ -779,7 +909,7 @@ class BatchProcessor:
             for job_id, job_json in all_jobs_data.items():
                 try:
                     job_data = json.loads(job_json)
-                    job = BatchJob(**job_data)
+                    job = BatchJob.from_dict(job_data)
                     
                     if (job.source_system == source_system and
                         job.job_type == job_type and
@@ -787,7 +917,7 @@ class BatchProcessor:
                         job.scheduled_time.date() == target_date):
                         return job
                         
-                except (json.JSONDecodeError, TypeError):
+                except (json.JSONDecodeError, TypeError, ValueError):
                     continue
             
             return None
@@ -807,13 +937,13 @@ class BatchProcessor:
             for job_id, job_json in all_jobs_data.items():
                 try:
                     job_data = json.loads(job_json)
-                    job = BatchJob(**job_data)
+                    job = BatchJob.from_dict(job_data)
                     
                     if (job.status in [BatchJobStatus.COMPLETED, BatchJobStatus.FAILED, BatchJobStatus.CANCELLED] and
                         job.completed_time and job.completed_time < cutoff_time):
                         jobs_to_delete.append(job_id)
                         
-                except (json.JSONDecodeError, TypeError):
+                except (json.JSONDecodeError, TypeError, ValueError):
                     # Invalid job data, mark for deletion
                     jobs_to_delete.append(job_id)
                     continue
@@ -866,7 +996,7 @@ class BatchProcessor:
             job_json = await self.redis_manager.hget(self.jobs_key, job_id)
             if job_json:
                 job_data = json.loads(job_json)
-                return BatchJob(**job_data)
+                return BatchJob.from_dict(job_data)
             return None
         except Exception as e:
             logger.error("Failed to load job", error=str(e), job_id=job_id)
@@ -883,15 +1013,7 @@ class BatchProcessor:
     async def _load_data_sources(self) -> None:
         """Load data source configurations."""
         try:
-            sources_data = await self.redis_manager.hgetall(self.sources_key)
-            
-            for name, config_json in sources_data.items():
-                try:
-                    config_data = json.loads(config_json)
-                    self.data_sources[name] = DataSourceConfig(**config_data)
-                except (json.JSONDecodeError, TypeError) as e:
-                    logger.warning("Invalid data source config", name=name, error=str(e))
-                    continue
+            self.data_sources.update(await load_data_sources(self.redis_manager, self.sources_key))
             
             logger.info("Data sources loaded", count=len(self.data_sources))
             
@@ -0,0 +1,145 @@
+"""
+Chunking throughput and truncation benchmark.
+
+Chunks a corpus with the previous whitespace-word chunker and with the
+token-aware chunker, then re-tokenizes every chunk with the embedding
+tokenizer to report chunks/sec and the share of chunks the model would
+silently truncate:
+
+    python -m rag_service.bench_chunking --model BAAI/bge-small-en-v1.5
+    python -m rag_service.bench_chunking --files 'exports/*.txt' --chunk-size 256
+
+Without ``--model`` the built-in token estimate stands in for the tokenizer.
+The synthetic corpus mixes CRM notes (emails, SKUs, order numbers that
+split into many subword tokens) with JSON record exports.
+"""
+
+import argparse
+import glob
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from shared.chunking import TokenChunker
+
+_SENTENCES = [
+    "Customer requested a renewal quote for the premium support tier",
+    "Shipment WF-{n:06d}-EU was delayed at the Rotterdam distribution hub",
+    "Contact ops-team+escalations-{n}@acme-industries.example.com before Friday",
+    "Invoice INV/2024/{n:05d} remains unpaid after the second reminder",
+    "Pilot covers forty WearForce X2 devices across two warehouses",
+    "SKU WFX2-BLK-{n:04d}-L is back-ordered until the next production run",
+]
+
+
+def synthetic_corpus(documents: int, seed: int = 7) -> List[str]:
+    """Build CRM-style notes and JSON exports of varied length."""
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(documents):
+        if index % 3 == 2:
+            records = [
+                {"id": n, "sku": f"WFX2-{n:05d}", "qty": rng.randint(1, 500), "status": "open"}
+                for n in range(rng.randint(20, 400))
+            ]
+            corpus.append(json.dumps(records))
+        else:
+            sentences = [
+                rng.choice(_SENTENCES).format(n=rng.randint(0, 99999)) + "."
+                for _ in range(rng.randint(10, 600))
+            ]
+            corpus.append(" ".join(sentences))
+    return corpus
+
+
+def word_chunks(text: str, chunk_size: int, overlap: int) -> List[str]:
+    """The previous DocumentProcessor strategy: fixed windows of whitespace words."""
+    words = text.split()
+    if len(words) <= chunk_size:
+        return [text]
+    chunks = []
+    for i in range(0, len(words), chunk_size - overlap):
+        chunks.append(" ".join(words[i:i + chunk_size]))
+        if i + chunk_size >= len(words):
+            break
+    return chunks
+
+
+def truncation_stats(chunker: TokenChunker, chunks: List[str], max_length: int) -> Dict[str, float]:
+    """Share of chunks, and of tokens, beyond the model's input limit (special tokens included)."""
+    counts = []
+    for start in range(0, len(chunks), 256):
+        counts.extend(int(count) + 2 for count in chunker.count_tokens(chunks[start:start + 256]))
+    truncated = [count for count in counts if count > max_length]
+    total_tokens = max(sum(counts), 1)
+    return {
+        "truncated_chunks": len(truncated) / max(len(counts), 1),
+        "truncated_tokens": sum(count - max_length for count in truncated) / total_tokens,
+        "avg_tokens": sum(counts) / max(len(counts), 1),
+    }
+
+
+def run(
+    corpus: List[str],
+    tokenizer: Optional[Any],
+    chunk_size: int,
+    overlap: int,
+    max_length: int,
+) -> List[Dict[str, Any]]:
+    chunker = TokenChunker(max_tokens=chunk_size, overlap_tokens=overlap, tokenizer=tokenizer)
+    rows = []
+
+    started = time.perf_counter()
+    words = [chunk for text in corpus for chunk in word_chunks(text, chunk_size, overlap)]
+    elapsed = time.perf_counter() - started
+    rows.append({"mode": f"words ({chunk_size})", "chunks": len(words), "seconds": elapsed,
+                 **truncation_stats(chunker, words, max_length)})
+
+    started = time.perf_counter()
+    tokens = [chunk.text for text in corpus for chunk in chunker.iter_chunks(text)]
+    elapsed = time.perf_counter() - started
+    rows.append({"mode": f"tokens ({chunk_size})", "chunks": len(tokens), "seconds": elapsed,
+                 **truncation_stats(chunker, tokens, max_length)})
+
+    return rows
+
+
+def main(args: argparse.Namespace) -> None:
+    if args.files:
+        corpus = []
+        for path in sorted(glob.glob(args.files)):
+            with open(path, encoding="utf-8") as handle:
+                corpus.append(handle.read())
+    else:
+        corpus = synthetic_corpus(args.documents)
+
+    tokenizer = None
+    if args.model:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(args.model, use_fast=True)
+
+    megabytes = sum(len(text) for text in corpus) / 1e6
+    print(f"{len(corpus)} documents, {megabytes:.1f} MB, tokenizer {args.model or 'estimate'}, "
+          f"model limit {args.max_length}")
+    print(f"{'mode':<16}{'chunks':>9}{'chunks/s':>11}{'MB/s':>8}{'avg tok':>9}{'trunc %':>9}{'lost tok %':>12}")
+    for row in run(corpus, tokenizer, args.chunk_size, args.overlap, args.max_length):
+        seconds = max(row["seconds"], 1e-9)
+        print(f"{row['mode']:<16}{row['chunks']:>9}{row['chunks'] / seconds:>11.0f}{megabytes / seconds:>8.1f}"
+              f"{row['avg_tokens']:>9.0f}{100 * row['truncated_chunks']:>9.1f}{100 * row['truncated_tokens']:>12.1f}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Chunking throughput/truncation benchmark")
+    parser.add_argument("--documents", type=int, default=300)
+    parser.add_argument("--files", help="Glob of text files to chunk instead of the synthetic corpus")
+    parser.add_argument("--model", help="Hugging Face tokenizer to count tokens with")
+    parser.add_argument("--chunk-size", type=int, default=510)
+    parser.add_argument("--overlap", type=int, default=50)
+    parser.add_argument("--max-length", type=int, default=512, help="Model input limit incl. special tokens")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
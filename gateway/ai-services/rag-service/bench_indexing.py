@@ -0,0 +1,144 @@
+"""
+CPU indexing throughput benchmark.
+
+Indexes synthetic CRM contact records (one chunk each, like real contacts)
+through the indexing worker path, once with per-document embedding and
+once per cross-document batch budget, and reports docs/sec:
+
+    python -m rag_service.bench_indexing --documents 2000 --model BAAI/bge-small-en-v1.5
+
+Vectors are kept in memory so the figures isolate chunking, embedding and
+batching from Qdrant latency.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from .document_processor import DocumentProcessor
+from .embeddings import EmbeddingEngine
+from .indexing_manager import IndexingManager
+
+_FIRST_NAMES = ["Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Frances", "Ken"]
+_COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries"]
+_NOTES = [
+    "Requested a renewal quote for the premium support tier",
+    "Interested in the wearable fleet rollout for field technicians",
+    "Escalated a delayed shipment on the last purchase order",
+    "Prefers email follow-ups and quarterly business reviews",
+    "Evaluating a pilot with forty devices across two warehouses",
+]
+
+
+class InMemoryVectorStore:
+    """Minimal stand-in for VectorDatabaseManager used by the benchmark."""
+
+    def __init__(self):
+        self.points: Dict[str, Any] = {}
+        self.upsert_calls = 0
+
+    async def scroll(self, filter_conditions=None, with_vectors=False, page_size=256):
+        return []
+
+    async def upsert_vectors(self, vectors, payloads, ids):
+        self.upsert_calls += 1
+        self.points.update(zip(ids, zip(vectors, payloads)))
+
+    async def delete_vectors(self, ids):
+        for point_id in ids:
+            self.points.pop(point_id, None)
+
+
+def _contact_documents(count: int, run: str, seed: int = 7) -> List[Dict[str, Any]]:
+    """Build queue payloads for synthetic CRM contacts, unique per run to defeat caching."""
+    rng = random.Random(seed)
+    documents = []
+    for index in range(count):
+        record = {
+            "id": index,
+            "name": f"{rng.choice(_FIRST_NAMES)} {run}-{index}",
+            "company": rng.choice(_COMPANIES),
+            "email": f"contact{index}@example.com",
+            "notes": ". ".join(rng.sample(_NOTES, 3)),
+        }
+        documents.append({
+            "id": f"crm_{run}_{index}",
+            "content": json.dumps(record, indent=2),
+            "source": "crm://crm",
+            "metadata": {"record_type": "contact"},
+        })
+    return documents
+
+
+async def run_indexing(
+    engine: EmbeddingEngine,
+    documents: List[Dict[str, Any]],
+    concurrency: int,
+    batch_tokens: int,
+    batch_wait: float,
+) -> Dict[str, Any]:
+    """Index documents with ``concurrency`` in flight and return throughput figures."""
+    vector_db = InMemoryVectorStore()
+    manager = IndexingManager(
+        vector_db,
+        engine,
+        DocumentProcessor(),
+        redis_manager=None,
+        embedding_batch_tokens=batch_tokens,
+        embedding_batch_wait=batch_wait,
+    )
+    slots = asyncio.Semaphore(concurrency)
+
+    async def index(document_data: Dict[str, Any]) -> None:
+        async with slots:
+            await manager._index_single_document(document_data, "bench")
+
+    started = time.monotonic()
+    await asyncio.gather(*(index(document_data) for document_data in documents))
+    elapsed = time.monotonic() - started
+
+    batch_stats = manager.embedding_coalescer.get_stats() if manager.embedding_coalescer else None
+    return {
+        "documents": manager.stats["indexed_documents"],
+        "failed": manager.stats["failed_documents"],
+        "docs_per_sec": manager.stats["indexed_documents"] / elapsed if elapsed else 0.0,
+        "avg_batch_items": batch_stats["avg_batch_items"] if batch_stats else 1.0,
+        "upsert_calls": vector_db.upsert_calls,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = EmbeddingEngine(args.model, enable_caching=False, batch_size=args.model_batch_size)
+    engine.device = "cpu"
+    await engine.initialize()
+
+    scenarios: List[tuple] = [("per-document", args.workers, 0)]
+    for batch_tokens in args.batch_tokens:
+        scenarios.append((f"batched ({batch_tokens} tokens)", args.max_inflight, batch_tokens))
+
+    print(f"{args.documents} contacts, model {args.model} on cpu")
+    print(f"{'mode':<28}{'docs':>7}{'docs/s':>10}{'batch':>8}{'upserts':>9}")
+    for run, (name, concurrency, batch_tokens) in enumerate(scenarios):
+        documents = _contact_documents(args.documents, run=f"r{run}")
+        result = await run_indexing(engine, documents, concurrency, batch_tokens, args.batch_wait)
+        print(f"{name:<28}{result['documents']:>7}{result['docs_per_sec']:>10.1f}"
+              f"{result['avg_batch_items']:>8.1f}{result['upsert_calls']:>9}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="RAG indexing throughput benchmark")
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--model-batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4, help="Concurrency of the per-document baseline")
+    parser.add_argument("--max-inflight", type=int, default=64, help="Documents in flight when batching")
+    parser.add_argument("--batch-tokens", type=int, nargs="+", default=[2048, 8192])
+    parser.add_argument("--batch-wait", type=float, default=0.05)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
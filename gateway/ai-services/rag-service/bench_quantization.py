@@ -0,0 +1,154 @@
+"""
+Recall and memory benchmark for compact vector storage.
+
+Reproduces Qdrant's int8 scalar quantization (quantile-clipped linear
+codes) and the float16 cache encoding in NumPy, then reports recall@k
+against exact float32 cosine search with and without oversampled
+rescoring, plus vector memory per million chunks:
+
+    python -m rag_service.bench_quantization --vectors 100000 --dim 384
+    python -m rag_service.bench_quantization --embeddings chunks.npy
+
+Synthetic data is clustered unit vectors with queries drawn near corpus
+points; pass real embeddings for production figures.
+"""
+
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MIB = 1024 * 1024
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def synthetic_corpus(
+    count: int,
+    dim: int,
+    queries: int,
+    clusters: int = 256,
+    seed: int = 7,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Build clustered unit vectors and queries close to corpus points."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    corpus = centers[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    corpus = _normalize(corpus)
+    anchors = corpus[rng.integers(0, count, queries)]
+    noise = rng.standard_normal((queries, dim)).astype(np.float32) / np.sqrt(dim)
+    query_vectors = _normalize(anchors + 0.5 * noise)
+    return corpus, query_vectors
+
+
+def scalar_quantize(vectors: np.ndarray, quantile: float = 0.99) -> np.ndarray:
+    """Quantize to 8-bit codes over the quantile range and return the dequantized vectors."""
+    tail = (1.0 - quantile) / 2
+    low, high = np.quantile(vectors, [tail, 1.0 - tail])
+    scale = (high - low) / 255.0
+    codes = np.round((np.clip(vectors, low, high) - low) / scale).astype(np.uint8)
+    return codes.astype(np.float32) * scale + low
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall_at_k(exact: np.ndarray, approx: np.ndarray) -> float:
+    k = exact.shape[1]
+    return float(np.mean([len(set(e) & set(a)) / k for e, a in zip(exact, approx)]))
+
+
+def search_quantized(
+    corpus: np.ndarray,
+    quantized: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    oversampling: float,
+    rescore: bool,
+) -> np.ndarray:
+    """Search the quantized vectors, optionally rescoring an oversampled shortlist exactly."""
+    candidates = _top_k(queries @ quantized.T, max(k, int(round(k * oversampling))))
+    if not rescore:
+        return candidates[:, :k]
+    exact_scores = np.einsum("qd,qcd->qc", queries, corpus[candidates])
+    order = np.argsort(-exact_scores, axis=1)[:, :k]
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def memory_per_million(dim: int) -> Dict[str, float]:
+    """Vector bytes per million chunks (excludes HNSW links and payloads)."""
+    million = 1_000_000
+    return {
+        "float32_ram_mib": million * dim * 4 / MIB,
+        "int8_ram_mib": million * dim / MIB,
+        "int8_disk_originals_mib": million * dim * 4 / MIB,
+        "float16_cache_mib": million * dim * 2 / MIB,
+    }
+
+
+def run(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    ks: List[int],
+    oversamplings: List[float],
+    quantile: float,
+) -> List[Tuple[str, Dict[int, float]]]:
+    exact = {k: _top_k(queries @ corpus.T, k) for k in ks}
+    quantized = scalar_quantize(corpus, quantile)
+    half = corpus.astype(np.float16).astype(np.float32)
+
+    rows = [
+        ("float16", {k: recall_at_k(exact[k], _top_k(queries @ half.T, k)) for k in ks}),
+        ("int8", {
+            k: recall_at_k(exact[k], search_quantized(corpus, quantized, queries, k, 1.0, rescore=False))
+            for k in ks
+        }),
+    ]
+    for oversampling in oversamplings:
+        rows.append((f"int8 + rescore x{oversampling:g}", {
+            k: recall_at_k(exact[k], search_quantized(corpus, quantized, queries, k, oversampling, rescore=True))
+            for k in ks
+        }))
+    return rows
+
+
+def main(args: argparse.Namespace) -> None:
+    if args.embeddings:
+        vectors = _normalize(np.load(args.embeddings).astype(np.float32))
+        # Hold the queries out of the corpus so they cannot match themselves
+        held_out = np.random.default_rng(7).choice(len(vectors), args.queries, replace=False)
+        queries = vectors[held_out]
+        corpus = np.delete(vectors, held_out, axis=0)
+    else:
+        corpus, queries = synthetic_corpus(args.vectors, args.dim, args.queries)
+
+    dim = corpus.shape[1]
+    print(f"{len(corpus)} vectors, dim {dim}, {len(queries)} queries, quantile {args.quantile}")
+    print(f"{'mode':<24}" + "".join(f"{f'recall@{k}':>12}" for k in args.k))
+    for name, recalls in run(corpus, queries, args.k, args.oversampling, args.quantile):
+        print(f"{name:<24}" + "".join(f"{recalls[k]:>12.4f}" for k in args.k))
+
+    print("\nvector memory per 1M chunks")
+    for name, mib in memory_per_million(dim).items():
+        print(f"  {name:<26}{mib:>10.0f} MiB")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Quantized vector recall/memory benchmark")
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--embeddings", help="Corpus embeddings as an (N, dim) .npy file")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 3.0])
+    parser.add_argument("--quantile", type=float, default=0.99)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,278 @@
+"""Change-data-capture indexing from CRM/ERP domain events."""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import structlog
+
+from shared.events import BaseEvent, EventSubscriber
+from shared.models import Document
+from .batch_processor import DataSourceConfig, records_to_documents
+from .indexing_manager import IndexingManager
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_SUBJECTS = ("crm.>", "erp.>")
+
+
+@dataclass
+class PendingChange:
+    """Latest state of one entity waiting to be applied to the index."""
+    document_id: str
+    action: str  # upsert, delete
+    document: Optional[Document]
+    published_at: datetime
+    version: datetime  # timestamp of the event the state comes from
+    futures: List[asyncio.Future] = field(default_factory=list)
+
+
+class CDCConsumer:
+    """Keeps the index in step with CRM/ERP writes as they happen.
+
+    Events are coalesced per entity for ``coalesce_window`` seconds so a
+    burst of updates to one record is indexed once, using the newest
+    payload. Changes across entities are applied together, so their
+    chunks are embedded in one batch. A message is acked only once its
+    change has been applied.
+
+    Redelivered events can arrive after newer ones, so the consumer keeps
+    the version (event timestamp) of the latest state taken for each of the
+    last ``max_tracked_versions`` entities and drops anything older.
+    """
+
+    def __init__(
+        self,
+        indexing_manager: IndexingManager,
+        subscriber: EventSubscriber,
+        coalesce_window: float = 0.5,
+        max_batch: int = 64,
+        data_sources: Optional[Dict[str, DataSourceConfig]] = None,
+        subjects: Sequence[str] = DEFAULT_SUBJECTS,
+        max_tracked_versions: int = 100_000,
+    ):
+        self.indexing_manager = indexing_manager
+        self.subscriber = subscriber
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+        self.data_sources = data_sources if data_sources is not None else {}
+        self.subjects = subjects
+        self.max_tracked_versions = max_tracked_versions
+
+        self.pending: Dict[str, PendingChange] = {}
+        self.versions: "OrderedDict[str, datetime]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.is_running = False
+
+        self.stats = {
+            "events_received": 0,
+            "events_coalesced": 0,
+            "events_ignored": 0,
+            "events_stale": 0,
+            "documents_indexed": 0,
+            "documents_deleted": 0,
+            "batches_applied": 0,
+            "failed_batches": 0,
+            "last_lag_seconds": 0.0,
+            "max_lag_seconds": 0.0,
+        }
+
+    async def start(self) -> None:
+        """Subscribe to domain events and start applying changes."""
+        if self.is_running:
+            return
+
+        for subject in self.subjects:
+            self.subscriber.subscribe(subject, self.handle_event)
+
+        await self.subscriber.connect()
+        self.is_running = True
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        await self.subscriber.start_consuming()
+
+        logger.info("CDC consumer started", subjects=list(self.subjects))
+
+    async def stop(self) -> None:
+        """Stop consuming and apply whatever is still pending."""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        self._wakeup.set()
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+
+        while self.pending:
+            await self._apply_pending()
+
+        await self.subscriber.disconnect()
+        logger.info("CDC consumer stopped")
+
+    def handle_event(self, event: BaseEvent) -> Optional[asyncio.Future]:
+        """Record an event's change; returns a future resolved once it is indexed."""
+        self.stats["events_received"] += 1
+
+        change = self._event_to_change(event)
+        if change is None:
+            self.stats["events_ignored"] += 1
+            return None
+
+        applied = self.versions.get(change.document_id)
+        if applied is not None and change.version < applied:
+            # A newer state is already indexed or being indexed
+            self.stats["events_stale"] += 1
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+
+        previous = self.pending.get(change.document_id)
+        if previous:
+            self.stats["events_coalesced"] += 1
+            previous.published_at = min(previous.published_at, change.published_at)
+            if change.version >= previous.version:
+                change.futures = previous.futures
+                change.published_at = previous.published_at
+            else:
+                change = previous
+        change.futures.append(future)
+        self.pending[change.document_id] = change
+
+        self._wakeup.set()
+        return future
+
+    def health_check(self) -> bool:
+        """Whether the consumer is running and subscribed to every subject."""
+        return self.is_running and self.subscriber.health_check()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending_changes": len(self.pending),
+            "subscriber": self.subscriber.get_stats(),
+        }
+
+    def _event_to_change(self, event: BaseEvent) -> Optional[PendingChange]:
+        system = event.service.split("-", 1)[0]
+        entity = event.entity_type
+        data = event.data or {}
+        record = data.get(entity)
+
+        entity_id = (event.metadata or {}).get("entity_id")
+        if entity_id is None and isinstance(record, dict):
+            entity_id = record.get("id")
+        if entity_id is None:
+            entity_id = data.get(f"{entity}_id")
+        if entity_id is None:
+            return None
+
+        source_config = self._source_for(system, entity)
+        document_id = f"{source_config.name}_{entity_id}"
+
+        if event.action == "deleted":
+            return PendingChange(document_id, "delete", None, event.timestamp, event.timestamp)
+
+        # Events such as stock.low carry a partial view; only full records are indexed
+        if not isinstance(record, dict):
+            return None
+
+        documents = records_to_documents([{**record, "id": entity_id}], source_config)
+        if not documents:
+            return None
+
+        return PendingChange(document_id, "upsert", documents[0], event.timestamp, event.timestamp)
+
+    def _source_for(self, system: str, entity: str) -> DataSourceConfig:
+        """Match a configured batch source so CDC and batch syncs share document IDs."""
+        for source_config in self.data_sources.values():
+            if (
+                source_config.type == system
+                and source_config.connection_params.get("record_type") == entity
+            ):
+                return source_config
+
+        return DataSourceConfig(
+            name=f"{system}_{entity}",
+            type=system,
+            connection_params={"record_type": entity},
+            sync_frequency="event",
+            incremental_field="updated_at",
+        )
+
+    async def _flush_loop(self) -> None:
+        try:
+            while self.is_running:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+
+                # Let a burst settle before applying it
+                await asyncio.sleep(self.coalesce_window)
+
+                while self.pending:
+                    await self._apply_pending()
+
+        except asyncio.CancelledError:
+            pass
+
+    async def _apply_pending(self) -> None:
+        """Apply up to ``max_batch`` pending changes and resolve their futures."""
+        document_ids = list(self.pending)[:self.max_batch]
+        changes = [self.pending.pop(document_id) for document_id in document_ids]
+
+        # Recorded before applying: if this fails, the same events are
+        # redelivered (same version) while older ones are still dropped
+        for change in changes:
+            self._record_version(change.document_id, change.version)
+
+        upserts = [change.document for change in changes if change.action == "upsert"]
+        deletes = [change.document_id for change in changes if change.action == "delete"]
+
+        try:
+            if upserts:
+                await self.indexing_manager.index_documents_direct(upserts, worker_id="cdc")
+            if deletes:
+                # A missing document counts as deleted, so redelivery is idempotent
+                await asyncio.gather(*(
+                    self.indexing_manager.delete_document(document_id, raise_errors=True)
+                    for document_id in deletes
+                ))
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            logger.error("Failed to apply CDC batch", error=str(e), changes=len(changes))
+            for change in changes:
+                for future in change.futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        now = datetime.utcnow()
+        lag = max((now - change.published_at).total_seconds() for change in changes)
+        self.stats["documents_indexed"] += len(upserts)
+        self.stats["documents_deleted"] += len(deletes)
+        self.stats["batches_applied"] += 1
+        self.stats["last_lag_seconds"] = lag
+        self.stats["max_lag_seconds"] = max(self.stats["max_lag_seconds"], lag)
+
+        for change in changes:
+            for future in change.futures:
+                if not future.done():
+                    future.set_result(change.document_id)
+
+        logger.debug(
+            "CDC batch applied",
+            indexed=len(upserts),
+            deleted=len(deletes),
+            lag_seconds=lag,
+        )
+
+    def _record_version(self, document_id: str, version: datetime) -> None:
+        self.versions[document_id] = version
+        self.versions.move_to_end(document_id)
+        while len(self.versions) > self.max_tracked_versions:
+            self.versions.popitem(last=False)
@@ -2,10 +2,11 @@
 
 import re
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from enum import Enum
 import structlog
+from shared.chunking import TokenChunker
 from shared.models import Document, DocumentChunk
 
 logger = structlog.get_logger(__name__)
@@ -30,11 +31,16 @@ class ProcessedDocument:
     data_format: DataFormat = DataFormat.TEXT
 
 class DocumentProcessor:
-    """Document chunking and preprocessing."""
+    """Document chunking and preprocessing.
     
-    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50):
+    ``chunk_size`` and ``chunk_overlap`` are in tokens of ``tokenizer`` (the
+    embedding model's), or of a conservative estimate when it is not given.
+    """
+    
+    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50, tokenizer: Optional[Any] = None):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.chunker = TokenChunker(max_tokens=chunk_size, overlap_tokens=chunk_overlap, tokenizer=tokenizer)
         
         # CRM/ERP field mappings
         self.crm_field_mappings = {
@@ -73,17 +79,14 @@ class DocumentProcessor:
         else:
             processed_content = document.content
         
-        # Clean and preprocess text
-        cleaned_content = self._clean_text(processed_content)
-        
-        # Create chunks
-        chunks = self._create_chunks(document.id, cleaned_content)
+        # Chunk before cleaning so boundaries and character offsets refer to the processed text
+        chunks = self._create_chunks(document.id, processed_content)
         
         # Add metadata
         processing_metadata = {
             "original_length": len(document.content),
             "processed_length": len(processed_content),
-            "cleaned_length": len(cleaned_content),
+            "cleaned_length": sum(len(chunk.content) for chunk in chunks),
             "chunk_count": len(chunks),
             "chunk_size": self.chunk_size,
             "chunk_overlap": self.chunk_overlap,
@@ -106,37 +109,25 @@ class DocumentProcessor:
         return text.strip()
     
     def _create_chunks(self, document_id: str, content: str) -> List[DocumentChunk]:
-        """Create overlapping chunks from text."""
+        """Create token-bounded, overlapping chunks that end on sentence or record boundaries."""
         chunks = []
-        words = content.split()
         
-        if len(words) <= self.chunk_size:
-            # Single chunk
+        for text_chunk in self.chunker.iter_chunks(content):
+            chunk_content = self._clean_text(text_chunk.text)
+            if not chunk_content:
+                continue
+            
             chunks.append(DocumentChunk(
                 document_id=document_id,
-                content=content,
-                chunk_index=0,
-                metadata={"word_count": len(words)},
+                content=chunk_content,
+                chunk_index=len(chunks),
+                metadata={
+                    "token_count": text_chunk.token_count,
+                    # Span in the processed text (the original content for plain text)
+                    "start_char": text_chunk.start,
+                    "end_char": text_chunk.end,
+                },
             ))
-        else:
-            # Multiple chunks with overlap
-            for i in range(0, len(words), self.chunk_size - self.chunk_overlap):
-                chunk_words = words[i:i + self.chunk_size]
-                chunk_content = ' '.join(chunk_words)
-                
-                chunks.append(DocumentChunk(
-                    document_id=document_id,
-                    content=chunk_content,
-                    chunk_index=len(chunks),
-                    metadata={
-                        "word_count": len(chunk_words),
-                        "start_word_index": i,
-                        "end_word_index": i + len(chunk_words),
-                    },
-                ))
-                
-                if i + self.chunk_size >= len(words):
-                    break
         
         return chunks
     
@@ -0,0 +1,118 @@
+"""Cross-document micro-batching of chunk embedding and upserts."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class EmbeddingCoalescer:
+    """Gathers work from concurrent indexing workers into shared batches.
+
+    Items are flushed together once their token estimate reaches
+    ``max_tokens``, ``max_items`` are waiting, or ``max_wait`` seconds have
+    passed since the first item arrived. Only one flush runs at a time, so
+    items arriving while the model is busy are picked up by the next batch.
+    ``submit`` returns once the item's batch has been flushed and re-raises
+    the batch's error otherwise.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[Any]], Awaitable[None]],
+        max_tokens: int = 8192,
+        max_items: int = 256,
+        max_wait: float = 0.05,
+    ):
+        self.flush = flush
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.max_wait = max_wait
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+
+        self.stats = {
+            "batches": 0,
+            "items": 0,
+            "tokens": 0,
+            "failed_batches": 0,
+            "flushes_on_budget": 0,
+            "flushes_on_deadline": 0,
+            "total_flush_time": 0.0,
+        }
+
+    async def submit(self, item: Any, tokens: int) -> None:
+        """Queue an item and wait until its batch has been flushed."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        self._pending_tokens += tokens
+
+        if self._pending_tokens >= self.max_tokens or len(self._pending) >= self.max_items:
+            self.stats["flushes_on_budget"] += 1
+            self._cut_batch()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._on_deadline)
+
+        await future
+
+    async def drain(self) -> None:
+        """Flush whatever is pending and wait for in-progress batches."""
+        if self._pending:
+            batch = self._take_pending()
+            await self._flush_batch(batch)
+        async with self._flush_lock:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        batches = max(self.stats["batches"], 1)
+        return {
+            **self.stats,
+            "pending_items": len(self._pending),
+            "avg_batch_items": self.stats["items"] / batches,
+            "avg_batch_tokens": self.stats["tokens"] / batches,
+        }
+
+    def _on_deadline(self) -> None:
+        self._timer = None
+        if self._pending:
+            self.stats["flushes_on_deadline"] += 1
+            self._cut_batch()
+
+    def _cut_batch(self) -> None:
+        asyncio.get_running_loop().create_task(self._flush_batch(self._take_pending()))
+
+    def _take_pending(self) -> List[Tuple[Any, asyncio.Future]]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        self.stats["tokens"] += self._pending_tokens
+        self._pending_tokens = 0
+        return batch
+
+    async def _flush_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        async with self._flush_lock:
+            start_time = time.time()
+            try:
+                await self.flush([item for item, _ in batch])
+            except Exception as e:
+                self.stats["failed_batches"] += 1
+                logger.error("Embedding batch failed", error=str(e), items=len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                self.stats["batches"] += 1
+                self.stats["items"] += len(batch)
+                self.stats["total_flush_time"] += time.time() - start_time
+
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
@@ -0,0 +1,283 @@
+"""
+Two-tier embedding cache for the RAG embedding engine.
+
+Tier 1 is an in-process LRU of NumPy arrays bounded by a byte budget.
+Tier 2 is an optional shared store (Redis or local disk) so replicas and
+restarted workers can reuse embeddings computed elsewhere.
+
+Both tiers store float32 by default; with ``dtype="float16"`` they hold half
+as many bytes per vector and hand back float32 arrays on read.
+"""
+
+import base64
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16}
+
+
+def storage_dtype(name: str) -> np.dtype:
+    """Resolve a configured vector precision name."""
+    try:
+        return np.dtype(STORAGE_DTYPES[name])
+    except KeyError:
+        raise ValueError(f"Unsupported vector precision: {name}") from None
+
+
+def encode_embeddings(vectors: Sequence[Sequence[float]], dtype: str = "float16") -> Dict[str, Any]:
+    """Pack embeddings as base64 little-endian bytes for compact HTTP responses."""
+    array = np.asarray(vectors, dtype=np.float32)
+    return {
+        "data": base64.b64encode(array.astype(storage_dtype(dtype).newbyteorder("<")).tobytes()).decode("ascii"),
+        "dtype": dtype,
+        "shape": list(array.shape),
+    }
+
+
+def decode_embeddings(payload: Dict[str, Any]) -> np.ndarray:
+    """Inverse of ``encode_embeddings``; returns a float32 array."""
+    dtype = storage_dtype(payload["dtype"]).newbyteorder("<")
+    array = np.frombuffer(base64.b64decode(payload["data"]), dtype=dtype)
+    return array.reshape(payload["shape"]).astype(np.float32)
+
+
+def embedding_cache_key(model_name: str, instruction: Optional[str], text: str) -> str:
+    """Build a stable cache key from model, instruction and text hash."""
+    digest = hashlib.sha1(f"{instruction or ''}\x1f{text}".encode("utf-8")).hexdigest()
+    return f"{model_name}:{digest}"
+
+
+class LRUEmbeddingCache:
+    """In-process LRU cache of embeddings with a byte budget."""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: Optional[int] = None,
+        dtype: str = "float32",
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.dtype = storage_dtype(dtype)
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.current_bytes = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Get an embedding and mark it as most recently used."""
+        vector = self._entries.get(key)
+        if vector is None:
+            return None
+        self._entries.move_to_end(key)
+        return vector if vector.dtype == np.float32 else vector.astype(np.float32)
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """Insert an embedding, evicting least recently used entries as needed."""
+        # Copy so a row view never pins its whole batch array in memory
+        vector = np.array(vector, dtype=self.dtype)
+        if vector.nbytes > self.max_bytes:
+            return
+
+        existing = self._entries.pop(key, None)
+        if existing is not None:
+            self.current_bytes -= existing.nbytes
+
+        self._entries[key] = vector
+        self.current_bytes += vector.nbytes
+        self._evict()
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def _evict(self) -> None:
+        while self._entries and (
+            self.current_bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+            self.evictions += 1
+
+
+class RedisEmbeddingStore:
+    """Shared embedding tier stored as raw little-endian bytes in Redis."""
+
+    def __init__(
+        self,
+        redis_manager,
+        prefix: str = "rag:emb",
+        ttl: int = 7 * 86400,
+        dtype: str = "float32",
+    ):
+        self.redis = redis_manager
+        self.dtype = storage_dtype(dtype).newbyteorder("<")
+        # Keep precisions in separate key spaces so mixed deployments never misread bytes
+        self.prefix = prefix if dtype == "float32" else f"{prefix}:{dtype}"
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Fetch many embeddings in a single MGET round-trip."""
+        if not keys:
+            return []
+        values = await self.redis.mget([self._key(key) for key in keys])
+        return [
+            np.frombuffer(value, dtype=self.dtype).astype(np.float32) if value else None
+            for value in values
+        ]
+
+    async def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store many embeddings in a single pipelined round-trip."""
+        if not items:
+            return
+        await self.redis.mset_with_ttl(
+            {
+                self._key(key): np.ascontiguousarray(vector, dtype=self.dtype).tobytes()
+                for key, vector in items.items()
+            },
+            ex=self.ttl,
+        )
+
+
+class DiskEmbeddingStore:
+    """Shared embedding tier stored as raw little-endian files on a local or mounted volume."""
+
+    def __init__(self, cache_dir: str, dtype: str = "float32"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.dtype = storage_dtype(dtype).newbyteorder("<")
+        self.suffix = ".f32" if dtype == "float32" else ".f16"
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}{self.suffix}"
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Read embeddings for the given keys; missing files are misses."""
+        results: List[Optional[np.ndarray]] = []
+        for key in keys:
+            path = self._path(key)
+            try:
+                results.append(np.fromfile(path, dtype=self.dtype).astype(np.float32))
+            except (FileNotFoundError, ValueError):
+                results.append(None)
+        return results
+
+    async def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Write embeddings atomically (write to temp file, then rename)."""
+        for key, vector in items.items():
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            np.ascontiguousarray(vector, dtype=self.dtype).tofile(tmp_path)
+            os.replace(tmp_path, path)
+
+
+class TieredEmbeddingCache:
+    """LRU memory tier backed by an optional shared tier."""
+
+    def __init__(
+        self,
+        memory_cache: LRUEmbeddingCache,
+        shared_store: Optional[Any] = None,
+    ):
+        self.memory = memory_cache
+        self.shared = shared_store
+
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.shared_errors = 0
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Look up keys in memory first, then batch-fetch the rest from the shared tier."""
+        results: List[Optional[np.ndarray]] = []
+        missing_positions: List[int] = []
+
+        for position, key in enumerate(keys):
+            vector = self.memory.get(key)
+            results.append(vector)
+            if vector is None:
+                missing_positions.append(position)
+            else:
+                self.memory_hits += 1
+
+        if missing_positions and self.shared is not None:
+            try:
+                shared_values = await self.shared.get_many(
+                    [keys[position] for position in missing_positions]
+                )
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning("Shared embedding cache lookup failed", error=str(e))
+                shared_values = [None] * len(missing_positions)
+
+            still_missing = []
+            for position, vector in zip(missing_positions, shared_values):
+                if vector is None:
+                    still_missing.append(position)
+                    continue
+                results[position] = vector
+                self.memory.put(keys[position], vector)
+                self.shared_hits += 1
+            missing_positions = still_missing
+
+        self.misses += len(missing_positions)
+        return results
+
+    async def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Write to the memory tier and the shared tier."""
+        for key, vector in items.items():
+            self.memory.put(key, vector)
+
+        if self.shared is not None and items:
+            try:
+                await self.shared.set_many(items)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning("Shared embedding cache write failed", error=str(e))
+
+    def clear(self) -> None:
+        """Clear the memory tier and reset counters (the shared tier is left intact)."""
+        self.memory.clear()
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.shared_errors = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/byte statistics for both tiers."""
+        hits = self.memory_hits + self.shared_hits
+        total = hits + self.misses
+        return {
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.current_bytes,
+            "memory_max_bytes": self.memory.max_bytes,
+            "memory_evictions": self.memory.evictions,
+            "memory_hits": self.memory_hits,
+            "shared_enabled": self.shared is not None,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+            "cache_hits": hits,
+            "cache_misses": self.misses,
+            "hit_rate": hits / max(total, 1),
+            "total_requests": total,
+        }
@@ -11,7 +11,6 @@ Features:
 """
 
 import asyncio
-import hashlib
 import time
 from enum import Enum
 from typing import List, Optional, Union, Dict, Any
@@ -20,6 +19,8 @@ import structlog
 from sentence_transformers import SentenceTransformer
 import torch
 
+from .embedding_cache import LRUEmbeddingCache, TieredEmbeddingCache, embedding_cache_key
+
 logger = structlog.get_logger(__name__)
 
 class EmbeddingModel(str, Enum):
@@ -43,7 +44,10 @@ class EmbeddingEngine:
         enable_caching: bool = True,
         cache_size: int = 10000,
         batch_size: int = 32,
-        max_sequence_length: int = 512
+        max_sequence_length: int = 512,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+        shared_cache: Optional[Any] = None,
+        vector_precision: str = "float32",
     ):
         self.model_name = model_name
         self.model: Optional[SentenceTransformer] = None
@@ -51,13 +55,15 @@ class EmbeddingEngine:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.batch_size = batch_size
         self.max_sequence_length = max_sequence_length
+        self.vector_precision = vector_precision
         
-        # Caching
+        # Caching: LRU of float32 arrays in memory, optional shared tier (Redis/disk)
         self.enable_caching = enable_caching
         self.cache_size = cache_size
-        self.embedding_cache: Dict[str, List[float]] = {}
-        self.cache_hits = 0
-        self.cache_misses = 0
+        self.embedding_cache = TieredEmbeddingCache(
+            LRUEmbeddingCache(max_bytes=cache_max_bytes, max_entries=cache_size, dtype=vector_precision),
+            shared_store=shared_cache,
+        )
         
         # Model-specific settings
         self.is_instructor_model = "instructor" in model_name.lower()
@@ -139,6 +145,22 @@ class EmbeddingEngine:
             logger.error("Failed to initialize embedding engine", error=str(e))
             raise
     
+    @property
+    def tokenizer(self) -> Optional[Any]:
+        """The model's tokenizer, used for token-bounded chunking."""
+        return getattr(self.model, "tokenizer", None)
+    
+    @property
+    def max_input_tokens(self) -> int:
+        """Document tokens that fit without truncation.
+        
+        Excludes the [CLS]/[SEP] special tokens and room for the document
+        instruction or prefix Instructor and E5 models add.
+        """
+        max_seq_length = getattr(self.model, "max_seq_length", None) or self.max_sequence_length
+        reserved = 2 + (16 if self.is_instructor_model else 4 if self.is_e5_model else 0)
+        return max(max_seq_length - reserved, 1)
+    
     async def encode(
         self, 
         text: str, 
@@ -169,30 +191,22 @@ class EmbeddingEngine:
         self.batch_count += 1
         
         try:
-            # Check cache first if enabled
-            cached_results = []
-            texts_to_encode = []
-            cache_keys = []
+            # Check cache first if enabled (memory tier, then one batched shared lookup)
+            final_embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+            cache_keys: List[str] = []
             
             if self.enable_caching and use_cache:
-                for text in texts:
-                    cache_key = self._get_cache_key(text, instruction)
-                    cache_keys.append(cache_key)
-                    
-                    if cache_key in self.embedding_cache:
-                        cached_results.append(self.embedding_cache[cache_key])
-                        self.cache_hits += 1
-                    else:
-                        cached_results.append(None)
-                        texts_to_encode.append(text)
-                        self.cache_misses += 1
-            else:
-                texts_to_encode = texts
-                cached_results = [None] * len(texts)
-                cache_keys = []
+                cache_keys = [self._get_cache_key(text, instruction) for text in texts]
+                final_embeddings = await self.embedding_cache.get_many(cache_keys)
+            
+            # Deduplicate uncached texts so repeated chunks are encoded once
+            pending: Dict[str, List[int]] = {}
+            for i, (text, cached) in enumerate(zip(texts, final_embeddings)):
+                if cached is None:
+                    pending.setdefault(text, []).append(i)
+            texts_to_encode = list(pending.keys())
             
             # Encode uncached texts
-            new_embeddings = []
             if texts_to_encode:
                 # Preprocess texts
                 processed_texts = [self._preprocess_text(text) for text in texts_to_encode]
@@ -211,29 +225,21 @@ class EmbeddingEngine:
                 else:
                     new_embeddings = await self._encode_standard(processed_texts)
                 
-                # Cache new embeddings
-                if self.enable_caching and cache_keys:
-                    encode_idx = 0
-                    for i, cached in enumerate(cached_results):
-                        if cached is None and encode_idx < len(new_embeddings):
-                            if i < len(cache_keys):
-                                self._cache_embedding(cache_keys[i], new_embeddings[encode_idx])
-                            encode_idx += 1
-            
-            # Combine cached and new embeddings
-            final_embeddings = []
-            encode_idx = 0
-            
-            for cached in cached_results:
-                if cached is not None:
-                    final_embeddings.append(cached)
-                else:
-                    if encode_idx < len(new_embeddings):
-                        final_embeddings.append(new_embeddings[encode_idx])
-                        encode_idx += 1
-                    else:
-                        # Fallback empty embedding
-                        final_embeddings.append([0.0] * self.embedding_dim)
+                new_vectors = np.asarray(new_embeddings, dtype=np.float32)
+                if self.vector_precision != "float32":
+                    # Round fresh vectors like cached ones so a text always maps to the same vector
+                    new_vectors = new_vectors.astype(self.vector_precision).astype(np.float32)
+                to_cache: Dict[str, np.ndarray] = {}
+                
+                for text, vector in zip(texts_to_encode, new_vectors):
+                    for i in pending[text]:
+                        final_embeddings[i] = vector
+                        if cache_keys:
+                            to_cache[cache_keys[i]] = vector
+                
+                # Cache new embeddings (single multi-set for the shared tier)
+                if to_cache:
+                    await self.embedding_cache.set_many(to_cache)
             
             encoding_time = time.time() - start_time
             self.total_encoding_time += encoding_time
@@ -241,14 +247,17 @@ class EmbeddingEngine:
             logger.debug(
                 "Batch encoding completed",
                 total_texts=len(texts),
-                cached_texts=len(texts) - len(texts_to_encode),
+                cached_texts=len(texts) - sum(len(positions) for positions in pending.values()),
                 encoded_texts=len(texts_to_encode),
-                cache_hit_rate=self.cache_hits / max(self.cache_hits + self.cache_misses, 1),
+                cache_hit_rate=self.embedding_cache.get_stats()["hit_rate"],
                 encoding_time=encoding_time,
                 avg_time_per_text=encoding_time / len(texts) if texts else 0
             )
             
-            return final_embeddings
+            return [
+                embedding.tolist() if embedding is not None else [0.0] * self.embedding_dim
+                for embedding in final_embeddings
+            ]
             
         except Exception as e:
             logger.error("Batch encoding failed", error=str(e))
@@ -256,17 +265,7 @@ class EmbeddingEngine:
     
     def _get_cache_key(self, text: str, instruction: Optional[str] = None) -> str:
         """Generate cache key for text and instruction."""
-        cache_input = f"{text}|{instruction or ''}|{self.model_name}"
-        return hashlib.md5(cache_input.encode()).hexdigest()
-    
-    def _cache_embedding(self, cache_key: str, embedding: List[float]) -> None:
-        """Cache embedding with LRU eviction."""
-        if len(self.embedding_cache) >= self.cache_size:
-            # Simple FIFO eviction (could be improved to LRU)
-            oldest_key = next(iter(self.embedding_cache))
-            del self.embedding_cache[oldest_key]
-        
-        self.embedding_cache[cache_key] = embedding
+        return embedding_cache_key(self.model_name, instruction, text)
     
     async def _encode_standard(self, texts: List[str]) -> List[List[float]]:
         """Standard encoding for BGE and similar models."""
@@ -447,25 +446,18 @@ class EmbeddingEngine:
             return False
     
     def clear_cache(self) -> None:
-        """Clear the embedding cache."""
+        """Clear the in-process embedding cache."""
         self.embedding_cache.clear()
-        self.cache_hits = 0
-        self.cache_misses = 0
         logger.info("Embedding cache cleared")
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get caching statistics."""
-        total_requests = self.cache_hits + self.cache_misses
-        hit_rate = self.cache_hits / max(total_requests, 1)
-        
         return {
             "cache_enabled": self.enable_caching,
-            "cache_size": len(self.embedding_cache),
+            "vector_precision": self.vector_precision,
+            "cache_size": len(self.embedding_cache.memory),
             "max_cache_size": self.cache_size,
-            "cache_hits": self.cache_hits,
-            "cache_misses": self.cache_misses,
-            "hit_rate": hit_rate,
-            "total_requests": total_requests,
+            **self.embedding_cache.get_stats(),
         }
     
     def get_stats(self) -> Dict[str, Any]:
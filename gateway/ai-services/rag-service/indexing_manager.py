@@ -1,20 +1,38 @@
 """Enhanced incremental indexing manager with document tracking and bulk operations."""
 
 import asyncio
+import hashlib
 import json
 import time
 import uuid
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Set, Tuple
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterable, Optional, Set, Tuple
 from enum import Enum
 import structlog
 from shared.models import Document
 from shared.database import RedisManager
 from .document_processor import ProcessedDocument, DataFormat
+from .sparse_index import InvertedIndex
+from .embedding_batcher import EmbeddingCoalescer
 
 logger = structlog.get_logger(__name__)
 
+# Payload fields that change on every write and must not affect the fingerprint
+VOLATILE_PAYLOAD_FIELDS = ("indexed_at", "worker_id")
+
+
+def chunk_fingerprint(model_name: str, content: str) -> str:
+    """Fingerprint of everything that determines a chunk's embedding."""
+    return hashlib.sha1(f"{model_name}\x1f{content}".encode("utf-8")).hexdigest()
+
+
+def payload_fingerprint(payload: Dict[str, Any]) -> str:
+    """Fingerprint of a point payload, ignoring volatile fields."""
+    stable = {key: value for key, value in payload.items() if key not in VOLATILE_PAYLOAD_FIELDS}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
 class IndexingStatus(str, Enum):
     """Document indexing status."""
     PENDING = "pending"
@@ -66,7 +84,11 @@ class IndexingManager:
         redis_manager: RedisManager,
         max_retry_attempts: int = 3,
         bulk_batch_size: int = 100,
-        concurrent_workers: int = 4
+        concurrent_workers: int = 4,
+        sparse_index: Optional[InvertedIndex] = None,
+        embedding_batch_tokens: int = 8192,
+        embedding_batch_wait: float = 0.05,
+        max_inflight_documents: int = 64,
     ):
         self.vector_db = vector_db
         self.embedding_engine = embedding_engine
@@ -75,6 +97,20 @@ class IndexingManager:
         self.max_retry_attempts = max_retry_attempts
         self.bulk_batch_size = bulk_batch_size
         self.concurrent_workers = concurrent_workers
+        self.sparse_index = sparse_index
+        self.max_inflight_documents = max_inflight_documents
+        
+        # Chunks from concurrently indexed documents are embedded and upserted
+        # together; a zero token budget applies each document on its own. Once
+        # every in-flight document is waiting there is no point waiting longer.
+        self.embedding_coalescer: Optional[EmbeddingCoalescer] = None
+        if embedding_batch_tokens > 0:
+            self.embedding_coalescer = EmbeddingCoalescer(
+                self._apply_chunk_plans,
+                max_tokens=embedding_batch_tokens,
+                max_items=max_inflight_documents,
+                max_wait=embedding_batch_wait,
+            )
         
         # Redis keys
         self.queue_key = "rag:indexing_queue"
@@ -87,11 +123,21 @@ class IndexingManager:
         self.is_running = False
         self.processor_tasks: List[asyncio.Task] = []
         self.bulk_processor_task: Optional[asyncio.Task] = None
+        self.document_tasks: Set[asyncio.Task] = set()
+        self._document_slots = asyncio.Semaphore(max_inflight_documents)
+        
+        # One writer per document ID: in-flight tasks for the same document
+        # would otherwise diff against the same stored chunks and race
+        self._document_locks: Dict[str, asyncio.Lock] = {}
+        self._document_lock_users: Dict[str, int] = {}
         
         # In-memory caches
         self.document_cache: Dict[str, IndexedDocument] = {}
         self.active_jobs: Dict[str, IndexingJob] = {}
         
+        # Called with document IDs whose indexed content changed or was removed
+        self.change_listeners: List[Callable[[List[str]], None]] = []
+        
         # Statistics
         self.stats = {
             "indexed_documents": 0,
@@ -102,6 +148,10 @@ class IndexingManager:
             "last_indexing_time": None,
             "cache_hits": 0,
             "cache_misses": 0,
+            "chunks_embedded": 0,
+            "chunks_reused": 0,
+            "chunks_skipped": 0,
+            "chunks_deleted": 0,
         }
     
     async def start(self) -> None:
@@ -122,6 +172,10 @@ class IndexingManager:
         # Load document registry cache
         await self._load_document_cache()
         
+        # Catch the keyword index up with the vectors before any worker writes
+        if self.sparse_index:
+            await self._ensure_sparse_index()
+        
         # Start multiple worker tasks for concurrent processing
         for i in range(self.concurrent_workers):
             task = asyncio.create_task(self._process_queue_worker(f"worker-{i}"))
@@ -156,9 +210,22 @@ class IndexingManager:
         except asyncio.CancelledError:
             pass
         
+        # Let documents already being indexed finish their batch
+        if self.document_tasks:
+            await asyncio.gather(*self.document_tasks, return_exceptions=True)
+        if self.embedding_coalescer:
+            await self.embedding_coalescer.drain()
+        
         # Save statistics
         await self._save_stats()
         
+        # Persist pending sparse index changes
+        if self.sparse_index:
+            try:
+                await self.sparse_index.flush()
+            except Exception as e:
+                logger.warning("Failed to flush sparse index", error=str(e))
+        
         logger.info("Enhanced indexing manager stopped")
     
     async def index_document(self, document: Document, job_type: str = "single") -> str:
@@ -281,38 +348,127 @@ class IndexingManager:
             logger.error("Failed to queue bulk indexing job", error=str(e))
             raise
     
-    async def delete_document(self, document_id: str) -> bool:
-        """Delete document from index with proper tracking."""
+    async def index_documents_direct(self, documents: List[Document], worker_id: str = "direct") -> int:
+        """Index documents immediately, bypassing the Redis queues.
+        
+        Used by latency-sensitive callers such as the CDC consumer. Changed
+        chunks from every document are embedded in a single batch and
+        upserted in one call. Returns the number of documents indexed.
+        """
+        if not documents:
+            return 0
+        
+        start_time = time.time()
+        
+        processed_docs = await asyncio.gather(
+            *(self.document_processor.process_document(document) for document in documents)
+        )
+        async with self._document_lock(document.id for document in documents):
+            plans = [
+                await self._plan_chunks(document, processed, worker_id)
+                for document, processed in zip(documents, processed_docs)
+            ]
+            await self._apply_chunk_plans(plans)
+        
+        processing_time = time.time() - start_time
+        now = datetime.utcnow()
+        
+        for document, processed in zip(documents, processed_docs):
+            indexed_doc = await self._get_indexed_document(document.id)
+            if indexed_doc:
+                indexed_doc.version += 1
+            else:
+                indexed_doc = IndexedDocument(
+                    id=document.id,
+                    source=document.source or "unknown",
+                    status=IndexingStatus.COMPLETED,
+                    created_at=now,
+                    updated_at=now,
+                    chunk_count=0,
+                    data_format="text",
+                    metadata=document.metadata or {},
+                )
+            indexed_doc.status = IndexingStatus.COMPLETED
+            indexed_doc.chunk_count = len(processed.chunks)
+            indexed_doc.data_format = processed.data_format.value
+            indexed_doc.processing_time = processing_time / len(documents)
+            indexed_doc.updated_at = now
+            indexed_doc.error_message = None
+            await self._save_indexed_document(indexed_doc)
+        
+        self.stats["indexed_documents"] += len(documents)
+        self.stats["total_processing_time"] += processing_time
+        self.stats["average_processing_time"] = (
+            self.stats["total_processing_time"] / self.stats["indexed_documents"]
+        )
+        self.stats["last_indexing_time"] = now.isoformat()
+        
+        logger.info(
+            "Documents indexed directly",
+            document_count=len(documents),
+            worker_id=worker_id,
+            processing_time=processing_time,
+        )
+        
+        return len(documents)
+    
+    async def delete_document(self, document_id: str, raise_errors: bool = False) -> bool:
+        """Delete document from index with proper tracking.
+        
+        Returns False if the document isn't indexed. Failures are logged and
+        reported as False too, unless ``raise_errors`` is set (CDC needs them
+        to nak the event, while a missing document is already deleted).
+        """
         try:
-            # Get document info
-            indexed_doc = await self._get_indexed_document(document_id)
-            if not indexed_doc:
-                logger.warning("Document not found in registry", document_id=document_id)
-                return False
-            
-            # Delete from vector database
-            # In a real implementation, you'd track chunk IDs properly
-            chunk_ids = [f"{document_id}_{i}" for i in range(indexed_doc.chunk_count)]
-            if chunk_ids:
-                await self.vector_db.delete_vectors(chunk_ids)
-            
-            # Remove from registry
-            await self.redis_manager.hdel(self.document_registry_key, document_id)
-            if document_id in self.document_cache:
-                del self.document_cache[document_id]
-            
-            logger.info(
-                "Document deleted successfully",
-                document_id=document_id,
-                chunk_count=indexed_doc.chunk_count
-            )
-            
-            return True
-            
+            async with self._document_lock([document_id]):
+                return await self._delete_document(document_id)
         except Exception as e:
             logger.error("Failed to delete document", error=str(e), document_id=document_id)
+            if raise_errors:
+                raise
             return False
     
+    async def _delete_document(self, document_id: str) -> bool:
+        # Get document info
+        indexed_doc = await self._get_indexed_document(document_id)
+        
+        # Find the document's points; documents indexed through bulk jobs
+        # or before a restart may not be in the registry
+        existing = await self.vector_db.scroll(filter_conditions={"document_id": document_id})
+        chunk_ids = [str(point["id"]) for point in existing]
+        if not chunk_ids and indexed_doc:
+            chunk_ids = [f"{document_id}_{i}" for i in range(indexed_doc.chunk_count)]
+        
+        if not indexed_doc and not chunk_ids:
+            logger.warning("Document not found in registry", document_id=document_id)
+            return False
+        
+        # Delete from vector database
+        if chunk_ids:
+            await self.vector_db.delete_vectors(chunk_ids)
+            if self.sparse_index:
+                self.sparse_index.remove_documents(chunk_ids)
+                await self.sparse_index.maybe_flush()
+        
+        # Remove from registry
+        await self.redis_manager.hdel(self.document_registry_key, document_id)
+        if document_id in self.document_cache:
+            del self.document_cache[document_id]
+        
+        self._notify_documents_changed([document_id])
+        
+        logger.info(
+            "Document deleted successfully",
+            document_id=document_id,
+            chunk_count=len(chunk_ids)
+        )
+        
+        return True
+    
+    def add_change_listener(self, listener: Callable[[List[str]], None]) -> None:
+        """Register a callback for documents whose indexed chunks change."""
+        self.change_listeners.append(listener)
+    
     async def get_job_status(self, job_id: str) -> Optional[IndexingJob]:
         """Get job status information."""
         # Check active jobs first
@@ -386,6 +542,25 @@ class IndexingManager:
             logger.error("Failed to reindex document", error=str(e), document_id=document_id)
             raise
     
+    async def rebuild_sparse_index(self) -> int:
+        """Rebuild the keyword index from the chunks stored in the vector database."""
+        self.sparse_index.clear()
+        async for page in self.vector_db.scroll_pages():
+            for point in page:
+                content = (point["payload"] or {}).get("content")
+                if content:
+                    self.sparse_index.add_document(str(point["id"]), content)
+        await self.sparse_index.flush()
+        
+        logger.info("Sparse index rebuilt from vector database", documents=len(self.sparse_index))
+        return len(self.sparse_index)
+    
+    async def get_queue_depth(self) -> int:
+        """Get the number of queued single and bulk indexing entries."""
+        queue_length = await self.redis_manager.client.llen(self.queue_key)
+        bulk_queue_length = await self.redis_manager.client.llen(self.bulk_queue_key)
+        return queue_length + bulk_queue_length
+    
     async def get_indexing_stats(self) -> Dict[str, Any]:
         """Get comprehensive indexing statistics."""
         await self._refresh_stats()
@@ -409,10 +584,33 @@ class IndexingManager:
             "active_jobs": len(self.active_jobs),
             "concurrent_workers": self.concurrent_workers,
             "bulk_batch_size": self.bulk_batch_size,
+            "sparse_index": self.sparse_index.get_stats() if self.sparse_index else None,
+            "inflight_documents": len(self.document_tasks),
+            "embedding_batches": self.embedding_coalescer.get_stats() if self.embedding_coalescer else None,
         }
     
     # Private methods
     
+    async def _ensure_sparse_index(self) -> None:
+        """Rebuild the keyword index if its checkpoint is stale or misses chunks."""
+        try:
+            vector_count = await self.vector_db.count()
+        except Exception as e:
+            logger.warning("Failed to count vectors, keeping sparse index as loaded", error=str(e))
+            return
+        
+        if not self.sparse_index.stale and len(self.sparse_index) == vector_count:
+            return
+        
+        logger.info(
+            "Sparse index out of step with vector database, rebuilding",
+            stale=self.sparse_index.stale,
+            sparse_documents=len(self.sparse_index),
+            vectors=vector_count,
+        )
+        await self.rebuild_sparse_index()
+        self.sparse_index.stale = False
+    
     async def _process_queue_worker(self, worker_id: str) -> None:
         """Process the indexing queue with a single worker."""
         logger.info("Indexing queue worker started", worker_id=worker_id)
@@ -424,7 +622,14 @@ class IndexingManager:
                     document_data = await self.redis_manager.rpop(self.queue_key)
                     
                     if document_data:
-                        await self._index_single_document(json.loads(document_data), worker_id)
+                        # Hand the document off so this worker can keep feeding
+                        # the embedding batch while earlier documents wait on it
+                        await self._document_slots.acquire()
+                        task = asyncio.create_task(
+                            self._index_single_document(json.loads(document_data), worker_id)
+                        )
+                        self.document_tasks.add(task)
+                        task.add_done_callback(self._on_document_task_done)
                     else:
                         # No documents in queue, sleep briefly
                         await asyncio.sleep(1)
@@ -438,6 +643,10 @@ class IndexingManager:
         finally:
             logger.info("Indexing queue worker stopped", worker_id=worker_id)
     
+    def _on_document_task_done(self, task: asyncio.Task) -> None:
+        self.document_tasks.discard(task)
+        self._document_slots.release()
+    
     async def _process_bulk_queue(self) -> None:
         """Process bulk indexing jobs."""
         logger.info("Bulk indexing processor started")
@@ -462,8 +671,41 @@ class IndexingManager:
         finally:
             logger.info("Bulk indexing processor stopped")
     
+    @asynccontextmanager
+    async def _document_lock(self, document_ids: Iterable[str]) -> AsyncIterator[None]:
+        """Hold the locks of several documents, taken in sorted order."""
+        document_ids = sorted(set(document_ids))
+        for document_id in document_ids:
+            if document_id not in self._document_locks:
+                self._document_locks[document_id] = asyncio.Lock()
+                self._document_lock_users[document_id] = 0
+            self._document_lock_users[document_id] += 1
+        
+        acquired = []
+        try:
+            for document_id in document_ids:
+                await self._document_locks[document_id].acquire()
+                acquired.append(document_id)
+            yield
+        finally:
+            for document_id in acquired:
+                self._document_locks[document_id].release()
+            for document_id in document_ids:
+                self._document_lock_users[document_id] -= 1
+                if not self._document_lock_users[document_id]:
+                    del self._document_lock_users[document_id]
+                    del self._document_locks[document_id]
+    
     async def _index_single_document(self, document_data: Dict[str, Any], worker_id: str) -> None:
-        """Index a single document with enhanced tracking."""
+        """Index a single document with enhanced tracking.
+        
+        The document's lock is taken before anything else, so versions of one
+        document popped back to back are applied in queue order.
+        """
+        async with self._document_lock([document_data["id"]]):
+            await self._index_document_data(document_data, worker_id)
+    
+    async def _index_document_data(self, document_data: Dict[str, Any], worker_id: str) -> None:
         document_id = document_data["id"]
         job_id = document_data.get("job_id")
         
@@ -496,43 +738,8 @@ class IndexingManager:
             # Process document
             processed = await self.document_processor.process_document(document)
             
-            # Generate embeddings for chunks
-            if processed.chunks:
-                chunk_texts = [chunk.content for chunk in processed.chunks]
-                
-                # Use optimized encoding method
-                if hasattr(self.embedding_engine, 'encode_documents'):
-                    embeddings = await self.embedding_engine.encode_documents(chunk_texts)
-                else:
-                    embeddings = await self.embedding_engine.encode_batch(chunk_texts)
-                
-                # Prepare vectors for Qdrant
-                vectors = []
-                payloads = []
-                ids = []
-                
-                for i, (chunk, embedding) in enumerate(zip(processed.chunks, embeddings)):
-                    chunk_id = f"{document_id}_{i}"
-                    
-                    vectors.append(embedding)
-                    payloads.append({
-                        "content": chunk.content,
-                        "document_id": document_id,
-                        "chunk_index": chunk.chunk_index,
-                        "source": document.source,
-                        "data_format": processed.data_format.value,
-                        "metadata": {**document.metadata, **chunk.metadata},
-                        "indexed_at": datetime.utcnow().isoformat(),
-                        "worker_id": worker_id,
-                    })
-                    ids.append(chunk_id)
-                
-                # Upsert to vector database
-                await self.vector_db.upsert_vectors(
-                    vectors=vectors,
-                    payloads=payloads,
-                    ids=ids,
-                )
+            # Embed and upsert only the chunks whose content or payload changed
+            await self._sync_chunks(document, processed, worker_id)
             
             processing_time = time.time() - start_time
             
@@ -621,6 +828,149 @@ class IndexingManager:
                 retry_count=indexed_doc.retry_count if indexed_doc else 0
             )
     
+    async def _sync_chunks(self, document: Document, processed: ProcessedDocument, worker_id: str) -> None:
+        """Diff a document's chunks against the fingerprints stored with its points.
+        
+        Unchanged chunks are skipped, chunks whose content moved position or whose
+        payload changed reuse the stored vector, only new content is embedded,
+        and points beyond the new chunk count are deleted.
+        """
+        plan = await self._plan_chunks(document, processed, worker_id)
+        
+        if self.embedding_coalescer:
+            tokens = sum(len(plan["payloads"][index]["content"].split()) for index in plan["to_embed"])
+            await self.embedding_coalescer.submit(plan, tokens)
+        else:
+            await self._apply_chunk_plans([plan])
+    
+    async def _plan_chunks(
+        self,
+        document: Document,
+        processed: ProcessedDocument,
+        worker_id: str,
+    ) -> Dict[str, Any]:
+        """Work out which of a document's chunks need upserting, embedding or deleting."""
+        document_id = document.id
+        model_name = getattr(self.embedding_engine, "model_name", "")
+        
+        existing = await self.vector_db.scroll(
+            filter_conditions={"document_id": document_id},
+            with_vectors=True,
+        )
+        existing_by_id = {str(point["id"]): point for point in existing}
+        vectors_by_hash = {
+            point["payload"].get("content_hash"): point["vector"]
+            for point in existing
+            if point["payload"] and point["payload"].get("content_hash") and point["vector"] is not None
+        }
+        
+        ids, payloads, vectors = [], [], []
+        to_embed: List[int] = []
+        skipped = 0
+        
+        for i, chunk in enumerate(processed.chunks):
+            chunk_id = f"{document_id}_{i}"
+            content_hash = chunk_fingerprint(model_name, chunk.content)
+            payload = {
+                "content": chunk.content,
+                "document_id": document_id,
+                "chunk_index": chunk.chunk_index,
+                "source": document.source,
+                "data_format": processed.data_format.value,
+                "metadata": {**document.metadata, **chunk.metadata},
+                "content_hash": content_hash,
+                "indexed_at": datetime.utcnow().isoformat(),
+                "worker_id": worker_id,
+            }
+            
+            stored = existing_by_id.get(chunk_id)
+            if stored and payload_fingerprint(stored["payload"] or {}) == payload_fingerprint(payload):
+                skipped += 1
+                continue
+            
+            ids.append(chunk_id)
+            payloads.append(payload)
+            vectors.append(vectors_by_hash.get(content_hash))
+            if vectors[-1] is None:
+                to_embed.append(len(vectors) - 1)
+        
+        live_ids = {f"{document_id}_{i}" for i in range(len(processed.chunks))}
+        
+        return {
+            "document_id": document_id,
+            "ids": ids,
+            "payloads": payloads,
+            "vectors": vectors,
+            "to_embed": to_embed,
+            "skipped": skipped,
+            "orphan_ids": [chunk_id for chunk_id in existing_by_id if chunk_id not in live_ids],
+        }
+    
+    async def _apply_chunk_plans(self, plans: List[Dict[str, Any]]) -> None:
+        """Embed, upsert and delete for one or more chunk plans in single round trips."""
+        pending = [(plan, index) for plan in plans for index in plan["to_embed"]]
+        
+        if pending:
+            chunk_texts = [plan["payloads"][index]["content"] for plan, index in pending]
+            
+            # Use optimized encoding method
+            if hasattr(self.embedding_engine, 'encode_documents'):
+                embeddings = await self.embedding_engine.encode_documents(chunk_texts)
+            else:
+                embeddings = await self.embedding_engine.encode_batch(chunk_texts)
+            
+            for (plan, index), embedding in zip(pending, embeddings):
+                plan["vectors"][index] = embedding
+        
+        ids = [chunk_id for plan in plans for chunk_id in plan["ids"]]
+        payloads = [payload for plan in plans for payload in plan["payloads"]]
+        orphan_ids = [chunk_id for plan in plans for chunk_id in plan["orphan_ids"]]
+        
+        if ids:
+            await self.vector_db.upsert_vectors(
+                vectors=[vector for plan in plans for vector in plan["vectors"]],
+                payloads=payloads,
+                ids=ids,
+            )
+        
+        if orphan_ids:
+            await self.vector_db.delete_vectors(orphan_ids)
+        
+        # Keep the keyword index in step with the vectors
+        if self.sparse_index:
+            for chunk_id, payload in zip(ids, payloads):
+                self.sparse_index.add_document(chunk_id, payload["content"])
+            self.sparse_index.remove_documents(orphan_ids)
+            await self.sparse_index.maybe_flush()
+        
+        self._notify_documents_changed([
+            plan["document_id"] for plan in plans if plan["ids"] or plan["orphan_ids"]
+        ])
+        
+        skipped = sum(plan["skipped"] for plan in plans)
+        self.stats["chunks_embedded"] += len(pending)
+        self.stats["chunks_reused"] += len(ids) - len(pending)
+        self.stats["chunks_skipped"] += skipped
+        self.stats["chunks_deleted"] += len(orphan_ids)
+        
+        logger.debug(
+            "Chunks synced",
+            document_ids=[plan["document_id"] for plan in plans],
+            embedded=len(pending),
+            reused=len(ids) - len(pending),
+            skipped=skipped,
+            deleted=len(orphan_ids),
+        )
+    
+    def _notify_documents_changed(self, document_ids: List[str]) -> None:
+        if not document_ids:
+            return
+        for listener in self.change_listeners:
+            try:
+                listener(document_ids)
+            except Exception as e:
+                logger.warning("Document change listener failed", error=str(e))
+    
     async def _process_bulk_job(self, bulk_data: Dict[str, Any]) -> None:
         """Process a bulk indexing job."""
         job_id = bulk_data["job_id"]
@@ -11,9 +11,10 @@ Provides:
 """
 
 import asyncio
+import json
 import time
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional
 
 import structlog
 import uvicorn
@@ -22,14 +23,20 @@ from fastapi.responses import StreamingResponse
 
 from shared.config import RAGServiceConfig, get_config, setup_logging
 from shared.database import VectorDatabaseManager, RedisManager, CacheStore
+from shared.events import EventSubscriber
 from shared.exceptions import ValidationError, ServiceUnavailableError
 from shared.middleware import setup_middleware
 from shared.models import (
+    BatchSearchRequest,
+    BatchSearchResponse,
     Document,
     VectorSearchRequest,
     VectorSearchResponse,
     RAGRequest,
     RAGResponse,
+    RAGContextRequest,
+    RAGContextResponse,
+    RAGPassage,
     SearchResult,
     HealthResponse,
     HealthStatus,
@@ -39,9 +46,14 @@ from shared.monitoring import init_metrics, get_metrics, health_checker, metrics
 from shared.utils import generate_uuid
 
 from .embeddings import EmbeddingEngine
+from .embedding_cache import RedisEmbeddingStore, DiskEmbeddingStore, STORAGE_DTYPES, encode_embeddings
 from .document_processor import DocumentProcessor
-from .search_engine import HybridSearchEngine
+from .search_engine import HybridSearchEngine, SearchDeadlines
 from .indexing_manager import IndexingManager
+from .sparse_index import InvertedIndex
+from .cdc_consumer import CDCConsumer
+from .batch_processor import load_data_sources
+from .semantic_cache import SemanticCache
 from .citation_generator import CitationGenerator
 
 logger = structlog.get_logger(__name__)
@@ -56,13 +68,23 @@ citation_generator: Optional[CitationGenerator] = None
 vector_db: Optional[VectorDatabaseManager] = None
 redis_manager: Optional[RedisManager] = None
 cache_store: Optional[CacheStore] = None
+cdc_consumer: Optional[CDCConsumer] = None
+semantic_cache: Optional[SemanticCache] = None
+
+# Retrieval latency budgets applied when a request does not set its own
+default_latency_budget_ms: Optional[float] = None
+default_stage_budgets_ms: Dict[str, float] = {}
+
+NO_ANSWER = "I apologize, but I couldn't generate an answer based on the available context."
+ANSWER_ERROR = "I encountered an error while generating the answer. Please try again."
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Manage service lifecycle."""
     global embedding_engine, document_processor, search_engine, indexing_manager
-    global citation_generator, vector_db, redis_manager, cache_store
+    global citation_generator, vector_db, redis_manager, cache_store, cdc_consumer, semantic_cache
+    global default_latency_budget_ms, default_stage_budgets_ms
     
     config = get_config()
     rag_config = RAGServiceConfig()
@@ -83,16 +105,42 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         await vector_db.create_collection()
         logger.info("Qdrant vector database initialized")
         
-        # Initialize embedding engine
-        embedding_engine = EmbeddingEngine(config.models.embedding_model)
+        # Initialize embedding engine with a shared tier-2 cache
+        shared_embedding_cache = None
+        if rag_config.embedding_cache_backend == "redis":
+            shared_embedding_cache = RedisEmbeddingStore(
+                redis_manager,
+                ttl=rag_config.embedding_cache_ttl,
+                dtype=rag_config.vector_precision,
+            )
+        elif rag_config.embedding_cache_backend == "disk":
+            shared_embedding_cache = DiskEmbeddingStore(
+                rag_config.embedding_cache_dir, dtype=rag_config.vector_precision
+            )
+        
+        embedding_engine = EmbeddingEngine(
+            config.models.embedding_model,
+            cache_max_bytes=rag_config.embedding_cache_max_bytes,
+            shared_cache=shared_embedding_cache,
+            vector_precision=rag_config.vector_precision,
+        )
         await embedding_engine.initialize()
         logger.info("Embedding engine initialized")
         
-        # Initialize document processor
+        # Initialize document processor, chunking in the embedding model's tokens
         document_processor = DocumentProcessor(
-            chunk_size=rag_config.chunk_size,
+            chunk_size=min(rag_config.chunk_size, embedding_engine.max_input_tokens),
             chunk_overlap=rag_config.chunk_overlap,
+            tokenizer=embedding_engine.tokenizer,
+        )
+        
+        # Load the persistent BM25 index; the indexing manager rebuilds it from
+        # Qdrant on start if the checkpoint is stale or misses chunks
+        sparse_index = InvertedIndex(
+            rag_config.sparse_index_dir,
+            flush_threshold=rag_config.sparse_index_flush_threshold,
         )
+        sparse_index.load()
         
         # Initialize search engine
         search_engine = HybridSearchEngine(
@@ -100,7 +148,10 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             embedding_engine=embedding_engine,
             dense_weight=rag_config.dense_weight,
             sparse_weight=rag_config.sparse_weight,
+            sparse_index=sparse_index,
         )
+        default_latency_budget_ms = rag_config.search_latency_budget_ms or None
+        default_stage_budgets_ms = _parse_stage_budgets(rag_config.search_stage_budgets_ms)
         
         # Initialize citation generator
         citation_generator = CitationGenerator()
@@ -111,10 +162,44 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             embedding_engine=embedding_engine,
             document_processor=document_processor,
             redis_manager=redis_manager,
+            sparse_index=sparse_index,
+            embedding_batch_tokens=rag_config.embedding_batch_tokens,
+            embedding_batch_wait=rag_config.embedding_batch_wait,
+            max_inflight_documents=rag_config.indexing_max_inflight_documents,
         )
         await indexing_manager.start()
         logger.info("Indexing manager started")
         
+        # Semantic result cache, invalidated whenever a cited document is reindexed
+        if rag_config.semantic_cache_enabled:
+            semantic_cache = SemanticCache(
+                similarity_threshold=rag_config.semantic_cache_threshold,
+                max_entries=rag_config.semantic_cache_max_entries,
+                ttl=rag_config.semantic_cache_ttl,
+            )
+            indexing_manager.add_change_listener(semantic_cache.invalidate_documents)
+        
+        # Index CRM/ERP changes as their domain events arrive
+        if rag_config.cdc_enabled:
+            try:
+                data_sources = await load_data_sources(redis_manager)
+            except Exception as e:
+                logger.warning("Failed to load data sources for CDC", error=str(e))
+                data_sources = {}
+            cdc_consumer = CDCConsumer(
+                indexing_manager=indexing_manager,
+                subscriber=EventSubscriber(
+                    rag_config.nats_servers.split(","),
+                    consumer_name=rag_config.name,
+                ),
+                coalesce_window=rag_config.cdc_coalesce_window,
+                max_batch=rag_config.cdc_max_batch,
+                data_sources=data_sources,
+            )
+            await cdc_consumer.start()
+            health_checker.add_check("cdc", cdc_consumer.health_check)
+            logger.info("CDC consumer started", data_sources=len(data_sources))
+        
         # Setup health checks
         health_checker.add_check("redis", redis_manager.health_check)
         health_checker.add_check("vector_db", vector_db.health_check)
@@ -130,6 +215,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         logger.info("Shutting down RAG Pipeline Service")
         
         # Cleanup resources
+        if cdc_consumer:
+            await cdc_consumer.stop()
         if indexing_manager:
             await indexing_manager.stop()
         if vector_db:
@@ -290,22 +377,32 @@ async def search_documents(request: VectorSearchRequest) -> VectorSearchResponse
     start_time = time.time()
     
     try:
-        # Check cache
+        # Check cache: semantically when enabled (invalidated on reindex), else by
+        # exact query. Keyword queries always match exactly: "invoice 10234" and
+        # "invoice 10243" embed almost identically but want different results
         cache_key = None
-        if cache_store:
-            cache_key = cache_store.cache_key(
-                "search",
-                request.query,
-                str(request.top_k),
-                str(request.search_type.value),
-                str(request.similarity_threshold),
-            )
+        query_vector = None
+        partition = _search_partition(request)
+        if semantic_cache and embedding_engine and request.search_type != VectorSearchType.SPARSE:
+            query_vector = await embedding_engine.encode(request.query)
+            cached_result = semantic_cache.lookup(partition, query_vector)
+            if cached_result:
+                logger.info("Semantic cache hit for search query")
+                return VectorSearchResponse(**{
+                    **cached_result,
+                    "query": request.query,
+                    "processing_time": time.time() - start_time,
+                    "stage_timings_ms": {},
+                })
+        elif cache_store:
+            cache_key = cache_store.cache_key("search", request.query, partition)
             cached_result = await cache_store.get(cache_key)
             if cached_result:
                 logger.info("Cache hit for search query")
                 return VectorSearchResponse(**cached_result)
         
-        # Perform search
+        # Perform search, degrading to partial results if a stage overruns its budget
+        deadlines = _search_deadlines(request.latency_budget_ms, request.stage_budgets_ms)
         results = await search_engine.search(
             query=request.query,
             top_k=request.top_k,
@@ -313,6 +410,7 @@ async def search_documents(request: VectorSearchRequest) -> VectorSearchResponse
             similarity_threshold=request.similarity_threshold,
             filters=request.filters,
             include_metadata=request.include_metadata,
+            deadlines=deadlines,
         )
         
         processing_time = time.time() - start_time
@@ -323,10 +421,14 @@ async def search_documents(request: VectorSearchRequest) -> VectorSearchResponse
             results=results,
             total_results=len(results),
             processing_time=processing_time,
+            stage_timings_ms=deadlines.timings_ms,
+            partial=deadlines.partial,
         )
         
-        # Cache response
-        if cache_key and cache_store:
+        # Cache response; partial results would outlive the slowdown that caused them
+        if query_vector is not None and not deadlines.partial:
+            semantic_cache.store(partition, query_vector, response.dict(), _cited_document_ids(results))
+        elif cache_key and cache_store and not deadlines.partial:
             await cache_store.set(cache_key, response.dict(), ttl=300)
         
         # Record metrics
@@ -362,6 +464,104 @@ async def search_documents(request: VectorSearchRequest) -> VectorSearchResponse
         raise HTTPException(status_code=500, detail="Internal server error during search")
 
 
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_documents_batch(request: BatchSearchRequest) -> BatchSearchResponse:
+    """Search several queries at once.
+    
+    Queries are embedded in one batch, dense retrieval is a single Qdrant
+    batch search and sparse scoring is one pass over the shared index.
+    """
+    if not search_engine:
+        raise ServiceUnavailableError("Search engine not initialized")
+    
+    start_time = time.time()
+    
+    try:
+        queries = request.queries
+        partitions = [_search_partition(query) for query in queries]
+        responses: List[Optional[VectorSearchResponse]] = [None] * len(queries)
+        
+        # Answer what we can from the semantic cache; the same vectors feed dense
+        # retrieval. Keyword-only queries are neither embedded nor cached, as in /search
+        query_vectors = None
+        cacheable = [i for i, query in enumerate(queries) if query.search_type != VectorSearchType.SPARSE]
+        if semantic_cache and embedding_engine and cacheable:
+            query_vectors = [None] * len(queries)
+            vectors = await embedding_engine.encode_batch([queries[i].query for i in cacheable])
+            for i, vector in zip(cacheable, vectors):
+                query_vectors[i] = vector
+                cached_result = semantic_cache.lookup(partitions[i], vector)
+                if cached_result:
+                    responses[i] = VectorSearchResponse(**{
+                        **cached_result,
+                        "query": queries[i].query,
+                        "stage_timings_ms": {},
+                    })
+        
+        deadlines = _search_deadlines(request.latency_budget_ms, request.stage_budgets_ms)
+        misses = [i for i, response in enumerate(responses) if response is None]
+        if misses:
+            batch_results = await search_engine.search_batch(
+                [queries[i] for i in misses],
+                query_vectors=[query_vectors[i] for i in misses] if query_vectors is not None else None,
+                deadlines=deadlines,
+            )
+            for i, results in zip(misses, batch_results):
+                responses[i] = VectorSearchResponse(
+                    query=queries[i].query,
+                    results=results,
+                    total_results=len(results),
+                    processing_time=0.0,
+                    partial=deadlines.partial,
+                )
+                if query_vectors is not None and query_vectors[i] is not None and not deadlines.partial:
+                    semantic_cache.store(
+                        partitions[i], query_vectors[i], responses[i].dict(), _cited_document_ids(results)
+                    )
+        
+        processing_time = time.time() - start_time
+        for response in responses:
+            response.processing_time = processing_time
+        
+        # Record metrics
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_vector_operation("search_batch", processing_time)
+        
+        return BatchSearchResponse(
+            results=responses,
+            total_queries=len(responses),
+            processing_time=processing_time,
+            stage_timings_ms=deadlines.timings_ms,
+            partial=deadlines.partial,
+        )
+        
+    except ValidationError as e:
+        logger.error("Batch search request validation failed", error=str(e))
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_error("search_batch_validation_error", "rag_service")
+        raise HTTPException(status_code=400, detail=f"Invalid batch search request: {str(e)}")
+    except ServiceUnavailableError as e:
+        logger.error("Batch search service unavailable", error=str(e))
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_error("search_batch_service_unavailable", "rag_service")
+        raise HTTPException(status_code=503, detail=str(e))
+    except TimeoutError as e:
+        logger.error("Batch search timeout", error=str(e))
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_error("search_batch_timeout", "rag_service")
+        raise HTTPException(status_code=504, detail="Batch search request timed out")
+    except Exception as e:
+        logger.error("Batch search failed", error=str(e), exc_info=True)
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_error("search_batch_error", "rag_service")
+        raise HTTPException(status_code=500, detail="Internal server error during batch search")
+
+
 @app.post("/rag", response_model=RAGResponse)
 async def rag_query(
     request: RAGRequest,
@@ -374,13 +574,37 @@ async def rag_query(
     start_time = time.time()
     
     try:
-        # Search for relevant documents
+        # Reuse the answer to a near-identical earlier question
+        query_vector = None
+        partition = _cache_partition(
+            "rag",
+            request.top_k,
+            request.similarity_threshold,
+            request.include_sources,
+            request.model,
+            request.temperature,
+            request.max_tokens,
+        )
+        if semantic_cache and embedding_engine:
+            query_vector = await embedding_engine.encode(request.question)
+            cached_result = semantic_cache.lookup(partition, query_vector)
+            if cached_result:
+                logger.info("Semantic cache hit for RAG query")
+                return RAGResponse(**{
+                    **cached_result,
+                    "question": request.question,
+                    "processing_time": time.time() - start_time,
+                })
+        
+        # Search for relevant documents within the default retrieval budgets
+        deadlines = _search_deadlines()
         search_results = await search_engine.search(
             query=request.question,
             top_k=request.top_k,
             similarity_threshold=request.similarity_threshold,
             search_type=VectorSearchType.HYBRID,
             include_metadata=True,
+            deadlines=deadlines,
         )
         
         # Generate answer using LLM service
@@ -406,7 +630,7 @@ async def rag_query(
         if metrics:
             metrics.record_inference("rag", processing_time)
         
-        return RAGResponse(
+        response = RAGResponse(
             question=request.question,
             answer=answer,
             sources=sources,
@@ -415,6 +639,17 @@ async def rag_query(
             processing_time=processing_time,
         )
         
+        # Only cache real answers, keyed to the documents used as context
+        if (
+            query_vector is not None
+            and search_results
+            and not deadlines.partial
+            and answer not in (NO_ANSWER, ANSWER_ERROR)
+        ):
+            semantic_cache.store(partition, query_vector, response.dict(), _cited_document_ids(search_results))
+        
+        return response
+        
     except ValidationError as e:
         logger.error("RAG request validation failed", error=str(e))
         metrics = get_metrics()
@@ -441,6 +676,90 @@ async def rag_query(
         raise HTTPException(status_code=500, detail="Internal server error during RAG query")
 
 
+@app.post("/rag/context", response_model=RAGContextResponse)
+async def rag_context(request: RAGContextRequest) -> RAGContextResponse:
+    """Retrieve cited passages for a question without generating an answer.
+    
+    For callers that put the passages into their own LLM prompt (the NLU
+    orchestrator), so a knowledge turn pays for a single generation.
+    """
+    if not search_engine or not citation_generator:
+        raise ServiceUnavailableError("RAG components not initialized")
+    
+    start_time = time.time()
+    
+    try:
+        # Reuse the passages retrieved for a near-identical earlier question
+        query_vector = None
+        partition = _cache_partition("rag_context", request.top_k, request.similarity_threshold)
+        if semantic_cache and embedding_engine:
+            query_vector = await embedding_engine.encode(request.question)
+            cached_result = semantic_cache.lookup(partition, query_vector)
+            if cached_result:
+                logger.info("Semantic cache hit for RAG context")
+                return RAGContextResponse(**{
+                    **cached_result,
+                    "question": request.question,
+                    "processing_time": time.time() - start_time,
+                })
+        
+        # Same retrieval as /rag, within the default retrieval budgets
+        deadlines = _search_deadlines()
+        search_results = await search_engine.search(
+            query=request.question,
+            top_k=request.top_k,
+            similarity_threshold=request.similarity_threshold,
+            search_type=VectorSearchType.HYBRID,
+            include_metadata=True,
+            deadlines=deadlines,
+        )
+        passages = await _cited_passages(search_results, request.question)
+        
+        processing_time = time.time() - start_time
+        
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_inference("rag_context", processing_time)
+        
+        response = RAGContextResponse(
+            question=request.question,
+            passages=passages,
+            confidence=_calculate_confidence(search_results),
+            processing_time=processing_time,
+            partial=deadlines.partial,
+        )
+        
+        if query_vector is not None and passages and not deadlines.partial:
+            semantic_cache.store(partition, query_vector, response.dict(), _cited_document_ids(passages))
+        
+        return response
+        
+    except ValidationError as e:
+        logger.error("RAG context request validation failed", error=str(e))
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_error("rag_context_validation_error", "rag_service")
+        raise HTTPException(status_code=400, detail=f"Invalid RAG context request: {str(e)}")
+    except ServiceUnavailableError as e:
+        logger.error("RAG service unavailable", error=str(e))
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_error("rag_service_unavailable", "rag_service")
+        raise HTTPException(status_code=503, detail=str(e))
+    except TimeoutError as e:
+        logger.error("RAG context retrieval timeout", error=str(e))
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_error("rag_context_timeout", "rag_service")
+        raise HTTPException(status_code=504, detail="RAG context retrieval timed out")
+    except Exception as e:
+        logger.error("RAG context retrieval failed", error=str(e), exc_info=True)
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_error("rag_context_error", "rag_service")
+        raise HTTPException(status_code=500, detail="Internal server error during RAG context retrieval")
+
+
 @app.delete("/documents/{document_id}")
 async def delete_document(document_id: str) -> Dict[str, str]:
     """Delete a document from the index."""
@@ -515,10 +834,20 @@ async def generate_embeddings(request: Dict) -> Dict:
         if not texts:
             raise ValidationError("Texts list is required")
         
+        # "float" (the default) returns JSON lists; "float16"/"float32" return
+        # base64 packed arrays for callers that ask for them
+        encoding_format = request.get("encoding_format") or "float"
+        if encoding_format not in ("float", *STORAGE_DTYPES):
+            raise ValidationError(f"Unsupported encoding_format: {encoding_format}")
+        
         embeddings = await embedding_engine.encode_batch(texts)
         
         return {
-            "embeddings": embeddings,
+            "embeddings": (
+                embeddings if encoding_format == "float"
+                else encode_embeddings(embeddings, dtype=encoding_format)
+            ),
+            "encoding_format": encoding_format,
             "model": embedding_engine.model_name,
             "dimension": len(embeddings[0]) if embeddings else 0,
         }
@@ -576,11 +905,70 @@ Answer: Please provide a comprehensive answer based on the context above. If the
                     return result["choices"][0]["text"].strip()
         
         # Fallback response
-        return "I apologize, but I couldn't generate an answer based on the available context."
+        return NO_ANSWER
         
     except Exception as e:
         logger.error("RAG answer generation failed", error=str(e))
-        return "I encountered an error while generating the answer. Please try again."
+        return ANSWER_ERROR
+
+
+async def _cited_passages(search_results: List[SearchResult], question: str) -> List[RAGPassage]:
+    """Pair deduplicated citations with the full passages they cite."""
+    citations = await citation_generator.generate_citations(search_results, question)
+    results_by_id = {result.id: result for result in search_results}
+    return [
+        RAGPassage(
+            **results_by_id[citation.id].dict(),
+            citation_index=citation.index,
+            citation=citation.formatted_citation,
+        )
+        for citation in citations
+        if citation.id in results_by_id
+    ]
+
+
+def _cache_partition(*params: Any) -> str:
+    """Key for the request parameters that must match for a cached result to apply."""
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _search_partition(request: VectorSearchRequest) -> str:
+    return _cache_partition(
+        "search",
+        request.top_k,
+        request.search_type.value,
+        request.similarity_threshold,
+        request.filters,
+        request.include_metadata,
+    )
+
+
+def _parse_stage_budgets(spec: str) -> Dict[str, float]:
+    """Parse stage budgets such as ``"embedding=50,dense=100,sparse=80"``."""
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        stage, _, budget = item.partition("=")
+        budgets[stage.strip()] = float(budget)
+    return budgets
+
+
+def _search_deadlines(
+    latency_budget_ms: Optional[float] = None,
+    stage_budgets_ms: Optional[Dict[str, float]] = None,
+) -> SearchDeadlines:
+    """Deadlines for one search; request budgets override the configured defaults."""
+    try:
+        return SearchDeadlines(
+            stage_budgets_ms={**default_stage_budgets_ms, **(stage_budgets_ms or {})},
+            total_budget_ms=latency_budget_ms or default_latency_budget_ms,
+        )
+    except ValueError as e:
+        raise ValidationError(str(e))
+
+
+def _cited_document_ids(results: List[SearchResult]) -> List[str]:
+    """Documents behind a set of results, for cache invalidation."""
+    return [result.metadata.get("document_id", result.id) for result in results]
 
 
 def _calculate_confidence(search_results: List[SearchResult]) -> float:
@@ -2,19 +2,90 @@
 
 import asyncio
 import time
-from typing import List, Dict, Any, Optional
+from typing import Any, Awaitable, Dict, List, Optional, Sequence, Tuple
 import structlog
-from shared.models import SearchResult, VectorSearchType
+from shared.models import SearchResult, VectorSearchRequest, VectorSearchType
 from shared.monitoring import monitor_vector_operation
+from shared.utils import run_in_executor
+from .sparse_index import InvertedIndex, extract_terms
 
 logger = structlog.get_logger(__name__)
 
+RETRIEVAL_STAGES = ("embedding", "dense", "sparse", "fusion")
+
+
+class SearchDeadlines:
+    """Per-stage latency budgets for one search, plus the timings it recorded.
+    
+    Budgets are in milliseconds. A stage that overruns its own budget or the
+    overall budget is cancelled and listed in ``overruns``; a stage that
+    raises is listed in ``failures``. Either way the search returns whatever
+    the other stages produced and is marked partial.
+    """
+    
+    def __init__(
+        self,
+        stage_budgets_ms: Optional[Dict[str, float]] = None,
+        total_budget_ms: Optional[float] = None,
+    ):
+        unknown = set(stage_budgets_ms or {}) - set(RETRIEVAL_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown retrieval stages: {', '.join(sorted(unknown))}")
+        
+        self.stage_budgets = {
+            stage: budget / 1000.0
+            for stage, budget in (stage_budgets_ms or {}).items()
+            if budget and budget > 0
+        }
+        self.total_budget = total_budget_ms / 1000.0 if total_budget_ms else None
+        self.started_at = time.monotonic()
+        self.timings_ms: Dict[str, float] = {}
+        self.overruns: List[str] = []
+        self.failures: List[str] = []
+    
+    @property
+    def partial(self) -> bool:
+        return bool(self.overruns or self.failures)
+    
+    def timeout_for(self, stage: str) -> Optional[float]:
+        """Seconds the stage may take, bounded by what is left of the overall budget."""
+        limits = [self.stage_budgets[stage]] if stage in self.stage_budgets else []
+        if self.total_budget is not None:
+            limits.append(self.total_budget - (time.monotonic() - self.started_at))
+        return max(min(limits), 0.0) if limits else None
+    
+    async def run(self, stage: str, operation: Awaitable[Any]) -> Optional[Any]:
+        """Run one stage under its deadline; returns None if it overran."""
+        timeout = self.timeout_for(stage)
+        start_time = time.monotonic()
+        try:
+            async with monitor_vector_operation(f"search_{stage}"):
+                return await asyncio.wait_for(operation, timeout)
+        except asyncio.TimeoutError:
+            self.overruns.append(stage)
+            logger.warning("Retrieval stage overran its budget", stage=stage, timeout=timeout)
+            return None
+        except Exception:
+            self.failures.append(stage)
+            raise
+        finally:
+            self.timings_ms[stage] = (time.monotonic() - start_time) * 1000
+    
+    def record(self, stage: str, duration: float) -> None:
+        """Record a synchronous stage, flagging it if it went over budget."""
+        self.timings_ms[stage] = duration * 1000
+        budget = self.stage_budgets.get(stage)
+        if budget is not None and duration > budget:
+            self.overruns.append(stage)
+
+
 class HybridSearchEngine:
     """Hybrid search combining dense and sparse retrieval."""
     
-    def __init__(self, vector_db, embedding_engine, dense_weight=0.7, sparse_weight=0.3):
+    def __init__(self, vector_db, embedding_engine, dense_weight=0.7, sparse_weight=0.3, sparse_index=None):
         self.vector_db = vector_db
         self.embedding_engine = embedding_engine
+        self.sparse_index: InvertedIndex = sparse_index or InvertedIndex()
         self.dense_weight = dense_weight
         self.sparse_weight = sparse_weight
     
@@ -26,112 +97,302 @@ class HybridSearchEngine:
         similarity_threshold: float = 0.7,
         filters: Optional[Dict[str, Any]] = None,
         include_metadata: bool = True,
+        deadlines: Optional[SearchDeadlines] = None,
     ) -> List[SearchResult]:
-        """Perform hybrid search."""
+        """Perform hybrid search, within ``deadlines`` if given."""
+        deadlines = deadlines or SearchDeadlines()
         
         if search_type == VectorSearchType.DENSE:
-            return await self._dense_search(query, top_k, similarity_threshold, filters)
+            return await self._dense_search(query, top_k, similarity_threshold, filters, deadlines) or []
         elif search_type == VectorSearchType.SPARSE:
-            return await self._sparse_search(query, top_k, similarity_threshold, filters)
+            try:
+                return await deadlines.run(
+                    "sparse", self._sparse_search(query, top_k, similarity_threshold, filters)
+                ) or []
+            except Exception as e:
+                logger.error("Sparse search failed", error=str(e))
+                return []
         else:  # HYBRID
-            return await self._hybrid_search(query, top_k, similarity_threshold, filters)
+            return await self._hybrid_search(query, top_k, similarity_threshold, filters, deadlines)
     
-    async def _dense_search(self, query: str, top_k: int, threshold: float, filters: Optional[Dict]) -> List[SearchResult]:
-        """Dense vector search using embeddings."""
-        async with monitor_vector_operation("dense_search"):
-            query_embedding = await self.embedding_engine.encode(query)
-            
-            results = await self.vector_db.search(
-                query_vector=query_embedding,
-                limit=top_k,
-                score_threshold=threshold,
-                filter_conditions=filters,
-            )
-            
-            return [
-                SearchResult(
-                    id=result["id"],
-                    content=result["payload"].get("content", ""),
-                    score=result["score"],
-                    metadata=result["payload"],
-                    source=result["payload"].get("source"),
+    async def search_batch(
+        self,
+        requests: Sequence[VectorSearchRequest],
+        query_vectors: Optional[List[List[float]]] = None,
+        deadlines: Optional[SearchDeadlines] = None,
+    ) -> List[List[SearchResult]]:
+        """Run several searches with one embedding pass, one Qdrant batch and one sparse pass.
+        
+        ``query_vectors``, if given, are the requests' query embeddings and
+        skip the embedding stage. Results are returned in request order.
+        """
+        deadlines = deadlines or SearchDeadlines()
+        
+        # Hybrid queries over-fetch from both retrievers before fusion, as in _hybrid_search
+        limits = []
+        for request in requests:
+            if request.search_type == VectorSearchType.HYBRID:
+                limits.append((min(request.top_k * 3, 100), request.similarity_threshold * 0.6))
+            else:
+                limits.append((request.top_k, request.similarity_threshold))
+        
+        dense_indices = [i for i, request in enumerate(requests) if request.search_type != VectorSearchType.SPARSE]
+        sparse_indices = [i for i, request in enumerate(requests) if request.search_type != VectorSearchType.DENSE]
+        dense_results: List[Optional[List[SearchResult]]] = [None] * len(requests)
+        sparse_results: List[Optional[List[SearchResult]]] = [None] * len(requests)
+        
+        sparse_task = None
+        if sparse_indices:
+            sparse_task = asyncio.create_task(deadlines.run("sparse", self._sparse_search_batch([
+                (requests[i].query, *limits[i], requests[i].filters) for i in sparse_indices
+            ])))
+        
+        if dense_indices:
+            try:
+                batch = await self._dense_search_batch(
+                    [requests[i].query for i in dense_indices],
+                    [(*limits[i], requests[i].filters) for i in dense_indices],
+                    [query_vectors[i] for i in dense_indices] if query_vectors is not None else None,
+                    deadlines,
                 )
-                for result in results
-            ]
+            except Exception as e:
+                logger.error("Dense batch search failed", error=str(e))
+                batch = None
+            for i, results in zip(dense_indices, batch or []):
+                dense_results[i] = results
+        
+        if sparse_task:
+            try:
+                batch = await sparse_task
+            except Exception as e:
+                logger.error("Sparse batch search failed", error=str(e))
+                batch = None
+            for i, results in zip(sparse_indices, batch or []):
+                sparse_results[i] = results
+        
+        needs_fusion = any(
+            request.search_type == VectorSearchType.HYBRID
+            and dense_results[i] is not None
+            and sparse_results[i] is not None
+            for i, request in enumerate(requests)
+        )
+        fuse = needs_fusion and self._fusion_allowed(deadlines)
+        fusion_start = time.monotonic()
+        
+        combined = []
+        for i, request in enumerate(requests):
+            if request.search_type == VectorSearchType.DENSE:
+                combined.append(dense_results[i] or [])
+            elif request.search_type == VectorSearchType.SPARSE:
+                combined.append(sparse_results[i] or [])
+            else:
+                sparse = sparse_results[i] if fuse or dense_results[i] is None else None
+                combined.append(self._fuse(dense_results[i], sparse, request.top_k, request.similarity_threshold))
+        
+        if fuse:
+            deadlines.record("fusion", time.monotonic() - fusion_start)
+        
+        return combined
+    
+    async def _dense_search(
+        self,
+        query: str,
+        top_k: int,
+        threshold: float,
+        filters: Optional[Dict],
+        deadlines: SearchDeadlines,
+    ) -> Optional[List[SearchResult]]:
+        """Dense vector search using embeddings; None if a stage overran."""
+        query_embedding = await deadlines.run("embedding", self.embedding_engine.encode(query))
+        if query_embedding is None:
+            return None
+        
+        results = await deadlines.run("dense", self.vector_db.search(
+            query_vector=query_embedding,
+            limit=top_k,
+            score_threshold=threshold,
+            filter_conditions=filters,
+        ))
+        if results is None:
+            return None
+        
+        return self._to_search_results(results)
+    
+    async def _dense_search_batch(
+        self,
+        queries: List[str],
+        params: List[Tuple[int, float, Optional[Dict]]],
+        query_vectors: Optional[List[List[float]]],
+        deadlines: SearchDeadlines,
+    ) -> Optional[List[List[SearchResult]]]:
+        """Dense search for several queries with one encode_batch call and one Qdrant batch."""
+        if query_vectors is None:
+            query_vectors = await deadlines.run("embedding", self.embedding_engine.encode_batch(queries))
+            if query_vectors is None:
+                return None
+        
+        batches = await deadlines.run("dense", self.vector_db.search_batch([
+            {
+                "query_vector": vector,
+                "limit": limit,
+                "score_threshold": threshold,
+                "filter_conditions": filters,
+            }
+            for vector, (limit, threshold, filters) in zip(query_vectors, params)
+        ]))
+        if batches is None:
+            return None
+        
+        return [self._to_search_results(results) for results in batches]
+    
+    @staticmethod
+    def _to_search_results(results: List[Dict[str, Any]]) -> List[SearchResult]:
+        return [
+            SearchResult(
+                id=result["id"],
+                content=result["payload"].get("content", ""),
+                score=result["score"],
+                metadata=result["payload"],
+                source=result["payload"].get("source"),
+            )
+            for result in results
+        ]
     
     async def _sparse_search(self, query: str, top_k: int, threshold: float, filters: Optional[Dict]) -> List[SearchResult]:
-        """Sparse keyword search using TF-IDF and BM25-like scoring."""
+        """Sparse keyword search using BM25 over the inverted index."""
+        return (await self._sparse_search_batch([(query, top_k, threshold, filters)]))[0]
+    
+    async def _sparse_search_batch(
+        self,
+        queries: List[Tuple[str, int, float, Optional[Dict]]],
+    ) -> List[List[SearchResult]]:
+        """BM25 search for several (query, top_k, threshold, filters) with one payload fetch."""
+        # Over-fetch when filtering, since filters apply to payloads after scoring.
+        # Scoring is CPU-bound, so it runs on a worker thread: the stage deadline
+        # can then cut it short and the dense path keeps running meanwhile
+        scored = await run_in_executor(self.sparse_index.search_batch, [
+            (query, top_k * 4 if filters else top_k) for query, top_k, _, filters in queries
+        ])
+        hits_per_query = [
+            [(doc_id, score) for doc_id, score in hits if score >= threshold]
+            for hits, (_, _, threshold, _) in zip(scored, queries)
+        ]
+        doc_ids = list(dict.fromkeys(doc_id for hits in hits_per_query for doc_id, _ in hits))
+        if not doc_ids:
+            return [[] for _ in queries]
+        
+        points = await self.vector_db.retrieve(doc_ids)
+        payloads = {str(point["id"]): point["payload"] or {} for point in points}
+        
+        batch = []
+        for hits, (_, top_k, _, filters) in zip(hits_per_query, queries):
+            results = []
+            for doc_id, score in hits:
+                payload = payloads.get(str(doc_id))
+                if payload is None:
+                    continue
+                if filters and any(payload.get(key) != value for key, value in filters.items()):
+                    continue
+                results.append(SearchResult(
+                    id=doc_id,
+                    content=payload.get('content', ''),
+                    score=score,
+                    metadata=payload,
+                    source=payload.get('source'),
+                ))
+            batch.append(results[:top_k])
+        
+        return batch
+    
+    async def _hybrid_search(
+        self,
+        query: str,
+        top_k: int,
+        threshold: float,
+        filters: Optional[Dict],
+        deadlines: SearchDeadlines,
+    ) -> List[SearchResult]:
+        """Hybrid search combining dense and sparse results with improved ranking.
+        
+        Sparse retrieval runs alongside embedding and the dense ANN query. If
+        sparse retrieval or fusion overruns its budget, dense results are
+        returned alone; if the dense path overruns, sparse results are.
+        """
+        # Get results from both approaches with expanded top_k
+        expansion_factor = 3
+        expanded_k = min(top_k * expansion_factor, 100)
+        
+        sparse_task = asyncio.create_task(deadlines.run(
+            "sparse", self._sparse_search(query, expanded_k, threshold * 0.6, filters)
+        ))
+        
         try:
-            # Extract query terms
-            query_terms = self._extract_terms(query.lower())
-            if not query_terms:
-                return []
-            
-            # Get all documents from vector database for sparse search
-            # In production, this would be optimized with a separate keyword index
-            all_docs = await self._get_all_documents_for_sparse_search()
-            
-            if not all_docs:
-                return []
-            
-            # Calculate BM25 scores
-            scored_results = []
-            
-            for doc in all_docs:
-                score = self._calculate_bm25_score(query_terms, doc)
-                if score >= threshold:
-                    result = SearchResult(
-                        id=doc['id'],
-                        content=doc['content'],
-                        score=score,
-                        metadata=doc.get('metadata', {}),
-                        source=doc.get('source')
-                    )
-                    scored_results.append(result)
-            
-            # Sort by score and return top_k
-            scored_results.sort(key=lambda x: x.score, reverse=True)
-            return scored_results[:top_k]
-            
+            dense_results = await self._dense_search(query, expanded_k, threshold * 0.6, filters, deadlines)
+        except Exception as e:
+            logger.error("Dense search failed", error=str(e))
+            dense_results = None
+        
+        try:
+            sparse_results = await sparse_task
         except Exception as e:
             logger.error("Sparse search failed", error=str(e))
+            sparse_results = None
+        
+        if dense_results is None or sparse_results is None:
+            return self._fuse(dense_results, sparse_results, top_k, threshold)
+        if not self._fusion_allowed(deadlines):
+            return self._single_source_results(dense_results, top_k, threshold, "dense_only")
+        
+        fusion_start = time.monotonic()
+        combined_results = self._fuse(dense_results, sparse_results, top_k, threshold)
+        deadlines.record("fusion", time.monotonic() - fusion_start)
+        
+        return combined_results
+    
+    @staticmethod
+    def _fusion_allowed(deadlines: SearchDeadlines) -> bool:
+        """Fusion is synchronous, so skip it when no budget is left for it."""
+        fusion_timeout = deadlines.timeout_for("fusion")
+        if fusion_timeout is not None and fusion_timeout <= 0:
+            deadlines.overruns.append("fusion")
+            return False
+        return True
+    
+    def _fuse(
+        self,
+        dense_results: Optional[List[SearchResult]],
+        sparse_results: Optional[List[SearchResult]],
+        top_k: int,
+        threshold: float,
+    ) -> List[SearchResult]:
+        """Fuse dense and sparse results, or return whichever one is available."""
+        if dense_results is None and sparse_results is None:
             return []
+        if sparse_results is None:
+            return self._single_source_results(dense_results, top_k, threshold, "dense_only")
+        if dense_results is None:
+            return self._single_source_results(sparse_results, top_k, threshold, "sparse_only")
+        
+        # Normalize scores within each result set
+        dense_results = self._normalize_scores(dense_results)
+        sparse_results = self._normalize_scores(sparse_results)
+        
+        # Combine and re-rank results with improved algorithm
+        return self._combine_results_advanced(dense_results, sparse_results, top_k, threshold)
     
-    async def _hybrid_search(self, query: str, top_k: int, threshold: float, filters: Optional[Dict]) -> List[SearchResult]:
-        """Hybrid search combining dense and sparse results with improved ranking."""
-        try:
-            # Get results from both approaches with expanded top_k
-            expansion_factor = 3
-            expanded_k = min(top_k * expansion_factor, 100)
-            
-            dense_results, sparse_results = await asyncio.gather(
-                self._dense_search(query, expanded_k, threshold * 0.6, filters),
-                self._sparse_search(query, expanded_k, threshold * 0.6, filters),
-                return_exceptions=True
-            )
-            
-            # Handle exceptions
-            if isinstance(dense_results, Exception):
-                logger.error("Dense search failed", error=str(dense_results))
-                dense_results = []
-            
-            if isinstance(sparse_results, Exception):
-                logger.error("Sparse search failed", error=str(sparse_results))
-                sparse_results = []
-            
-            # Normalize scores within each result set
-            dense_results = self._normalize_scores(dense_results)
-            sparse_results = self._normalize_scores(sparse_results)
-            
-            # Combine and re-rank results with improved algorithm
-            combined_results = self._combine_results_advanced(dense_results, sparse_results, top_k, threshold)
-            
-            return combined_results
-            
-        except Exception as e:
-            logger.error("Hybrid search failed", error=str(e))
-            # Fallback to dense search only
-            return await self._dense_search(query, top_k, threshold, filters)
+    def _single_source_results(
+        self,
+        results: List[SearchResult],
+        top_k: int,
+        threshold: float,
+        fusion_type: str,
+    ) -> List[SearchResult]:
+        """Results from one retriever when the other one is unavailable."""
+        for result in results:
+            result.metadata = {**result.metadata, "fusion_type": fusion_type}
+        results = [result for result in results if result.score >= threshold]
+        results.sort(key=lambda x: x.score, reverse=True)
+        return results[:top_k]
     
     def _combine_results(self, dense_results: List[SearchResult], sparse_results: List[SearchResult], top_k: int) -> List[SearchResult]:
         """Combine dense and sparse results with weighted scoring."""
@@ -171,84 +432,7 @@ class HybridSearchEngine:
     
     def _extract_terms(self, text: str) -> List[str]:
         """Extract search terms from text."""
-        import re
-        # Simple tokenization and stop word removal
-        terms = re.findall(r'\b\w{2,}\b', text.lower())
-        
-        # Remove common stop words
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'from', 'about', 'into', 'through', 'during',
-            'before', 'after', 'above', 'below', 'between', 'among', 'this',
-            'that', 'these', 'those', 'is', 'are', 'was', 'were', 'be', 'been',
-            'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-            'could', 'should', 'may', 'might', 'must', 'can'
-        }
-        
-        return [term for term in terms if term not in stop_words and len(term) > 2]
-    
-    async def _get_all_documents_for_sparse_search(self) -> List[Dict]:
-        """Get all documents for sparse search (optimized for production)."""
-        try:
-            # In production, this should use a proper search index
-            # For now, we'll get a sample from the vector database
-            search_results = await self.vector_db.scroll(
-                limit=10000,  # Limit for performance
-                with_payload=True
-            )
-            
-            documents = []
-            for result in search_results:
-                documents.append({
-                    'id': result['id'],
-                    'content': result['payload'].get('content', ''),
-                    'metadata': result['payload'],
-                    'source': result['payload'].get('source')
-                })
-            
-            return documents
-            
-        except Exception as e:
-            logger.error("Failed to get documents for sparse search", error=str(e))
-            return []
-    
-    def _calculate_bm25_score(self, query_terms: List[str], document: Dict) -> float:
-        """Calculate BM25 score for document."""
-        try:
-            content = document.get('content', '').lower()
-            doc_terms = self._extract_terms(content)
-            
-            if not doc_terms:
-                return 0.0
-            
-            # BM25 parameters
-            k1 = 1.2
-            b = 0.75
-            avgdl = 100  # Average document length (approximate)
-            
-            score = 0.0
-            doc_length = len(doc_terms)
-            
-            for term in query_terms:
-                if term in doc_terms:
-                    # Term frequency in document
-                    tf = doc_terms.count(term)
-                    
-                    # Inverse document frequency (simplified)
-                    idf = 2.0  # Simplified IDF
-                    
-                    # BM25 formula
-                    numerator = tf * (k1 + 1)
-                    denominator = tf + k1 * (1 - b + b * (doc_length / avgdl))
-                    
-                    score += idf * (numerator / denominator)
-            
-            # Normalize score to 0-1 range
-            return min(score / len(query_terms), 1.0)
-            
-        except Exception as e:
-            logger.error("BM25 score calculation failed", error=str(e))
-            return 0.0
+        return extract_terms(text)
     
     def _normalize_scores(self, results: List[SearchResult]) -> List[SearchResult]:
         """Normalize scores to 0-1 range."""
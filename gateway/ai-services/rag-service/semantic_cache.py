@@ -0,0 +1,172 @@
+"""
+Semantic cache for search results and RAG answers.
+
+Queries are matched by embedding similarity rather than exact text, so
+paraphrases such as "show my open deals" and "list my open deals" share an
+entry. Entries remember the documents they cite and are dropped as soon as
+the indexing manager changes any of them.
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class SemanticCache:
+    """In-memory nearest-neighbour cache keyed by query embeddings.
+
+    Vectors live in one preallocated float32 matrix and are matched with a
+    single matrix-vector product; at the few thousand entries this cache
+    holds that is faster than maintaining a graph index and is exact.
+    Entries only match within the same partition (endpoint plus the request
+    parameters that change the answer).
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 2048,
+        ttl: float = 300.0,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._vectors: Optional[np.ndarray] = None
+        self._partitions = np.full(max_entries, -1, dtype=np.int64)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._values: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._documents: List[Set[str]] = [set() for _ in range(max_entries)]
+
+        self._partition_ids: Dict[str, int] = {}
+        self._slots_by_document: Dict[str, Set[int]] = {}
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._partitions >= 0))
+
+    def lookup(self, partition: str, query_vector: List[float]) -> Optional[Dict[str, Any]]:
+        """Return the cached value of the most similar live query, if similar enough."""
+        partition_id = self._partition_ids.get(partition)
+        vector = self._normalize(query_vector)
+        if partition_id is None or self._vectors is None or vector is None:
+            self.stats["misses"] += 1
+            return None
+
+        now = time.time()
+        candidates = np.flatnonzero((self._partitions == partition_id) & (self._expires_at > now))
+        if candidates.size == 0:
+            self.stats["misses"] += 1
+            return None
+
+        similarities = self._vectors[candidates] @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            self.stats["misses"] += 1
+            return None
+
+        slot = int(candidates[best])
+        self._last_used[slot] = now
+        self.stats["hits"] += 1
+        return self._values[slot]
+
+    def store(
+        self,
+        partition: str,
+        query_vector: List[float],
+        value: Dict[str, Any],
+        document_ids: Iterable[str],
+    ) -> None:
+        """Cache a value under a query embedding, tracking the documents it cites."""
+        vector = self._normalize(query_vector)
+        if vector is None:
+            return
+
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+        slot = self._free_slot()
+        now = time.time()
+        partition_id = self._partition_ids.setdefault(partition, len(self._partition_ids))
+
+        self._vectors[slot] = vector
+        self._partitions[slot] = partition_id
+        self._expires_at[slot] = now + self.ttl
+        self._last_used[slot] = now
+        self._values[slot] = value
+        self._documents[slot] = set(document_ids)
+        for document_id in self._documents[slot]:
+            self._slots_by_document.setdefault(document_id, set()).add(slot)
+
+        self.stats["stores"] += 1
+
+    def invalidate_documents(self, document_ids: Iterable[str]) -> int:
+        """Drop every entry that cites any of the given documents."""
+        slots: Set[int] = set()
+        for document_id in document_ids:
+            slots |= self._slots_by_document.get(document_id, set())
+
+        for slot in slots:
+            self._clear_slot(slot)
+
+        if slots:
+            self.stats["invalidations"] += len(slots)
+            logger.debug("Semantic cache entries invalidated", entries=len(slots))
+        return len(slots)
+
+    def clear(self) -> None:
+        for slot in np.flatnonzero(self._partitions >= 0):
+            self._clear_slot(int(slot))
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+            "hit_rate": self.stats["hits"] / max(lookups, 1),
+        }
+
+    def _free_slot(self) -> int:
+        """Pick an empty or expired slot, else evict the least recently used entry."""
+        reusable = np.flatnonzero((self._partitions < 0) | (self._expires_at <= time.time()))
+        if reusable.size:
+            slot = int(reusable[0])
+        else:
+            slot = int(np.argmin(self._last_used))
+            self.stats["evictions"] += 1
+        self._clear_slot(slot)
+        return slot
+
+    def _clear_slot(self, slot: int) -> None:
+        for document_id in self._documents[slot]:
+            slots = self._slots_by_document.get(document_id)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._slots_by_document[document_id]
+        self._documents[slot] = set()
+        self._values[slot] = None
+        self._partitions[slot] = -1
+        self._expires_at[slot] = 0.0
+
+    @staticmethod
+    def _normalize(query_vector: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.ndim != 1 or not norm:
+            return None
+        return vector / norm
@@ -0,0 +1,564 @@
+"""
+Persistent inverted index for BM25 keyword search.
+
+Postings live in two places:
+
+- an immutable on-disk segment (``.npy`` arrays opened with ``mmap_mode="r"``)
+  holding doc ordinals and term frequencies for every term, plus a JSON
+  manifest with the term dictionary and doc table;
+- an in-memory delta with the postings of documents indexed since the last
+  flush.
+
+Every document gets a new, monotonically increasing ordinal on insert, so each
+term's postings are sorted by ordinal across segment and delta. Deletes are
+tombstones until the next flush merges the delta into a new segment, like a
+Lucene merge: tombstoned postings are dropped and live documents are
+renumbered densely (keeping their order), so re-adds and deletes don't grow
+the doc table. Document frequencies count tombstoned documents until then.
+
+A marker file sits next to the manifest while the delta holds changes that
+no segment has, so a restart after a crash can tell the checkpoint is stale
+and rebuild the index from the vector database.
+
+Searches run on executor threads while writes happen on the event loop, so
+both take a lock around the index structures.
+
+Queries score term-at-a-time in NumPy with max-score pruning: terms are
+processed by descending upper bound, and once the remaining terms cannot lift
+an unseen document into the top k, only existing candidates are looked up
+(binary search into the sorted postings) instead of scanning whole lists.
+"""
+
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'about', 'into', 'through', 'during',
+    'before', 'after', 'above', 'below', 'between', 'among', 'this',
+    'that', 'these', 'those', 'is', 'are', 'was', 'were', 'be', 'been',
+    'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+    'could', 'should', 'may', 'might', 'must', 'can'
+})
+
+_TERM_PATTERN = re.compile(r'\b\w{2,}\b')
+
+MANIFEST_NAME = "manifest.json"
+DIRTY_MARKER_NAME = "dirty"
+
+
+def extract_terms(text: str) -> List[str]:
+    """Tokenize text into lowercase terms without stop words."""
+    return [
+        term for term in _TERM_PATTERN.findall(text.lower())
+        if term not in STOP_WORDS and len(term) > 2
+    ]
+
+
+class _DeltaPostings:
+    """Growable postings list for one term."""
+
+    __slots__ = ("docs", "tfs")
+
+    def __init__(self):
+        self.docs: List[int] = []
+        self.tfs: List[int] = []
+
+
+class InvertedIndex:
+    """BM25 inverted index with a memory-mapped segment and an in-memory delta."""
+
+    def __init__(
+        self,
+        index_dir: Optional[str] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        flush_threshold: int = 5000,
+    ):
+        self.index_dir = Path(index_dir) if index_dir else None
+        self.k1 = k1
+        self.b = b
+        self.flush_threshold = flush_threshold
+
+        # Doc table, indexed by ordinal (None once deleted)
+        self._doc_ids: List[Optional[str]] = []
+        self._lengths = np.zeros(1024, dtype=np.int32)
+        self._ordinals: Dict[str, int] = {}
+        self._deleted: Set[int] = set()
+        self._deleted_array: Optional[np.ndarray] = None
+
+        self._live_length = 0
+
+        # On-disk segment
+        self._generation = 0
+        self._segment_terms: Dict[str, Tuple[int, int, int]] = {}  # term -> (offset, df, max_tf)
+        self._segment_docs = np.zeros(0, dtype=np.int32)
+        self._segment_tfs = np.zeros(0, dtype=np.int32)
+
+        # In-memory postings: the active delta, plus the one being merged
+        self._delta: Dict[str, _DeltaPostings] = {}
+        self._merging: Dict[str, _DeltaPostings] = {}
+        self._pending_changes = 0
+        self._flush_lock = asyncio.Lock()
+        self._epoch = 0  # bumped by clear() so an in-flight flush doesn't install old data
+        self._lock = threading.RLock()  # searches run on worker threads
+
+        # Set by load() when the checkpoint on disk misses changes
+        self.stale = False
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._ordinals
+
+    @property
+    def average_length(self) -> float:
+        return self._live_length / max(len(self._ordinals), 1)
+
+    def add_document(self, doc_id: str, text: str) -> None:
+        """Index a document, replacing any previous version with the same id."""
+        counts = Counter(extract_terms(text))
+        length = sum(counts.values())
+
+        with self._lock:
+            self.remove_document(doc_id)
+
+            ordinal = len(self._doc_ids)
+            self._doc_ids.append(doc_id)
+            self._ordinals[doc_id] = ordinal
+            if ordinal >= len(self._lengths):
+                self._lengths = np.resize(self._lengths, len(self._lengths) * 2)
+            self._lengths[ordinal] = length
+            self._live_length += length
+
+            for term, tf in counts.items():
+                postings = self._delta.get(term)
+                if postings is None:
+                    postings = self._delta[term] = _DeltaPostings()
+                postings.docs.append(ordinal)
+                postings.tfs.append(tf)
+
+            self._record_change()
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Tombstone a document; its postings are dropped at the next flush."""
+        with self._lock:
+            ordinal = self._ordinals.pop(doc_id, None)
+            if ordinal is None:
+                return False
+            self._doc_ids[ordinal] = None
+            self._deleted.add(ordinal)
+            self._deleted_array = None
+            self._live_length -= int(self._lengths[ordinal])
+            self._record_change()
+            return True
+
+    def remove_documents(self, doc_ids: Iterable[str]) -> int:
+        return sum(1 for doc_id in doc_ids if self.remove_document(doc_id))
+
+    def clear(self) -> None:
+        """Drop every document; the next flush replaces the on-disk segment."""
+        with self._lock:
+            self._doc_ids = []
+            self._lengths = np.zeros(1024, dtype=np.int32)
+            self._ordinals = {}
+            self._deleted = set()
+            self._deleted_array = None
+            self._live_length = 0
+            self._segment_terms = {}
+            self._segment_docs = np.zeros(0, dtype=np.int32)
+            self._segment_tfs = np.zeros(0, dtype=np.int32)
+            self._delta = {}
+            self._epoch += 1
+            self._record_change()
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Return up to top_k (doc_id, score) pairs, scores normalized to 0-1.
+
+        Scores are divided by the sum of the query terms' upper bounds, so 1.0
+        means every term matched at its best possible weight.
+        """
+        with self._lock:
+            return self._search(query, top_k, self._postings)
+
+    def search_batch(self, queries: Sequence[Tuple[str, int]]) -> List[List[Tuple[str, float]]]:
+        """Score several (query, top_k) pairs, reading each shared term's postings once."""
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray, int]] = {}
+
+        def cached_postings(term: str) -> Tuple[np.ndarray, np.ndarray, int]:
+            if term not in postings:
+                postings[term] = self._postings(term)
+            return postings[term]
+
+        with self._lock:
+            return [self._search(query, top_k, cached_postings) for query, top_k in queries]
+
+    def _search(
+        self,
+        query: str,
+        top_k: int,
+        postings_for: Callable[[str], Tuple[np.ndarray, np.ndarray, int]],
+    ) -> List[Tuple[str, float]]:
+        query_terms = Counter(extract_terms(query))
+        num_docs = len(self._ordinals)
+        if not query_terms or not num_docs or top_k <= 0:
+            return []
+
+        avgdl = max(self.average_length, 1.0)
+        # Like Lucene's maxDoc, count tombstones so df never exceeds N
+        max_doc = num_docs + len(self._deleted)
+        terms = []
+        for term, query_tf in query_terms.items():
+            docs, tfs, max_tf = postings_for(term)
+            if not len(docs):
+                continue
+            idf = math.log(1.0 + (max_doc - len(docs) + 0.5) / (len(docs) + 0.5))
+            weight = idf * query_tf
+            # BM25 is increasing in tf and decreasing in length, so the best
+            # case is the term's max tf in the shortest possible document
+            upper_bound = weight * max_tf * (self.k1 + 1) / (max_tf + self.k1 * (1 - self.b))
+            terms.append((upper_bound, weight, docs, tfs))
+
+        if not terms:
+            return []
+
+        terms.sort(key=lambda item: item[0], reverse=True)
+        max_score = sum(item[0] for item in terms)
+        remaining = max_score
+        deleted = self._deleted_ordinals()
+
+        cand_docs = np.zeros(0, dtype=np.int64)
+        cand_scores = np.zeros(0, dtype=np.float64)
+        threshold = 0.0
+        essential = True
+
+        for upper_bound, weight, docs, tfs in terms:
+            remaining -= upper_bound
+
+            if essential:
+                docs = np.asarray(docs, dtype=np.int64)
+                tfs = np.asarray(tfs, dtype=np.float64)
+                if len(deleted):
+                    live = ~np.isin(docs, deleted, assume_unique=True)
+                    docs, tfs = docs[live], tfs[live]
+                scores = self._bm25(weight, tfs, docs, avgdl)
+                merged, inverse = np.unique(np.concatenate([cand_docs, docs]), return_inverse=True)
+                cand_scores = np.bincount(
+                    inverse, weights=np.concatenate([cand_scores, scores]), minlength=len(merged)
+                )
+                cand_docs = merged
+            elif len(cand_docs):
+                # Non-essential term: look up existing candidates only
+                positions = np.searchsorted(docs, cand_docs)
+                in_range = positions < len(docs)
+                hits = np.zeros(len(cand_docs), dtype=bool)
+                hits[in_range] = np.asarray(docs[positions[in_range]]) == cand_docs[in_range]
+                if hits.any():
+                    hit_tfs = np.asarray(tfs[positions[hits]], dtype=np.float64)
+                    cand_scores[hits] += self._bm25(weight, hit_tfs, cand_docs[hits], avgdl)
+
+            if len(cand_scores) >= top_k:
+                threshold = float(np.partition(cand_scores, len(cand_scores) - top_k)[len(cand_scores) - top_k])
+            if essential and len(cand_scores) >= top_k and remaining < threshold:
+                essential = False
+            if not essential:
+                keep = cand_scores + remaining >= threshold
+                cand_docs, cand_scores = cand_docs[keep], cand_scores[keep]
+
+        if not len(cand_docs):
+            return []
+
+        order = np.argsort(-cand_scores, kind="stable")[:top_k]
+        return [
+            (self._doc_ids[int(cand_docs[index])], float(cand_scores[index] / max_score))
+            for index in order
+        ]
+
+    async def maybe_flush(self) -> None:
+        """Flush once enough changes have accumulated."""
+        if self._pending_changes >= self.flush_threshold:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Merge the delta and tombstones into a new on-disk segment.
+
+        The merge runs in a worker thread; writes made meanwhile land in a
+        fresh delta and are picked up by the next flush.
+        """
+        if self.index_dir is None:
+            return
+
+        async with self._flush_lock:
+            if not self._pending_changes:
+                return
+
+            with self._lock:
+                self._merging, self._delta = self._delta, {}
+                deleted = set(self._deleted)
+                doc_ids = list(self._doc_ids)
+                lengths = self._lengths[:len(doc_ids)].copy()
+                pending = self._pending_changes
+                self._pending_changes = 0
+                epoch = self._epoch
+
+            try:
+                loop = asyncio.get_running_loop()
+                generation, terms, docs, tfs, remap = await loop.run_in_executor(
+                    None, self._write_segment, self._merging, deleted, doc_ids, lengths
+                )
+            except Exception:
+                # Keep the unmerged postings searchable and retry next flush
+                with self._lock:
+                    for term, postings in self._delta.items():
+                        merged = self._merging.setdefault(term, _DeltaPostings())
+                        merged.docs.extend(postings.docs)
+                        merged.tfs.extend(postings.tfs)
+                    self._delta, self._merging = self._merging, {}
+                    self._pending_changes += pending
+                raise
+
+            with self._lock:
+                self._generation = generation
+                self._merging = {}
+                if epoch != self._epoch:
+                    # Cleared mid-merge; the next flush writes the cleared state
+                    return
+
+                self._segment_terms, self._segment_docs, self._segment_tfs = terms, docs, tfs
+                self._compact_ordinals(remap, len(doc_ids))
+                if not self._pending_changes:
+                    self._set_dirty(False)
+
+            logger.info(
+                "Sparse index flushed",
+                generation=generation,
+                documents=len(self._ordinals),
+                terms=len(terms),
+                postings=len(docs),
+            )
+
+    def load(self) -> None:
+        """Open the latest on-disk segment, if any.
+
+        Sets ``stale`` when the previous process stopped with unflushed
+        changes or the segment could not be read.
+        """
+        if self.index_dir is None:
+            return
+        self.stale = (self.index_dir / DIRTY_MARKER_NAME).exists()
+        manifest_path = self.index_dir / MANIFEST_NAME
+        if not manifest_path.exists():
+            return
+
+        try:
+            manifest = json.loads(manifest_path.read_text())
+            generation = manifest["generation"]
+            docs = np.load(self._segment_path(generation, "docs"), mmap_mode="r")
+            tfs = np.load(self._segment_path(generation, "tfs"), mmap_mode="r")
+            lengths = np.load(self._segment_path(generation, "lengths"))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Failed to load sparse index, starting empty", error=str(e))
+            self.stale = True
+            return
+
+        self._generation = generation
+        self._segment_terms = {term: tuple(entry) for term, entry in manifest["terms"].items()}
+        self._segment_docs, self._segment_tfs = docs, tfs
+        self._doc_ids = manifest["doc_ids"]
+        self._lengths = np.resize(lengths.astype(np.int32), max(len(lengths), 1024))
+        self._ordinals = {doc_id: ordinal for ordinal, doc_id in enumerate(self._doc_ids) if doc_id is not None}
+        self._live_length = int(sum(int(self._lengths[ordinal]) for ordinal in self._ordinals.values()))
+
+        logger.info(
+            "Sparse index loaded",
+            generation=generation,
+            documents=len(self._ordinals),
+            stale=self.stale,
+        )
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "documents": len(self._ordinals),
+            "segment_terms": len(self._segment_terms),
+            "segment_postings": len(self._segment_docs),
+            "delta_terms": len(self._delta),
+            "tombstones": len(self._deleted),
+            "pending_changes": self._pending_changes,
+            "average_length": self.average_length,
+            "generation": self._generation,
+        }
+
+    # Private methods
+
+    def _record_change(self) -> None:
+        if not self._pending_changes:
+            self._set_dirty(True)
+        self._pending_changes += 1
+
+    def _set_dirty(self, dirty: bool) -> None:
+        """Create or remove the marker for changes not yet in a segment."""
+        if self.index_dir is None:
+            return
+        marker = self.index_dir / DIRTY_MARKER_NAME
+        try:
+            if dirty:
+                self.index_dir.mkdir(parents=True, exist_ok=True)
+                marker.touch()
+            else:
+                marker.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning("Failed to update sparse index marker", error=str(e))
+
+    def _compact_ordinals(self, remap: np.ndarray, merged_count: int) -> None:
+        """Renumber the doc table after a merge.
+
+        ``remap`` maps the first ``merged_count`` ordinals (the ones the merge
+        saw) to their ordinal in the new segment, or -1 for dropped tombstones.
+        Documents added during the merge shift down past the dropped ones.
+        """
+        shift = merged_count - int((remap >= 0).sum())
+        live = np.flatnonzero(remap >= 0)
+
+        self._doc_ids = [self._doc_ids[ordinal] for ordinal in live] + self._doc_ids[merged_count:]
+        lengths = np.concatenate([self._lengths[live], self._lengths[merged_count:len(self._lengths)]])
+        self._lengths = np.resize(lengths, max(len(self._doc_ids), 1024))
+        self._ordinals = {doc_id: ordinal for ordinal, doc_id in enumerate(self._doc_ids) if doc_id is not None}
+
+        # Tombstones the merge didn't see: merged documents deleted meanwhile
+        # keep theirs under the new ordinal, later ones shift down
+        self._deleted = {
+            int(remap[ordinal]) if ordinal < merged_count else ordinal - shift
+            for ordinal in self._deleted
+            if ordinal >= merged_count or remap[ordinal] >= 0
+        }
+        self._deleted_array = None
+
+        if shift:
+            for postings in self._delta.values():
+                postings.docs = [ordinal - shift for ordinal in postings.docs]
+
+    def _bm25(self, weight: float, tfs: np.ndarray, docs: np.ndarray, avgdl: float) -> np.ndarray:
+        norm = self.k1 * (1 - self.b + self.b * self._lengths[docs] / avgdl)
+        return weight * tfs * (self.k1 + 1) / (tfs + norm)
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Concatenate segment, merging and delta postings (already in ordinal order)."""
+        parts_docs, parts_tfs = [], []
+        max_tf = 0
+
+        entry = self._segment_terms.get(term)
+        if entry is not None:
+            offset, df, segment_max_tf = entry
+            parts_docs.append(self._segment_docs[offset:offset + df])
+            parts_tfs.append(self._segment_tfs[offset:offset + df])
+            max_tf = segment_max_tf
+
+        for source in (self._merging, self._delta):
+            postings = source.get(term)
+            if postings is not None:
+                parts_docs.append(np.asarray(postings.docs, dtype=np.int32))
+                parts_tfs.append(np.asarray(postings.tfs, dtype=np.int32))
+                max_tf = max(max_tf, max(postings.tfs))
+
+        if not parts_docs:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), 0
+        if len(parts_docs) == 1:
+            return parts_docs[0], parts_tfs[0], max_tf
+        return np.concatenate(parts_docs), np.concatenate(parts_tfs), max_tf
+
+    def _deleted_ordinals(self) -> np.ndarray:
+        if self._deleted_array is None:
+            self._deleted_array = np.fromiter(sorted(self._deleted), dtype=np.int64, count=len(self._deleted))
+        return self._deleted_array
+
+    def _segment_path(self, generation: int, name: str) -> Path:
+        return self.index_dir / f"segment-{generation:06d}.{name}.npy"
+
+    def _write_segment(
+        self,
+        merging: Dict[str, _DeltaPostings],
+        deleted: Set[int],
+        doc_ids: List[Optional[str]],
+        lengths: np.ndarray,
+    ) -> Tuple[int, Dict[str, Tuple[int, int, int]], np.ndarray, np.ndarray, np.ndarray]:
+        """Merge the current segment with a delta, dropping tombstones and renumbering live documents."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        # Old ordinal -> new dense ordinal (-1 once deleted); increasing, so
+        # postings stay sorted. Older manifests may still list None entries.
+        live = np.array(
+            [
+                ordinal for ordinal, doc_id in enumerate(doc_ids)
+                if doc_id is not None and ordinal not in deleted
+            ],
+            dtype=np.int64,
+        )
+        remap = np.full(len(doc_ids), -1, dtype=np.int64)
+        remap[live] = np.arange(len(live))
+
+        terms: Dict[str, Tuple[int, int, int]] = {}
+        doc_chunks, tf_chunks = [], []
+        offset = 0
+        for term in sorted(set(self._segment_terms) | set(merging)):
+            parts_docs, parts_tfs = [], []
+            entry = self._segment_terms.get(term)
+            if entry is not None:
+                start, df, _ = entry
+                parts_docs.append(np.asarray(self._segment_docs[start:start + df]))
+                parts_tfs.append(np.asarray(self._segment_tfs[start:start + df]))
+            postings = merging.get(term)
+            if postings is not None:
+                parts_docs.append(np.asarray(postings.docs, dtype=np.int32))
+                parts_tfs.append(np.asarray(postings.tfs, dtype=np.int32))
+
+            docs = remap[np.concatenate(parts_docs)]
+            tfs = np.concatenate(parts_tfs)
+            kept = docs >= 0
+            docs, tfs = docs[kept], tfs[kept]
+            if not len(docs):
+                continue
+
+            terms[term] = (offset, len(docs), int(tfs.max()))
+            doc_chunks.append(docs)
+            tf_chunks.append(tfs)
+            offset += len(docs)
+
+        all_docs = np.concatenate(doc_chunks) if doc_chunks else np.zeros(0, dtype=np.int32)
+        all_tfs = np.concatenate(tf_chunks) if tf_chunks else np.zeros(0, dtype=np.int32)
+
+        generation = self._generation + 1
+        np.save(self._segment_path(generation, "docs"), all_docs.astype(np.int32))
+        np.save(self._segment_path(generation, "tfs"), all_tfs.astype(np.int32))
+        np.save(self._segment_path(generation, "lengths"), lengths[live])
+
+        manifest = {"generation": generation, "terms": terms, "doc_ids": [doc_ids[ordinal] for ordinal in live]}
+        tmp_path = self.index_dir / f"{MANIFEST_NAME}.tmp"
+        tmp_path.write_text(json.dumps(manifest))
+        os.replace(tmp_path, self.index_dir / MANIFEST_NAME)
+
+        for name in ("docs", "tfs", "lengths"):
+            old_path = self._segment_path(self._generation, name)
+            if old_path.exists():
+                # Open memmaps keep the old data readable until they are dropped
+                old_path.unlink()
+
+        return (
+            generation,
+            terms,
+            np.load(self._segment_path(generation, "docs"), mmap_mode="r"),
+            np.load(self._segment_path(generation, "tfs"), mmap_mode="r"),
+            remap,
+        )
@@ -0,0 +1,196 @@
+"""Token-bounded text chunking that keeps sentence and record boundaries."""
+
+import re
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Split points: after sentence punctuation, at line breaks, and between
+# adjacent JSON objects (after the comma of "}, {"), so chunks end on whole
+# sentences/records and separators are counted with the segment before them
+_BOUNDARY = re.compile(r"(?<=[.!?;])\s+|\s*\n\s*|(?<=\},)\s*(?=\{)")
+# Estimated tokens: words of up to 12 characters, 6-character pieces of longer
+# words, and single punctuation marks
+_ESTIMATE_TOKEN = re.compile(r"\w{1,12}\b|\w{1,6}|[^\w\s]")
+
+
+@dataclass
+class TextChunk:
+    """A chunk of text with its exact character span in the source."""
+    text: str
+    start: int
+    end: int
+    token_count: int
+
+
+def estimate_token_offsets(text: str) -> List[Tuple[int, int]]:
+    """Approximate subword token spans when no tokenizer is available.
+
+    Punctuation is one token and long words are split every few characters,
+    which over- rather than under-counts against WordPiece/BPE vocabularies.
+    """
+    return [match.span() for match in _ESTIMATE_TOKEN.finditer(text)]
+
+
+def estimate_token_count(text: str) -> int:
+    return len(_ESTIMATE_TOKEN.findall(text))
+
+
+class TokenChunker:
+    """Packs text into chunks of at most ``max_tokens`` embedding tokens.
+
+    Text is segmented at sentence, line and JSON-record boundaries, segments
+    are tokenized in batches with the embedding model's (fast) tokenizer,
+    and consecutive segments are packed greedily using cumulative token
+    counts. Segments longer than a chunk are split at token boundaries.
+    Consecutive chunks share up to ``overlap_tokens`` of whole segments.
+
+    Large documents are processed in one pass over windows of
+    ``batch_size`` segments, so memory stays bounded by the window.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 512,
+        overlap_tokens: int = 50,
+        tokenizer: Optional[Any] = None,
+        batch_size: int = 256,
+    ):
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = max(0, min(overlap_tokens, max_tokens - 1))
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+
+    def chunk(self, text: str) -> List[TextChunk]:
+        return list(self.iter_chunks(text))
+
+    def iter_chunks(self, text: str) -> Iterator[TextChunk]:
+        """Yield chunks in order; ``text[chunk.start:chunk.end] == chunk.text``."""
+        starts: List[int] = []
+        ends: List[int] = []
+        counts: List[int] = []
+
+        for window in self._segment_windows(text):
+            segments = [text[start:end] for start, end in window]
+            for (seg_start, seg_end), segment, count, offsets in zip(window, segments, *self._tokenize(segments)):
+                if count <= self.max_tokens:
+                    if count:
+                        starts.append(seg_start)
+                        ends.append(seg_end)
+                        counts.append(count)
+                    continue
+                for piece_start, piece_end, piece_count in self._split_segment(
+                    seg_start, offsets or estimate_token_offsets(segment)
+                ):
+                    starts.append(piece_start)
+                    ends.append(piece_end)
+                    counts.append(piece_count)
+
+            # Pack everything except a tail that might still grow with the next window
+            consumed, chunks = self._pack(text, starts, ends, counts, final=False)
+            yield from chunks
+            del starts[:consumed], ends[:consumed], counts[:consumed]
+
+        _, chunks = self._pack(text, starts, ends, counts, final=True)
+        yield from chunks
+
+    def count_tokens(self, texts: Sequence[str]) -> np.ndarray:
+        """Token counts for a batch of texts, without special tokens."""
+        return np.array(self._tokenize(texts)[0], dtype=np.int64)
+
+    def token_offsets(self, texts: Sequence[str]) -> List[List[Tuple[int, int]]]:
+        """Character span of every token in each text, tokenized as one batch."""
+        if not texts:
+            return []
+        if self.tokenizer is None:
+            return [estimate_token_offsets(text) for text in texts]
+
+        encoded = self.tokenizer(
+            list(texts),
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        return [[(int(start), int(end)) for start, end in offsets] for offsets in encoded["offset_mapping"]]
+
+    def _tokenize(self, texts: Sequence[str]) -> Tuple[List[int], List[Optional[List[Tuple[int, int]]]]]:
+        """Token counts, plus offsets where the tokenizer produces them anyway."""
+        if self.tokenizer is None:
+            # Counting is much cheaper than building spans; spans are only needed to split
+            return [estimate_token_count(text) for text in texts], [None] * len(texts)
+        offsets = self.token_offsets(texts)
+        return [len(text_offsets) for text_offsets in offsets], offsets
+
+    def _segment_windows(self, text: str) -> Iterator[List[Tuple[int, int]]]:
+        """Yield (start, end) spans of non-blank segments, ``batch_size`` at a time."""
+        window: List[Tuple[int, int]] = []
+        position = 0
+        for match in chain(_BOUNDARY.finditer(text), [None]):
+            end = match.start() if match else len(text)
+            segment = text[position:end]
+            stripped = segment.strip()
+            if stripped:
+                start = position + segment.index(stripped[0])
+                window.append((start, start + len(stripped)))
+                if len(window) >= self.batch_size:
+                    yield window
+                    window = []
+            position = match.end() if match else end
+        if window:
+            yield window
+
+    def _split_segment(self, start: int, offsets: List[Tuple[int, int]]) -> Iterator[Tuple[int, int, int]]:
+        """Split an oversized segment at token boundaries into pieces of at most max_tokens."""
+        for first in range(0, len(offsets), self.max_tokens):
+            last = min(first + self.max_tokens, len(offsets)) - 1
+            yield start + offsets[first][0], start + offsets[last][1], last - first + 1
+
+    def _pack(
+        self,
+        text: str,
+        starts: List[int],
+        ends: List[int],
+        counts: List[int],
+        final: bool,
+    ) -> Tuple[int, List[TextChunk]]:
+        """Greedily pack pieces into chunks; returns (pieces consumed, chunks)."""
+        if not counts:
+            return 0, []
+
+        cumulative = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        total = len(counts)
+        chunks = []
+        first = 0
+
+        while first < total:
+            if not final and cumulative[total] - cumulative[first] <= self.max_tokens:
+                break
+
+            # Last piece that still fits, found by binary search on the running total
+            stop = int(np.searchsorted(cumulative, cumulative[first] + self.max_tokens, side="right")) - 1
+            stop = max(stop, first + 1)
+            start_char, end_char = starts[first], ends[stop - 1]
+            chunks.append(TextChunk(
+                text=text[start_char:end_char],
+                start=start_char,
+                end=end_char,
+                token_count=int(cumulative[stop] - cumulative[first]),
+            ))
+            if stop >= total:
+                first = total
+                break
+
+            # Start the next chunk on whole pieces worth at most overlap_tokens,
+            # as long as the chunk after them still makes progress
+            overlap_from = int(np.searchsorted(cumulative, cumulative[stop] - self.overlap_tokens, side="left"))
+            overlap_from = max(overlap_from, first + 1)
+            if overlap_from >= stop or cumulative[stop + 1] - cumulative[overlap_from] > self.max_tokens:
+                overlap_from = stop
+            first = overlap_from
+
+        return first, chunks
@@ -48,6 +48,12 @@ class QdrantConfig(BaseSettings):
     collection_name: str = Field(default="wearforce_docs", env="QDRANT_COLLECTION")
     embedding_dim: int = Field(default=384, env="EMBEDDING_DIM")
     
+    # Compact vectors: int8 scalar quantization in RAM, float32 originals on disk
+    quantization: str = Field(default="none", env="QDRANT_QUANTIZATION")  # none, int8
+    quantization_quantile: float = Field(default=0.99, env="QDRANT_QUANTIZATION_QUANTILE")
+    quantization_oversampling: float = Field(default=3.0, env="QDRANT_QUANTIZATION_OVERSAMPLING")
+    quantization_rescore: bool = Field(default=True, env="QDRANT_QUANTIZATION_RESCORE")
+    
     @property
     def url(self) -> str:
         """Get Qdrant URL."""
@@ -139,6 +145,20 @@ class STTServiceConfig(ServiceConfig):
     whisper_compute_type: str = Field(default="float16", env="WHISPER_COMPUTE_TYPE")
     whisper_threads: int = Field(default=4, env="WHISPER_THREADS")
 
+    # Streaming session buffering
+    stream_sample_rate: int = Field(default=16000, env="STREAM_SAMPLE_RATE")
+    stream_window_seconds: float = Field(default=1.0, env="STREAM_WINDOW_SECONDS")
+    stream_max_window_seconds: float = Field(default=6.0, env="STREAM_MAX_WINDOW_SECONDS")
+    stream_overlap_ratio: float = Field(default=0.25, env="STREAM_OVERLAP_RATIO")
+    stream_backlog_chunks: int = Field(default=64, env="STREAM_BACKLOG_CHUNKS")
+    stream_incremental: bool = Field(default=True, env="STREAM_INCREMENTAL")
+    stream_min_silence_seconds: float = Field(default=0.5, env="STREAM_MIN_SILENCE_SECONDS")
+    stream_prompt_chars: int = Field(default=200, env="STREAM_PROMPT_CHARS")
+    stream_batch_enabled: bool = Field(default=True, env="STREAM_BATCH_ENABLED")
+    stream_batch_max_size: int = Field(default=8, env="STREAM_BATCH_MAX_SIZE")
+    stream_batch_max_wait_ms: float = Field(default=25.0, env="STREAM_BATCH_MAX_WAIT_MS")
+    stream_batch_max_per_session: int = Field(default=1, env="STREAM_BATCH_MAX_PER_SESSION")
+
 
 class TTSServiceConfig(ServiceConfig):
     """TTS Service specific configuration."""
@@ -151,6 +171,24 @@ class TTSServiceConfig(ServiceConfig):
     max_text_length: int = Field(default=5000, env="MAX_TEXT_LENGTH")
     audio_format: str = Field(default="wav", env="AUDIO_FORMAT")
     sample_rate: int = Field(default=22050, env="SAMPLE_RATE")
+    
+    # Warm Piper worker pool
+    piper_pool_enabled: bool = Field(default=True, env="PIPER_POOL_ENABLED")
+    piper_pool_size: int = Field(default=2, env="PIPER_POOL_SIZE")
+    piper_pool_voice_sizes: Dict[str, int] = Field(default_factory=dict, env="PIPER_POOL_VOICE_SIZES")
+    piper_pool_min_workers: int = Field(default=1, env="PIPER_POOL_MIN_WORKERS")
+    piper_pool_idle_timeout: float = Field(default=300.0, env="PIPER_POOL_IDLE_TIMEOUT")
+    
+    # Pipelined streaming
+    streaming_ttfb_target_ms: float = Field(default=300.0, env="STREAMING_TTFB_TARGET_MS")
+    streaming_first_chunk_chars: int = Field(default=80, env="STREAMING_FIRST_CHUNK_CHARS")
+
+    # Synthesized audio cache
+    audio_cache_enabled: bool = Field(default=True, env="AUDIO_CACHE_ENABLED")
+    audio_cache_memory_bytes: int = Field(default=64 * 1024 * 1024, env="AUDIO_CACHE_MEMORY_BYTES")
+    audio_cache_dir: Optional[str] = Field(default="/tmp/wearforce/tts-audio-cache", env="AUDIO_CACHE_DIR")
+    audio_cache_disk_bytes: int = Field(default=1024 * 1024 * 1024, env="AUDIO_CACHE_DISK_BYTES")
+    audio_cache_segment_bytes: int = Field(default=32 * 1024 * 1024, env="AUDIO_CACHE_SEGMENT_BYTES")
 
 
 class NLUServiceConfig(ServiceConfig):
@@ -162,10 +200,17 @@ class NLUServiceConfig(ServiceConfig):
     # Agent settings
     max_conversation_history: int = Field(default=50, env="MAX_CONVERSATION_HISTORY")
     conversation_ttl: int = Field(default=3600, env="CONVERSATION_TTL")  # 1 hour
+    conversation_max_messages: int = Field(default=100, env="CONVERSATION_MAX_MESSAGES")  # per-conversation log cap
+    # Run entity extraction and RAG retrieval alongside intent classification;
+    # retrieval is cancelled or discarded when the turn isn't routed to RAG
+    speculative_execution: bool = Field(default=False, env="SPECULATIVE_EXECUTION")
+    # Estimated tokens of retrieved passages packed into the response prompt
+    rag_context_token_budget: int = Field(default=1500, env="RAG_CONTEXT_TOKEN_BUDGET")
     
     # Tool settings
     crm_api_url: str = Field(default="http://localhost:3000/api", env="CRM_API_URL")
     erp_api_url: str = Field(default="http://localhost:3001/api", env="ERP_API_URL")
+    tool_turn_deadline: float = Field(default=20.0, env="TOOL_TURN_DEADLINE")  # seconds, 0 = no deadline
 
 
 class LLMServiceConfig(ServiceConfig):
@@ -179,6 +224,15 @@ class LLMServiceConfig(ServiceConfig):
     max_num_seqs: int = Field(default=256, env="MAX_NUM_SEQS")
     max_model_len: int = Field(default=4096, env="MAX_MODEL_LEN")
     swap_space: int = Field(default=4, env="SWAP_SPACE")
+    engine_backend: str = Field(default="vllm", env="LLM_ENGINE_BACKEND")  # vllm | stub
+    enable_prefix_caching: bool = Field(default=True, env="ENABLE_PREFIX_CACHING")
+    
+    # Replica routing
+    local_replicas: int = Field(default=1, env="LLM_LOCAL_REPLICAS")
+    remote_replicas: str = Field(default="", env="LLM_REMOTE_REPLICAS")  # "model=http://host:port,..."
+    routing_policy: str = Field(default="least_tokens", env="LLM_ROUTING_POLICY")  # least_tokens | ewma
+    replica_failure_threshold: int = Field(default=3, env="LLM_REPLICA_FAILURE_THRESHOLD")
+    replica_ejection_seconds: float = Field(default=30.0, env="LLM_REPLICA_EJECTION_SECONDS")
     
     # Request batching
     batch_size: int = Field(default=32, env="BATCH_SIZE")
@@ -192,14 +246,46 @@ class RAGServiceConfig(ServiceConfig):
     port: int = Field(default=8005, env="PORT")
     
     # RAG settings
-    chunk_size: int = Field(default=512, env="CHUNK_SIZE")
-    chunk_overlap: int = Field(default=50, env="CHUNK_OVERLAP")
+    chunk_size: int = Field(default=512, env="CHUNK_SIZE")  # embedding tokens, capped at the model limit
+    chunk_overlap: int = Field(default=50, env="CHUNK_OVERLAP")  # tokens
     top_k: int = Field(default=5, env="TOP_K")
     similarity_threshold: float = Field(default=0.7, env="SIMILARITY_THRESHOLD")
     
     # Hybrid search weights
     dense_weight: float = Field(default=0.7, env="DENSE_WEIGHT")
     sparse_weight: float = Field(default=0.3, env="SPARSE_WEIGHT")
+    
+    # Default retrieval latency budgets in ms; requests may override (0/empty = none)
+    search_latency_budget_ms: float = Field(default=0, env="SEARCH_LATENCY_BUDGET_MS")
+    search_stage_budgets_ms: str = Field(default="", env="SEARCH_STAGE_BUDGETS_MS")  # e.g. "embedding=50,sparse=80"
+    
+    # Embedding cache (in-process LRU + shared tier)
+    embedding_cache_max_bytes: int = Field(default=64 * 1024 * 1024, env="EMBEDDING_CACHE_MAX_BYTES")
+    embedding_cache_backend: str = Field(default="redis", env="EMBEDDING_CACHE_BACKEND")  # redis, disk, none
+    embedding_cache_dir: str = Field(default="/tmp/wearforce/embedding-cache", env="EMBEDDING_CACHE_DIR")
+    embedding_cache_ttl: int = Field(default=7 * 86400, env="EMBEDDING_CACHE_TTL")
+    vector_precision: str = Field(default="float32", env="VECTOR_PRECISION")  # float32, float16
+    
+    # Semantic cache for /search and /rag (matches paraphrased queries)
+    semantic_cache_enabled: bool = Field(default=False, env="SEMANTIC_CACHE_ENABLED")
+    semantic_cache_threshold: float = Field(default=0.95, env="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_max_entries: int = Field(default=2048, env="SEMANTIC_CACHE_MAX_ENTRIES")
+    semantic_cache_ttl: int = Field(default=300, env="SEMANTIC_CACHE_TTL")
+    
+    # Sparse (BM25) inverted index
+    sparse_index_dir: str = Field(default="/tmp/wearforce/sparse-index", env="SPARSE_INDEX_DIR")
+    sparse_index_flush_threshold: int = Field(default=5000, env="SPARSE_INDEX_FLUSH_THRESHOLD")
+    
+    # Cross-document embedding batches in the indexing workers
+    embedding_batch_tokens: int = Field(default=8192, env="EMBEDDING_BATCH_TOKENS")  # 0 disables
+    embedding_batch_wait: float = Field(default=0.05, env="EMBEDDING_BATCH_WAIT")
+    indexing_max_inflight_documents: int = Field(default=64, env="INDEXING_MAX_INFLIGHT_DOCUMENTS")
+    
+    # Change-data-capture indexing from CRM/ERP domain events
+    cdc_enabled: bool = Field(default=False, env="CDC_ENABLED")
+    nats_servers: str = Field(default="nats://localhost:4222", env="NATS_SERVERS")  # comma-separated
+    cdc_coalesce_window: float = Field(default=0.5, env="CDC_COALESCE_WINDOW")
+    cdc_max_batch: int = Field(default=64, env="CDC_MAX_BATCH")
 
 
 class AppConfig(BaseSettings):
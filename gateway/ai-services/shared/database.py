@@ -5,6 +5,7 @@ from contextlib import asynccontextmanager
 from typing import Any, AsyncGenerator, Dict, List, Optional
 
 import asyncpg
+import structlog
 from sqlalchemy import MetaData
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
@@ -12,6 +13,8 @@ from sqlalchemy.orm import DeclarativeBase
 
 from .config import DatabaseConfig
 
+logger = structlog.get_logger(__name__)
+
 
 class Base(DeclarativeBase):
     """Base class for SQLAlchemy models."""
@@ -96,10 +99,25 @@ class RedisManager:
         """Set key-value pair with optional expiration."""
         return await self.client.set(key, value, ex=ex, px=px)
     
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Get values for multiple keys in one round-trip."""
+        if not keys:
+            return []
+        return await self.client.mget(keys)
+
+    async def mset_with_ttl(self, mapping: Dict[str, Any], ex: Optional[int] = None) -> None:
+        """Set multiple key-value pairs with optional expiration in one pipeline."""
+        if not mapping:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=ex)
+            await pipe.execute()
+
     async def delete(self, *keys: str) -> int:
         """Delete keys."""
         return await self.client.delete(*keys)
-    
+
     async def exists(self, key: str) -> bool:
         """Check if key exists."""
         return bool(await self.client.exists(key))
@@ -170,10 +188,15 @@ class VectorDatabaseManager:
         )
         self.collection_name = config.collection_name
         self.embedding_dim = config.embedding_dim
+        self.quantization = getattr(config, "quantization", "none")
         
+    @property
+    def is_quantized(self) -> bool:
+        return self.quantization == "int8"
+    
     async def create_collection(self) -> None:
         """Create collection if it doesn't exist."""
-        from qdrant_client.models import Distance, VectorParams
+        from qdrant_client.models import Distance, VectorParams, VectorParamsDiff
         
         collections = await self.client.get_collections()
         collection_names = [c.name for c in collections.collections]
@@ -184,8 +207,50 @@ class VectorDatabaseManager:
                 vectors_config=VectorParams(
                     size=self.embedding_dim,
                     distance=Distance.COSINE,
+                    # Quantized collections search int8 copies in RAM and only
+                    # read the float32 originals from disk to rescore
+                    on_disk=self.is_quantized,
                 ),
+                quantization_config=self._quantization_config(),
+            )
+        elif self.is_quantized:
+            # Enabling quantization on an existing collection builds the int8
+            # copies in place and moves the float32 originals to disk ("" is
+            # the collection's unnamed vector)
+            await self.client.update_collection(
+                collection_name=self.collection_name,
+                vectors_config={"": VectorParamsDiff(on_disk=True)},
+                quantization_config=self._quantization_config(),
+            )
+    
+    def _quantization_config(self) -> Any:
+        from qdrant_client.models import ScalarQuantization, ScalarQuantizationConfig, ScalarType
+        
+        if not self.is_quantized:
+            return None
+        
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=self.config.quantization_quantile,
+                always_ram=True,
             )
+        )
+    
+    def _search_params(self) -> Any:
+        from qdrant_client.models import QuantizationSearchParams, SearchParams
+        
+        if not self.is_quantized:
+            return None
+        
+        # Oversample on the int8 index, then rescore with the original vectors
+        return SearchParams(
+            quantization=QuantizationSearchParams(
+                ignore=False,
+                rescore=self.config.quantization_rescore,
+                oversampling=self.config.quantization_oversampling,
+            )
+        )
     
     async def upsert_vectors(
         self,
@@ -217,23 +282,13 @@ class VectorDatabaseManager:
         filter_conditions: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """Search similar vectors."""
-        from qdrant_client.models import Filter, FieldCondition, MatchValue
-        
-        search_filter = None
-        if filter_conditions:
-            conditions = []
-            for field, value in filter_conditions.items():
-                conditions.append(
-                    FieldCondition(key=field, match=MatchValue(value=value))
-                )
-            search_filter = Filter(must=conditions)
-        
         results = await self.client.search(
             collection_name=self.collection_name,
             query_vector=query_vector,
             limit=limit,
             score_threshold=score_threshold,
-            query_filter=search_filter,
+            query_filter=self._build_filter(filter_conditions),
+            search_params=self._search_params(),
         )
         
         return [
@@ -245,6 +300,125 @@ class VectorDatabaseManager:
             for hit in results
         ]
     
+    async def search_batch(self, queries: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Run several searches in one request.
+        
+        Each query is a dict with the keyword arguments of ``search``
+        (``query_vector``, ``limit``, ``score_threshold``, ``filter_conditions``).
+        """
+        from qdrant_client.models import SearchRequest
+        
+        if not queries:
+            return []
+        
+        requests = [
+            SearchRequest(
+                vector=query["query_vector"],
+                limit=query.get("limit", 5),
+                score_threshold=query.get("score_threshold"),
+                filter=self._build_filter(query.get("filter_conditions")),
+                params=self._search_params(),
+                with_payload=True,
+            )
+            for query in queries
+        ]
+        
+        batches = await self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=requests,
+        )
+        
+        return [
+            [
+                {
+                    "id": hit.id,
+                    "score": hit.score,
+                    "payload": hit.payload,
+                }
+                for hit in results
+            ]
+            for results in batches
+        ]
+    
+    @staticmethod
+    def _build_filter(filter_conditions: Optional[Dict[str, Any]]) -> Any:
+        from qdrant_client.models import Filter, FieldCondition, MatchValue
+        
+        if not filter_conditions:
+            return None
+        
+        conditions = []
+        for field, value in filter_conditions.items():
+            conditions.append(
+                FieldCondition(key=field, match=MatchValue(value=value))
+            )
+        return Filter(must=conditions)
+    
+    async def retrieve(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch points with payloads by ID."""
+        points = await self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=ids,
+            with_payload=True,
+        )
+        
+        return [
+            {
+                "id": point.id,
+                "payload": point.payload,
+            }
+            for point in points
+        ]
+    
+    async def scroll(
+        self,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        page_size: int = 256,
+    ) -> List[Dict[str, Any]]:
+        """Fetch all points matching equality filters, page by page."""
+        points = []
+        async for page in self.scroll_pages(filter_conditions, with_vectors, page_size):
+            points.extend(page)
+        return points
+    
+    async def scroll_pages(
+        self,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        page_size: int = 256,
+    ) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        """Yield the points matching equality filters one page at a time."""
+        scroll_filter = self._build_filter(filter_conditions)
+        offset = None
+        while True:
+            page, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=with_vectors,
+            )
+            yield [
+                {
+                    "id": point.id,
+                    "payload": point.payload,
+                    "vector": point.vector,
+                }
+                for point in page
+            ]
+            if offset is None:
+                return
+    
+    async def count(self) -> int:
+        """Count the points in the collection."""
+        result = await self.client.count(
+            collection_name=self.collection_name,
+            exact=True,
+        )
+        return result.count
+    
     async def delete_vectors(self, ids: List[str]) -> None:
         """Delete vectors by IDs."""
         await self.client.delete(
@@ -266,34 +440,63 @@ class VectorDatabaseManager:
 
 
 class ConversationStore:
-    """Redis-based conversation storage."""
-    
-    def __init__(self, redis_manager: RedisManager, ttl: int = 3600):
+    """Redis-based conversation storage.
+    
+    Messages are an append-only Redis list per conversation
+    (``conversation:{id}:messages``), capped at ``max_messages`` with LTRIM;
+    conversation metadata lives in a hash (``conversation:{id}:meta``).
+    Appends and reads are single pipelined round-trips that never touch the
+    rest of the history. Conversations still stored in the old single-blob
+    format (``conversation:{id}``) are moved over the first time they are
+    read or written.
+    """
+    
+    def __init__(self, redis_manager: RedisManager, ttl: int = 3600, max_messages: int = 100):
         self.redis = redis_manager
         self.ttl = ttl
+        self.max_messages = max_messages
+    
+    @staticmethod
+    def _messages_key(conversation_id: str) -> str:
+        return f"conversation:{conversation_id}:messages"
+    
+    @staticmethod
+    def _meta_key(conversation_id: str) -> str:
+        return f"conversation:{conversation_id}:meta"
+    
+    @staticmethod
+    def _legacy_key(conversation_id: str) -> str:
+        return f"conversation:{conversation_id}"
     
     async def save_conversation(
         self,
         conversation_id: str,
         conversation: Dict[str, Any],
     ) -> None:
-        """Save conversation to Redis."""
+        """Replace a conversation's messages and metadata."""
         import json
-        key = f"conversation:{conversation_id}"
-        value = json.dumps(conversation, default=str)
-        await self.redis.set(key, value, ex=self.ttl)
+        messages_key = self._messages_key(conversation_id)
+        meta_key = self._meta_key(conversation_id)
+        messages = conversation.get("messages", [])[-self.max_messages:]
+        metadata = {key: value for key, value in conversation.items() if key != "messages"}
+        
+        async with self.redis.client.pipeline(transaction=True) as pipe:
+            pipe.delete(messages_key, meta_key, self._legacy_key(conversation_id))
+            if messages:
+                pipe.rpush(messages_key, *(json.dumps(message, default=str) for message in messages))
+                pipe.expire(messages_key, self.ttl)
+            if metadata:
+                pipe.hset(meta_key, mapping=self._encode_fields(metadata))
+                pipe.expire(meta_key, self.ttl)
+            await pipe.execute()
     
     async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        """Get conversation from Redis."""
-        import json
-        key = f"conversation:{conversation_id}"
-        value = await self.redis.get(key)
-        if value is None:
-            return None
-        try:
-            return json.loads(value)
-        except json.JSONDecodeError:
+        """Get a conversation's metadata and all of its messages."""
+        metadata = await self.get_metadata(conversation_id)
+        messages = await self.get_messages(conversation_id, limit=0)
+        if not metadata and not messages:
             return None
+        return {"id": conversation_id, **metadata, "messages": messages}
     
     async def add_message(
         self,
@@ -301,41 +504,136 @@ class ConversationStore:
         message: Dict[str, Any],
     ) -> None:
         """Add message to conversation."""
-        conversation = await self.get_conversation(conversation_id)
-        if conversation is None:
-            conversation = {
-                "id": conversation_id,
-                "messages": [],
-                "created_at": message.get("timestamp"),
-            }
+        await self.add_messages(conversation_id, [message])
+    
+    async def add_messages(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+    ) -> None:
+        """Append messages in one pipelined round-trip, trimming to ``max_messages``."""
+        import json
+        if not messages:
+            return
         
-        conversation["messages"].append(message)
-        conversation["updated_at"] = message.get("timestamp")
+        messages_key = self._messages_key(conversation_id)
+        meta_key = self._meta_key(conversation_id)
+        timestamp = json.dumps(messages[-1].get("timestamp"), default=str)
         
-        # Keep only last N messages
-        max_messages = 100
-        if len(conversation["messages"]) > max_messages:
-            conversation["messages"] = conversation["messages"][-max_messages:]
+        async with self.redis.client.pipeline(transaction=False) as pipe:
+            pipe.getdel(self._legacy_key(conversation_id))
+            pipe.rpush(messages_key, *(json.dumps(message, default=str) for message in messages))
+            pipe.ltrim(messages_key, -self.max_messages, -1)
+            pipe.hsetnx(meta_key, "created_at", json.dumps(messages[0].get("timestamp"), default=str))
+            pipe.hset(meta_key, mapping={"id": json.dumps(conversation_id), "updated_at": timestamp})
+            pipe.expire(messages_key, self.ttl)
+            pipe.expire(meta_key, self.ttl)
+            legacy = (await pipe.execute())[0]
         
-        await self.save_conversation(conversation_id, conversation)
+        if legacy is not None:
+            await self._migrate_legacy(conversation_id, legacy)
     
     async def get_messages(
         self,
         conversation_id: str,
         limit: int = 50,
     ) -> List[Dict[str, Any]]:
-        """Get conversation messages."""
-        conversation = await self.get_conversation(conversation_id)
-        if conversation is None:
-            return []
+        """Get the last ``limit`` messages (all of them if ``limit`` <= 0)."""
+        import json
+        messages_key = self._messages_key(conversation_id)
+        start = -limit if limit > 0 else 0
         
-        messages = conversation.get("messages", [])
-        return messages[-limit:] if limit > 0 else messages
+        async with self.redis.client.pipeline(transaction=False) as pipe:
+            pipe.getdel(self._legacy_key(conversation_id))
+            pipe.lrange(messages_key, start, -1)
+            legacy, values = await pipe.execute()
+        
+        if legacy is not None:
+            await self._migrate_legacy(conversation_id, legacy)
+            values = await self.redis.lrange(messages_key, start, -1)
+        
+        messages = []
+        for value in values:
+            try:
+                messages.append(json.loads(value))
+            except json.JSONDecodeError:
+                continue
+        return messages
+    
+    async def set_metadata(self, conversation_id: str, metadata: Dict[str, Any]) -> None:
+        """Set conversation metadata fields without touching the messages."""
+        if not metadata:
+            return
+        meta_key = self._meta_key(conversation_id)
+        async with self.redis.client.pipeline(transaction=False) as pipe:
+            pipe.hset(meta_key, mapping=self._encode_fields(metadata))
+            pipe.expire(meta_key, self.ttl)
+            await pipe.execute()
+    
+    async def get_metadata(self, conversation_id: str) -> Dict[str, Any]:
+        """Get conversation metadata fields."""
+        import json
+        fields = await self.redis.hgetall(self._meta_key(conversation_id))
+        if not fields:
+            # Conversations in the old format only have metadata inside the blob
+            await self.get_messages(conversation_id, limit=1)
+            fields = await self.redis.hgetall(self._meta_key(conversation_id))
+        
+        metadata = {}
+        for key, value in fields.items():
+            key = key.decode() if isinstance(key, bytes) else key
+            try:
+                metadata[key] = json.loads(value)
+            except json.JSONDecodeError:
+                metadata[key] = value
+        return metadata
     
     async def delete_conversation(self, conversation_id: str) -> None:
         """Delete conversation from Redis."""
-        key = f"conversation:{conversation_id}"
-        await self.redis.delete(key)
+        await self.redis.delete(
+            self._messages_key(conversation_id),
+            self._meta_key(conversation_id),
+            self._legacy_key(conversation_id),
+        )
+    
+    async def _migrate_legacy(self, conversation_id: str, legacy: Any) -> None:
+        """Move a conversation from the old JSON-blob format.
+        
+        GETDEL hands the blob to exactly one caller; its messages are
+        prepended so they stay ahead of any appended meanwhile.
+        """
+        import json
+        try:
+            conversation = json.loads(legacy)
+        except json.JSONDecodeError:
+            logger.warning("Dropping unreadable legacy conversation", conversation_id=conversation_id)
+            return
+        
+        messages_key = self._messages_key(conversation_id)
+        meta_key = self._meta_key(conversation_id)
+        messages = conversation.pop("messages", [])[-self.max_messages:]
+        
+        async with self.redis.client.pipeline(transaction=True) as pipe:
+            if messages:
+                pipe.lpush(messages_key, *(json.dumps(message, default=str) for message in reversed(messages)))
+                pipe.ltrim(messages_key, -self.max_messages, -1)
+                pipe.expire(messages_key, self.ttl)
+            for key, value in self._encode_fields(conversation).items():
+                if key == "created_at":
+                    # The blob's creation time predates any append that triggered the migration
+                    pipe.hset(meta_key, key, value)
+                else:
+                    # Other values written since the migration started win over the blob's
+                    pipe.hsetnx(meta_key, key, value)
+            pipe.expire(meta_key, self.ttl)
+            await pipe.execute()
+        
+        logger.info("Migrated legacy conversation", conversation_id=conversation_id, messages=len(messages))
+    
+    @staticmethod
+    def _encode_fields(fields: Dict[str, Any]) -> Dict[str, str]:
+        import json
+        return {key: json.dumps(value, default=str) for key, value in fields.items()}
 
 
 class CacheStore:
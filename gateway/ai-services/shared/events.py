@@ -0,0 +1,239 @@
+"""
+NATS JetStream event subscription for AI services.
+
+Consumes the domain events published by the CRM/ERP services
+(``services/shared/events.py``). The wire format and subject naming
+(``<domain>.<event_type with '.' -> '_'>``, e.g. ``crm.contact_updated``,
+captured by the ``crm.>`` stream) match that module; event types are kept
+as plain strings so new event types do not need a release here.
+"""
+
+import asyncio
+import inspect
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import structlog
+
+try:
+    import nats
+    NATS_AVAILABLE = True
+except ImportError:
+    nats = None
+    NATS_AVAILABLE = False
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class BaseEvent:
+    """Domain event as published by the CRM/ERP services."""
+
+    event_id: str
+    event_type: str
+    service: str
+    timestamp: datetime
+    data: Dict[str, Any]
+    metadata: Optional[Dict[str, Any]] = None
+    correlation_id: Optional[str] = None
+    user_id: Optional[str] = None
+
+    @property
+    def entity_type(self) -> str:
+        return self.event_type.split(".", 1)[0]
+
+    @property
+    def action(self) -> str:
+        return self.event_type.split(".", 1)[-1]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BaseEvent":
+        """Create event from dictionary."""
+        data = dict(data)
+        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+        return cls(**data)
+
+
+def event_subject(service: str, event_type: str) -> str:
+    """Get the NATS subject an event is published on."""
+    return f"{service.split('-', 1)[0]}.{event_type.replace('.', '_')}"
+
+
+EventHandler = Callable[[BaseEvent], Optional[Awaitable[Any]]]
+
+
+class EventSubscriber:
+    """NATS JetStream event subscriber.
+
+    Same interface as the services' EventSubscriber, with one addition: a
+    handler may return an awaitable (e.g. a future resolved once the event's
+    effects are durable). The message is then acked when it completes, or
+    nak'ed for redelivery if it fails, without blocking later messages. A
+    handler that raises gets the message nak'ed as well. Subscriptions that
+    fail are retried with backoff and reported by ``health_check``.
+    """
+
+    def __init__(
+        self,
+        nats_servers: List[str],
+        consumer_name: str,
+        jetstream: Any = None,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 30.0,
+    ):
+        self.nats_servers = nats_servers
+        self.consumer_name = consumer_name
+        self.nc = None
+        self.js = jetstream
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.handlers: Dict[str, List[EventHandler]] = {}
+        self.subscription_errors: Dict[str, str] = {}
+        self._active: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {
+            "messages_received": 0,
+            "messages_acked": 0,
+            "messages_nacked": 0,
+            "subscribe_failures": 0,
+            "num_pending": 0,
+            "lag_seconds": 0.0,
+        }
+
+    async def connect(self) -> None:
+        """Connect to NATS."""
+        if self.js is not None:
+            return
+        if not NATS_AVAILABLE:
+            raise RuntimeError("nats-py is not installed")
+        self.nc = await nats.connect(servers=self.nats_servers)
+        self.js = self.nc.jetstream()
+        logger.info("Connected to NATS JetStream for subscription", consumer=self.consumer_name)
+
+    async def disconnect(self) -> None:
+        """Stop consuming and disconnect from NATS."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self.nc:
+            await self.nc.close()
+            logger.info("Disconnected from NATS", consumer=self.consumer_name)
+
+    def subscribe(self, event_pattern: str, handler: EventHandler) -> None:
+        """Subscribe to events matching a subject pattern."""
+        self.handlers.setdefault(event_pattern, []).append(handler)
+
+    async def start_consuming(self) -> None:
+        """Start consuming events."""
+        if not self.js:
+            raise RuntimeError("Not connected to NATS")
+
+        for pattern in self.handlers:
+            self._tasks.append(asyncio.create_task(self._consume_pattern(pattern)))
+
+    def health_check(self) -> bool:
+        """Whether every subscribed pattern currently has a live subscription."""
+        return bool(self.handlers) and all(pattern in self._active for pattern in self.handlers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "subscriptions": {
+                pattern: "active" if pattern in self._active else self.subscription_errors.get(pattern, "pending")
+                for pattern in self.handlers
+            },
+        }
+
+    async def _consume_pattern(self, pattern: str) -> None:
+        """Consume events for a specific pattern, resubscribing after failures."""
+        durable = f"{self.consumer_name}-{pattern.replace('.', '-').replace('*', 'all').replace('>', 'rest')}"
+        delay = self.retry_delay
+
+        while True:
+            try:
+                subscription = await self.js.subscribe(subject=pattern, durable=durable, manual_ack=True)
+                self._active.add(pattern)
+                self.subscription_errors.pop(pattern, None)
+                delay = self.retry_delay
+                logger.info("Started consuming events", pattern=pattern, consumer=self.consumer_name)
+
+                async for msg in subscription.messages:
+                    await self._handle_message(pattern, msg)
+
+                self.subscription_errors[pattern] = "subscription closed"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["subscribe_failures"] += 1
+                self.subscription_errors[pattern] = str(e)
+                logger.error("Failed to consume events", pattern=pattern, error=str(e), retry_in=delay)
+            finally:
+                self._active.discard(pattern)
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    async def _handle_message(self, pattern: str, msg: Any) -> None:
+        self.stats["messages_received"] += 1
+        self._record_lag(msg)
+        try:
+            event = BaseEvent.from_dict(json.loads(msg.data.decode()))
+        except Exception as e:
+            logger.error("Failed to decode event", pattern=pattern, error=str(e))
+            # Poison message: redelivery would not help
+            await self._ack(msg)
+            return
+
+        pending = []
+        failed = False
+        for handler in self.handlers[pattern]:
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    pending.append(result)
+            except Exception as e:
+                failed = True
+                logger.error("Handler failed", pattern=pattern, event_id=event.event_id, error=str(e))
+
+        if failed:
+            # Redeliver; handlers that did accept the event see it again
+            if pending:
+                asyncio.ensure_future(asyncio.gather(*pending, return_exceptions=True))
+            await self._nak(msg)
+        elif pending:
+            asyncio.create_task(self._ack_when_done(msg, pending, event.event_id))
+        else:
+            await self._ack(msg)
+
+    async def _ack_when_done(self, msg: Any, pending: List[Awaitable[Any]], event_id: str) -> None:
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            logger.error("Deferred handler failed", event_id=event_id, error=str(failures[0]))
+            await self._nak(msg)
+        else:
+            await self._ack(msg)
+
+    async def _ack(self, msg: Any) -> None:
+        self.stats["messages_acked"] += 1
+        await msg.ack()
+
+    async def _nak(self, msg: Any) -> None:
+        self.stats["messages_nacked"] += 1
+        await msg.nak()
+
+    def _record_lag(self, msg: Any) -> None:
+        """Track pending count and publish-to-receive lag from JetStream metadata."""
+        metadata = getattr(msg, "metadata", None)
+        if metadata is None:
+            return
+        num_pending = getattr(metadata, "num_pending", None)
+        if num_pending is not None:
+            self.stats["num_pending"] = num_pending
+        published = getattr(metadata, "timestamp", None)
+        if isinstance(published, datetime):
+            self.stats["lag_seconds"] = max(0.0, time.time() - published.timestamp())
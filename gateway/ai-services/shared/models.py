@@ -155,6 +155,8 @@ class StreamSTTChunk(BaseModel):
     text: str
     is_partial: bool = True
     confidence: Optional[float] = None
+    committed_text: Optional[str] = None  # Full transcript committed so far
+    end_of_segment: bool = False  # Final chunk closed an utterance at a pause
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -236,12 +238,19 @@ class ChatChoice(BaseModel):
     finish_reason: str
 
 
+class PromptTokensDetails(BaseModel):
+    """Breakdown of prompt tokens (OpenAI compatible)."""
+    
+    cached_tokens: int = 0
+
+
 class TokenUsage(BaseModel):
     """Token usage statistics."""
     
     prompt_tokens: int
     completion_tokens: int
     total_tokens: int
+    prompt_tokens_details: Optional[PromptTokensDetails] = None
 
 
 class ChatResponse(BaseResponse):
@@ -294,6 +303,9 @@ class VectorSearchRequest(BaseModel):
     similarity_threshold: float = Field(0.7, ge=0.0, le=1.0)
     filters: Optional[Dict[str, Any]] = None
     include_metadata: bool = True
+    # Latency budgets: overall, and per stage (embedding, dense, sparse, fusion)
+    latency_budget_ms: Optional[float] = Field(None, gt=0)
+    stage_budgets_ms: Optional[Dict[str, float]] = None
 
 
 class SearchResult(BaseModel):
@@ -313,6 +325,27 @@ class VectorSearchResponse(BaseResponse):
     results: List[SearchResult]
     total_results: int
     processing_time: float
+    stage_timings_ms: Dict[str, float] = Field(default_factory=dict)
+    partial: bool = False  # a retrieval stage overran its budget or failed
+
+
+class BatchSearchRequest(BaseModel):
+    """Several vector searches answered with one embedding pass and one index round-trip."""
+    
+    queries: List[VectorSearchRequest] = Field(..., min_items=1, max_items=32)
+    # Budgets for the whole batch; per-query budgets are ignored
+    latency_budget_ms: Optional[float] = Field(None, gt=0)
+    stage_budgets_ms: Optional[Dict[str, float]] = None
+
+
+class BatchSearchResponse(BaseResponse):
+    """Batch vector search response, one entry per query in request order."""
+    
+    results: List[VectorSearchResponse]
+    total_queries: int
+    processing_time: float
+    stage_timings_ms: Dict[str, float] = Field(default_factory=dict)
+    partial: bool = False
 
 
 class RAGRequest(BaseModel):
@@ -339,6 +372,32 @@ class RAGResponse(BaseResponse):
     processing_time: float
 
 
+class RAGContextRequest(BaseModel):
+    """Retrieval-only RAG request: cited passages, no answer generation."""
+    
+    question: str
+    collection: Optional[str] = None
+    top_k: int = Field(5, ge=1, le=20)
+    similarity_threshold: float = Field(0.7, ge=0.0, le=1.0)
+
+
+class RAGPassage(SearchResult):
+    """Retrieved passage with the citation a caller's prompt can refer to."""
+    
+    citation_index: int
+    citation: str
+
+
+class RAGContextResponse(BaseResponse):
+    """Retrieval-only RAG response, passages ordered by citation index."""
+    
+    question: str
+    passages: List[RAGPassage] = Field(default_factory=list)
+    confidence: Optional[float] = None
+    processing_time: float
+    partial: bool = False
+
+
 # NLU Models
 class Intent(BaseModel):
     """Intent classification result."""
@@ -421,6 +480,7 @@ class AgentResponse(BaseResponse):
     reasoning: Optional[str] = None
     confidence: Optional[float] = None
     processing_time: float
+    stage_timeline: List[Dict[str, Any]] = Field(default_factory=list)  # per-stage start/end offsets (ms)
 
 
 # Tool Integration Models
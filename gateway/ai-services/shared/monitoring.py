@@ -1,5 +1,6 @@
 """Monitoring and metrics utilities."""
 
+import asyncio
 import time
 from contextlib import asynccontextmanager
 from functools import wraps
@@ -70,6 +71,13 @@ class Metrics:
             ["operation", "service"],  # operation: transcription, synthesis
         )
         
+        self.streaming_ttfb_seconds = Histogram(
+            "streaming_ttfb_seconds",
+            "Time from request to the first streamed audio byte in seconds",
+            ["service"],
+            buckets=[0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0],
+        )
+        
         self.audio_files_processed_total = Counter(
             "audio_files_processed_total",
             "Total audio files processed",
@@ -89,6 +97,13 @@ class Metrics:
             ["service"],
         )
         
+        self.vector_operation_duration_seconds = Histogram(
+            "vector_operation_duration_seconds",
+            "Vector operation duration in seconds, per retrieval stage",
+            ["operation", "service"],  # operation: search_embedding, search_dense, ...
+            buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],
+        )
+        
         # System metrics
         self.active_connections = Gauge(
             "active_connections",
@@ -187,6 +202,10 @@ class Metrics:
             status="success" if success else "error",
         ).inc()
     
+    def record_streaming_ttfb(self, duration: float) -> None:
+        """Record time-to-first-byte of a streamed response."""
+        self.streaming_ttfb_seconds.labels(service=self.service_name).observe(duration)
+    
     def record_vector_operation(
         self,
         operation: str,
@@ -202,6 +221,11 @@ class Metrics:
             self.vector_search_duration_seconds.labels(
                 service=self.service_name,
             ).observe(duration)
+        elif duration is not None:
+            self.vector_operation_duration_seconds.labels(
+                operation=operation,
+                service=self.service_name,
+            ).observe(duration)
     
     def set_active_connections(self, count: int) -> None:
         """Set active connections count."""
@@ -330,6 +354,10 @@ async def monitor_vector_operation(operation: str) -> AsyncGenerator[None, None]
     
     try:
         yield
+    except asyncio.TimeoutError:
+        if _metrics:
+            _metrics.record_error("vector_stage_timeout", operation)
+        raise
     except Exception as e:
         if _metrics:
             _metrics.record_error("vector_db_error", operation)
@@ -16,6 +16,7 @@ from tenacity import (
     retry_if_exception_type,
 )
 
+from .chunking import TokenChunker
 from .exceptions import ExternalServiceError
 
 
@@ -43,36 +44,25 @@ def chunk_text(
     chunk_size: int = 512,
     overlap: int = 50,
     min_chunk_size: int = 100,
+    tokenizer: Optional[Any] = None,
 ) -> List[Dict[str, Any]]:
-    """Split text into overlapping chunks."""
-    if len(text) <= chunk_size:
-        return [{"text": text, "start": 0, "end": len(text)}]
+    """Split text into overlapping chunks of at most ``chunk_size`` tokens.
     
-    chunks = []
-    start = 0
+    Chunks end on sentence or record boundaries and carry their exact
+    character span in ``text``. Chunks shorter than ``min_chunk_size``
+    characters are dropped, except the first.
+    """
+    chunker = TokenChunker(max_tokens=chunk_size, overlap_tokens=overlap, tokenizer=tokenizer)
     
-    while start < len(text):
-        end = start + chunk_size
-        
-        # If this is not the last chunk, try to break at word boundary
-        if end < len(text):
-            # Look for the last space within the chunk
-            last_space = text.rfind(" ", start, end)
-            if last_space > start + min_chunk_size:
-                end = last_space
-        
-        chunk_text = text[start:end].strip()
-        if len(chunk_text) >= min_chunk_size or start == 0:
+    chunks = []
+    for chunk in chunker.iter_chunks(text):
+        if len(chunk.text) >= min_chunk_size or not chunks:
             chunks.append({
-                "text": chunk_text,
-                "start": start,
-                "end": end,
+                "text": chunk.text,
+                "start": chunk.start,
+                "end": chunk.end,
+                "tokens": chunk.token_count,
             })
-        
-        # Move start position with overlap
-        start = end - overlap
-        if start >= len(text):
-            break
     
     return chunks
 
@@ -2,8 +2,10 @@
 
 import io
 import tempfile
+import time
 import wave
-from typing import Any, Dict, Optional, Tuple
+from math import gcd
+from typing import Any, Dict, List, Optional, Tuple
 
 import structlog
 import numpy as np
@@ -17,8 +19,9 @@ logger = structlog.get_logger(__name__)
 class AudioProcessor:
     """Audio preprocessing and processing utilities."""
     
-    def __init__(self, target_sample_rate: int = 16000):
+    def __init__(self, target_sample_rate: int = 16000, metrics=None):
         self.target_sample_rate = target_sample_rate
+        self.metrics = metrics
         self.is_initialized = False
         
         # Try to import audio libraries
@@ -47,6 +50,13 @@ class AudioProcessor:
         except ImportError:
             pass
         
+        self.scipy_available = False
+        try:
+            import scipy.signal
+            self.scipy_available = True
+        except ImportError:
+            pass
+        
         if not any([self.librosa_available, self.pydub_available, self.soundfile_available]):
             logger.warning("No audio processing libraries available. Limited functionality.")
         
@@ -339,6 +349,56 @@ class AudioProcessor:
             logger.warning("Noise reduction failed", error=str(exc))
             return audio
     
+    def detect_speech_segments(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        frame_ms: int = 30,
+        min_silence_seconds: float = 0.3,
+        min_speech_seconds: float = 0.1,
+        energy_floor: float = 0.005,
+    ) -> List[Tuple[int, int]]:
+        """Find speech regions as (start, end) sample offsets using frame energy.
+        
+        Cheap enough to run on every streaming step: one vectorized RMS pass,
+        an adaptive threshold over the window's noise floor, then gap filling.
+        """
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768.0
+        
+        frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        n_frames = len(audio) // frame_length
+        if n_frames == 0:
+            return []
+        
+        frames = audio[:n_frames * frame_length].reshape(n_frames, frame_length)
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+        
+        # Adaptive threshold: above the quietest frames, but never above half the peak
+        threshold = max(energy_floor, min(np.percentile(rms, 10) * 3.0, rms.max() * 0.5))
+        is_speech = rms > threshold
+        
+        # Run boundaries of speech frames
+        padded = np.concatenate(([0], is_speech.astype(np.int8), [0]))
+        edges = np.flatnonzero(np.diff(padded))
+        runs = list(zip(edges[::2], edges[1::2]))
+        
+        # Merge runs separated by short pauses, then drop blips
+        min_gap = int(min_silence_seconds * 1000 / frame_ms)
+        min_run = max(1, int(min_speech_seconds * 1000 / frame_ms))
+        merged: List[List[int]] = []
+        for start, end in runs:
+            if merged and start - merged[-1][1] < min_gap:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        
+        return [
+            (int(start * frame_length), int(end * frame_length))
+            for start, end in merged
+            if end - start >= min_run
+        ]
+    
     async def extract_audio_features(self, audio_data: bytes) -> Dict[str, Any]:
         """Extract audio features for analysis."""
         if not self.librosa_available:
@@ -880,4 +940,181 @@ class AudioProcessor:
                 # Return original audio if optimization fails
                 return audio_data
         
-        return await run_in_executor(_optimize)
\ No newline at end of file
+        return await run_in_executor(_optimize)
+
+    async def prepare_for_transcription(
+        self,
+        audio_data: bytes,
+        apply_vad: bool = True,
+        normalize: bool = True,
+    ) -> np.ndarray:
+        """Decode once and run the fused float32 pipeline for Whisper.
+        
+        Returns mono float32 samples at the target sample rate, ready to pass
+        straight to WhisperEngine without re-encoding to WAV. Each stage is
+        timed and recorded as `preprocess_<stage>`.
+        """
+        if not self.is_initialized:
+            raise AudioProcessingError("Audio processor not initialized", "initialization")
+        
+        audio_format = get_audio_info(audio_data).get("format", "unknown")
+        
+        def _process():
+            timings: Dict[str, float] = {}
+            started = time.perf_counter()
+            audio, sample_rate = self._decode_to_float32(audio_data)
+            timings["decode"] = time.perf_counter() - started
+            audio = self._run_pipeline(audio, sample_rate, apply_vad, normalize, timings)
+            return audio, timings
+        
+        try:
+            audio, timings = await run_in_executor(_process)
+        except Exception as exc:
+            logger.error("Audio pipeline failed", error=str(exc))
+            if self.metrics:
+                self.metrics.record_audio_processing("preprocess", 0.0, audio_format, success=False)
+            raise AudioProcessingError(f"Audio pipeline failed: {str(exc)}", "preprocessing")
+        
+        if self.metrics:
+            for stage, duration in timings.items():
+                self.metrics.record_audio_processing(f"preprocess_{stage}", duration, audio_format)
+        logger.debug("Audio pipeline completed",
+                    samples=len(audio),
+                    **{f"{stage}_ms": round(duration * 1000, 2) for stage, duration in timings.items()})
+        
+        return audio
+
+    def to_model_input(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Convert already-decoded PCM samples to float32 at the target rate."""
+        audio = samples.astype(np.float32)
+        if samples.dtype == np.int16:
+            audio *= 1.0 / 32768.0
+        return self._resample(audio, sample_rate, self.target_sample_rate)
+
+    def _decode_to_float32(self, audio_data: bytes) -> Tuple[np.ndarray, int]:
+        """Decode audio bytes to mono float32 samples in [-1, 1]."""
+        if audio_data[:4] == b"RIFF" and audio_data[8:12] == b"WAVE":
+            try:
+                with wave.open(io.BytesIO(audio_data), "rb") as wav_file:
+                    sample_width = wav_file.getsampwidth()
+                    channels = wav_file.getnchannels()
+                    sample_rate = wav_file.getframerate()
+                    frames = wav_file.readframes(wav_file.getnframes())
+                if sample_width in (2, 4):
+                    dtype = "<i2" if sample_width == 2 else "<i4"
+                    scale = 1.0 / float(2 ** (8 * sample_width - 1))
+                    audio = np.frombuffer(frames, dtype=dtype).astype(np.float32)
+                    audio *= scale
+                    if channels > 1:
+                        audio = audio.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+                    return audio, sample_rate
+            except wave.Error:
+                pass  # e.g. float WAV; let soundfile handle it
+        
+        if self.soundfile_available:
+            import soundfile as sf
+            
+            try:
+                audio, sample_rate = sf.read(io.BytesIO(audio_data), dtype="float32", always_2d=True)
+                return audio.mean(axis=1, dtype=np.float32), sample_rate
+            except Exception as exc:
+                logger.debug("soundfile decode failed", error=str(exc))
+        
+        if self.pydub_available:
+            from pydub import AudioSegment
+            
+            try:
+                segment = AudioSegment.from_file(io.BytesIO(audio_data)).set_channels(1)
+                scale = 1.0 / float(2 ** (8 * segment.sample_width - 1))
+                audio = np.array(segment.get_array_of_samples(), dtype=np.float32)
+                audio *= scale
+                return audio, segment.frame_rate
+            except Exception as exc:
+                logger.debug("pydub decode failed", error=str(exc))
+        
+        # Headerless streaming chunks: 16-bit little-endian PCM at the target rate
+        if get_audio_info(audio_data)["format"] == "unknown" and len(audio_data) % 2 == 0:
+            audio = np.frombuffer(audio_data, dtype="<i2").astype(np.float32)
+            audio *= 1.0 / 32768.0
+            return audio, self.target_sample_rate
+        
+        raise AudioProcessingError("No decoder available for audio format", "decode")
+
+    def _resample(self, audio: np.ndarray, sample_rate: int, target_rate: int) -> np.ndarray:
+        """Resample float32 audio (polyphase when scipy is available)."""
+        if sample_rate == target_rate or len(audio) == 0:
+            return audio
+        
+        if self.scipy_available:
+            from scipy.signal import resample_poly
+            
+            divisor = gcd(sample_rate, target_rate)
+            resampled = resample_poly(audio, target_rate // divisor, sample_rate // divisor)
+            return resampled.astype(np.float32, copy=False)
+        
+        new_length = int(len(audio) * target_rate / sample_rate)
+        positions = np.linspace(0, len(audio) - 1, new_length, dtype=np.float32)
+        return np.interp(positions, np.arange(len(audio), dtype=np.float32), audio).astype(np.float32)
+
+    def _run_pipeline(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        apply_vad: bool,
+        normalize: bool,
+        timings: Dict[str, float],
+    ) -> np.ndarray:
+        """Resample, gate silence, filter and level one float32 array in place."""
+        
+        def _stage(name: str, started: float) -> float:
+            now = time.perf_counter()
+            timings[name] = now - started
+            return now
+        
+        started = time.perf_counter()
+        audio = self._resample(audio, sample_rate, self.target_sample_rate)
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        sample_rate = self.target_sample_rate
+        started = _stage("resample", started)
+        if len(audio) == 0:
+            return audio
+        
+        if apply_vad:
+            # Zero everything outside detected speech; keep audio if nothing is found
+            segments = self.detect_speech_segments(audio, sample_rate, min_silence_seconds=0.1)
+            if segments:
+                position = 0
+                for start, end in segments:
+                    audio[position:start] = 0.0
+                    position = end
+                audio[position:] = 0.0
+            started = _stage("vad", started)
+        
+        # High-pass: remove DC offset, then pre-emphasis (y[n] = x[n] - 0.97 x[n-1])
+        audio -= audio.mean()
+        audio[1:] -= 0.97 * audio[:-1]
+        started = _stage("highpass", started)
+        
+        # Noise gate: attenuate samples under 3x the noise floor (quietest 10%)
+        magnitude = np.abs(audio)
+        floor_index = max(1, len(magnitude) // 10)
+        noise_floor = float(np.partition(magnitude, floor_index - 1)[:floor_index].mean())
+        if noise_floor > 0:
+            np.multiply(audio, 0.1, out=audio, where=magnitude <= noise_floor * 3)
+        started = _stage("denoise", started)
+        
+        if normalize:
+            # RMS to -20 dB, 4:1 compression above 0.5, then peak at -3 dB
+            rms = float(np.sqrt(np.mean(np.square(audio))))
+            if rms > 0:
+                audio *= 10 ** (-20.0 / 20.0) / rms
+            np.abs(audio, out=magnitude)
+            over = magnitude > 0.5
+            if over.any():
+                audio[over] = np.sign(audio[over]) * (0.5 + (magnitude[over] - 0.5) / 4.0)
+            peak = float(np.max(np.abs(audio)))
+            if peak > 0:
+                audio *= 0.707 / peak
+            _stage("normalize", started)
+        
+        return audio
@@ -0,0 +1,150 @@
+"""Preallocated ring buffer of PCM samples for streaming transcription sessions."""
+
+import io
+import wave
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from shared.exceptions import AudioProcessingError
+
+WAV_HEADER_SIZE = 44
+
+
+class AudioRingBuffer:
+    """Fixed-capacity FIFO of int16 samples.
+
+    Writes copy incoming samples into a preallocated array; reads return views
+    into it (at most two when the window wraps around), so buffering and
+    overlapping windows never reallocate or re-copy the session's audio.
+    When full, the oldest samples are overwritten and counted as overflow.
+    """
+
+    def __init__(self, capacity: int, dtype: np.dtype = np.int16):
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._start = 0
+        self._size = 0
+        self.samples_written = 0
+        self.overflow_samples = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the preallocated sample array."""
+        return self._data.nbytes
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Bytes of audio currently buffered."""
+        return self._size * self._data.itemsize
+
+    def write(self, samples: np.ndarray) -> int:
+        """Append samples, overwriting the oldest ones if needed. Returns samples overwritten."""
+        samples = np.asarray(samples, dtype=self._data.dtype)
+        count = len(samples)
+        if count == 0:
+            return 0
+        self.samples_written += count
+
+        if count >= self.capacity:
+            # Only the newest `capacity` samples can survive
+            overflow = self._size + count - self.capacity
+            self._data[:] = samples[-self.capacity:]
+            self._start = 0
+            self._size = self.capacity
+            self.overflow_samples += overflow
+            return overflow
+
+        overflow = max(0, self._size + count - self.capacity)
+        if overflow:
+            self.consume(overflow)
+            self.overflow_samples += overflow
+
+        end = (self._start + self._size) % self.capacity
+        first = min(count, self.capacity - end)
+        self._data[end:end + first] = samples[:first]
+        if first < count:
+            self._data[:count - first] = samples[first:]
+        self._size += count
+        return overflow
+
+    def peek(self, count: Optional[int] = None) -> Tuple[np.ndarray, ...]:
+        """Return views over the oldest `count` samples (all by default) without consuming them."""
+        count = self._size if count is None else min(count, self._size)
+        if count == 0:
+            return ()
+
+        end = self._start + count
+        if end <= self.capacity:
+            return (self._data[self._start:end],)
+        return (self._data[self._start:], self._data[:end - self.capacity])
+
+    def consume(self, count: int) -> None:
+        """Drop the oldest `count` samples."""
+        count = min(max(count, 0), self._size)
+        self._start = (self._start + count) % self.capacity
+        self._size -= count
+
+    def clear(self) -> None:
+        """Drop all buffered samples."""
+        self._start = 0
+        self._size = 0
+
+
+def pcm_samples_from_chunk(audio_data: bytes) -> Tuple[np.ndarray, Optional[int]]:
+    """Decode a streamed chunk into int16 mono samples.
+
+    Chunks are raw 16-bit little-endian mono PCM, or a complete 16-bit mono
+    WAV file. Returns the samples and the WAV sample rate when one is present.
+    """
+    if audio_data[:4] == b"RIFF":
+        try:
+            with wave.open(io.BytesIO(audio_data), "rb") as wav_file:
+                if wav_file.getsampwidth() != 2 or wav_file.getnchannels() != 1:
+                    raise AudioProcessingError(
+                        "Streaming audio must be 16-bit mono PCM",
+                        "stream_decode",
+                        details={
+                            "sample_width": wav_file.getsampwidth(),
+                            "channels": wav_file.getnchannels(),
+                        },
+                    )
+                frames = wav_file.readframes(wav_file.getnframes())
+                return np.frombuffer(frames, dtype="<i2"), wav_file.getframerate()
+        except wave.Error as exc:
+            raise AudioProcessingError(f"Invalid WAV chunk: {exc}", "stream_decode")
+
+    usable = len(audio_data) - (len(audio_data) % 2)
+    return np.frombuffer(audio_data, dtype="<i2", count=usable // 2), None
+
+
+def samples_to_wav(parts: Sequence[np.ndarray], sample_rate: int) -> bytes:
+    """Serialize sample views into a single 16-bit mono WAV file."""
+    data_length = sum(part.nbytes for part in parts)
+    output = bytearray(WAV_HEADER_SIZE + data_length)
+
+    output[0:4] = b"RIFF"
+    output[4:8] = (36 + data_length).to_bytes(4, "little")
+    output[8:16] = b"WAVEfmt "
+    output[16:20] = (16).to_bytes(4, "little")
+    output[20:22] = (1).to_bytes(2, "little")  # PCM
+    output[22:24] = (1).to_bytes(2, "little")  # mono
+    output[24:28] = sample_rate.to_bytes(4, "little")
+    output[28:32] = (sample_rate * 2).to_bytes(4, "little")  # byte rate
+    output[32:34] = (2).to_bytes(2, "little")  # block align
+    output[34:36] = (16).to_bytes(2, "little")
+    output[36:40] = b"data"
+    output[40:44] = data_length.to_bytes(4, "little")
+
+    # Copy each view straight into the output; no intermediate concatenation
+    samples = np.frombuffer(output, dtype="<i2", offset=WAV_HEADER_SIZE)
+    position = 0
+    for part in parts:
+        samples[position:position + len(part)] = part
+        position += len(part)
+    return bytes(output)
@@ -0,0 +1,233 @@
+"""
+Cross-session transcription scheduler.
+
+Streaming sessions (WebSocket and gRPC) submit short windows here instead of
+calling the Whisper engine directly. The scheduler waits at most `max_wait_ms`
+after the oldest pending window, takes up to `max_batch_size` windows
+round-robin across sessions (at most `max_per_session` each per batch, so one
+chatty session cannot starve the others), runs them as one batched decode and
+resolves each session's future with its own result.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class _PendingRequest:
+    request: Dict[str, Any]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class SessionTranscriber:
+    """Per-session handle with the same transcribe_chunk signature as WhisperEngine."""
+
+    def __init__(self, scheduler: "TranscriptionScheduler", session_id: str):
+        self.scheduler = scheduler
+        self.session_id = session_id
+
+    async def transcribe_chunk(
+        self,
+        audio_data: bytes,
+        language: Optional[str] = None,
+        temperature: float = 0.0,
+        prompt: Optional[str] = None,
+        word_timestamps: bool = False,
+    ) -> Dict[str, Any]:
+        return await self.scheduler.submit(
+            self.session_id,
+            audio_data=audio_data,
+            language=language,
+            temperature=temperature,
+            prompt=prompt,
+            word_timestamps=word_timestamps,
+        )
+
+
+class TranscriptionScheduler:
+    """Coalesces streaming windows from all sessions into batched decodes."""
+
+    def __init__(
+        self,
+        whisper_engine,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 25.0,
+        max_per_session: int = 1,
+        stats_window: int = 1000,
+    ):
+        self.whisper_engine = whisper_engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_per_session = max_per_session
+
+        self._queues: "OrderedDict[str, Deque[_PendingRequest]]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.requests = 0
+        self.failed_batches = 0
+        self._batch_sizes: Deque[int] = deque(maxlen=stats_window)
+        self._queue_waits: Deque[float] = deque(maxlen=stats_window)
+        self._latencies: Deque[float] = deque(maxlen=stats_window)
+
+    @property
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def start(self) -> None:
+        """Start the dispatch loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                "Transcription scheduler started",
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.max_wait * 1000,
+                batching=getattr(self.whisper_engine, "supports_batching", False),
+            )
+
+    async def stop(self) -> None:
+        """Stop the dispatch loop and fail anything still queued."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for queue in self._queues.values():
+            for pending in queue:
+                pending.future.cancel()
+        self._queues.clear()
+
+    def for_session(self, session_id: str) -> SessionTranscriber:
+        """Get a transcriber bound to a session."""
+        return SessionTranscriber(self, session_id)
+
+    async def submit(self, session_id: str, **request: Any) -> Dict[str, Any]:
+        """Queue one window and wait for its result."""
+        if self._task is None:
+            return await self.whisper_engine.transcribe_chunk(**request)
+
+        pending = _PendingRequest(request=request, future=asyncio.get_running_loop().create_future())
+        self._queues.setdefault(session_id, deque()).append(pending)
+        self._wakeup.set()
+        return await pending.future
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching and latency statistics."""
+        return {
+            "running": self._task is not None,
+            "batching_backend": getattr(self.whisper_engine, "supports_batching", False),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_per_session": self.max_per_session,
+            "pending": self.pending,
+            "sessions_waiting": len(self._queues),
+            "batches": self.batches,
+            "requests": self.requests,
+            "failed_batches": self.failed_batches,
+            "avg_batch_size": (
+                sum(self._batch_sizes) / len(self._batch_sizes) if self._batch_sizes else 0.0
+            ),
+            "queue_wait_p95_ms": _percentile(self._queue_waits, 95) * 1000,
+            "latency_p50_ms": _percentile(self._latencies, 50) * 1000,
+            "latency_p95_ms": _percentile(self._latencies, 95) * 1000,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._queues:
+                continue
+
+            # Collect until the batch is full or the oldest window hits max_wait
+            oldest = min(queue[0].enqueued_at for queue in self._queues.values())
+            while self.pending < self.max_batch_size:
+                remaining = oldest + self.max_wait - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._wakeup.clear()
+
+            batch = self._take_batch()
+            if self._queues:
+                self._wakeup.set()
+            if batch:
+                await self._dispatch(batch)
+
+    def _take_batch(self) -> List[_PendingRequest]:
+        """Take up to max_batch_size windows, round-robin across sessions."""
+        batch: List[_PendingRequest] = []
+        taken: Dict[str, int] = {}
+
+        progress = True
+        while len(batch) < self.max_batch_size and progress:
+            progress = False
+            for session_id in list(self._queues):
+                if len(batch) >= self.max_batch_size:
+                    break
+                if taken.get(session_id, 0) >= self.max_per_session:
+                    continue
+                queue = self._queues[session_id]
+                pending = queue.popleft()
+                if not queue:
+                    del self._queues[session_id]
+                else:
+                    # Served sessions go to the back for the next batch
+                    self._queues.move_to_end(session_id)
+                if pending.future.done():  # Caller went away
+                    progress = True
+                    continue
+                batch.append(pending)
+                taken[session_id] = taken.get(session_id, 0) + 1
+                progress = True
+
+        return batch
+
+    async def _dispatch(self, batch: List[_PendingRequest]) -> None:
+        started = time.monotonic()
+        for pending in batch:
+            self._queue_waits.append(started - pending.enqueued_at)
+
+        try:
+            results = await self.whisper_engine.transcribe_batch(
+                [pending.request for pending in batch]
+            )
+        except Exception as exc:
+            self.failed_batches += 1
+            logger.error("Batched transcription failed", batch_size=len(batch), error=str(exc))
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+            return
+
+        finished = time.monotonic()
+        self.batches += 1
+        self.requests += len(batch)
+        self._batch_sizes.append(len(batch))
+        for pending, result in zip(batch, results):
+            self._latencies.append(finished - pending.enqueued_at)
+            if not pending.future.done():
+                pending.future.set_result(result)
+
+
+def _percentile(values: Deque[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
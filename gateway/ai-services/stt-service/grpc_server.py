@@ -107,12 +107,19 @@ class TTSResponse:
 class AudioStreamingServiceServicer:
     """gRPC servicer for audio streaming."""
     
-    def __init__(self, whisper_engine, audio_processor):
+    def __init__(self, whisper_engine, audio_processor, scheduler=None):
         self.whisper_engine = whisper_engine
         self.audio_processor = audio_processor
+        self.scheduler = scheduler
         self.active_sessions: Dict[str, Dict[str, Any]] = {}
         self._session_lock = asyncio.Lock()
     
+    def _transcriber(self, session_id: str):
+        """Route a session's decodes through the batch scheduler when enabled."""
+        if self.scheduler:
+            return self.scheduler.for_session(session_id)
+        return self.whisper_engine
+    
     async def BiDirectionalStream(
         self,
         request_iterator: AsyncGenerator[Any, None],
@@ -343,14 +350,12 @@ class AudioStreamingServiceServicer:
             
             if len(session_state["buffer"]) >= min_buffer_size:
                 # Preprocess audio
-                processed_audio = await self.audio_processor.preprocess_audio(
-                    session_state["buffer"],
-                    target_format="wav",
-                    apply_vad=True
+                processed_audio = await self.audio_processor.prepare_for_transcription(
+                    session_state["buffer"]
                 )
                 
                 # Transcribe
-                result = await self.whisper_engine.transcribe_chunk(processed_audio)
+                result = await self._transcriber(session_id).transcribe_chunk(processed_audio)
                 
                 # Clear buffer
                 session_state["buffer"] = b""
@@ -425,13 +430,11 @@ class AudioStreamingServiceServicer:
                             session["buffer"] = b""
                             
                             try:
-                                processed_audio = await self.audio_processor.preprocess_audio(
-                                    buffer_data,
-                                    target_format="wav",
-                                    apply_vad=True
+                                processed_audio = await self.audio_processor.prepare_for_transcription(
+                                    buffer_data
                                 )
                                 
-                                result = await self.whisper_engine.transcribe_chunk(processed_audio)
+                                result = await self._transcriber(session_id).transcribe_chunk(processed_audio)
                                 logger.info("Final transcription", session_id=session_id, text=result.get("text", ""))
                             except Exception as exc:
                                 logger.error("Final buffer processing failed", session_id=session_id, error=str(exc))
@@ -455,14 +458,12 @@ class AudioStreamingServiceServicer:
             
             if len(session_state["buffer"]) >= min_buffer_size:
                 # Preprocess audio
-                processed_audio = await self.audio_processor.preprocess_audio(
-                    session_state["buffer"],
-                    target_format="wav",
-                    apply_vad=True
+                processed_audio = await self.audio_processor.prepare_for_transcription(
+                    session_state["buffer"]
                 )
                 
                 # Transcribe
-                result = await self.whisper_engine.transcribe_chunk(processed_audio)
+                result = await self._transcriber(session_id).transcribe_chunk(processed_audio)
                 
                 # Clear processed portion of buffer (keep some overlap)
                 overlap_size = min_buffer_size // 4
@@ -499,14 +500,15 @@ class AudioStreamingServiceServicer:
 async def create_grpc_server(
     whisper_engine,
     audio_processor,
-    port: int = 50051
+    port: int = 50051,
+    scheduler=None,
 ) -> grpc.aio.Server:
     """Create and configure gRPC server."""
     
     server = grpc.aio.server()
     
     # Add the servicer
-    servicer = AudioStreamingServiceServicer(whisper_engine, audio_processor)
+    servicer = AudioStreamingServiceServicer(whisper_engine, audio_processor, scheduler)
     
     # In a real implementation, you would add the generated service here:
     # add_AudioStreamingServiceServicer_to_server(servicer, server)
@@ -538,11 +540,12 @@ async def create_grpc_server(
 async def run_grpc_server(
     whisper_engine,
     audio_processor,
-    port: int = 50051
+    port: int = 50051,
+    scheduler=None,
 ) -> None:
     """Run the gRPC server."""
     
-    server = await create_grpc_server(whisper_engine, audio_processor, port)
+    server = await create_grpc_server(whisper_engine, audio_processor, port, scheduler)
     
     await server.start()
     logger.info("gRPC server started", port=port)
@@ -0,0 +1,213 @@
+"""
+Incremental streaming decoder on top of WhisperEngine.transcribe_chunk.
+
+Only audio that has not been committed yet is decoded. Each step:
+- runs the energy VAD over the uncommitted audio; a window with no speech is
+  discarded without touching the model;
+- when speech is followed by enough silence, decodes up to that boundary
+  once and commits it as final text;
+- otherwise decodes the open utterance and commits the prefix that two
+  consecutive hypotheses agree on (local agreement), trimming the audio at
+  the end of the last committed word so only the unstable tail is re-decoded.
+
+Committed text is fed back as the decoder prompt, so consecutive steps stay
+consistent without re-transcribing overlapping audio.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import structlog
+
+from .audio_ring_buffer import AudioRingBuffer
+
+logger = structlog.get_logger(__name__)
+
+# (normalized word, display text, end time in seconds or None)
+Word = Tuple[str, str, Optional[float]]
+
+_NORMALIZE = re.compile(r"[^\w']+")
+
+
+def _normalize_word(text: str) -> str:
+    return _NORMALIZE.sub("", text.lower())
+
+
+def _words_from_result(result: Dict[str, Any]) -> List[Word]:
+    """Build a word list from a transcription result, merging sub-word tokens."""
+    words: List[Word] = []
+    for item in result.get("words") or []:
+        text = item.get("word", "")
+        if not text.strip():
+            continue
+        if words and not text[:1].isspace():
+            # Continuation token (whisper.cpp emits sub-words)
+            _, display, _ = words[-1]
+            display += text
+            words[-1] = (_normalize_word(display), display, item.get("end"))
+        else:
+            words.append((_normalize_word(text), text.strip(), item.get("end")))
+
+    if words:
+        return words
+
+    # No word timings from this backend; agree on plain words instead
+    return [(_normalize_word(token), token, None) for token in result.get("text", "").split()]
+
+
+def _common_prefix(previous: List[Word], current: List[Word]) -> int:
+    count = 0
+    for old, new in zip(previous, current):
+        if not old[0] or old[0] != new[0]:
+            break
+        count += 1
+    return count
+
+
+class IncrementalDecoder:
+    """Per-session streaming decoder that commits a stable prefix."""
+
+    def __init__(
+        self,
+        whisper_engine,
+        audio_processor,
+        sample_rate: int = 16000,
+        language: Optional[str] = None,
+        temperature: float = 0.0,
+        max_segment_seconds: float = 6.0,
+        min_silence_seconds: float = 0.5,
+        prompt_chars: int = 200,
+    ):
+        self.whisper_engine = whisper_engine
+        self.audio_processor = audio_processor
+        self.sample_rate = sample_rate
+        self.language = language
+        self.temperature = temperature
+        self.max_segment_samples = int(max_segment_seconds * sample_rate)
+        self.min_silence_seconds = min_silence_seconds
+        self.min_silence_samples = int(min_silence_seconds * sample_rate)
+        self.prompt_chars = prompt_chars
+
+        self.committed_text = ""
+        self._hypothesis: List[Word] = []
+
+        self.decode_calls = 0
+        self.decoded_seconds = 0.0
+        self.skipped_silence_seconds = 0.0
+
+    async def process(self, ring: AudioRingBuffer) -> List[Dict[str, Any]]:
+        """Decode the uncommitted audio in `ring` and return partial/final events."""
+        if len(ring) == 0:
+            return []
+
+        audio = np.concatenate(ring.peek())
+        speech = self.audio_processor.detect_speech_segments(
+            audio, self.sample_rate, min_silence_seconds=self.min_silence_seconds
+        )
+
+        if not speech:
+            # Nothing to decode; keep a little lead-in in case speech starts next
+            discard = max(0, len(audio) - self.min_silence_samples)
+            ring.consume(discard)
+            self.skipped_silence_seconds += discard / self.sample_rate
+            return []
+
+        # Speech regions are separated by at least min_silence, so every region
+        # but an unterminated last one is a closed utterance
+        if len(audio) - speech[-1][1] >= self.min_silence_samples:
+            closed_end = speech[-1][1]
+        elif len(speech) > 1:
+            closed_end = speech[-2][1]
+        else:
+            closed_end = None
+
+        if closed_end is not None:
+            # Decode the closed utterance(s) once and commit them
+            boundary = closed_end + self.min_silence_samples // 2
+            result = await self._decode(audio[:boundary], word_timestamps=False)
+            ring.consume(boundary)
+            self._hypothesis = []
+            return self._commit(result.get("text", "").strip(), result, end_of_segment=True)
+
+        result = await self._decode(audio, word_timestamps=True)
+        hypothesis = _words_from_result(result)
+        events: List[Dict[str, Any]] = []
+
+        agreed = _common_prefix(self._hypothesis, hypothesis)
+        # Keep the last word open: it is the most likely to change
+        agreed = min(agreed, max(len(hypothesis) - 1, 0))
+        cut_time = hypothesis[agreed - 1][2] if agreed else None
+
+        if agreed and cut_time is not None:
+            stable = hypothesis[:agreed]
+            events.extend(self._commit(" ".join(word[1] for word in stable), result))
+            ring.consume(min(int(cut_time * self.sample_rate), len(ring)))
+            hypothesis = hypothesis[agreed:]
+        elif len(audio) >= self.max_segment_samples:
+            # No usable agreement and the segment is too long: commit it all
+            ring.consume(len(audio))
+            self._hypothesis = []
+            return self._commit(result.get("text", "").strip(), result, end_of_segment=True)
+
+        self._hypothesis = hypothesis
+        tail = " ".join(word[1] for word in hypothesis)
+        if tail:
+            events.append(self._event(tail, result, is_partial=True))
+        return events
+
+    async def flush(self, ring: AudioRingBuffer) -> List[Dict[str, Any]]:
+        """Decode and commit everything left in `ring` (end of session)."""
+        if len(ring) == 0:
+            return []
+
+        audio = np.concatenate(ring.peek())
+        ring.clear()
+        self._hypothesis = []
+        if not self.audio_processor.detect_speech_segments(audio, self.sample_rate):
+            return []
+
+        result = await self._decode(audio, word_timestamps=False)
+        return self._commit(result.get("text", "").strip(), result, end_of_segment=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get decode counters for the session."""
+        return {
+            "decode_calls": self.decode_calls,
+            "decoded_seconds": self.decoded_seconds,
+            "skipped_silence_seconds": self.skipped_silence_seconds,
+            "committed_chars": len(self.committed_text),
+        }
+
+    async def _decode(self, audio: np.ndarray, word_timestamps: bool) -> Dict[str, Any]:
+        self.decode_calls += 1
+        self.decoded_seconds += len(audio) / self.sample_rate
+        prompt = self.committed_text[-self.prompt_chars:] or None
+        return await self.whisper_engine.transcribe_chunk(
+            self.audio_processor.to_model_input(audio, self.sample_rate),
+            language=self.language,
+            temperature=self.temperature,
+            prompt=prompt,
+            word_timestamps=word_timestamps,
+        )
+
+    def _commit(
+        self,
+        text: str,
+        result: Dict[str, Any],
+        end_of_segment: bool = False,
+    ) -> List[Dict[str, Any]]:
+        if not text:
+            return []
+        self.committed_text = f"{self.committed_text} {text}".strip()
+        event = self._event(text, result, is_partial=False)
+        event["end_of_segment"] = end_of_segment
+        return [event]
+
+    def _event(self, text: str, result: Dict[str, Any], is_partial: bool) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "is_partial": is_partial,
+            "confidence": result.get("confidence"),
+            "committed_text": self.committed_text,
+        }
@@ -0,0 +1,145 @@
+"""
+CPU load generator for streaming transcription.
+
+Simulates N concurrent streaming sessions, each submitting one window of audio
+every `--interval` seconds (real-time pacing), and reports throughput and
+latency with the cross-session scheduler on and off:
+
+    python -m stt_service.loadgen --sessions 16 --model tiny.en --compute-type int8
+"""
+
+import argparse
+import asyncio
+import time
+import wave
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .audio_ring_buffer import samples_to_wav
+from .batch_scheduler import TranscriptionScheduler, _percentile
+from .whisper_engine import WhisperEngine
+
+
+def _load_window(path: Optional[str], seconds: float, sample_rate: int = 16000) -> bytes:
+    """Load a mono 16-bit WAV (or synthesize a tone) and cut one window."""
+    if path:
+        with wave.open(path, "rb") as wav_file:
+            sample_rate = wav_file.getframerate()
+            samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype="<i2")
+    else:
+        t = np.arange(int(sample_rate * seconds)) / sample_rate
+        samples = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+    return samples_to_wav((samples[: int(sample_rate * seconds)],), sample_rate)
+
+
+async def _session(
+    transcriber,
+    window: bytes,
+    interval: float,
+    duration: float,
+    latencies: List[float],
+) -> None:
+    deadline = time.monotonic() + duration
+    next_send = time.monotonic()
+    while next_send < deadline:
+        await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+        started = time.monotonic()
+        await transcriber.transcribe_chunk(window)
+        latencies.append(time.monotonic() - started)
+        # Real-time pacing: a slow decode delays the next window, like a live stream
+        next_send = max(next_send + interval, time.monotonic())
+
+
+async def run_load(
+    engine: WhisperEngine,
+    window: bytes,
+    sessions: int,
+    interval: float,
+    duration: float,
+    scheduler: Optional[TranscriptionScheduler] = None,
+) -> Dict[str, Any]:
+    """Run one load scenario and return throughput/latency figures."""
+    latencies: List[float] = []
+    if scheduler:
+        await scheduler.start()
+
+    started = time.monotonic()
+    try:
+        await asyncio.gather(*(
+            _session(
+                scheduler.for_session(str(index)) if scheduler else engine,
+                window,
+                interval,
+                duration,
+                latencies,
+            )
+            for index in range(sessions)
+        ))
+    finally:
+        if scheduler:
+            await scheduler.stop()
+    elapsed = time.monotonic() - started
+
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50_ms": _percentile(latencies, 50) * 1000,
+        "latency_p95_ms": _percentile(latencies, 95) * 1000,
+        "avg_batch_size": scheduler.get_stats()["avg_batch_size"] if scheduler else 1.0,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = WhisperEngine(
+        model_path=args.model,
+        device="cpu",
+        compute_type=args.compute_type,
+        num_workers=args.workers,
+    )
+    await engine.initialize()
+    window = _load_window(args.audio, args.window_seconds)
+
+    try:
+        scenarios = [("direct", None)]
+        for max_wait_ms in args.max_wait_ms:
+            scenarios.append((
+                f"batched (max_wait={max_wait_ms:g}ms)",
+                TranscriptionScheduler(
+                    engine,
+                    max_batch_size=args.max_batch_size,
+                    max_wait_ms=max_wait_ms,
+                ),
+            ))
+
+        print(f"{args.sessions} sessions, {args.window_seconds:g}s windows every "
+              f"{args.interval:g}s, batching backend: {engine.supports_batching}")
+        print(f"{'mode':<28}{'req':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'batch':>8}")
+        for name, scheduler in scenarios:
+            result = await run_load(
+                engine, window, args.sessions, args.interval, args.duration, scheduler
+            )
+            print(f"{name:<28}{result['requests']:>6}{result['throughput_rps']:>9.2f}"
+                  f"{result['latency_p50_ms']:>10.0f}{result['latency_p95_ms']:>10.0f}"
+                  f"{result['avg_batch_size']:>8.2f}")
+    finally:
+        await engine.cleanup()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="STT streaming load generator")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per scenario")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between windows")
+    parser.add_argument("--window-seconds", type=float, default=2.0)
+    parser.add_argument("--audio", help="Mono 16-bit WAV to replay (default: synthetic tone)")
+    parser.add_argument("--model", default="tiny.en")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[10.0, 25.0, 50.0])
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -38,6 +38,9 @@ from shared.utils import (
 
 from .whisper_engine import WhisperEngine
 from .audio_processor import AudioProcessor
+from .audio_ring_buffer import AudioRingBuffer, pcm_samples_from_chunk, samples_to_wav
+from .incremental_decoder import IncrementalDecoder
+from .batch_scheduler import TranscriptionScheduler
 from .grpc_server import create_grpc_server, run_grpc_server
 
 logger = structlog.get_logger(__name__)
@@ -48,18 +51,45 @@ audio_processor: Optional[AudioProcessor] = None
 redis_client: Optional[RedisManager] = None
 metrics: Optional[Metrics] = None
 grpc_server: Optional[Any] = None
+transcription_scheduler: Optional[TranscriptionScheduler] = None
 health_checker = HealthChecker()
 
 # Connection manager for streaming with backpressure
 class StreamingConnectionManager:
     """Enhanced connection manager with backpressure control."""
     
-    def __init__(self, max_connections: int = 100, max_buffer_size: int = 1024*1024):
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_buffer_size: int = 1024*1024,
+        sample_rate: int = 16000,
+        window_seconds: float = 1.0,
+        max_window_seconds: float = 6.0,
+        overlap_ratio: float = 0.25,
+        backlog_chunks: int = 64,
+        incremental: bool = True,
+        min_silence_seconds: float = 0.5,
+        prompt_chars: int = 200,
+        drain_timeout: float = 30.0,
+    ):
         self.active_connections: Dict[str, WebSocket] = {}
         self.connection_states: Dict[str, Dict[str, Any]] = {}
         self.max_connections = max_connections
         self.max_buffer_size = max_buffer_size
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.max_window_seconds = max_window_seconds
+        self.overlap_ratio = overlap_ratio
+        self.backlog_chunks = backlog_chunks
+        self.incremental = incremental
+        self.min_silence_seconds = min_silence_seconds
+        self.prompt_chars = prompt_chars
+        self.drain_timeout = drain_timeout
         self._connection_lock = asyncio.Lock()
+    
+    def create_ring_buffer(self, sample_rate: int) -> AudioRingBuffer:
+        """Preallocate a session ring buffer with headroom over the largest window."""
+        return AudioRingBuffer(capacity=int(sample_rate * self.max_window_seconds * 2))
         
     async def connect(self, websocket: WebSocket, session_id: str) -> bool:
         """Connect with backpressure check."""
@@ -73,11 +103,21 @@ class StreamingConnectionManager:
             self.connection_states[session_id] = {
                 "connected_at": time.time(),
                 "is_processing": False,
-                "buffer": b"",
+                "sample_rate": self.sample_rate,
+                "ring": self.create_ring_buffer(self.sample_rate),
+                "backlog": asyncio.Queue(maxsize=self.backlog_chunks),
+                "backlog_bytes": 0,
+                "worker": None,
+                "decoder": None,
+                "decode_lock": asyncio.Lock(),
+                "pending_samples": 0,
                 "buffer_size": 0,
                 "last_activity": time.time(),
                 "message_count": 0,
                 "error_count": 0,
+                "chunks_received": 0,
+                "chunks_dropped": 0,
+                "bytes_dropped": 0,
             }
             logger.info("WebSocket connected", session_id=session_id, 
                        total_connections=len(self.active_connections))
@@ -87,8 +127,9 @@ class StreamingConnectionManager:
         """Remove a WebSocket connection."""
         if session_id in self.active_connections:
             del self.active_connections[session_id]
-        if session_id in self.connection_states:
-            del self.connection_states[session_id]
+        state = self.connection_states.pop(session_id, None)
+        if state and state.get("worker"):
+            state["worker"].cancel()
         logger.info("WebSocket disconnected", session_id=session_id,
                    remaining_connections=len(self.active_connections))
     
@@ -134,8 +175,12 @@ class StreamingConnectionManager:
                           limit=self.max_buffer_size)
             return False
         
-        # Check if already processing (prevent overwhelming)
-        if state.get("is_processing", False):
+        # Audio arriving during transcription is queued; reject only when the backlog is full
+        backlog = state.get("backlog")
+        if backlog is not None and backlog.full():
+            logger.warning("Audio backlog full",
+                          session_id=session_id,
+                          backlog_depth=backlog.qsize())
             return False
         
         # Check error rate
@@ -157,6 +202,31 @@ class StreamingConnectionManager:
             current = self.connection_states[session_id].get("buffer_size", 0)
             self.connection_states[session_id]["buffer_size"] = max(0, current + size_delta)
     
+    def record_dropped(self, session_id: str, data_size: int) -> None:
+        """Count a chunk rejected by backpressure."""
+        if session_id in self.connection_states:
+            state = self.connection_states[session_id]
+            state["chunks_dropped"] = state.get("chunks_dropped", 0) + 1
+            state["bytes_dropped"] = state.get("bytes_dropped", 0) + data_size
+    
+    def get_session_buffer_stats(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Memory and drop counters for one session."""
+        ring = state.get("ring")
+        backlog = state.get("backlog")
+        return {
+            "memory_bytes": (ring.nbytes if ring else 0) + state.get("backlog_bytes", 0),
+            "ring_capacity_bytes": ring.nbytes if ring else 0,
+            "buffered_bytes": ring.buffered_bytes if ring else 0,
+            "backlog_depth": backlog.qsize() if backlog else 0,
+            "backlog_max": backlog.maxsize if backlog else 0,
+            "backlog_bytes": state.get("backlog_bytes", 0),
+            "chunks_received": state.get("chunks_received", 0),
+            "chunks_dropped": state.get("chunks_dropped", 0),
+            "bytes_dropped": state.get("bytes_dropped", 0),
+            "overflow_samples": ring.overflow_samples if ring else 0,
+            "decoder": state["decoder"].get_stats() if state.get("decoder") else None,
+        }
+    
     async def cleanup_stale_connections(self) -> None:
         """Cleanup stale connections periodically."""
         current_time = time.time()
@@ -175,7 +245,7 @@ class StreamingConnectionManager:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
-    global whisper_engine, audio_processor, redis_client, metrics, grpc_server
+    global whisper_engine, audio_processor, redis_client, metrics, grpc_server, transcription_scheduler
     
     # Initialize configuration and logging
     config = STTServiceConfig()
@@ -195,7 +265,7 @@ async def lifespan(app: FastAPI):
         await redis_client.initialize(get_config().redis.url)
         
         # Initialize audio processor
-        audio_processor = AudioProcessor()
+        audio_processor = AudioProcessor(metrics=metrics)
         
         # Initialize Whisper engine
         whisper_engine = WhisperEngine(
@@ -206,12 +276,23 @@ async def lifespan(app: FastAPI):
         )
         await whisper_engine.initialize()
         
+        # Batch streaming windows across sessions
+        if config.stream_batch_enabled:
+            transcription_scheduler = TranscriptionScheduler(
+                whisper_engine,
+                max_batch_size=config.stream_batch_max_size,
+                max_wait_ms=config.stream_batch_max_wait_ms,
+                max_per_session=config.stream_batch_max_per_session,
+            )
+            await transcription_scheduler.start()
+        
         # Initialize gRPC server
         grpc_port = config.port + 1000  # HTTP on 8001, gRPC on 9001
         grpc_server = await create_grpc_server(
             whisper_engine, 
             audio_processor, 
-            port=grpc_port
+            port=grpc_port,
+            scheduler=transcription_scheduler,
         )
         
         # Start gRPC server in background
@@ -257,6 +338,9 @@ async def lifespan(app: FastAPI):
             except asyncio.CancelledError:
                 pass
         
+        if transcription_scheduler:
+            await transcription_scheduler.stop()
+        
         if whisper_engine:
             await whisper_engine.cleanup()
         
@@ -438,7 +522,12 @@ async def service_status():
         
         # Add connection details
         connection_details = {}
+        total_memory_bytes = 0
+        total_chunks_dropped = 0
         for session_id, state in connection_manager.connection_states.items():
+            buffer_stats = connection_manager.get_session_buffer_stats(state)
+            total_memory_bytes += buffer_stats["memory_bytes"]
+            total_chunks_dropped += buffer_stats["chunks_dropped"]
             connection_details[session_id] = {
                 "connected_at": state.get("connected_at"),
                 "last_activity": state.get("last_activity"),
@@ -446,9 +535,15 @@ async def service_status():
                 "is_processing": state.get("is_processing", False),
                 "message_count": state.get("message_count", 0),
                 "error_count": state.get("error_count", 0),
+                "buffer": buffer_stats,
             }
         
         status["active_sessions"] = connection_details
+        status["connections"]["buffer_memory_bytes"] = total_memory_bytes
+        status["connections"]["chunks_dropped"] = total_chunks_dropped
+        
+        if transcription_scheduler:
+            status["scheduler"] = transcription_scheduler.get_stats()
         
         return status
     
@@ -606,10 +701,9 @@ async def transcribe_audio(request: STTRequest) -> STTResponse:
         audio_info = get_audio_info(audio_data)
         logger.info("Processing audio", **audio_info)
         
-        # Preprocess audio if needed
-        processed_audio = await audio_processor.preprocess_audio(
-            audio_data, 
-            target_format="wav",
+        # Decode and preprocess once; Whisper takes the float32 samples directly
+        processed_audio = await audio_processor.prepare_for_transcription(
+            audio_data,
             apply_vad=request.enable_vad,
         )
         
@@ -713,7 +807,16 @@ async def transcribe_file(
         raise ModelInferenceError(f"File transcription failed: {str(exc)}", "whisper")
 
 
-connection_manager = StreamingConnectionManager()
+connection_manager = StreamingConnectionManager(
+    sample_rate=config.stream_sample_rate,
+    window_seconds=config.stream_window_seconds,
+    max_window_seconds=config.stream_max_window_seconds,
+    overlap_ratio=config.stream_overlap_ratio,
+    backlog_chunks=config.stream_backlog_chunks,
+    incremental=config.stream_incremental,
+    min_silence_seconds=config.stream_min_silence_seconds,
+    prompt_chars=config.stream_prompt_chars,
+)
 
 
 @app.websocket("/transcribe-stream/{session_id}")
@@ -742,6 +845,7 @@ async def transcribe_stream(websocket: WebSocket, session_id: str) -> None:
                 estimated_size = len(audio_data) if audio_data else 0
                 
                 if not connection_manager.can_accept_data(session_id, estimated_size):
+                    connection_manager.record_dropped(session_id, estimated_size)
                     # Send backpressure warning
                     await connection_manager.send_message(
                         session_id,
@@ -789,15 +893,8 @@ async def transcribe_stream(websocket: WebSocket, session_id: str) -> None:
 
 
 async def process_audio_chunk_enhanced(session_id: str, data: Dict[str, Any]) -> None:
-    """Enhanced process streaming audio chunk with better error handling."""
+    """Queue a streaming audio chunk for the session's buffering worker."""
     try:
-        # Get audio data from chunk
-        audio_data = decode_audio_base64(data["audio"])
-        audio_size = len(audio_data)
-        
-        # Update buffer size tracking
-        connection_manager.update_buffer_size(session_id, audio_size)
-        
         # Get connection state
         if session_id not in connection_manager.connection_states:
             logger.error("Session not found", session_id=session_id)
@@ -805,103 +902,27 @@ async def process_audio_chunk_enhanced(session_id: str, data: Dict[str, Any]) ->
         
         state = connection_manager.connection_states[session_id]
         
-        # Check if already processing
-        if state.get("is_processing", False):
-            logger.debug("Already processing, queuing audio", session_id=session_id)
-            return
+        # Decode to int16 samples (a view over the decoded payload, no copy)
+        audio_data = decode_audio_base64(data["audio"])
+        samples, chunk_sample_rate = pcm_samples_from_chunk(audio_data)
+        if chunk_sample_rate and chunk_sample_rate != state["sample_rate"]:
+            _set_session_sample_rate(state, chunk_sample_rate)
         
-        # Buffer the audio data
-        state["buffer"] += audio_data
+        state["chunks_received"] += 1
         
-        # Process when buffer has enough data
-        min_buffer_size = 16000  # ~1 second at 16kHz mono for better responsiveness
-        max_buffer_size = 96000  # ~6 seconds max
+        # Queue without blocking; transcription in progress no longer loses audio
+        try:
+            state["backlog"].put_nowait(samples)
+        except asyncio.QueueFull:
+            connection_manager.record_dropped(session_id, samples.nbytes)
+            logger.warning("Audio backlog full, dropping chunk", session_id=session_id)
+            return
         
-        current_buffer_size = len(state["buffer"])
+        state["backlog_bytes"] += samples.nbytes
+        connection_manager.update_buffer_size(session_id, samples.nbytes)
         
-        if current_buffer_size >= min_buffer_size:
-            state["is_processing"] = True
-            
-            # Limit buffer size to prevent memory issues
-            if current_buffer_size > max_buffer_size:
-                logger.warning("Buffer size exceeded, truncating", 
-                              session_id=session_id,
-                              size=current_buffer_size)
-                state["buffer"] = state["buffer"][-max_buffer_size:]
-                current_buffer_size = max_buffer_size
-            
-            # Process buffer with overlap
-            overlap_size = min_buffer_size // 4  # 25% overlap
-            buffer_data = state["buffer"]
-            
-            # Keep overlap for next processing
-            if current_buffer_size > overlap_size:
-                state["buffer"] = state["buffer"][-overlap_size:]
-                connection_manager.update_buffer_size(session_id, -current_buffer_size + overlap_size)
-            else:
-                state["buffer"] = b""
-                connection_manager.update_buffer_size(session_id, -current_buffer_size)
-            
-            try:
-                # Validate and preprocess audio
-                validation = await audio_processor.validate_audio_file(buffer_data)
-                if not validation["is_valid"]:
-                    logger.warning("Invalid audio chunk", 
-                                  session_id=session_id, 
-                                  errors=validation.get("errors", []))
-                    state["is_processing"] = False
-                    return
-                
-                # Optimize audio for transcription
-                processed_audio = await audio_processor.optimize_for_transcription(buffer_data)
-                
-                # Transcribe chunk
-                result = await whisper_engine.transcribe_chunk(processed_audio)
-                
-                # Send partial result if we have text
-                if result.get("text", "").strip():
-                    chunk = StreamSTTChunk(
-                        text=result["text"].strip(),
-                        is_partial=True,
-                        confidence=result.get("confidence"),
-                    )
-                    
-                    success = await connection_manager.send_message(
-                        session_id,
-                        WebSocketResponse(
-                            type="transcription_chunk",
-                            data=chunk.dict(),
-                        ),
-                    )
-                    
-                    if not success:
-                        logger.warning("Failed to send transcription result", session_id=session_id)
-                
-                # Record metrics
-                if metrics:
-                    metrics.record_audio_processing(
-                        operation="streaming_transcription",
-                        duration=0.5,  # Estimated
-                        format="wav",
-                        success=True,
-                    )
-                
-            except Exception as processing_exc:
-                logger.error("Chunk transcription failed", 
-                            session_id=session_id, 
-                            error=str(processing_exc))
-                
-                # Record failed metrics
-                if metrics:
-                    metrics.record_audio_processing(
-                        operation="streaming_transcription",
-                        duration=0.5,
-                        format="wav",
-                        success=False,
-                    )
-            
-            finally:
-                state["is_processing"] = False
+        if state["worker"] is None or state["worker"].done():
+            state["worker"] = asyncio.create_task(_session_audio_worker(session_id, state))
             
     except Exception as exc:
         logger.error("Audio chunk processing failed", session_id=session_id, error=str(exc))
@@ -914,10 +935,248 @@ async def process_audio_chunk_enhanced(session_id: str, data: Dict[str, Any]) ->
                 data={"error": f"Chunk processing failed: {str(exc)}"},
             ),
         )
+
+
+def _set_session_sample_rate(state: Dict[str, Any], sample_rate: int) -> None:
+    """Switch a session's sample rate before any audio has been buffered."""
+    if state["ring"].samples_written or not state["backlog"].empty():
+        logger.warning(
+            "Sample rate changed mid-stream, keeping session rate",
+            session_rate=state["sample_rate"],
+            chunk_rate=sample_rate,
+        )
+        return
+    state["sample_rate"] = sample_rate
+    state["ring"] = connection_manager.create_ring_buffer(sample_rate)
+
+
+async def _session_audio_worker(session_id: str, state: Dict[str, Any]) -> None:
+    """Drain the session backlog into its ring buffer and transcribe full windows."""
+    backlog: asyncio.Queue = state["backlog"]
+    
+    while True:
+        samples = await backlog.get()
+        _move_to_ring(session_id, state, samples)
+        backlog.task_done()
+        
+        # Pull everything queued while the last window was transcribing
+        while not backlog.empty():
+            _move_to_ring(session_id, state, backlog.get_nowait())
+            backlog.task_done()
+        
+        ring: AudioRingBuffer = state["ring"]
+        sample_rate = state["sample_rate"]
+        window_samples = int(sample_rate * connection_manager.window_seconds)
+        
+        if connection_manager.incremental:
+            # Decode once per step of new audio; the decoder trims what it commits
+            if state["pending_samples"] >= window_samples:
+                state["pending_samples"] = 0
+                await _run_incremental_step(session_id, state)
+            continue
+        
+        max_window_samples = int(sample_rate * connection_manager.max_window_seconds)
+        overlap_samples = int(window_samples * connection_manager.overlap_ratio)
+        
+        if state["pending_samples"] < window_samples - overlap_samples or len(ring) < window_samples:
+            continue
+        
+        # Limit window size; older audio beyond it is skipped, as before
+        if len(ring) > max_window_samples:
+            logger.warning("Buffer size exceeded, truncating",
+                          session_id=session_id,
+                          size=len(ring))
+            skipped = len(ring) - max_window_samples
+            ring.consume(skipped)
+            connection_manager.update_buffer_size(session_id, -skipped * 2)
+        
+        # Serialize the window straight from ring views, then keep the overlap
+        window_audio = samples_to_wav(ring.peek(), sample_rate)
+        released = len(ring) - overlap_samples
+        ring.consume(released)
+        state["pending_samples"] = 0
+        connection_manager.update_buffer_size(session_id, -released * 2)
+        
+        state["is_processing"] = True
+        try:
+            await _transcribe_stream_window(session_id, state, window_audio)
+        finally:
+            state["is_processing"] = False
+
+
+async def _drain_session_backlog(session_id: str, state: Dict[str, Any]) -> None:
+    """Wait for the session worker to empty the backlog, without trusting it to be alive."""
+    backlog: asyncio.Queue = state["backlog"]
+    worker: Optional[asyncio.Task] = state["worker"]
+    
+    if worker is not None and not worker.done():
+        joined = asyncio.create_task(backlog.join())
+        try:
+            # The worker only finishes by failing; then join() would never return
+            await asyncio.wait(
+                {joined, worker},
+                timeout=connection_manager.drain_timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            joined.cancel()
+    
+    if worker is not None and worker.done() and not worker.cancelled() and worker.exception():
+        logger.error(
+            "Session audio worker failed",
+            session_id=session_id,
+            error=str(worker.exception()),
+        )
+    elif not backlog.empty() and worker is not None and not worker.done():
+        logger.warning(
+            "Timed out draining audio backlog",
+            session_id=session_id,
+            queued_chunks=backlog.qsize(),
+        )
+        worker.cancel()
+    
+    # Whatever the worker left behind still belongs in the final flush
+    while not backlog.empty():
+        _move_to_ring(session_id, state, backlog.get_nowait())
+        backlog.task_done()
+
+
+def _get_transcriber(session_id: str):
+    """Get the engine a streaming session should decode with."""
+    if transcription_scheduler:
+        return transcription_scheduler.for_session(session_id)
+    return whisper_engine
+
+
+def _get_decoder(session_id: str, state: Dict[str, Any]) -> IncrementalDecoder:
+    """Create the session's incremental decoder on first use."""
+    if state["decoder"] is None:
+        state["decoder"] = IncrementalDecoder(
+            _get_transcriber(session_id),
+            audio_processor,
+            sample_rate=state["sample_rate"],
+            language=state.get("language"),
+            temperature=state.get("temperature", 0.0),
+            max_segment_seconds=connection_manager.max_window_seconds,
+            min_silence_seconds=connection_manager.min_silence_seconds,
+            prompt_chars=connection_manager.prompt_chars,
+        )
+    return state["decoder"]
+
+
+async def _run_incremental_step(session_id: str, state: Dict[str, Any], flush: bool = False) -> None:
+    """Run one incremental decode step (or the final flush) and send its events."""
+    ring: AudioRingBuffer = state["ring"]
+    start_time = time.time()
+    
+    async with state["decode_lock"]:
+        buffered_before = ring.buffered_bytes
+        state["is_processing"] = True
+        try:
+            decoder = _get_decoder(session_id, state)
+            events = await (decoder.flush(ring) if flush else decoder.process(ring))
+            success = True
+        except Exception as exc:
+            logger.error("Incremental decode failed", session_id=session_id, error=str(exc))
+            events = []
+            success = False
+        finally:
+            state["is_processing"] = False
+            connection_manager.update_buffer_size(session_id, ring.buffered_bytes - buffered_before)
+    
+    if metrics:
+        metrics.record_audio_processing(
+            operation="streaming_transcription",
+            duration=time.time() - start_time,
+            format="pcm",
+            success=success,
+        )
+    
+    for event in events:
+        chunk = StreamSTTChunk(
+            text=event["text"],
+            is_partial=event["is_partial"],
+            confidence=event.get("confidence"),
+            committed_text=event.get("committed_text"),
+            end_of_segment=event.get("end_of_segment", False),
+        )
+        await connection_manager.send_message(
+            session_id,
+            WebSocketResponse(
+                type="transcription_chunk" if chunk.is_partial else "transcription_final",
+                data=chunk.dict(),
+            ),
+        )
+
+
+def _move_to_ring(session_id: str, state: Dict[str, Any], samples) -> None:
+    """Copy queued samples into the session ring buffer."""
+    state["backlog_bytes"] -= samples.nbytes
+    overflow = state["ring"].write(samples)
+    state["pending_samples"] += len(samples)
+    if overflow:
+        connection_manager.update_buffer_size(session_id, -overflow * 2)
+
+
+async def _transcribe_stream_window(session_id: str, state: Dict[str, Any], window_audio: bytes) -> None:
+    """Transcribe one buffered window and send the partial result."""
+    start_time = time.time()
+    try:
+        # Validate and preprocess audio
+        validation = await audio_processor.validate_audio_file(window_audio)
+        if not validation["is_valid"]:
+            logger.warning("Invalid audio chunk", 
+                          session_id=session_id, 
+                          errors=validation.get("errors", []))
+            return
+        
+        # Decode and preprocess once; Whisper takes the float32 samples directly
+        processed_audio = await audio_processor.prepare_for_transcription(window_audio)
         
-        # Reset processing state
-        if session_id in connection_manager.connection_states:
-            connection_manager.connection_states[session_id]["is_processing"] = False
+        # Transcribe chunk
+        result = await _get_transcriber(session_id).transcribe_chunk(processed_audio)
+        
+        # Send partial result if we have text
+        if result.get("text", "").strip():
+            chunk = StreamSTTChunk(
+                text=result["text"].strip(),
+                is_partial=True,
+                confidence=result.get("confidence"),
+            )
+            
+            success = await connection_manager.send_message(
+                session_id,
+                WebSocketResponse(
+                    type="transcription_chunk",
+                    data=chunk.dict(),
+                ),
+            )
+            
+            if not success:
+                logger.warning("Failed to send transcription result", session_id=session_id)
+        
+        # Record metrics
+        if metrics:
+            metrics.record_audio_processing(
+                operation="streaming_transcription",
+                duration=time.time() - start_time,
+                format="wav",
+                success=True,
+            )
+        
+    except Exception as processing_exc:
+        logger.error("Chunk transcription failed", 
+                    session_id=session_id, 
+                    error=str(processing_exc))
+        
+        # Record failed metrics
+        if metrics:
+            metrics.record_audio_processing(
+                operation="streaming_transcription",
+                duration=time.time() - start_time,
+                format="wav",
+                success=False,
+            )
 
 
 async def process_audio_chunk(session_id: str, data: Dict[str, Any]) -> None:
@@ -938,6 +1197,8 @@ async def start_transcription_session(session_id: str, data: Dict[str, Any]) ->
             "temperature": data.get("temperature", 0.0),
             "enable_vad": data.get("enable_vad", True),
         })
+        if data.get("sample_rate"):
+            _set_session_sample_rate(state, int(data["sample_rate"]))
         
         await connection_manager.send_message(
             session_id,
@@ -956,17 +1217,22 @@ async def end_transcription_session(session_id: str) -> None:
     try:
         logger.info("Ending transcription session", session_id=session_id)
         
-        # Process any remaining buffer
+        # Let queued audio reach the ring buffer, then flush what has not been transcribed
         state = connection_manager.connection_states[session_id]
-        if state["buffer"]:
-            buffer_data = state["buffer"]
-            state["buffer"] = b""
+        await _drain_session_backlog(session_id, state)
+        
+        ring: AudioRingBuffer = state["ring"]
+        if connection_manager.incremental:
+            if len(ring):
+                state["pending_samples"] = 0
+                await _run_incremental_step(session_id, state, flush=True)
+        elif state["pending_samples"]:
+            buffer_data = samples_to_wav(ring.peek(), state["sample_rate"])
+            connection_manager.update_buffer_size(session_id, -ring.buffered_bytes)
+            ring.clear()
+            state["pending_samples"] = 0
             
-            processed_audio = await audio_processor.preprocess_audio(
-                buffer_data,
-                target_format="wav",
-                apply_vad=True,
-            )
+            processed_audio = await audio_processor.prepare_for_transcription(buffer_data)
             
             result = await whisper_engine.transcribe_chunk(processed_audio)
             
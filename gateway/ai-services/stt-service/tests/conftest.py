@@ -170,6 +170,7 @@ def mock_audio_processor() -> AsyncMock:
     
     processor.convert_audio_format.side_effect = mock_preprocess
     processor.optimize_for_transcription.side_effect = mock_preprocess
+    processor.prepare_for_transcription.side_effect = mock_preprocess
     processor.get_audio_quality_metrics.return_value = {
         "snr_estimate_db": 20.0,
         "dynamic_range_db": 10.0,
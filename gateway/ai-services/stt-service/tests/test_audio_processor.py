@@ -288,4 +288,32 @@ class TestAudioProcessor:
         result = await processor.preprocess_audio(sample_audio_data)
         
         # Should return original data with basic preprocessing
-        assert result == sample_audio_data
\ No newline at end of file
+        assert result == sample_audio_data
+
+    @pytest.mark.unit
+    async def test_prepare_for_transcription_returns_float32_array(self, sample_audio_data):
+        """Test the fused pipeline decodes once and records per-stage timings."""
+        metrics = MagicMock()
+        processor = AudioProcessor(metrics=metrics)
+        
+        audio = await processor.prepare_for_transcription(sample_audio_data)
+        
+        assert isinstance(audio, np.ndarray)
+        assert audio.dtype == np.float32
+        assert len(audio) == 16000
+        assert np.max(np.abs(audio)) == pytest.approx(0.707, abs=1e-3)
+        stages = {call.args[0] for call in metrics.record_audio_processing.call_args_list}
+        assert {"preprocess_decode", "preprocess_resample", "preprocess_vad",
+                "preprocess_highpass", "preprocess_denoise", "preprocess_normalize"} <= stages
+
+    @pytest.mark.unit
+    def test_to_model_input_resamples_pcm(self):
+        """Test int16 PCM at another rate is scaled and resampled to 16kHz."""
+        processor = AudioProcessor()
+        samples = np.full(8000, 16384, dtype=np.int16)
+        
+        audio = processor.to_model_input(samples, 8000)
+        
+        assert audio.dtype == np.float32
+        assert len(audio) == 16000
+        assert audio[8000] == pytest.approx(0.5, abs=1e-3)
@@ -0,0 +1,58 @@
+"""Tests for the streaming audio ring buffer."""
+
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from stt_service.audio_ring_buffer import (
+    AudioRingBuffer,
+    pcm_samples_from_chunk,
+    samples_to_wav,
+)
+
+
+class TestAudioRingBuffer:
+    """Test cases for AudioRingBuffer class."""
+
+    @pytest.mark.unit
+    def test_write_and_peek_wraparound(self):
+        """Test windowed reads across the wrap point return views in order."""
+        ring = AudioRingBuffer(capacity=8)
+        ring.write(np.arange(6, dtype=np.int16))
+        ring.consume(4)
+        ring.write(np.arange(6, 11, dtype=np.int16))
+
+        parts = ring.peek()
+        assert len(parts) == 2
+        assert np.concatenate(parts).tolist() == [4, 5, 6, 7, 8, 9, 10]
+        assert all(part.base is not None for part in parts)  # views, not copies
+
+    @pytest.mark.unit
+    def test_overflow_drops_oldest(self):
+        """Test writes beyond capacity overwrite and count the oldest samples."""
+        ring = AudioRingBuffer(capacity=4)
+        ring.write(np.arange(3, dtype=np.int16))
+        overflow = ring.write(np.arange(3, 6, dtype=np.int16))
+
+        assert overflow == 2
+        assert ring.overflow_samples == 2
+        assert np.concatenate(ring.peek()).tolist() == [2, 3, 4, 5]
+
+    @pytest.mark.unit
+    def test_chunk_decoding_and_wav_roundtrip(self, sample_audio_data):
+        """Test WAV chunks decode to samples and windows serialize to valid WAV."""
+        samples, sample_rate = pcm_samples_from_chunk(sample_audio_data)
+        assert sample_rate == 16000
+        assert len(samples) == 16000
+
+        ring = AudioRingBuffer(capacity=32000)
+        ring.write(samples)
+        wav_bytes = samples_to_wav(ring.peek(), sample_rate)
+
+        with wave.open(io.BytesIO(wav_bytes), "rb") as wav_file:
+            assert wav_file.getframerate() == 16000
+            assert wav_file.getnframes() == 16000
+            frames = np.frombuffer(wav_file.readframes(16000), dtype="<i2")
+        assert np.array_equal(frames, samples)
@@ -0,0 +1,66 @@
+"""Tests for the cross-session transcription scheduler."""
+
+import asyncio
+
+import pytest
+
+from stt_service.batch_scheduler import TranscriptionScheduler
+
+
+class FakeBatchEngine:
+    """Records batches and echoes each request's audio back as text."""
+
+    supports_batching = True
+
+    def __init__(self):
+        self.batches = []
+
+    async def transcribe_batch(self, requests):
+        self.batches.append([request["audio_data"] for request in requests])
+        return [{"text": request["audio_data"].decode()} for request in requests]
+
+    async def transcribe_chunk(self, audio_data, **kwargs):
+        return {"text": audio_data.decode()}
+
+
+class TestTranscriptionScheduler:
+    """Test cases for TranscriptionScheduler class."""
+
+    @pytest.mark.unit
+    async def test_coalesces_sessions_and_fans_out_results(self):
+        """Test concurrent windows share one batch and each caller gets its own result."""
+        engine = FakeBatchEngine()
+        scheduler = TranscriptionScheduler(engine, max_batch_size=8, max_wait_ms=20)
+        await scheduler.start()
+        try:
+            results = await asyncio.gather(*(
+                scheduler.for_session(f"s{index}").transcribe_chunk(f"a{index}".encode())
+                for index in range(4)
+            ))
+        finally:
+            await scheduler.stop()
+
+        assert [result["text"] for result in results] == ["a0", "a1", "a2", "a3"]
+        assert len(engine.batches) == 1
+        assert scheduler.get_stats()["avg_batch_size"] == 4
+
+    @pytest.mark.unit
+    async def test_round_robin_limits_each_session_per_batch(self):
+        """Test a busy session cannot fill a batch ahead of other sessions."""
+        engine = FakeBatchEngine()
+        scheduler = TranscriptionScheduler(engine, max_batch_size=2, max_wait_ms=20)
+        await scheduler.start()
+        try:
+            busy = scheduler.for_session("busy")
+            quiet = scheduler.for_session("quiet")
+            await asyncio.gather(
+                busy.transcribe_chunk(b"b0"),
+                busy.transcribe_chunk(b"b1"),
+                busy.transcribe_chunk(b"b2"),
+                quiet.transcribe_chunk(b"q0"),
+            )
+        finally:
+            await scheduler.stop()
+
+        assert sorted(engine.batches[0]) == [b"b0", b"q0"]
+        assert [len(batch) for batch in engine.batches] == [2, 1, 1]
@@ -179,7 +179,7 @@ class TestAudioStreamingServiceServicer:
         await servicer._handle_control_message(session_id, control)
         
         # Should have processed the buffer
-        servicer.audio_processor.preprocess_audio.assert_called_once()
+        servicer.audio_processor.prepare_for_transcription.assert_called_once()
         servicer.whisper_engine.transcribe_chunk.assert_called_once()
 
     @pytest.mark.integration
@@ -216,7 +216,7 @@ class TestAudioStreamingServiceServicer:
         session_state = {"buffer": b""}
         
         # Mock error
-        servicer.audio_processor.preprocess_audio.side_effect = Exception("Processing error")
+        servicer.audio_processor.prepare_for_transcription.side_effect = Exception("Processing error")
         
         responses = []
         async for response in servicer._transcribe_audio_chunk(session_id, audio_data, session_state):
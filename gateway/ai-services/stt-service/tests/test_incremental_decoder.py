@@ -0,0 +1,243 @@
+"""Tests for the incremental streaming decoder."""
+
+import numpy as np
+import pytest
+
+from stt_service.audio_processor import AudioProcessor
+from stt_service.audio_ring_buffer import AudioRingBuffer
+from stt_service.incremental_decoder import IncrementalDecoder
+
+SAMPLE_RATE = 16000
+
+
+def _tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 220 * t) * 12000).astype(np.int16)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(SAMPLE_RATE * seconds), dtype=np.int16)
+
+
+class FakeWhisperEngine:
+    """Emits one word per 0.5s of audio, with word end times."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def transcribe_chunk(self, audio_data, language=None, temperature=0.0,
+                               prompt=None, word_timestamps=False):
+        seconds = len(audio_data) / SAMPLE_RATE
+        self.calls.append({"seconds": seconds, "prompt": prompt})
+        count = int(seconds / 0.5)
+        words = [{"word": f" w{i}", "end": (i + 1) * 0.5} for i in range(count)]
+        return {
+            "text": "".join(word["word"] for word in words).strip(),
+            "words": words if word_timestamps else [],
+            "confidence": 0.9,
+        }
+
+
+class TestIncrementalDecoder:
+    """Test cases for IncrementalDecoder class."""
+
+    @pytest.mark.unit
+    async def test_silence_is_not_decoded(self):
+        """Test that windows without speech never reach the model."""
+        engine = FakeWhisperEngine()
+        decoder = IncrementalDecoder(engine, AudioProcessor(), sample_rate=SAMPLE_RATE)
+        ring = AudioRingBuffer(capacity=SAMPLE_RATE * 10)
+
+        ring.write(_silence(2.0))
+        events = await decoder.process(ring)
+
+        assert events == []
+        assert engine.calls == []
+        assert len(ring) <= SAMPLE_RATE  # silence trimmed
+
+    @pytest.mark.unit
+    async def test_commits_stable_prefix_and_final_segment(self):
+        """Test agreement commits words once and pauses close the utterance."""
+        engine = FakeWhisperEngine()
+        decoder = IncrementalDecoder(engine, AudioProcessor(), sample_rate=SAMPLE_RATE)
+        ring = AudioRingBuffer(capacity=SAMPLE_RATE * 10)
+
+        ring.write(_tone(1.0))
+        first = await decoder.process(ring)
+        assert [event["is_partial"] for event in first] == [True]
+
+        ring.write(_tone(1.0))
+        second = await decoder.process(ring)
+        finals = [event for event in second if not event["is_partial"]]
+        assert finals and finals[0]["text"] == "w0 w1"
+        assert len(ring) == SAMPLE_RATE  # committed audio trimmed
+
+        ring.write(_silence(1.0))
+        third = await decoder.process(ring)
+        assert third[-1]["end_of_segment"] is True
+        assert engine.calls[-1]["prompt"] == "w0 w1"
+
+        # Committed audio is never decoded again: only the 1s tail plus the pause
+        assert engine.calls[-1]["seconds"] < 2.0
+        assert decoder.committed_text == "w0 w1 w0 w1"
+
+
+class _FakeFeatureExtractor:
+    """One 2-bin frame per 10ms of audio; 0.5s of audio is 50 frames."""
+
+    sampling_rate = SAMPLE_RATE
+    nb_max_frames = 3000
+
+    def __call__(self, audio):
+        frames = len(audio) // 160
+        return np.ones((2, frames), dtype=np.float32)
+
+
+class _FakeCTranslate2Whisper:
+    """Batched CTranslate2 Whisper stand-in: one token per 0.5s of audio."""
+
+    is_multilingual = True
+
+    def __init__(self):
+        self.generate_calls = []
+        self.detected = 0
+
+    def encode(self, features, to_cpu=False):
+        return features
+
+    def detect_language(self, encoder_output):
+        self.detected += len(encoder_output)
+        return [[("<|en|>", 0.98)] for _ in range(len(encoder_output))]
+
+    def generate(self, features, prompts, **kwargs):
+        from types import SimpleNamespace
+
+        self.generate_calls.append({"batch_size": len(features), **kwargs})
+        return [
+            SimpleNamespace(
+                sequences_ids=[list(range(int(clip[0].sum() // 50)))],
+                scores=[-0.1],
+            )
+            for clip in features
+        ]
+
+
+class _FakeFasterWhisperModel:
+    """WhisperModel surface used by WhisperEngine's batched decode."""
+
+    def __init__(self):
+        self.feature_extractor = _FakeFeatureExtractor()
+        self.model = _FakeCTranslate2Whisper()
+        self.hf_tokenizer = None
+        self.aligned = 0
+
+    def get_prompt(self, tokenizer, previous_tokens, without_timestamps=False):
+        return list(previous_tokens)
+
+    def add_word_timestamps(self, segments, tokenizer, encoder_output, num_frames, **kwargs):
+        self.aligned += 1
+        for segment in segments:
+            segment["words"] = [
+                {"word": f" w{token}", "start": token * 0.5, "end": (token + 1) * 0.5, "probability": 0.9}
+                for token in segment["tokens"]
+            ]
+
+
+def _install_fake_faster_whisper(monkeypatch):
+    import sys
+    import types
+
+    class Tokenizer:
+        eot = 1000
+
+        def __init__(self, hf_tokenizer, multilingual, task=None, language=None):
+            self.language = language
+
+        def encode(self, text):
+            return [0] * len(text.split())
+
+        def decode(self, tokens):
+            return "".join(f" w{token}" for token in tokens)
+
+    def pad_or_trim(features):
+        padded = np.zeros((features.shape[0], 3000), dtype=np.float32)
+        padded[:, :features.shape[1]] = features
+        return padded
+
+    ctranslate2 = types.ModuleType("ctranslate2")
+    ctranslate2.StorageView = types.SimpleNamespace(from_array=lambda array: array)
+    audio = types.ModuleType("faster_whisper.audio")
+    audio.decode_audio = None
+    audio.pad_or_trim = pad_or_trim
+    tokenizer = types.ModuleType("faster_whisper.tokenizer")
+    tokenizer.Tokenizer = Tokenizer
+
+    monkeypatch.setitem(sys.modules, "ctranslate2", ctranslate2)
+    monkeypatch.setitem(sys.modules, "faster_whisper", types.ModuleType("faster_whisper"))
+    monkeypatch.setitem(sys.modules, "faster_whisper.audio", audio)
+    monkeypatch.setitem(sys.modules, "faster_whisper.tokenizer", tokenizer)
+
+
+class TestBatchedIncrementalDecoding:
+    """Test the incremental decoder through the batching scheduler."""
+
+    @pytest.mark.unit
+    async def test_stable_prefix_commits_with_batching(self, monkeypatch):
+        """Test batched decodes return word timings, so stable prefixes still commit."""
+        from stt_service.batch_scheduler import TranscriptionScheduler
+        from stt_service.whisper_engine import WhisperEngine
+
+        _install_fake_faster_whisper(monkeypatch)
+        engine = WhisperEngine()
+        engine.backend = "faster-whisper"
+        engine.model = _FakeFasterWhisperModel()
+        engine.is_initialized = True
+        assert engine.supports_batching
+
+        scheduler = TranscriptionScheduler(engine, max_batch_size=4, max_wait_ms=5)
+        await scheduler.start()
+        try:
+            decoder = IncrementalDecoder(
+                scheduler.for_session("s1"), AudioProcessor(), sample_rate=SAMPLE_RATE
+            )
+            ring = AudioRingBuffer(capacity=SAMPLE_RATE * 10)
+
+            ring.write(_tone(1.0))
+            await decoder.process(ring)
+            ring.write(_tone(1.0))
+            events = await decoder.process(ring)
+        finally:
+            await scheduler.stop()
+
+        finals = [event for event in events if not event["is_partial"]]
+        assert finals and finals[0]["text"] == "w0 w1"
+        assert len(ring) == SAMPLE_RATE  # trimmed at the committed word's end
+        assert engine.model.aligned >= 2
+        # No language configured: detected per clip instead of forcing English
+        assert engine.model.model.detected >= 2
+        assert all("sampling_temperature" not in call for call in engine.model.model.generate_calls)
+
+    @pytest.mark.unit
+    async def test_batch_groups_by_temperature(self, monkeypatch):
+        """Test clips with different temperatures decode with their own sampling settings."""
+        from stt_service.whisper_engine import WhisperEngine
+
+        _install_fake_faster_whisper(monkeypatch)
+        engine = WhisperEngine()
+        engine.backend = "faster-whisper"
+        engine.model = _FakeFasterWhisperModel()
+        engine.is_initialized = True
+
+        clip = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        results = await engine.transcribe_batch([
+            {"audio_data": clip, "language": "de", "temperature": 0.0},
+            {"audio_data": clip, "language": "de", "temperature": 0.4},
+            {"audio_data": clip, "language": "de", "temperature": 0.0},
+        ])
+
+        calls = engine.model.model.generate_calls
+        assert sorted(call["batch_size"] for call in calls) == [1, 2]
+        assert [call.get("sampling_temperature") for call in calls if call["batch_size"] == 1] == [0.4]
+        assert [result["language"] for result in results] == ["de", "de", "de"]
+        assert engine.model.model.detected == 0
+        assert all(result["words"] == [] for result in results)
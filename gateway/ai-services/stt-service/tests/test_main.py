@@ -327,21 +327,28 @@ class TestConnectionManager:
 
     @pytest.mark.unit
     def test_can_accept_data_processing_state(self):
-        """Test backpressure control based on processing state."""
+        """Test audio is queued while processing and rejected only when the backlog is full."""
+        import asyncio
         from stt_service.main import StreamingConnectionManager
         
         manager = StreamingConnectionManager()
         session_id = "test-session"
+        backlog = asyncio.Queue(maxsize=1)
         
         # Session currently processing
         manager.connection_states[session_id] = {
             "buffer_size": 100,
             "is_processing": True,
+            "backlog": backlog,
             "message_count": 10,
             "error_count": 0
         }
         
-        # Should not accept data while processing
+        # Should keep accepting data while processing
+        assert manager.can_accept_data(session_id, 100) is True
+        
+        # Should reject data once the backlog is full
+        backlog.put_nowait(b"chunk")
         assert manager.can_accept_data(session_id, 100) is False
 
     @pytest.mark.unit
@@ -363,6 +370,58 @@ class TestConnectionManager:
         # Should not accept data with high error rate
         assert manager.can_accept_data(session_id, 100) is False
 
+    def _drain_state(self, worker):
+        import asyncio
+        import numpy as np
+        from stt_service.audio_ring_buffer import AudioRingBuffer
+        
+        backlog = asyncio.Queue()
+        backlog.put_nowait(np.ones(160, dtype=np.int16))
+        return {
+            "backlog": backlog,
+            "backlog_bytes": 320,
+            "worker": worker,
+            "ring": AudioRingBuffer(capacity=1600),
+            "pending_samples": 0,
+        }
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_drain_backlog_after_worker_died(self):
+        """Test ending a session does not hang when the audio worker crashed."""
+        import asyncio
+        from stt_service import main as main_module
+        
+        async def crashed_worker():
+            raise RuntimeError("decoder crashed")
+        
+        worker = asyncio.create_task(crashed_worker())
+        await asyncio.sleep(0)
+        state = self._drain_state(worker)
+        
+        await asyncio.wait_for(main_module._drain_session_backlog("s1", state), timeout=1.0)
+        
+        # Audio the dead worker never moved still reaches the final flush
+        assert len(state["ring"]) == 160
+        assert state["backlog"].empty()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_drain_backlog_times_out_on_stuck_worker(self, monkeypatch):
+        """Test a worker that stops consuming is cancelled after the drain timeout."""
+        import asyncio
+        from stt_service import main as main_module
+        
+        monkeypatch.setattr(main_module.connection_manager, "drain_timeout", 0.05)
+        worker = asyncio.create_task(asyncio.sleep(60))
+        state = self._drain_state(worker)
+        
+        await asyncio.wait_for(main_module._drain_session_backlog("s1", state), timeout=1.0)
+        await asyncio.sleep(0)
+        
+        assert worker.cancelled()
+        assert len(state["ring"]) == 160
+
 
 class TestErrorHandling:
     """Test cases for error handling scenarios."""
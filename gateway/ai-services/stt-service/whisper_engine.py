@@ -1,12 +1,16 @@
 """Whisper engine wrapper for speech-to-text processing."""
 
 import asyncio
+import io
+import math
 import os
 import tempfile
 import time
+import wave
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
+import numpy as np
 import structlog
 
 from shared.exceptions import ModelInferenceError
@@ -81,7 +85,7 @@ class WhisperEngine:
     
     async def transcribe(
         self,
-        audio_data: bytes,
+        audio_data: Union[bytes, np.ndarray],
         language: Optional[str] = None,
         model: str = "base.en",
         temperature: float = 0.0,
@@ -155,22 +159,31 @@ class WhisperEngine:
     
     async def transcribe_chunk(
         self,
-        audio_data: bytes,
+        audio_data: Union[bytes, np.ndarray],
         language: Optional[str] = None,
         temperature: float = 0.0,
+        prompt: Optional[str] = None,
+        word_timestamps: bool = False,
     ) -> Dict[str, Any]:
-        """Transcribe small audio chunk for streaming."""
+        """Transcribe small audio chunk for streaming.
+        
+        `audio_data` is either encoded audio or float32 samples at 16kHz.
+        `prompt` conditions the decoder on previously committed text, and
+        `word_timestamps` returns word timings so a caller can trim audio
+        at the end of a committed word (see IncrementalDecoder).
+        """
         if not self.is_initialized:
             raise ModelInferenceError("Whisper engine not initialized", "whisper")
         
         try:
-            # For streaming, use simpler transcription without detailed timestamps
+            # For streaming, skip segment timestamps unless word timings are needed
             result = await self._transcribe_audio(
                 audio_data,
                 language=language,
                 temperature=temperature,
-                return_timestamps=False,
-                return_word_level_timestamps=False,
+                return_timestamps=word_timestamps,
+                return_word_level_timestamps=word_timestamps,
+                initial_prompt=prompt,
             )
             
             return result
@@ -180,61 +193,260 @@ class WhisperEngine:
             # For streaming, return empty result instead of failing
             return {"text": "", "confidence": 0.0}
     
+    @property
+    def supports_batching(self) -> bool:
+        """Whether several clips can be decoded in one model call."""
+        return (
+            getattr(self, "backend", None) == "faster-whisper"
+            and hasattr(getattr(self.model, "model", None), "generate")
+        )
+    
+    async def transcribe_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Transcribe several short clips together.
+        
+        Each request holds transcribe_chunk arguments (audio_data, language,
+        temperature, prompt, word_timestamps). With faster-whisper the clips go
+        through batched CTranslate2 calls, with language detection and word
+        timings like transcribe_chunk; other backends decode them one by one.
+        """
+        if not self.is_initialized:
+            raise ModelInferenceError("Whisper engine not initialized", "whisper")
+        
+        if not requests:
+            return []
+        
+        if self.supports_batching:
+            try:
+                return await run_in_executor(self._generate_batch_faster_whisper, requests)
+            except Exception as exc:
+                logger.warning("Batched decode failed, decoding clips individually", error=str(exc))
+        
+        return [await self.transcribe_chunk(**request) for request in requests]
+    
+    def _generate_batch_faster_whisper(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Decode clips with batched CTranslate2 calls (runs in executor).
+        
+        The encoder runs once for the whole batch whenever a clip needs its
+        language detected or word timings aligned; decoding is batched per
+        distinct temperature, since sampling settings are per generate call.
+        """
+        import ctranslate2
+        from faster_whisper.audio import decode_audio, pad_or_trim
+        from faster_whisper.tokenizer import Tokenizer
+        
+        extractor = self.model.feature_extractor
+        max_length = getattr(self.model, "max_length", 448)
+        is_multilingual = self.model.model.is_multilingual
+        
+        features = []
+        num_frames = []
+        durations = []
+        for request in requests:
+            audio = request["audio_data"]
+            if not isinstance(audio, np.ndarray):
+                audio = decode_audio(io.BytesIO(audio), sampling_rate=extractor.sampling_rate)
+            durations.append(len(audio) / extractor.sampling_rate)
+            clip_features = extractor(audio)
+            num_frames.append(min(clip_features.shape[-1], extractor.nb_max_frames))
+            features.append(pad_or_trim(clip_features))
+        features = np.ascontiguousarray(np.stack(features), dtype=np.float32)
+        
+        languages = [request.get("language") for request in requests]
+        needs_detection = is_multilingual and any(language is None for language in languages)
+        needs_words = any(request.get("word_timestamps") for request in requests)
+        
+        # Decode from encoder output when it is needed anyway, so the encoder runs once
+        encoder_output = None
+        model_input = features
+        if needs_detection or needs_words:
+            encoded = self.model.model.encode(ctranslate2.StorageView.from_array(features), to_cpu=True)
+            encoder_output = np.asarray(encoded)
+            model_input = encoder_output
+        
+        if needs_detection:
+            detected = self.model.model.detect_language(ctranslate2.StorageView.from_array(encoder_output))
+            for index, candidates in enumerate(detected):
+                if languages[index] is None:
+                    token, _ = candidates[0]
+                    languages[index] = token[2:-2]  # "<|de|>" -> "de"
+        
+        tokenizers = []
+        prompts = []
+        for request, language in zip(requests, languages):
+            tokenizer = Tokenizer(
+                self.model.hf_tokenizer,
+                is_multilingual,
+                task="transcribe",
+                language=language or "en",
+            )
+            previous_tokens = []
+            if request.get("prompt"):
+                previous_tokens = tokenizer.encode(" " + request["prompt"].strip())
+                previous_tokens = previous_tokens[-(max_length // 2 - 1):]
+            tokenizers.append(tokenizer)
+            prompts.append(self.model.get_prompt(tokenizer, previous_tokens, without_timestamps=True))
+        
+        by_temperature: Dict[float, List[int]] = {}
+        for index, request in enumerate(requests):
+            by_temperature.setdefault(float(request.get("temperature") or 0.0), []).append(index)
+        
+        results: List[Any] = [None] * len(requests)
+        for temperature, indices in by_temperature.items():
+            sampling = {}
+            if temperature > 0:
+                sampling = {"sampling_topk": 0, "sampling_temperature": temperature}
+            group_results = self.model.model.generate(
+                ctranslate2.StorageView.from_array(np.ascontiguousarray(model_input[indices])),
+                [prompts[index] for index in indices],
+                beam_size=1,
+                max_length=max_length,
+                return_scores=True,
+                suppress_blank=True,
+                **sampling,
+            )
+            for index, result in zip(indices, group_results):
+                results[index] = result
+        
+        outputs = []
+        for index, request in enumerate(requests):
+            tokenizer = tokenizers[index]
+            result = results[index]
+            tokens = [token for token in result.sequences_ids[0] if token < tokenizer.eot]
+            
+            words = []
+            if request.get("word_timestamps") and tokens:
+                words = self._align_words_faster_whisper(
+                    tokenizer,
+                    tokens,
+                    ctranslate2.StorageView.from_array(
+                        np.ascontiguousarray(encoder_output[index:index + 1])
+                    ),
+                    num_frames[index],
+                    durations[index],
+                )
+            
+            outputs.append({
+                "text": tokenizer.decode(tokens).strip(),
+                "language": languages[index],
+                # Length-normalized log-probability -> mean token probability
+                "confidence": math.exp(result.scores[0]) if result.scores else None,
+                "duration": durations[index],
+                "segments": [],
+                "words": words,
+            })
+        return outputs
+    
+    def _align_words_faster_whisper(
+        self,
+        tokenizer: Any,
+        tokens: List[int],
+        encoder_output: Any,
+        num_frames: int,
+        duration: float,
+    ) -> List[Dict[str, Any]]:
+        """Word timings for one decoded clip via faster-whisper's cross-attention alignment."""
+        segment = {"seek": 0, "start": 0.0, "end": duration, "tokens": tokens}
+        self.model.add_word_timestamps(
+            [segment],
+            tokenizer,
+            encoder_output,
+            num_frames,
+            prepend_punctuations="\"'“¿([{-",
+            append_punctuations="\"'.。,，!！?？:：”)]}、",
+            last_speech_timestamp=0.0,
+        )
+        return [
+            {
+                "word": word["word"],
+                "start": word["start"],
+                "end": word["end"],
+                "confidence": word["probability"],
+            }
+            for word in segment.get("words", [])
+        ]
+    
     async def _transcribe_audio(
         self,
-        audio_data: bytes,
+        audio_data: Union[bytes, np.ndarray],
         language: Optional[str] = None,
         temperature: float = 0.0,
         return_timestamps: bool = False,
         return_word_level_timestamps: bool = False,
+        initial_prompt: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Internal transcription method."""
         
-        # Write audio data to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_file.write(audio_data)
-            temp_file_path = temp_file.name
+        # faster-whisper and openai-whisper take 16kHz float32 samples directly
+        if isinstance(audio_data, np.ndarray) and self.backend != "whisper-cpp":
+            audio_input = np.ascontiguousarray(audio_data, dtype=np.float32)
+            temp_file_path = None
+        else:
+            # Write audio data to temporary file
+            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+                if isinstance(audio_data, np.ndarray):
+                    self._write_samples_as_wav(temp_file, audio_data)
+                else:
+                    temp_file.write(audio_data)
+                temp_file_path = temp_file.name
+            audio_input = temp_file_path
         
         try:
             if self.backend == "faster-whisper":
                 return await self._transcribe_faster_whisper(
-                    temp_file_path,
+                    audio_input,
                     language=language,
                     temperature=temperature,
                     return_timestamps=return_timestamps,
                     return_word_level_timestamps=return_word_level_timestamps,
+                    initial_prompt=initial_prompt,
                 )
             elif self.backend == "openai-whisper":
                 return await self._transcribe_openai_whisper(
-                    temp_file_path,
+                    audio_input,
                     language=language,
                     temperature=temperature,
                     return_timestamps=return_timestamps,
                     return_word_level_timestamps=return_word_level_timestamps,
+                    initial_prompt=initial_prompt,
                 )
             elif self.backend == "whisper-cpp":
                 return await self._transcribe_whisper_cpp(
-                    temp_file_path,
+                    audio_input,
                     language=language,
                     temperature=temperature,
+                    return_timestamps=return_timestamps,
+                    return_word_level_timestamps=return_word_level_timestamps,
+                    initial_prompt=initial_prompt,
                 )
             else:
                 raise ModelInferenceError(f"Unknown backend: {self.backend}", "whisper")
                 
         finally:
             # Clean up temp file
-            try:
-                os.unlink(temp_file_path)
-            except OSError:
-                pass
+            if temp_file_path:
+                try:
+                    os.unlink(temp_file_path)
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def _write_samples_as_wav(file_obj, samples: np.ndarray, sample_rate: int = 16000) -> None:
+        """Write float32 samples as 16-bit mono WAV (for file-based backends)."""
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+        with wave.open(file_obj, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(pcm.tobytes())
     
     async def _transcribe_faster_whisper(
         self,
-        audio_path: str,
+        audio_path: Union[str, np.ndarray],
         language: Optional[str] = None,
         temperature: float = 0.0,
         return_timestamps: bool = False,
         return_word_level_timestamps: bool = False,
+        initial_prompt: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Transcribe using faster-whisper."""
         
@@ -243,6 +455,7 @@ class WhisperEngine:
                 audio_path,
                 language=language,
                 temperature=temperature,
+                initial_prompt=initial_prompt,
                 word_timestamps=return_word_level_timestamps,
                 vad_filter=True,  # Voice activity detection
                 vad_parameters=dict(min_silence_duration_ms=500),
@@ -289,11 +502,12 @@ class WhisperEngine:
     
     async def _transcribe_openai_whisper(
         self,
-        audio_path: str,
+        audio_path: Union[str, np.ndarray],
         language: Optional[str] = None,
         temperature: float = 0.0,
         return_timestamps: bool = False,
         return_word_level_timestamps: bool = False,
+        initial_prompt: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Transcribe using openai-whisper."""
         
@@ -305,6 +519,9 @@ class WhisperEngine:
                 "temperature": temperature,
             }
             
+            if initial_prompt:
+                options["initial_prompt"] = initial_prompt
+            
             if return_word_level_timestamps:
                 options["word_timestamps"] = True
             
@@ -350,6 +567,7 @@ class WhisperEngine:
         temperature: float = 0.0,
         return_timestamps: bool = False,
         return_word_level_timestamps: bool = False,
+        initial_prompt: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Transcribe using whisper.cpp Python bindings."""
         
@@ -369,6 +587,8 @@ class WhisperEngine:
             params.token_timestamps = return_word_level_timestamps
             params.suppress_blank = True
             params.suppress_non_speech_tokens = True
+            if initial_prompt and hasattr(params, "initial_prompt"):
+                params.initial_prompt = initial_prompt.encode('utf-8')
             
             # Load and process audio
             if self.model.full(params, audio_path.encode('utf-8')) != 0:
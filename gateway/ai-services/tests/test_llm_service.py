@@ -121,4 +121,214 @@ class TestLLMService:
         assert response.status_code == 200
         data = response.json()
         assert "id" in data
-        assert "status" in data
\ No newline at end of file
+        assert "status" in data
+
+
+class TestPrefixCaching:
+    """Test prefix-stable prompt assembly and cached-token accounting."""
+
+    def test_equal_system_prompts_share_prefix(self):
+        """Test whitespace and tool order do not change the canonical prefix."""
+        from llm_service.function_calling import FunctionDefinition
+        from llm_service.prompt_builder import build_chat_prompt
+
+        tools = [
+            FunctionDefinition(name="lookup", description="Find a record", parameters={"b": 1, "a": 2}),
+            FunctionDefinition(name="create", description="Create a record", parameters={}),
+        ]
+        first = build_chat_prompt(
+            [ChatMessage(role=MessageRole.SYSTEM, content="Be helpful.  \r\n"),
+             ChatMessage(role=MessageRole.USER, content="Hi")],
+            functions=tools,
+        )
+        second = build_chat_prompt(
+            [ChatMessage(role=MessageRole.SYSTEM, content="Be helpful."),
+             ChatMessage(role=MessageRole.USER, content="Hi"),
+             ChatMessage(role=MessageRole.ASSISTANT, content="Hello!"),
+             ChatMessage(role=MessageRole.USER, content="Next question")],
+            functions=list(reversed(tools)),
+        )
+
+        assert first.prefix == second.prefix
+        assert second.prompt.startswith(first.prompt[:-len("Assistant:")])
+        assert second.prompt.endswith("Assistant:")
+
+    def test_function_results_only_in_function_calling_prompts(self):
+        """Test chat prompts skip function-role messages, as before the prompt builder."""
+        from llm_service.prompt_builder import build_chat_prompt
+
+        messages = [
+            ChatMessage(role=MessageRole.USER, content="Find Acme"),
+            ChatMessage(role=MessageRole.FUNCTION, content='{"id": 7}'),
+        ]
+
+        assert "Function Result" not in build_chat_prompt(messages).prompt
+        assert 'Function Result: {"id": 7}' in build_chat_prompt(
+            messages, include_function_results=True
+        ).prompt
+
+    def test_missing_vllm_requires_explicit_stub_backend(self, monkeypatch):
+        """Test startup fails instead of silently serving stub completions."""
+        from llm_service import engine
+        from shared.config import LLMServiceConfig
+        from shared.exceptions import ConfigurationError
+
+        monkeypatch.setattr(engine, "VLLM_AVAILABLE", False)
+
+        with pytest.raises(ConfigurationError):
+            engine.LLMEngineManager(LLMServiceConfig(engine_backend="vllm"), MagicMock())
+        assert engine.LLMEngineManager(
+            LLMServiceConfig(engine_backend="stub"), MagicMock()
+        ).backend == "stub"
+
+    @pytest.mark.asyncio
+    async def test_stub_backend_reports_cached_prefix_tokens(self):
+        """Test follow-up turns hit the prefix cache and the hit rate is tracked."""
+        from llm_service.engine import LLMEngineManager
+        from llm_service.prompt_builder import build_chat_prompt
+        from shared.config import LLMServiceConfig
+
+        manager = LLMEngineManager(LLMServiceConfig(engine_backend="stub"), MagicMock())
+        await manager.initialize()
+
+        system = ChatMessage(role=MessageRole.SYSTEM, content="You are a WearForce assistant. " * 20)
+        turns = [system, ChatMessage(role=MessageRole.USER, content="First question")]
+        first = await manager.generate("gpt-oss-20b", build_chat_prompt(turns).prompt, max_tokens=8)
+
+        turns += [
+            ChatMessage(role=MessageRole.ASSISTANT, content=first["text"]),
+            ChatMessage(role=MessageRole.USER, content="Second question"),
+        ]
+        second = await manager.generate("gpt-oss-20b", build_chat_prompt(turns).prompt, max_tokens=8)
+
+        assert first["cached_tokens"] == 0
+        assert second["cached_tokens"] > 100
+        assert second["cached_tokens"] <= second["prompt_tokens"]
+
+        stats = manager.get_prefix_cache_stats()
+        assert stats["requests"] == 2
+        assert stats["hits"] == 1
+        assert 0 < stats["token_hit_rate"] < 1
+
+
+class TestChatStreaming:
+    """Test streamed chat completions."""
+
+    @pytest.mark.asyncio
+    async def test_stream_sends_incremental_deltas(self):
+        """Test cumulative engine output is streamed as non-overlapping deltas."""
+        import json
+        from llm_service import main
+        from llm_service.engine import LLMEngineManager
+        from shared.config import LLMServiceConfig
+
+        manager = LLMEngineManager(LLMServiceConfig(engine_backend="stub"), MagicMock())
+        await manager.initialize()
+        main.engine_manager = manager
+
+        request = ChatRequest(
+            model="gpt-oss-20b",
+            messages=[ChatMessage(role=MessageRole.USER, content="Where is my order?")],
+            max_tokens=12,
+            stream=True,
+        )
+        expected = await manager.generate("gpt-oss-20b", main._messages_to_prompt(request.messages), max_tokens=12)
+
+        deltas = []
+        async for event in main._stream_chat_completion(request, "gpt-oss-20b"):
+            data = event[len("data: "):].strip()
+            if data != "[DONE]":
+                deltas.append(json.loads(data)["choices"][0]["delta"].get("content", ""))
+
+        assert len([delta for delta in deltas if delta]) > 1
+        assert "".join(deltas) == expected["text"]
+
+    @pytest.mark.asyncio
+    async def test_stream_sends_only_the_revised_suffix(self, monkeypatch):
+        """Test that an engine revising earlier text doesn't resend the whole response."""
+        import json
+        from llm_service import main
+
+        async def generate_stream(**kwargs):
+            for text in ["Your order", "Your order has", "Your order was shipped", "Your order was shipped today"]:
+                yield {"text": text}
+
+        main.engine_manager = MagicMock(generate_stream=generate_stream)
+        request = ChatRequest(
+            model="gpt-oss-20b",
+            messages=[ChatMessage(role=MessageRole.USER, content="Where is my order?")],
+            stream=True,
+        )
+
+        warning = MagicMock()
+        monkeypatch.setattr(main.logger, "warning", warning)
+
+        deltas = []
+        async for event in main._stream_chat_completion(request, "gpt-oss-20b"):
+            data = event[len("data: "):].strip()
+            if data != "[DONE]":
+                deltas.append(json.loads(data)["choices"][0]["delta"].get("content", ""))
+
+        assert deltas[:4] == ["Your order", " has", "was shipped", " today"]
+        warning.assert_called_once()
+        assert warning.call_args.kwargs["common_prefix_length"] == len("Your order ")
+
+
+class FakeReplica:
+    """In-process replica with a controllable latency and failure mode."""
+
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def generate(self, prompt, sampling_params):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} unavailable")
+        return {"text": self.name, "generation_time": self.delay}
+
+
+class TestLoadBalancer:
+    """Test replica routing shared by the direct and batch paths."""
+
+    @pytest.mark.asyncio
+    async def test_routes_to_replica_with_fewest_outstanding_tokens(self):
+        """Test concurrent requests spread across replicas by outstanding tokens."""
+        from llm_service.load_balancer import LoadBalancer
+
+        balancer = LoadBalancer(policy="least_tokens")
+        replicas = [FakeReplica("a", delay=0.01), FakeReplica("b", delay=0.01)]
+        for replica in replicas:
+            balancer.add_replica("gpt-oss-20b", replica)
+
+        async def call(tokens):
+            async with balancer.route("gpt-oss-20b", tokens) as replica:
+                return await replica.generate("prompt", None)
+
+        results = await asyncio.gather(call(1000), call(10), call(10))
+
+        assert [result["text"] for result in results] == ["a", "b", "b"]
+        assert all(state["outstanding_tokens"] == 0 for state in balancer.get_stats()["models"]["gpt-oss-20b"])
+
+    @pytest.mark.asyncio
+    async def test_failing_replica_is_ejected(self):
+        """Test consecutive failures eject a replica and the batch path falls back."""
+        from llm_service.load_balancer import LoadBalancer
+
+        balancer = LoadBalancer(failure_threshold=2, ejection_seconds=60.0)
+        broken = FakeReplica("broken", fail=True)
+        healthy = FakeReplica("healthy")
+        balancer.add_replica("gpt-oss-20b", broken)
+        balancer.add_replica("gpt-oss-120b", healthy)
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                async with balancer.route("gpt-oss-20b") as replica:
+                    await replica.generate("prompt", None)
+
+        assert not balancer.has_healthy_replica("gpt-oss-20b")
+        assert balancer.resolve_model("gpt-oss-20b", ["gpt-oss-20b", "gpt-oss-120b"]) == "gpt-oss-120b"
+        assert balancer.resolve_model("gpt-oss-120b", ["gpt-oss-20b", "gpt-oss-120b"]) == "gpt-oss-120b"
@@ -75,4 +75,492 @@ class TestNLUService:
         """Test entity types list endpoint."""
         response = await client.get("/entities")
         # May return 503 if services not initialized
-        assert response.status_code in [200, 503]
\ No newline at end of file
+        assert response.status_code in [200, 503]
+
+
+class TestConversationStore:
+    """Test the append-only Redis conversation log."""
+
+    @pytest.mark.asyncio
+    async def test_appends_trim_and_migrate_legacy_blobs(self):
+        """Test capped appends, last-N reads and migration from the JSON-blob format."""
+        import json
+        from shared.database import ConversationStore
+
+        class FakePipeline:
+            def __init__(self, client):
+                self.client = client
+                self.calls = []
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+            async def execute(self):
+                self.client.round_trips += 1
+                return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+        class FakeRedis:
+            def __init__(self):
+                self.data = {}
+                self.round_trips = 0
+
+            def pipeline(self, transaction=False):
+                return FakePipeline(self)
+
+            def getdel(self, key):
+                return self.data.pop(key, None)
+
+            def rpush(self, key, *values):
+                self.data.setdefault(key, []).extend(values)
+                return len(self.data[key])
+
+            def lpush(self, key, *values):
+                self.data[key] = list(reversed(values)) + self.data.get(key, [])
+                return len(self.data[key])
+
+            def ltrim(self, key, start, end):
+                values = self.data.get(key, [])
+                self.data[key] = values[start:] if end == -1 else values[start:end + 1]
+
+            def lrange(self, key, start, end):
+                values = self.data.get(key, [])
+                return values[start:] if end == -1 else values[start:end + 1]
+
+            def hset(self, key, field=None, value=None, mapping=None):
+                self.data.setdefault(key, {}).update(mapping or {field: value})
+
+            def hsetnx(self, key, field, value):
+                self.data.setdefault(key, {}).setdefault(field, value)
+
+            def hgetall(self, key):
+                return dict(self.data.get(key, {}))
+
+            def expire(self, key, ttl):
+                return key in self.data
+
+            def delete(self, *keys):
+                return sum(self.data.pop(key, None) is not None for key in keys)
+
+        class FakeRedisManager:
+            def __init__(self):
+                self.client = FakeRedis()
+
+            async def lrange(self, key, start, end):
+                return self.client.lrange(key, start, end)
+
+            async def hgetall(self, key):
+                return self.client.hgetall(key)
+
+            async def delete(self, *keys):
+                return self.client.delete(*keys)
+
+        redis = FakeRedisManager()
+        redis.client.data["conversation:c1"] = json.dumps({
+            "id": "c1",
+            "created_at": 1.0,
+            "messages": [{"role": "user", "content": f"old {i}", "timestamp": i} for i in range(3)],
+        })
+        store = ConversationStore(redis, max_messages=4)
+
+        await store.add_messages("c1", [
+            {"role": "user", "content": "new 0", "timestamp": 10},
+            {"role": "assistant", "content": "new 1", "timestamp": 11},
+        ])
+        assert "conversation:c1" not in redis.client.data
+
+        # Legacy messages stay ahead of the new ones, capped at max_messages
+        messages = await store.get_messages("c1", limit=10)
+        assert [m["content"] for m in messages] == ["old 1", "old 2", "new 0", "new 1"]
+
+        round_trips = redis.client.round_trips
+        await store.add_message("c1", {"role": "user", "content": "new 2", "timestamp": 12})
+        assert redis.client.round_trips == round_trips + 1
+        assert [m["content"] for m in await store.get_messages("c1", limit=2)] == ["new 1", "new 2"]
+
+        conversation = await store.get_conversation("c1")
+        assert conversation["created_at"] == 1.0 and conversation["updated_at"] == 12
+        assert len(conversation["messages"]) == 4
+
+        await store.delete_conversation("c1")
+        assert await store.get_conversation("c1") is None
+
+
+class TestToolPlanExecution:
+    """Test dependency-aware concurrent tool execution."""
+
+    @staticmethod
+    async def _dispatcher(delays):
+        import asyncio
+        from nlu_service.tool_dispatcher import ToolDispatcher
+
+        dispatcher = ToolDispatcher(crm_api_url="http://crm", erp_api_url="http://erp")
+        await dispatcher._register_default_tools()
+        seen = {}
+
+        async def fake_request(tool, parameters, context, execution_id):
+            seen[tool.name] = dict(parameters)
+            await asyncio.sleep(delays[tool.name])
+            # Shaped like the CRM/ERP read models (ContactRead, ProductRead)
+            responses = {
+                "search_crm_contacts": [{"id": 42, "full_name": "Ada Lovelace", "email": "ada@example.com"}],
+                "get_erp_inventory": [{"id": 7, "name": "X2", "sku": "X2-001"}],
+            }
+            data = responses.get(tool.name, {"ok": True})
+            return {"success": True, "data": data, "tool_name": tool.name}
+
+        dispatcher._execute_tool_request = fake_request
+        return dispatcher, seen
+
+    @pytest.mark.asyncio
+    async def test_independent_tools_run_concurrently_and_bind_outputs(self):
+        """Test parallel execution, completion-order streaming and output binding."""
+        import time
+
+        dispatcher, seen = await self._dispatcher({
+            "search_crm_contacts": 0.1, "get_erp_inventory": 0.1, "search_erp_orders": 0.02, "update_crm_contact": 0.02,
+        })
+        calls = [
+            {"name": "search_crm_contacts", "parameters": {"query": "Ada"}},
+            {"name": "get_erp_inventory", "parameters": {"product_name": "X2"}},
+            {"name": "update_crm_contact", "parameters": {"notes": "called"}},
+            {"name": "search_erp_orders", "parameters": {"status": "open"}},
+        ]
+
+        started = time.monotonic()
+        outcomes = [outcome async for outcome in dispatcher.execute_tools(calls)]
+        elapsed = time.monotonic() - started
+
+        assert all(outcome["success"] for outcome in outcomes)
+        assert elapsed < 0.2  # sequential would take ~0.24s
+        # Streamed as completed; the update waits for the contact search
+        order = [outcome["tool_name"] for outcome in outcomes]
+        assert order[0] == "search_erp_orders"
+        assert order.index("update_crm_contact") > order.index("search_crm_contacts")
+        assert seen["update_crm_contact"]["notes"] == "called"
+        assert calls[2]["parameters"] == {"notes": "called"}
+        update = next(outcome for outcome in outcomes if outcome["tool_name"] == "update_crm_contact")
+        assert update["parameters"]["contact_id"] == "42"
+
+    @pytest.mark.asyncio
+    async def test_outputs_read_from_mapped_response_fields(self):
+        """Test that output names are read from the read models' ``id`` field."""
+        dispatcher, seen = await self._dispatcher({
+            "get_erp_inventory": 0.01, "update_erp_inventory": 0.01,
+        })
+        calls = [
+            {"name": "get_erp_inventory", "parameters": {"product_name": "X2"}},
+            {"name": "update_erp_inventory", "parameters": {"quantity": 5}},
+        ]
+
+        outcomes = [outcome async for outcome in dispatcher.execute_tools(calls)]
+
+        assert all(outcome["success"] for outcome in outcomes)
+        assert seen["update_erp_inventory"] == {"quantity": 5, "product_id": "7"}
+        assert dispatcher._extract_outputs("get_erp_inventory", {"data": {"product_id": 7}}) == {}
+
+    @pytest.mark.asyncio
+    async def test_deadline_cancels_stragglers_and_skips_dependents(self):
+        """Test that a turn deadline keeps finished results and reports the rest."""
+        import time
+
+        dispatcher, seen = await self._dispatcher({
+            "search_crm_contacts": 5.0, "get_erp_inventory": 0.01, "update_crm_contact": 0.01,
+        })
+        calls = [
+            {"name": "search_crm_contacts", "parameters": {"query": "Ada"}},
+            {"name": "get_erp_inventory", "parameters": {}},
+            {"name": "update_crm_contact", "parameters": {}},
+        ]
+
+        outcomes = {
+            outcome["tool_name"]: outcome
+            async for outcome in dispatcher.execute_tools(calls, deadline=time.monotonic() + 0.1)
+        }
+
+        assert outcomes["get_erp_inventory"]["status"] == "completed"
+        assert outcomes["search_crm_contacts"]["status"] == "cancelled"
+        assert outcomes["update_crm_contact"]["status"] == "skipped"
+        assert outcomes["update_crm_contact"]["error_type"] == "DeadlineExceeded"
+        assert "update_crm_contact" not in seen
+
+    @pytest.mark.asyncio
+    async def test_calls_that_supply_their_inputs_do_not_wait(self):
+        """Test a call with its input already set runs even when the tool that could produce it fails."""
+        dispatcher, seen = await self._dispatcher({"search_crm_contacts": 0.05, "update_crm_contact": 0.01})
+        fake_request = dispatcher._execute_tool_request
+
+        async def failing_search(tool, parameters, context, execution_id):
+            if tool.name == "search_crm_contacts":
+                raise ConnectionError("crm unavailable")
+            return await fake_request(tool, parameters, context, execution_id)
+
+        dispatcher._execute_tool_request = failing_search
+        calls = [
+            {"name": "search_crm_contacts", "parameters": {"query": "Ada"}},
+            {"name": "update_crm_contact", "parameters": {"contact_id": "5", "notes": "called"}},
+            {"name": "update_crm_contact", "parameters": {"notes": "called"}},
+        ]
+
+        assert dispatcher._tool_dependencies(calls) == [set(), set(), {0}]
+
+        outcomes = {outcome["index"]: outcome async for outcome in dispatcher.execute_tools(calls)}
+
+        assert [outcomes[index]["status"] for index in range(3)] == ["failed", "completed", "skipped"]
+        assert seen["update_crm_contact"] == {"contact_id": "5", "notes": "called"}
+        assert not any(dispatcher.tools[name].inputs for name in ("search_erp_orders", "search_crm_contacts"))
+
+
+class TestSpeculativeExecution:
+    """Test speculative entity extraction and RAG retrieval."""
+
+    @staticmethod
+    async def _run_turn(text, blocking=False):
+        import asyncio
+        import time
+        from types import SimpleNamespace
+        from nlu_service.langgraph_orchestrator import LangGraphOrchestrator, TurnTrace, WorkflowNode
+
+        async def classify(text, language):
+            await asyncio.sleep(0.1)
+            return SimpleNamespace(name="greeting" if text.startswith("hello") else "question", confidence=0.9)
+
+        async def extract(text, language):
+            await asyncio.sleep(0.1)
+            return []
+
+        intent_classifier = SimpleNamespace(classify=classify)
+        entity_extractor = SimpleNamespace(extract=extract)
+        if blocking:
+            # The real classifier and extractor, with their CPU-bound stages blocking
+            from nlu_service.entity_extractor import EntityExtractor
+            from nlu_service.intent_classifier import IntentClassifier
+            from shared.models import Intent
+
+            def match_rules(text, intent_definitions):
+                time.sleep(0.1)
+                return Intent(name="greeting" if text.startswith("hello") else "question", confidence=0.9)
+
+            def spacy_pipeline(text):
+                time.sleep(0.1)
+                return SimpleNamespace(ents=[])
+
+            intent_classifier = IntentClassifier()
+            intent_classifier._match_rules = match_rules
+            entity_extractor = EntityExtractor(use_business_recognizer=False)
+            entity_extractor.nlp = spacy_pipeline
+            entity_extractor.matcher = lambda doc: []
+
+        rag_calls = []
+
+        async def fetch_rag_context(message):
+            rag_calls.append(message)
+            await asyncio.sleep(0.15)
+            return [{"id": "policy-1"}]
+
+        orchestrator = LangGraphOrchestrator(
+            intent_classifier=intent_classifier,
+            entity_extractor=entity_extractor,
+            tool_dispatcher=None,
+            conversation_manager=None,
+            speculative_execution=True,
+        )
+        orchestrator._fetch_rag_context = fetch_rag_context
+
+        state = {
+            "messages": [{"role": "user", "content": text}], "current_intent": None, "entities": [],
+            "context": {}, "reasoning": [], "confidence_score": 0.0, "error_count": 0,
+            "routing_decision": None, "rag_context": [], "turn_id": "turn-1",
+        }
+        orchestrator.turns["turn-1"] = TurnTrace()
+
+        started = time.monotonic()
+        for stage, node in [
+            (WorkflowNode.INTENT_CLASSIFICATION, orchestrator._classify_intent),
+            (WorkflowNode.ENTITY_EXTRACTION, orchestrator._extract_entities),
+            (WorkflowNode.CONTEXT_ANALYSIS, orchestrator._analyze_context),
+        ]:
+            state = await orchestrator._timed(stage, node)(state)
+        route = orchestrator._route_with_speculation(state)
+        if route == "use_rag":
+            state = await orchestrator._timed(WorkflowNode.RAG_RETRIEVAL, orchestrator._rag_retrieval)(state)
+        elapsed = time.monotonic() - started
+
+        timeline = {entry["stage"]: entry for entry in orchestrator._finish_turn("turn-1")}
+        return route, state, elapsed, timeline, rag_calls, orchestrator
+
+    @pytest.mark.asyncio
+    async def test_speculative_retrieval_is_used_when_routed_to_rag(self):
+        """Test that extraction and retrieval overlap classification."""
+        route, state, elapsed, timeline, rag_calls, _ = await self._run_turn(
+            "how does the return policy work for enterprise customers"
+        )
+
+        assert route == "use_rag"
+        assert state["rag_context"] == [{"id": "policy-1"}]
+        assert len(rag_calls) == 1
+        assert elapsed < 0.25  # sequential stages would take ~0.35s
+        assert timeline["speculative_entity_extraction"]["outcome"] == "used"
+        assert timeline["speculative_rag_retrieval"]["outcome"] == "used"
+        assert timeline["speculative_rag_retrieval"]["start_ms"] < timeline["intent_classification"]["end_ms"]
+
+    @pytest.mark.asyncio
+    async def test_blocking_classifier_does_not_stall_the_loop(self):
+        """Test that rule scoring and the spaCy pipeline run off the event loop."""
+        import asyncio
+        import time
+
+        ticks = []
+
+        async def heartbeat():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        beat = asyncio.create_task(heartbeat())
+        try:
+            route, state, elapsed, timeline, _, _ = await self._run_turn(
+                "how does the return policy work for enterprise customers", blocking=True
+            )
+        finally:
+            beat.cancel()
+
+        assert route == "use_rag"
+        assert state["rag_context"] == [{"id": "policy-1"}]
+        assert elapsed < 0.25  # on the loop, classification and extraction would serialize
+        assert max(later - earlier for earlier, later in zip(ticks, ticks[1:])) < 0.08
+        assert timeline["speculative_rag_retrieval"]["start_ms"] < timeline["intent_classification"]["end_ms"]
+
+    @pytest.mark.asyncio
+    async def test_speculative_retrieval_is_cancelled_on_other_routes(self):
+        """Test that routing away from RAG cancels in-flight retrieval."""
+        route, state, _, timeline, _, orchestrator = await self._run_turn("hello there")
+
+        assert route == "direct_response"
+        assert state["rag_context"] == []
+        assert timeline["speculative_rag_retrieval"]["outcome"] == "cancelled"
+        assert orchestrator.speculations_discarded == 1
+        assert not orchestrator.turns
+
+
+class TestRAGContextPacking:
+    """Test packing retrieved passages into the response prompt."""
+
+    def test_passages_are_packed_under_the_token_budget(self):
+        """Test whole passages first, then one cut at a sentence boundary."""
+        from shared.chunking import estimate_token_count
+        from nlu_service.langgraph_orchestrator import LangGraphOrchestrator
+
+        orchestrator = LangGraphOrchestrator(
+            intent_classifier=None,
+            entity_extractor=None,
+            tool_dispatcher=None,
+            conversation_manager=None,
+            rag_context_token_budget=120,
+        )
+        passages = [
+            {"citation": "[1] faq.md", "content": "Enterprise customers get 60 days to return hardware."},
+            {"citation": "[2] returns-policy.pdf", "content": "Returns are accepted within 30 days. " * 30},
+            {"citation": "[3] shipping.md", "content": "Shipping is free above 500 EUR."},
+        ]
+
+        packed = orchestrator._pack_rag_passages(passages)
+
+        assert packed.startswith("[1] faq.md\nEnterprise customers get 60 days")
+        assert "[2] returns-policy.pdf\nReturns are accepted" in packed
+        assert "[3]" not in packed
+        assert packed.endswith("30 days.")
+        assert estimate_token_count(packed) <= 120
+
+        prompt = orchestrator._create_context_prompt({"rag_context": passages})
+        assert "cite sources by their [n] label" in prompt
+
+
+class TestTokenStreaming:
+    """Test token streaming through the agent stream."""
+
+    def test_sentence_buffer_keeps_abbreviations_and_initials(self):
+        """Test that "Dr." or "e.g." inside a sentence don't cut it for TTS."""
+        from nlu_service.langgraph_orchestrator import SentenceBuffer
+
+        buffer = SentenceBuffer()
+        sentences = []
+        for delta in ["Dr. Lee can help", " with refunds, e.g. late", " orders. Ask J. Smith", " too! Done"]:
+            sentences.extend(buffer.feed(delta))
+        sentences.extend(buffer.flush())
+
+        assert sentences == [
+            "Dr. Lee can help with refunds, e.g. late orders.",
+            "Ask J. Smith too!",
+            "Done",
+        ]
+
+    @staticmethod
+    def _orchestrator(deltas):
+        import json
+        from contextlib import asynccontextmanager
+        from types import SimpleNamespace
+        from nlu_service.langgraph_orchestrator import LangGraphOrchestrator
+
+        sse = [f"data: {json.dumps({'choices': [{'delta': {'content': delta}}]})}" for delta in deltas]
+        requests = []
+
+        @asynccontextmanager
+        async def stream(method, url, json=None, timeout=None):
+            requests.append(json)
+
+            async def aiter_lines():
+                for line in sse + ["", "data: [DONE]"]:
+                    yield line
+
+            yield SimpleNamespace(raise_for_status=lambda: None, aiter_lines=aiter_lines)
+
+        orchestrator = LangGraphOrchestrator(
+            intent_classifier=None,
+            entity_extractor=None,
+            tool_dispatcher=None,
+            conversation_manager=AsyncMock(),
+        )
+        orchestrator.http_client = SimpleNamespace(stream=stream)
+        orchestrator.conversation_manager.get_conversation_history.return_value = []
+        return orchestrator, requests
+
+    @pytest.mark.asyncio
+    async def test_tokens_and_sentences_stream_before_the_workflow_finishes(self):
+        """Test deltas are forwarded as they arrive, split into sentences for TTS."""
+        import json
+        from nlu_service.langgraph_orchestrator import WorkflowNode
+
+        orchestrator, requests = self._orchestrator(["Your order", " shipped.", " It arrives", " on Friday."])
+        generate = orchestrator._timed(WorkflowNode.RESPONSE_GENERATION, orchestrator._generate_response)
+
+        class FakeWorkflow:
+            async def astream(self, state):
+                state = await generate(state)
+                yield {"response_generation": {"messages": state["messages"]}}
+
+        orchestrator.compiled_workflow = FakeWorkflow()
+
+        events = [
+            json.loads(chunk)
+            async for chunk in orchestrator.process_request_stream("where is my order?", "conv-1")
+        ]
+
+        assert requests[0]["stream"] is True
+        types = [event["type"] for event in events]
+        assert types.index("token") < types.index("workflow_update")
+        assert types[-1] == "stage_timeline"
+        assert [event["delta"] for event in events if event["type"] == "token"] == [
+            "Your order", " shipped.", " It arrives", " on Friday.",
+        ]
+        assert [event["text"] for event in events if event["type"] == "sentence"] == [
+            "Your order shipped.", "It arrives on Friday.",
+        ]
+        response = events[types.index("workflow_update")]["data"]["response_generation"]["messages"][-1]
+        assert response["content"] == "Your order shipped. It arrives on Friday."
+        assert not orchestrator.turns
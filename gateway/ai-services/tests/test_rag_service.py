@@ -1,5 +1,7 @@
 """Tests for RAG Pipeline Service."""
 
+import asyncio
+
 import pytest
 from httpx import AsyncClient
 from unittest.mock import AsyncMock
@@ -15,6 +17,95 @@ async def client():
         yield ac
 
 
+class FakeVectorDB:
+    """In-memory stand-in for VectorDatabaseManager."""
+
+    def __init__(self):
+        self.points = {}
+
+    async def scroll(self, filter_conditions=None, with_vectors=False):
+        return [
+            {"id": point_id, "payload": payload, "vector": vector}
+            for point_id, (vector, payload) in self.points.items()
+            if all(payload.get(key) == value for key, value in (filter_conditions or {}).items())
+        ]
+
+    async def scroll_pages(self, page_size=2):
+        points = await self.scroll()
+        for i in range(0, len(points), page_size):
+            yield points[i:i + page_size]
+
+    async def count(self):
+        return len(self.points)
+
+    async def upsert_vectors(self, vectors, payloads, ids):
+        self.points.update({point_id: (v, p) for point_id, v, p in zip(ids, vectors, payloads)})
+
+    async def delete_vectors(self, ids):
+        for point_id in ids:
+            self.points.pop(point_id, None)
+
+
+class FakeMessage:
+    def __init__(self, data):
+        self.data = data
+        self.acked = False
+        self.nacked = False
+
+    async def ack(self):
+        self.acked = True
+
+    async def nak(self):
+        self.nacked = True
+
+
+class FakeSubscription:
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    @property
+    async def messages(self):
+        while True:
+            yield await self.queue.get()
+
+
+class FakeJetStream:
+    """In-process stand-in for a JetStream stream: retains messages and routes by subject."""
+
+    def __init__(self, subscribe_failures=0):
+        self.stream = []
+        self.subscriptions = {}
+        self.subscribe_failures = subscribe_failures
+
+    @staticmethod
+    def matches(pattern, subject):
+        pattern_tokens, tokens = pattern.split("."), subject.split(".")
+        if pattern_tokens[-1] == ">":
+            pattern_tokens = pattern_tokens[:-1]
+            tokens = tokens[:len(pattern_tokens)] if len(tokens) > len(pattern_tokens) else tokens + [None]
+        return len(tokens) == len(pattern_tokens) and all(
+            p in ("*", t) for p, t in zip(pattern_tokens, tokens)
+        )
+
+    async def subscribe(self, subject, durable=None, manual_ack=False):
+        if self.subscribe_failures:
+            self.subscribe_failures -= 1
+            raise RuntimeError("nats: no responders available for request")
+        subscription = self.subscriptions.setdefault(subject, FakeSubscription())
+        for stored_subject, message in self.stream:
+            if self.matches(subject, stored_subject):
+                await subscription.queue.put(message)
+        return subscription
+
+    async def publish(self, subject, data):
+        message = FakeMessage(data)
+        self.stream.append((subject, message))
+        for pattern, subscription in self.subscriptions.items():
+            if self.matches(pattern, subject):
+                await subscription.queue.put(message)
+        return message
+
+
 class TestRAGService:
     """Test RAG Pipeline Service."""
 
@@ -56,6 +147,19 @@ class TestRAGService:
         # May return 503 if services not initialized
         assert response.status_code in [200, 503]
 
+    @pytest.mark.asyncio
+    async def test_rag_context_query(self, client):
+        """Test retrieval-only RAG endpoint."""
+        request_data = {
+            "question": "What is the company policy?",
+            "top_k": 3,
+            "similarity_threshold": 0.7,
+        }
+        
+        response = await client.post("/rag/context", json=request_data)
+        # May return 503 if services not initialized
+        assert response.status_code in [200, 503]
+
     @pytest.mark.asyncio
     async def test_text_document_upload(self, client):
         """Test text document upload."""
@@ -79,10 +183,939 @@ class TestRAGService:
         response = await client.post("/embeddings", json=request_data)
         # May return 503 if services not initialized
         assert response.status_code in [200, 503]
+        if response.status_code == 200:
+            # Float lists unless the caller asks for a packed encoding, whatever VECTOR_PRECISION is
+            data = response.json()
+            assert data["encoding_format"] == "float"
+            assert isinstance(data["embeddings"][0], list)
 
     @pytest.mark.asyncio
     async def test_documents_list(self, client):
         """Test document listing endpoint."""
         response = await client.get("/documents")
         # May return 503 if services not initialized
-        assert response.status_code in [200, 503]
\ No newline at end of file
+        assert response.status_code in [200, 503]
+
+
+class TestEmbeddingCache:
+    """Test the two-tier embedding cache."""
+
+    def test_lru_evicts_least_recently_used_by_bytes(self):
+        """Test byte-budgeted LRU eviction."""
+        import numpy as np
+        from rag_service.embedding_cache import LRUEmbeddingCache
+
+        cache = LRUEmbeddingCache(max_bytes=3 * 4 * 4)  # three 4-dim float32 vectors
+        for key in ("a", "b", "c"):
+            cache.put(key, np.ones(4))
+        
+        cache.get("a")  # "b" becomes least recently used
+        cache.put("d", np.ones(4))
+        
+        assert "a" in cache
+        assert "b" not in cache
+        assert cache.current_bytes == 3 * 4 * 4
+        assert cache.evictions == 1
+
+    @pytest.mark.asyncio
+    async def test_tiered_cache_promotes_shared_hits(self):
+        """Test that shared-tier hits are promoted into memory."""
+        import numpy as np
+        from rag_service.embedding_cache import LRUEmbeddingCache, TieredEmbeddingCache
+
+        class InMemoryStore:
+            def __init__(self):
+                self.data = {}
+
+            async def get_many(self, keys):
+                return [self.data.get(key) for key in keys]
+
+            async def set_many(self, items):
+                self.data.update(items)
+
+        shared = InMemoryStore()
+        await TieredEmbeddingCache(LRUEmbeddingCache(), shared).set_many(
+            {"x": np.arange(4, dtype=np.float32)}
+        )
+        
+        cache = TieredEmbeddingCache(LRUEmbeddingCache(), shared)
+        first = await cache.get_many(["x", "y"])
+        second = await cache.get_many(["x"])
+        
+        assert first[0].tolist() == [0.0, 1.0, 2.0, 3.0]
+        assert first[1] is None
+        assert second[0] is not None
+        
+        stats = cache.get_stats()
+        assert stats["shared_hits"] == 1
+        assert stats["memory_hits"] == 1
+        assert stats["cache_misses"] == 1
+        assert stats["memory_bytes"] == 16
+
+    @pytest.mark.asyncio
+    async def test_float16_storage_and_wire_encoding(self, tmp_path):
+        """Test float16 tiers halve stored bytes and round-trip as float32."""
+        import numpy as np
+        from rag_service.embedding_cache import (
+            DiskEmbeddingStore, LRUEmbeddingCache, decode_embeddings, encode_embeddings,
+        )
+
+        vector = np.linspace(-1, 1, 8, dtype=np.float32)
+        memory = LRUEmbeddingCache(dtype="float16")
+        memory.put("a", vector)
+        disk = DiskEmbeddingStore(str(tmp_path), dtype="float16")
+        await disk.set_many({"a": vector})
+        (from_disk,) = await disk.get_many(["a"])
+
+        assert memory.current_bytes == 16
+        assert memory.get("a").dtype == np.float32
+        np.testing.assert_allclose(memory.get("a"), vector, atol=1e-3)
+        np.testing.assert_allclose(from_disk, vector, atol=1e-3)
+
+        payload = encode_embeddings([vector, -vector], dtype="float16")
+        assert payload["shape"] == [2, 8]
+        np.testing.assert_allclose(decode_embeddings(payload), [vector, -vector], atol=1e-3)
+
+
+class TestQuantization:
+    """Test int8 quantized collections."""
+
+    @pytest.mark.asyncio
+    async def test_enabling_int8_on_existing_collection_moves_originals_to_disk(self):
+        """Test an existing collection gets int8 copies in RAM and its float32 originals on disk."""
+        from types import SimpleNamespace
+        from shared.database import VectorDatabaseManager
+
+        config = SimpleNamespace(
+            host="localhost", port=6333, api_key=None, collection_name="documents", embedding_dim=4,
+            quantization="int8", quantization_quantile=0.99,
+        )
+        vector_db = VectorDatabaseManager(config)
+        vector_db.client = AsyncMock()
+        vector_db.client.get_collections.return_value = SimpleNamespace(
+            collections=[SimpleNamespace(name="documents")]
+        )
+
+        await vector_db.create_collection()
+
+        kwargs = vector_db.client.update_collection.await_args.kwargs
+        assert kwargs["vectors_config"][""].on_disk is True
+        assert kwargs["quantization_config"].scalar.always_ram is True
+        vector_db.client.create_collection.assert_not_awaited()
+
+
+class TestSparseIndex:
+    """Test the persistent BM25 inverted index."""
+
+    def test_ranks_by_bm25_and_honours_deletes(self):
+        """Test rare terms outrank common ones and deleted chunks disappear."""
+        from rag_service.sparse_index import InvertedIndex
+
+        index = InvertedIndex()
+        index.add_document("a", "invoice payment overdue invoice")
+        index.add_document("b", "customer invoice archived")
+        index.add_document("c", "customer meeting notes")
+        
+        results = index.search("overdue invoice", top_k=3)
+        assert [doc_id for doc_id, _ in results] == ["a", "b"]
+        assert 0 < results[1][1] < results[0][1] <= 1.0
+        
+        index.remove_document("a")
+        assert [doc_id for doc_id, _ in index.search("overdue invoice")] == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_flush_and_reload_from_disk(self, tmp_path):
+        """Test flushed segments are memory-mapped back with the same results."""
+        from rag_service.sparse_index import InvertedIndex
+
+        index = InvertedIndex(str(tmp_path))
+        for i in range(50):
+            index.add_document(f"doc_{i}", f"shipment {i} warehouse report " + "delay " * (i % 3))
+        index.remove_document("doc_1")
+        before_flush = index.search("warehouse delay", top_k=5)
+        
+        await index.flush()
+        expected = index.search("warehouse delay", top_k=5)
+        assert [doc_id for doc_id, _ in expected] == [doc_id for doc_id, _ in before_flush]
+        assert "doc_1" not in dict(expected)
+        
+        reloaded = InvertedIndex(str(tmp_path))
+        reloaded.load()
+        assert len(reloaded) == 49
+        assert reloaded.search("warehouse delay", top_k=5) == expected
+
+    @pytest.mark.asyncio
+    async def test_flush_compacts_ordinals_of_replaced_and_deleted_documents(self, tmp_path):
+        """Test re-adds and deletes don't grow the doc table or the manifest."""
+        import json
+        from rag_service.sparse_index import InvertedIndex
+
+        index = InvertedIndex(str(tmp_path))
+        for version in range(5):
+            for i in range(20):
+                index.add_document(f"doc_{i}", f"order {i} status revision{version}")
+        index.remove_document("doc_0")
+        
+        flush = asyncio.create_task(index.flush())
+        await asyncio.sleep(0)  # merge running in its worker thread
+        index.add_document("doc_20", "order late status")
+        index.remove_document("doc_1")
+        await flush
+        
+        assert index.get_stats()["tombstones"] == 1  # doc_1, deleted mid-merge
+        assert [doc_id for doc_id, _ in index.search("late order", top_k=3)][0] == "doc_20"
+        assert "doc_1" not in dict(index.search("order status", top_k=30))
+        
+        await index.flush()
+        manifest = json.loads((tmp_path / "manifest.json").read_text())
+        assert len(manifest["doc_ids"]) == len(index) == 19
+        assert None not in manifest["doc_ids"]
+        
+        reloaded = InvertedIndex(str(tmp_path))
+        reloaded.load()
+        assert reloaded.search("order revision4", top_k=30) == index.search("order revision4", top_k=30)
+        assert reloaded.search("revision3") == []
+
+    @pytest.mark.asyncio
+    async def test_unflushed_changes_trigger_rebuild_from_vectors(self, tmp_path):
+        """Test a crash with unflushed changes marks the index stale and startup rebuilds it."""
+        from rag_service.indexing_manager import IndexingManager
+        from rag_service.sparse_index import InvertedIndex
+
+        index = InvertedIndex(str(tmp_path))
+        index.add_document("chunk_0", "quarterly revenue report")
+        await index.flush()
+        index.add_document("chunk_1", "warehouse shipment delay")  # lost in the crash
+
+        crashed = InvertedIndex(str(tmp_path))
+        crashed.load()
+        assert crashed.stale and len(crashed) == 1
+
+        vector_db = FakeVectorDB()
+        await vector_db.upsert_vectors(
+            [[0.0]] * 3,
+            [{"content": text} for text in ("quarterly revenue report", "warehouse shipment delay", "customer renewal notes")],
+            ids=["chunk_0", "chunk_1", "chunk_2"],
+        )
+        manager = IndexingManager(vector_db, AsyncMock(), None, AsyncMock(), sparse_index=crashed)
+        await manager._ensure_sparse_index()
+        assert not crashed.stale and len(crashed) == 3
+        assert [doc_id for doc_id, _ in crashed.search("shipment delay")] == ["chunk_1"]
+
+        restarted = InvertedIndex(str(tmp_path))
+        restarted.load()
+        assert not restarted.stale and len(restarted) == 3
+
+
+class TestStreamingSync:
+    """Test the keyset-paginated batch sync pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_sync_bounds_inflight_batches_and_checkpoints(self):
+        """Test batches are throttled by in-flight limit and the checkpoint tracks completed keys."""
+        from types import SimpleNamespace
+        from rag_service.batch_processor import BatchJob, BatchJobType, BatchProcessor, DataSourceConfig
+        from rag_service.indexing_manager import IndexingStatus
+
+        class FakeIndexingManager:
+            def __init__(self):
+                self.jobs = {}
+                self.max_pending = 0
+
+            async def index_documents_bulk(self, documents):
+                job_id = f"job-{len(self.jobs)}"
+                self.jobs[job_id] = SimpleNamespace(status=IndexingStatus.PROCESSING, failure_count=0, polls=0)
+                pending = sum(1 for job in self.jobs.values() if job.status == IndexingStatus.PROCESSING)
+                self.max_pending = max(self.max_pending, pending)
+                return job_id
+
+            async def get_job_status(self, job_id):
+                job = self.jobs[job_id]
+                job.polls += 1
+                if job.polls >= 2:
+                    job.status = IndexingStatus.COMPLETED
+                return job
+
+            async def get_queue_depth(self):
+                return 0
+
+        indexing_manager = FakeIndexingManager()
+        processor = BatchProcessor(
+            indexing_manager, None, None, AsyncMock(), None, max_inflight_batches=2, poll_interval=0
+        )
+        source = DataSourceConfig(
+            name="crm", type="crm", connection_params={}, sync_frequency="daily",
+            incremental_field="updated_at", batch_size=10,
+        )
+        rows = [{"id": i, "name": f"contact {i}"} for i in range(1, 46)]
+
+        async def stream_records(source_config, key_columns, since=None, after=None):
+            start = after[0] if after else 0
+            remaining = [row for row in rows if row["id"] > start]
+            for i in range(0, len(remaining), source_config.batch_size):
+                yield remaining[i:i + source_config.batch_size]
+
+        async def count_records(source_config, since, key_columns, after):
+            return sum(1 for row in rows if row["id"] > (after[0] if after else 0))
+
+        processor._stream_records = stream_records
+        processor._count_records = count_records
+        job = BatchJob(id="sync", job_type=BatchJobType.FULL_SYNC, source_system="crm", scheduled_time=None)
+
+        await processor._run_sync(job, source, key_columns=["id"])
+
+        assert indexing_manager.max_pending <= 2
+        assert len(indexing_manager.jobs) == 5
+        assert job.processed_records == job.total_records == 45
+        assert job.checkpoint["last_key"] == [45]
+
+    @pytest.mark.asyncio
+    async def test_keyset_pages_resume_after_last_key_with_session_closed(self, tmp_path):
+        """Test keyset SQL pages through a real database and no session is open while batches are consumed."""
+        from contextlib import asynccontextmanager
+        from sqlalchemy import text
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from rag_service.batch_processor import BatchProcessor, DataSourceConfig
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/crm.db")
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        open_sessions = 0
+
+        class Database:
+            @asynccontextmanager
+            async def get_session(self):
+                nonlocal open_sessions
+                open_sessions += 1
+                try:
+                    async with session_factory() as session:
+                        yield session
+                        await session.commit()
+                finally:
+                    open_sessions -= 1
+
+        database_manager = Database()
+        async with database_manager.get_session() as session:
+            await session.execute(text("CREATE TABLE contacts (id INTEGER, updated_at TEXT, name TEXT)"))
+            for i in range(1, 24):
+                # Several rows share a timestamp, so paging must compare the full key
+                await session.execute(
+                    text("INSERT INTO contacts VALUES (:id, :updated_at, :name)"),
+                    {"id": i, "updated_at": f"2024-01-{i // 4 + 1:02d}", "name": f"contact {i}"},
+                )
+
+        processor = BatchProcessor(None, None, None, AsyncMock(), database_manager, page_batches=2)
+        source = DataSourceConfig(
+            name="crm", type="crm", connection_params={"table_name": "contacts"}, sync_frequency="daily",
+            incremental_field="updated_at", batch_size=3,
+        )
+        key_columns = ["updated_at", "id"]
+
+        async def stream(after=None):
+            batches = []
+            async for batch in processor._stream_records(source, key_columns, after=after):
+                assert open_sessions == 0
+                batches.append([row["id"] for row in batch])
+            return batches
+
+        try:
+            batches = await stream()
+            assert [record_id for batch in batches for record_id in batch] == list(range(1, 24))
+            assert all(len(batch) == 3 for batch in batches[:-1])
+
+            # Resume mid-timestamp: (2024-01-03, 9) is followed by id 10 on the same day
+            assert await processor._count_records(source, None, key_columns, ["2024-01-03", 9]) == 14
+            resumed = await stream(after=["2024-01-03", 9])
+            assert [record_id for batch in resumed for record_id in batch] == list(range(10, 24))
+        finally:
+            await engine.dispose()
+
+
+class TestChunkFingerprints:
+    """Test incremental reindexing with per-chunk content fingerprints."""
+
+    @pytest.mark.asyncio
+    async def test_reindex_embeds_only_changed_chunks(self):
+        """Test unchanged chunks are skipped and orphaned chunks deleted."""
+        from rag_service.document_processor import DocumentProcessor
+        from rag_service.indexing_manager import IndexingManager
+        from shared.models import Document
+
+        embedding_engine = AsyncMock()
+        embedding_engine.model_name = "test-model"
+        embedding_engine.encode_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+        vector_db = FakeVectorDB()
+        manager = IndexingManager(vector_db, embedding_engine, DocumentProcessor(chunk_size=4, chunk_overlap=0), AsyncMock())
+
+        async def index(content):
+            document = Document(id="crm_1", content=content)
+            processed = await manager.document_processor.process_document(document)
+            await manager._sync_chunks(document, processed, "worker-0")
+
+        await index("alpha beta gamma delta one two three four red green blue yellow")
+        await index("alpha beta gamma delta one two three four red green blue purple")
+        assert manager.stats["chunks_embedded"] == 4
+        assert manager.stats["chunks_skipped"] == 2
+
+        await index("alpha beta gamma delta one two three four")
+        assert manager.stats["chunks_embedded"] == 4
+        assert manager.stats["chunks_deleted"] == 1
+        assert sorted(vector_db.points) == ["crm_1_0", "crm_1_1"]
+
+
+class TestCDCConsumer:
+    """Test event-driven indexing from CRM/ERP domain events."""
+
+    @pytest.mark.asyncio
+    async def test_bursts_are_coalesced_and_deletes_applied(self):
+        """Test a burst of updates indexes each entity once and a delete removes it."""
+        import asyncio
+        import json
+        from datetime import datetime
+        from rag_service.cdc_consumer import CDCConsumer
+        from rag_service.document_processor import DocumentProcessor
+        from rag_service.indexing_manager import IndexingManager
+        from shared.events import EventSubscriber, event_subject
+
+        jetstream = FakeJetStream()
+        embedding_engine = AsyncMock()
+        embedding_engine.model_name = "test-model"
+        embedding_engine.encode_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+        redis_manager = AsyncMock()
+        redis_manager.hget.return_value = None
+        vector_db = FakeVectorDB()
+        manager = IndexingManager(vector_db, embedding_engine, DocumentProcessor(), redis_manager)
+        consumer = CDCConsumer(
+            manager,
+            EventSubscriber([], "rag-service", jetstream=jetstream),
+            coalesce_window=0.05,
+        )
+        await consumer.start()
+
+        async def publish(event_type, data, entity_id):
+            event = {
+                "event_id": f"evt-{entity_id}-{event_type}",
+                "event_type": event_type,
+                "service": "crm-service",
+                "timestamp": datetime.utcnow().isoformat(),
+                "data": data,
+                "metadata": {"entity_id": entity_id},
+            }
+            subject = event_subject("crm-service", event_type)
+            assert jetstream.matches("crm.>", subject)
+            return await jetstream.publish(subject, json.dumps(event).encode())
+
+        async def wait_for_acks(messages):
+            for _ in range(200):
+                if all(message.acked for message in messages):
+                    return
+                await asyncio.sleep(0.01)
+            raise AssertionError("messages were not acked")
+
+        try:
+            messages = [
+                await publish("contact.updated", {"contact": {"id": 7, "name": f"Ada v{i}"}}, 7)
+                for i in range(5)
+            ]
+            messages.append(await publish("contact.created", {"contact": {"id": 8, "name": "Grace"}}, 8))
+            await wait_for_acks(messages)
+
+            assert embedding_engine.encode_documents.await_count == 1
+            assert consumer.stats["events_coalesced"] == 4
+            assert consumer.stats["documents_indexed"] == 2
+            contents = {payload["document_id"]: payload["content"] for _, payload in vector_db.points.values()}
+            assert set(contents) == {"crm_contact_7", "crm_contact_8"}
+            assert "Ada v4" in contents["crm_contact_7"]
+
+            await wait_for_acks([await publish("contact.deleted", {"contact_id": 7}, 7)])
+
+            assert {payload["document_id"] for _, payload in vector_db.points.values()} == {"crm_contact_8"}
+            assert consumer.stats["documents_deleted"] == 1
+        finally:
+            await consumer.stop()
+
+    @pytest.mark.asyncio
+    async def test_stale_redeliveries_dropped_and_failures_nacked(self):
+        """Test subscribe retries show in health, older redeliveries never overwrite newer state and handler errors nak."""
+        import json
+        from datetime import datetime, timedelta
+        from rag_service.batch_processor import DataSourceConfig
+        from rag_service.cdc_consumer import CDCConsumer
+        from rag_service.document_processor import DocumentProcessor
+        from rag_service.indexing_manager import IndexingManager
+        from shared.events import EventSubscriber
+
+        jetstream = FakeJetStream(subscribe_failures=1)
+        embedding_engine = AsyncMock()
+        embedding_engine.model_name = "test-model"
+        embedding_engine.encode_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+        redis_manager = AsyncMock()
+        redis_manager.hget.return_value = None
+        vector_db = FakeVectorDB()
+        manager = IndexingManager(vector_db, embedding_engine, DocumentProcessor(), redis_manager)
+        contacts = DataSourceConfig(
+            name="crm_contacts", type="crm", connection_params={"record_type": "contact"},
+            sync_frequency="daily", incremental_field="updated_at",
+        )
+        consumer = CDCConsumer(
+            manager,
+            EventSubscriber([], "rag-service", jetstream=jetstream, retry_delay=0.01),
+            coalesce_window=0.01,
+            data_sources={contacts.name: contacts},
+            subjects=("crm.>",),
+        )
+        await consumer.start()
+
+        async def wait_for(condition):
+            for _ in range(200):
+                if condition():
+                    return
+                await asyncio.sleep(0.01)
+            raise AssertionError("condition not reached")
+
+        async def publish(name, timestamp, service="crm-service"):
+            event = {
+                "event_id": f"evt-{name}",
+                "event_type": "contact.updated",
+                "service": service,
+                "timestamp": timestamp.isoformat(),
+                "data": {"contact": {"id": 7, "name": name}},
+                "metadata": {"entity_id": 7},
+            }
+            return await jetstream.publish("crm.contact_updated", json.dumps(event).encode())
+
+        try:
+            assert not consumer.health_check()
+            await wait_for(consumer.health_check)
+            assert consumer.subscriber.stats["subscribe_failures"] == 1
+
+            now = datetime.utcnow()
+            newer = await publish("Ada v2", now)
+            await wait_for(lambda: newer.acked)
+            redelivered = await publish("Ada v1", now - timedelta(seconds=5))
+            await wait_for(lambda: redelivered.acked)
+
+            contents = {payload["document_id"]: payload["content"] for _, payload in vector_db.points.values()}
+            assert set(contents) == {"crm_contacts_7"}
+            assert "Ada v2" in contents["crm_contacts_7"]
+            assert consumer.stats["events_stale"] == 1
+
+            broken = await publish("Ada v3", now, service=None)
+            await wait_for(lambda: broken.nacked)
+            assert not broken.acked
+        finally:
+            await consumer.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_delete_is_nacked_and_missing_document_acked(self):
+        """Test a vector DB delete failure naks the event, while deleting an unknown entity acks."""
+        import json
+        from datetime import datetime
+        from rag_service.cdc_consumer import CDCConsumer
+        from rag_service.document_processor import DocumentProcessor
+        from rag_service.indexing_manager import IndexingManager
+        from shared.events import EventSubscriber
+
+        jetstream = FakeJetStream()
+        embedding_engine = AsyncMock()
+        embedding_engine.model_name = "test-model"
+        embedding_engine.encode_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+        redis_manager = AsyncMock()
+        redis_manager.hget.return_value = None
+        vector_db = FakeVectorDB()
+        manager = IndexingManager(vector_db, embedding_engine, DocumentProcessor(), redis_manager)
+        consumer = CDCConsumer(
+            manager,
+            EventSubscriber([], "rag-service", jetstream=jetstream),
+            coalesce_window=0.01,
+            subjects=("crm.>",),
+        )
+        await consumer.start()
+
+        async def wait_for(condition):
+            for _ in range(200):
+                if condition():
+                    return
+                await asyncio.sleep(0.01)
+            raise AssertionError("condition not reached")
+
+        async def publish(event_type, data, entity_id):
+            event = {
+                "event_id": f"evt-{entity_id}-{event_type}",
+                "event_type": event_type,
+                "service": "crm-service",
+                "timestamp": datetime.utcnow().isoformat(),
+                "data": data,
+                "metadata": {"entity_id": entity_id},
+            }
+            return await jetstream.publish(f"crm.{event_type.replace('.', '_')}", json.dumps(event).encode())
+
+        async def unavailable(ids):
+            raise RuntimeError("qdrant unavailable")
+
+        try:
+            created = await publish("contact.created", {"contact": {"id": 7, "name": "Ada"}}, 7)
+            await wait_for(lambda: created.acked)
+
+            vector_db.delete_vectors = unavailable
+            deleted = await publish("contact.deleted", {"contact_id": 7}, 7)
+            await wait_for(lambda: deleted.nacked)
+            assert not deleted.acked
+            assert consumer.stats["documents_deleted"] == 0
+            assert consumer.stats["failed_batches"] == 1
+            assert {payload["document_id"] for _, payload in vector_db.points.values()} == {"crm_contact_7"}
+
+            del vector_db.delete_vectors
+            redelivered = await publish("contact.deleted", {"contact_id": 7}, 7)
+            unknown = await publish("contact.deleted", {"contact_id": 99}, 99)
+            await wait_for(lambda: redelivered.acked and unknown.acked)
+            assert not vector_db.points
+        finally:
+            await consumer.stop()
+
+
+class TestEmbeddingCoalescer:
+    """Test cross-document embedding micro-batching."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_documents_share_one_embedding_call(self):
+        """Test chunks from concurrently indexed documents are embedded and upserted together."""
+        import asyncio
+        from rag_service.document_processor import DocumentProcessor
+        from rag_service.indexing_manager import IndexingManager
+
+        vector_db = AsyncMock()
+        vector_db.scroll.return_value = []
+        embedding_engine = AsyncMock()
+        embedding_engine.model_name = "test-model"
+        embedding_engine.encode_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+        manager = IndexingManager(
+            vector_db, embedding_engine, DocumentProcessor(), AsyncMock(),
+            embedding_batch_tokens=10_000, embedding_batch_wait=0.05,
+        )
+
+        await asyncio.gather(*(
+            manager._index_single_document({"id": f"crm_{i}", "content": f"contact {i} notes"}, "worker-0")
+            for i in range(20)
+        ))
+
+        assert manager.stats["indexed_documents"] == 20
+        assert embedding_engine.encode_documents.await_count == 1
+        assert len(embedding_engine.encode_documents.await_args.args[0]) == 20
+        assert vector_db.upsert_vectors.await_count == 1
+        assert manager.embedding_coalescer.get_stats()["flushes_on_deadline"] == 1
+
+        # A full budget flushes without waiting for the deadline
+        manager.embedding_coalescer.max_tokens = 6
+        manager.embedding_coalescer.max_wait = 60
+        await asyncio.gather(*(
+            manager._index_single_document({"id": f"erp_{i}", "content": f"product {i} sku"}, "worker-0")
+            for i in range(4)
+        ))
+        assert embedding_engine.encode_documents.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_inflight_versions_of_one_document_apply_in_order(self):
+        """Test two queued versions of a document are serialized, so the later one's diff sees the earlier one's chunks."""
+        from rag_service.document_processor import DocumentProcessor
+        from rag_service.indexing_manager import IndexingManager
+
+        vector_db = FakeVectorDB()
+        embedding_engine = AsyncMock()
+        embedding_engine.model_name = "test-model"
+        embedding_engine.encode_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+        manager = IndexingManager(
+            vector_db, embedding_engine, DocumentProcessor(chunk_size=4, chunk_overlap=0), AsyncMock(),
+            embedding_batch_tokens=10_000, embedding_batch_wait=0.01,
+        )
+
+        await asyncio.gather(
+            manager._index_single_document(
+                {"id": "crm_1", "content": "alpha beta gamma delta one two three four red green blue yellow"}, "worker-0"
+            ),
+            manager._index_single_document({"id": "crm_1", "content": "alpha beta gamma delta"}, "worker-1"),
+        )
+
+        assert sorted(vector_db.points) == ["crm_1_0"]
+        assert manager.stats["chunks_deleted"] == 2
+        assert not manager._document_locks
+
+
+class TestSemanticCache:
+    """Test the semantic query-result cache."""
+
+    @pytest.mark.asyncio
+    async def test_paraphrases_hit_and_reindex_invalidates(self):
+        """Test near-duplicate queries share an entry until a cited document changes."""
+        from rag_service.indexing_manager import IndexingManager
+        from rag_service.semantic_cache import SemanticCache
+
+        cache = SemanticCache(similarity_threshold=0.95, max_entries=2)
+        cache.store("rag", [1.0, 0.0, 0.0], {"answer": "3 open deals"}, ["crm_deal_1"])
+        cache.store("rag", [0.0, 1.0, 0.0], {"answer": "2 contacts"}, ["crm_contact_7"])
+
+        assert cache.lookup("rag", [0.99, 0.05, 0.0]) == {"answer": "3 open deals"}
+        assert cache.lookup("search", [0.99, 0.05, 0.0]) is None
+        assert cache.lookup("rag", [0.7, 0.7, 0.0]) is None
+
+        vector_db = AsyncMock()
+        vector_db.scroll.return_value = [{"id": "crm_deal_1_0", "payload": {}, "vector": None}]
+        manager = IndexingManager(vector_db, AsyncMock(), None, AsyncMock())
+        manager.add_change_listener(cache.invalidate_documents)
+        await manager.delete_document("crm_deal_1")
+
+        assert cache.lookup("rag", [1.0, 0.0, 0.0]) is None
+        assert cache.lookup("rag", [0.0, 1.0, 0.0]) == {"answer": "2 contacts"}
+
+        # A full cache evicts the least recently used entry
+        cache.store("rag", [0.0, 0.0, 1.0], {"answer": "1 order"}, ["erp_order_3"])
+        cache.store("rag", [1.0, 0.0, 0.0], {"answer": "4 open deals"}, ["crm_deal_1"])
+        assert len(cache) == 2
+        assert cache.lookup("rag", [0.0, 1.0, 0.0]) is None
+
+    @pytest.mark.asyncio
+    async def test_keyword_searches_bypass_the_semantic_cache(self, monkeypatch):
+        """Test sparse searches are neither embedded nor answered from a near-identical cached query."""
+        from rag_service import main
+        from rag_service.semantic_cache import SemanticCache
+        from shared.config import RAGServiceConfig
+        from shared.models import VectorSearchRequest, VectorSearchType
+
+        assert RAGServiceConfig.__fields__["semantic_cache_enabled"].default is False
+
+        cache = SemanticCache(similarity_threshold=0.95)
+        embedding_engine = AsyncMock()
+        embedding_engine.encode.return_value = [1.0, 0.0]
+        search_engine = AsyncMock()
+        search_engine.search.return_value = []
+        monkeypatch.setattr(main, "semantic_cache", cache)
+        monkeypatch.setattr(main, "embedding_engine", embedding_engine)
+        monkeypatch.setattr(main, "search_engine", search_engine)
+        monkeypatch.setattr(main, "cache_store", None)
+
+        keyword = VectorSearchRequest(query="invoice 10243", search_type=VectorSearchType.SPARSE)
+        hybrid = VectorSearchRequest(query="invoice 10243")
+        cached = {"query": "invoice 10234", "results": [], "total_results": 0, "processing_time": 0.0}
+        for request in (keyword, hybrid):
+            cache.store(main._search_partition(request), [1.0, 0.0], cached, [])
+
+        await main.search_documents(keyword)
+        assert embedding_engine.encode.await_count == 0
+        assert search_engine.search.await_count == 1
+
+        await main.search_documents(hybrid)
+        assert embedding_engine.encode.await_count == 1
+        assert search_engine.search.await_count == 1
+
+
+class TestSearchDeadlines:
+    """Test per-stage latency budgets in hybrid search."""
+
+    @pytest.mark.asyncio
+    async def test_slow_sparse_stage_returns_dense_only(self):
+        """Test an overrunning sparse stage degrades to partial dense results."""
+        import asyncio
+        from rag_service.search_engine import HybridSearchEngine, SearchDeadlines
+        from rag_service.sparse_index import InvertedIndex
+
+        async def slow_retrieve(ids):
+            await asyncio.sleep(1.0)
+            return [{"id": doc_id, "payload": {"content": "late"}} for doc_id in ids]
+
+        vector_db = AsyncMock()
+        vector_db.search.return_value = [
+            {"id": "crm_deal_1_0", "score": 0.9, "payload": {"content": "open deal with Acme"}},
+        ]
+        vector_db.retrieve.side_effect = slow_retrieve
+        embedding_engine = AsyncMock()
+        embedding_engine.encode.return_value = [0.1, 0.2, 0.3]
+
+        sparse_index = InvertedIndex()
+        sparse_index.add_document("crm_deal_2_0", "open deal with Globex")
+        engine = HybridSearchEngine(vector_db, embedding_engine, sparse_index=sparse_index)
+
+        deadlines = SearchDeadlines(stage_budgets_ms={"sparse": 50}, total_budget_ms=500)
+        results = await engine.search("open deal", top_k=5, similarity_threshold=0.5, deadlines=deadlines)
+
+        assert [result.id for result in results] == ["crm_deal_1_0"]
+        assert results[0].metadata["fusion_type"] == "dense_only"
+        assert deadlines.partial and deadlines.overruns == ["sparse"]
+        assert {"embedding", "dense", "sparse"} <= set(deadlines.timings_ms)
+        assert deadlines.timings_ms["sparse"] < 500
+
+        with pytest.raises(ValueError):
+            SearchDeadlines(stage_budgets_ms={"rerank": 10})
+
+    @pytest.mark.asyncio
+    async def test_slow_bm25_scoring_is_cut_off_without_blocking_dense(self):
+        """Test CPU-bound sparse scoring runs off the loop, so its budget holds and dense results return."""
+        import time
+        from rag_service.search_engine import HybridSearchEngine, SearchDeadlines
+        from rag_service.sparse_index import InvertedIndex
+
+        class SlowIndex(InvertedIndex):
+            def search_batch(self, queries):
+                time.sleep(0.3)  # stands in for NumPy scoring over a large index
+                return super().search_batch(queries)
+
+        vector_db = AsyncMock()
+        vector_db.search.return_value = [
+            {"id": "crm_deal_1_0", "score": 0.9, "payload": {"content": "open deal with Acme"}},
+        ]
+        embedding_engine = AsyncMock()
+        embedding_engine.encode.return_value = [0.1, 0.2, 0.3]
+
+        sparse_index = SlowIndex()
+        sparse_index.add_document("crm_deal_2_0", "open deal with Globex")
+        engine = HybridSearchEngine(vector_db, embedding_engine, sparse_index=sparse_index)
+
+        deadlines = SearchDeadlines(stage_budgets_ms={"sparse": 80, "embedding": 50})
+        results = await engine.search("open deal", top_k=5, similarity_threshold=0.5, deadlines=deadlines)
+
+        assert [result.id for result in results] == ["crm_deal_1_0"]
+        assert results[0].metadata["fusion_type"] == "dense_only"
+        assert deadlines.partial and deadlines.overruns == ["sparse"]
+        assert deadlines.timings_ms["sparse"] < 200
+        assert deadlines.timings_ms["embedding"] < 50
+
+    @pytest.mark.asyncio
+    async def test_failed_dense_stage_marks_results_partial(self):
+        """Test a dense search error falls back to sparse results flagged as partial."""
+        from rag_service.search_engine import HybridSearchEngine, SearchDeadlines
+        from rag_service.sparse_index import InvertedIndex
+
+        vector_db = AsyncMock()
+        vector_db.search.side_effect = ConnectionError("qdrant unavailable")
+        vector_db.retrieve.return_value = [{"id": "crm_deal_2_0", "payload": {"content": "open deal with Globex"}}]
+        embedding_engine = AsyncMock()
+        embedding_engine.encode.return_value = [0.1, 0.2, 0.3]
+
+        sparse_index = InvertedIndex()
+        sparse_index.add_document("crm_deal_2_0", "open deal with Globex")
+        engine = HybridSearchEngine(vector_db, embedding_engine, sparse_index=sparse_index)
+
+        deadlines = SearchDeadlines()
+        results = await engine.search("open deal", top_k=5, similarity_threshold=0.5, deadlines=deadlines)
+
+        assert [result.id for result in results] == ["crm_deal_2_0"]
+        assert results[0].metadata["fusion_type"] == "sparse_only"
+        assert deadlines.partial and deadlines.failures == ["dense"] and not deadlines.overruns
+
+
+class TestBatchSearch:
+    """Test multi-query search."""
+
+    @pytest.mark.asyncio
+    async def test_one_embedding_pass_and_round_trip_for_all_queries(self):
+        """Test a batch encodes once, searches Qdrant once and keeps per-query results."""
+        from shared.models import VectorSearchRequest, VectorSearchType
+        from rag_service.search_engine import HybridSearchEngine
+        from rag_service.sparse_index import InvertedIndex
+
+        payloads = {
+            "crm_deal_1_0": {"content": "open deal with Acme", "document_id": "crm_deal_1"},
+            "erp_order_2_0": {"content": "Acme purchase order", "document_id": "erp_order_2"},
+        }
+        vector_db = AsyncMock()
+        vector_db.search_batch.return_value = [
+            [{"id": "crm_deal_1_0", "score": 0.9, "payload": payloads["crm_deal_1_0"]}],
+            [{"id": "erp_order_2_0", "score": 0.8, "payload": payloads["erp_order_2_0"]}],
+        ]
+        vector_db.retrieve.side_effect = lambda ids: [
+            {"id": doc_id, "payload": payloads[doc_id]} for doc_id in ids
+        ]
+        embedding_engine = AsyncMock()
+        embedding_engine.encode_batch.return_value = [[1.0, 0.0], [0.0, 1.0]]
+
+        sparse_index = InvertedIndex()
+        for doc_id, payload in payloads.items():
+            sparse_index.add_document(doc_id, payload["content"])
+        engine = HybridSearchEngine(vector_db, embedding_engine, sparse_index=sparse_index)
+
+        requests = [
+            VectorSearchRequest(query="open deal", top_k=2, similarity_threshold=0.5),
+            VectorSearchRequest(query="purchase order", top_k=2, search_type=VectorSearchType.DENSE),
+            VectorSearchRequest(
+                query="acme order", top_k=2, similarity_threshold=0.1, search_type=VectorSearchType.SPARSE
+            ),
+        ]
+        results = await engine.search_batch(requests)
+
+        embedding_engine.encode_batch.assert_awaited_once_with(["open deal", "purchase order"])
+        vector_db.search_batch.assert_awaited_once()
+        vector_db.retrieve.assert_called_once()
+        assert [[result.id for result in query_results] for query_results in results] == [
+            ["crm_deal_1_0"],
+            ["erp_order_2_0"],
+            ["erp_order_2_0"],
+        ]
+        assert results[0][0].metadata["fusion_type"] == "dense_sparse"
+
+
+class TestRAGContext:
+    """Test retrieval-only RAG passages."""
+
+    @pytest.mark.asyncio
+    async def test_passages_keep_full_content_and_citation_labels(self):
+        """Test citations are deduplicated and paired with their full passages."""
+        from shared.models import SearchResult
+        from rag_service import main
+        from rag_service.citation_generator import CitationGenerator
+
+        long_policy = "Returns are accepted within 30 days of delivery. " * 20
+        results = [
+            SearchResult(id="policy_0", content=long_policy, score=0.92, source="returns-policy.pdf"),
+            SearchResult(id="policy_0_copy", content=long_policy, score=0.9, source="returns-policy.pdf"),
+            SearchResult(id="faq_3", content="Enterprise customers get 60 days.", score=0.81, source="faq.md"),
+        ]
+        main.citation_generator = CitationGenerator()
+
+        passages = await main._cited_passages(results, "What is the return policy?")
+
+        assert [(passage.id, passage.citation_index) for passage in passages] == [("policy_0", 1), ("faq_3", 2)]
+        assert passages[0].citation == "[1] returns-policy.pdf"
+        # Snippets are shortened for display; the prompt gets the whole passage
+        assert passages[0].content == long_policy
+
+
+class TestTokenChunker:
+    """Test token-bounded, structure-preserving chunking."""
+
+    def test_chunks_fit_token_budget_on_sentence_and_record_boundaries(self):
+        """Test chunks stay within budget, end on boundaries and keep exact offsets."""
+        from shared.chunking import TokenChunker, estimate_token_offsets
+
+        text = (
+            "Ada Lovelace renewed the premium support contract. "
+            "Shipment WF-000123-EU was delayed at the Rotterdam hub!\n"
+            '[{"id": 1, "sku": "WFX2-00001"}, {"id": 2, "sku": "WFX2-00002"}]'
+        )
+        chunker = TokenChunker(max_tokens=20, overlap_tokens=0, batch_size=2)
+        chunks = chunker.chunk(text)
+
+        assert [chunk.text for chunk in chunks] == [
+            "Ada Lovelace renewed the premium support contract.",
+            "Shipment WF-000123-EU was delayed at the Rotterdam hub!",
+            '[{"id": 1, "sku": "WFX2-00001"},',
+            '{"id": 2, "sku": "WFX2-00002"}]',
+        ]
+        for chunk in chunks:
+            assert text[chunk.start:chunk.end] == chunk.text
+            assert chunk.token_count == len(estimate_token_offsets(chunk.text)) <= 20
+
+    @pytest.mark.asyncio
+    async def test_document_chunks_record_offsets_and_overlap(self):
+        """Test processed chunks carry token counts, source offsets and token overlap."""
+        from rag_service.document_processor import DocumentProcessor
+        from shared.models import Document
+
+        content = " ".join(f"Sentence number {i} mentions order {i}." for i in range(40))
+        processor = DocumentProcessor(chunk_size=32, chunk_overlap=8)
+        processed = await processor.process_document(Document(id="doc", content=content))
+
+        chunks = processed.chunks
+        assert len(chunks) > 1
+        for chunk in chunks:
+            metadata = chunk.metadata
+            assert metadata["token_count"] <= 32
+            assert content[metadata["start_char"]:metadata["end_char"]] == chunk.content
+        assert chunks[1].metadata["start_char"] < chunks[0].metadata["end_char"]
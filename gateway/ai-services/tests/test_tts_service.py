@@ -0,0 +1,376 @@
+"""Tests for TTS Service."""
+
+import asyncio
+import textwrap
+
+import pytest
+
+
+FAKE_PIPER = textwrap.dedent(
+    '''
+    """Stand-in for the piper package used by the worker process tests."""
+
+    import sys
+
+
+    class _Config:
+        sample_rate = 22050
+
+
+    class PiperVoice:
+        config = _Config()
+
+        @classmethod
+        def load(cls, model_path, config_path=None, use_cuda=False):
+            # Libraries that print while loading must not corrupt the frames
+            print("loading", model_path)
+            sys.stdout.flush()
+            return cls()
+
+        def synthesize_stream_raw(self, text, length_scale=None):
+            print("synthesizing", text)
+            if text == "fail":
+                raise RuntimeError("bad text")
+            for word in text.split():
+                yield word.encode("utf-8")
+    '''
+)
+
+
+@pytest.fixture
+def fake_piper(tmp_path, monkeypatch):
+    """Put a fake piper module on the worker processes' import path."""
+    (tmp_path / "piper.py").write_text(FAKE_PIPER)
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    return tmp_path
+
+
+class TestPiperWorkerPool:
+    """Test warm Piper worker processes and their pool."""
+
+    @pytest.mark.asyncio
+    async def test_worker_frames_survive_stray_prints(self, fake_piper):
+        """Test prints from piper go to stderr instead of the frame stream."""
+        from tts_service.piper_pool import PiperWorker
+
+        worker = PiperWorker(voice="en", model_path="model.onnx", request_timeout=10.0)
+        await worker.start(startup_timeout=30.0)
+        try:
+            assert worker.sample_rate == 22050
+            chunks = [chunk async for chunk in worker.synthesize_stream("hello there")]
+            assert chunks == [b"hello", b"there"]
+            assert not worker.in_utterance
+        finally:
+            await worker.stop()
+
+        assert not worker.alive
+
+    @pytest.mark.asyncio
+    async def test_worker_error_keeps_serving(self, fake_piper):
+        """Test a failed utterance is reported and the worker stays usable."""
+        from shared.exceptions import ModelInferenceError
+        from tts_service.piper_pool import PiperWorkerPool
+
+        pool = PiperWorkerPool(default_size=1, min_workers=0, startup_timeout=30.0)
+        try:
+            with pytest.raises(ModelInferenceError):
+                await pool.synthesize("en", "model.onnx", "fail")
+
+            audio, sample_rate = await pool.synthesize("en", "model.onnx", "still alive")
+            assert audio == b"stillalive"
+            assert sample_rate == 22050
+            assert pool.get_stats()["voices"]["en"]["spawned"] == 1
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_terminates_checked_out_workers(self, fake_piper):
+        """Test shutdown stops busy workers, not only idle ones."""
+        from tts_service.piper_pool import PiperWorkerPool
+
+        pool = PiperWorkerPool(default_size=2, min_workers=0, startup_timeout=30.0)
+        acquired = asyncio.Event()
+        release = asyncio.Event()
+        workers = []
+
+        async def hold_worker():
+            async with pool.acquire("en", "model.onnx") as worker:
+                workers.append(worker)
+                acquired.set()
+                await release.wait()
+
+        holder = asyncio.create_task(hold_worker())
+        await acquired.wait()
+        await pool.stop()
+
+        assert not workers[0].alive
+        release.set()
+        await holder
+
+    @pytest.mark.asyncio
+    async def test_model_change_retires_old_workers(self, fake_piper):
+        """Test a new model path for a voice stops the previous pool's workers."""
+        from tts_service.piper_pool import PiperWorkerPool
+
+        pool = PiperWorkerPool(default_size=1, min_workers=1, startup_timeout=30.0)
+        try:
+            await pool.prewarm("en", "old.onnx")
+            old_pool = pool._pools["en"]
+            old_worker = next(iter(old_pool.workers))
+
+            async with pool.acquire("en", "new.onnx") as worker:
+                assert worker.model_path == "new.onnx"
+
+            await asyncio.gather(*pool._background_tasks)
+            assert old_pool.retired
+            assert not old_worker.alive
+            assert old_pool.total == 0
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_crashed_worker_is_replaced(self, fake_piper):
+        """Test a worker killed between requests is replaced on the next one."""
+        from tts_service.piper_pool import PiperWorkerPool
+
+        pool = PiperWorkerPool(default_size=1, min_workers=0, startup_timeout=30.0)
+        try:
+            await pool.synthesize("en", "model.onnx", "one")
+            worker = next(iter(pool._pools["en"].workers))
+            worker.process.kill()
+            await worker.process.wait()
+
+            audio, _ = await pool.synthesize("en", "model.onnx", "two")
+            assert audio == b"two"
+            stats = pool.get_stats()["voices"]["en"]
+            assert stats["restarts"] == 1
+            assert stats["workers"] == 1
+        finally:
+            await pool.stop()
+
+
+class TestPipelinedStreaming:
+    """Test sentence-pipelined WAV streaming."""
+
+    def _engine(self, synthesize_pcm):
+        from unittest.mock import AsyncMock
+
+        from tts_service.piper_engine import PiperEngine
+
+        voice_manager = AsyncMock()
+        voice_manager.get_voice_model_path.return_value = "voice.onnx"
+        engine = PiperEngine(voice_manager=voice_manager, first_chunk_max_chars=10)
+        engine.is_initialized = True
+        engine._synthesize_pcm = synthesize_pcm
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_single_header_then_pcm_in_order(self):
+        """Test one streaming header is followed by every sentence's PCM."""
+        from tts_service.piper_engine import STREAMING_WAV_DATA_LENGTH
+
+        async def synthesize_pcm(text, **kwargs):
+            return text.encode("utf-8"), 16000
+
+        engine = self._engine(synthesize_pcm)
+        chunks = [
+            chunk
+            async for chunk in engine.synthesize_streaming(
+                "First sentence here. Second one.", voice="en", pipelined=True
+            )
+        ]
+
+        header = chunks[0]
+        assert header[:4] == b"RIFF"
+        assert int.from_bytes(header[24:28], "little") == 16000
+        assert int.from_bytes(header[40:44], "little") == STREAMING_WAV_DATA_LENGTH
+        segments = engine._split_for_streaming("First sentence here. Second one.")
+        assert len(segments) == 3  # long first sentence is cut for a fast first byte
+        assert b"".join(chunks[1:]) == "".join(segments).encode("utf-8")
+        assert engine.streaming_requests == 1
+
+    @pytest.mark.asyncio
+    async def test_next_sentence_synthesized_while_streaming(self):
+        """Test sentence N+1 is synthesized before sentence N is consumed."""
+        started = []
+
+        async def synthesize_pcm(text, **kwargs):
+            started.append(text)
+            return b"\x00\x00" * 4, 16000
+
+        engine = self._engine(synthesize_pcm)
+        stream = engine.synthesize_streaming("One. Two. Three.", voice="en", pipelined=True)
+
+        try:
+            await stream.__anext__()  # header
+            for _ in range(5):
+                await asyncio.sleep(0)
+            assert started == ["One", "Two", "Three"]
+        finally:
+            await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_failed_sentence_raises_instead_of_skipping(self):
+        """Test a sentence that fails mid-stream ends the stream with an error."""
+        from shared.exceptions import ModelInferenceError
+
+        async def synthesize_pcm(text, **kwargs):
+            if text == "Two":
+                raise RuntimeError("piper crashed")
+            return text.encode("utf-8"), 16000
+
+        engine = self._engine(synthesize_pcm)
+        received = []
+        with pytest.raises(ModelInferenceError, match="sentence 2 of 3"):
+            async for chunk in engine.synthesize_streaming(
+                "One. Two. Three.", voice="en", pipelined=True
+            ):
+                received.append(chunk)
+
+        assert b"".join(received[1:]) == b"One"
+
+
+class TestAudioCache:
+    """Test the two-tier synthesized audio cache."""
+
+    def _key(self, text):
+        from tts_service.audio_cache import audio_cache_key
+
+        return audio_cache_key(text, "en", 1.0, 1.0, 1.0, 22050, "wav")
+
+    @pytest.mark.asyncio
+    async def test_round_trip_survives_restart(self, tmp_path):
+        """Test entries are served from memory, then from disk after a reload."""
+        from tts_service.audio_cache import AudioCache
+
+        cache = AudioCache(disk_dir=str(tmp_path))
+        await cache.initialize()
+        key = self._key("hello")
+        await cache.put(key, b"RIFFaudio", {"duration": 0.5, "synthesis_time": 0.2})
+
+        assert await cache.get(key) == (b"RIFFaudio", {"duration": 0.5, "synthesis_time": 0.2})
+        assert cache.memory_hits == 1
+        await cache.close()
+
+        reloaded = AudioCache(disk_dir=str(tmp_path))
+        await reloaded.initialize()
+        audio, metadata = await reloaded.get(key)
+        assert audio == b"RIFFaudio"
+        assert metadata["duration"] == 0.5
+        assert reloaded.disk_hits == 1
+        assert await reloaded.get(self._key("other")) is None
+        await reloaded.close()
+
+    @pytest.mark.asyncio
+    async def test_memory_tier_evicts_least_recently_used(self):
+        """Test the memory tier stays under its byte budget, dropping LRU first."""
+        from tts_service.audio_cache import AudioCache
+
+        cache = AudioCache(memory_max_bytes=20)
+        await cache.put("a", b"x" * 8, {})
+        await cache.put("b", b"x" * 8, {})
+        await cache.get("a")
+        await cache.put("c", b"x" * 8, {})
+
+        assert await cache.get("a") is not None
+        assert await cache.get("b") is None
+        assert cache.memory_bytes <= 20
+
+    @pytest.mark.asyncio
+    async def test_disk_evicts_whole_lru_segments(self, tmp_path):
+        """Test disk eviction drops the least recently used closed segment."""
+        from tts_service.audio_cache import RECORD_HEADER, AudioCache
+
+        record = RECORD_HEADER.size + len(b"{}") + 100
+        cache = AudioCache(
+            memory_max_bytes=0,
+            disk_dir=str(tmp_path),
+            disk_max_bytes=record * 3,
+            segment_bytes=record,
+        )
+        await cache.initialize()
+        keys = [self._key(str(i)) for i in range(3)]
+        for key in keys:
+            await cache.put(key, b"a" * 100, {})
+        await cache.get(keys[0])  # segment 0 is now more recent than segment 1
+        await cache.put(self._key("3"), b"a" * 100, {})
+
+        assert await cache.get(keys[1]) is None
+        assert await cache.get(keys[0]) is not None
+        assert cache.disk.total_bytes <= record * 3
+        assert len(list(tmp_path.glob("*.seg"))) == 3
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_torn_tail_is_truncated_on_load(self, tmp_path):
+        """Test a partially written record is dropped and the segment reused."""
+        from tts_service.audio_cache import AudioCache
+
+        cache = AudioCache(disk_dir=str(tmp_path))
+        await cache.initialize()
+        await cache.put(self._key("kept"), b"k" * 50, {})
+        await cache.close()
+
+        segment = next(tmp_path.glob("*.seg"))
+        intact_size = segment.stat().st_size
+        with open(segment, "ab") as segment_file:
+            segment_file.write(b"TTSA" + b"\x00" * 10)  # crash mid-append
+
+        reloaded = AudioCache(disk_dir=str(tmp_path))
+        await reloaded.initialize()
+        assert segment.stat().st_size == intact_size
+        assert (await reloaded.get(self._key("kept")))[0] == b"k" * 50
+
+        await reloaded.put(self._key("next"), b"n" * 50, {})
+        reloaded._memory.clear()
+        assert (await reloaded.get(self._key("next")))[0] == b"n" * 50
+        await reloaded.close()
+
+    @pytest.mark.asyncio
+    async def test_damaged_record_is_dropped_not_served(self, tmp_path):
+        """Test a record overwritten on disk is detected on read and forgotten."""
+        from tts_service.audio_cache import AudioCache
+
+        cache = AudioCache(memory_max_bytes=0, disk_dir=str(tmp_path))
+        await cache.initialize()
+        key = self._key("damaged")
+        await cache.put(key, b"d" * 50, {"duration": 1.0})
+
+        segment = next(tmp_path.glob("*.seg"))
+        with open(segment, "r+b") as segment_file:
+            segment_file.write(b"XXXX")  # clobber the record magic
+
+        cache.disk.close()  # drop the stale mapping
+        assert await cache.get(key) is None
+        assert key not in cache.disk.index
+        assert cache.get_stats()["disk_corrupt_records"] == 1
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reads_during_eviction(self, tmp_path):
+        """Test reads racing puts that evict segments never fail or misread."""
+        from tts_service.audio_cache import RECORD_HEADER, AudioCache
+
+        record = RECORD_HEADER.size + len(b"{}") + 64
+        cache = AudioCache(
+            memory_max_bytes=0,
+            disk_dir=str(tmp_path),
+            disk_max_bytes=record * 4,
+            segment_bytes=record,
+        )
+        await cache.initialize()
+        payloads = {self._key(str(i)): bytes([i]) * 64 for i in range(40)}
+
+        async def reader():
+            for _ in range(5):
+                for key, payload in payloads.items():
+                    entry = await cache.get(key)
+                    assert entry is None or entry[0] == payload
+
+        async def writer():
+            for key, payload in payloads.items():
+                await cache.put(key, payload, {})
+
+        await asyncio.gather(writer(), reader(), reader())
+        assert cache.disk.corrupt_records == 0
+        await cache.close()
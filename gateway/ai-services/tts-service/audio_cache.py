@@ -0,0 +1,386 @@
+"""
+Content-addressed cache for synthesized audio.
+
+Entries are keyed by a hash of the normalized text and every parameter that
+changes the rendered audio. A byte-bounded in-memory LRU sits in front of an
+on-disk store made of append-only segment files that are read through mmap.
+Disk eviction drops whole least-recently-used segments, so no file is ever
+rewritten in place, and the index is rebuilt by scanning segments on startup.
+"""
+
+import asyncio
+import hashlib
+import json
+import mmap
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+from shared.utils import run_in_executor
+
+logger = structlog.get_logger(__name__)
+
+# magic, sha256 digest, metadata length, audio length
+RECORD_HEADER = struct.Struct("<4s32sII")
+RECORD_MAGIC = b"TTSA"
+SEGMENT_SUFFIX = ".seg"
+
+
+def audio_cache_key(
+    text: str,
+    voice: str,
+    speed: float,
+    pitch: float,
+    volume: float,
+    sample_rate: int,
+    format: str,
+) -> str:
+    """Build a content address for a synthesis request (text must already be normalized)."""
+    payload = json.dumps(
+        {
+            "text": text,
+            "voice": voice,
+            "speed": round(speed, 3),
+            "pitch": round(pitch, 3),
+            "volume": round(volume, 3),
+            "sample_rate": sample_rate,
+            "format": format,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _DiskEntry:
+    segment_id: int
+    offset: int  # start of the metadata block, just after the record header
+    meta_length: int
+    audio_length: int
+
+
+class _SegmentStore:
+    """Append-only segment files with mmap reads and segment-level LRU eviction.
+
+    Methods run on executor threads; a lock keeps reads from seeing an index
+    or mmap that a concurrent put/eviction is replacing.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, segment_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+
+        self.index: Dict[str, _DiskEntry] = {}
+        self.segment_sizes: Dict[int, int] = {}
+        self.segment_access: Dict[int, float] = {}
+        self._maps: Dict[int, Tuple[mmap.mmap, int]] = {}
+        self.active_segment = 0
+        self.evicted_segments = 0
+        self.corrupt_records = 0
+        self._lock = threading.RLock()
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(self.segment_sizes.values())
+
+    def load(self) -> None:
+        """Rebuild the index by scanning existing segment files."""
+        with self._lock:
+            self._load()
+
+    def get(self, digest: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        with self._lock:
+            return self._get(digest)
+
+    def put(self, digest: str, audio: bytes, metadata: Dict[str, Any]) -> None:
+        with self._lock:
+            self._put(digest, audio, metadata)
+
+    def close(self) -> None:
+        with self._lock:
+            for view, _ in self._maps.values():
+                view.close()
+            self._maps.clear()
+
+    def _load(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        for path in sorted(self.cache_dir.glob(f"*{SEGMENT_SUFFIX}")):
+            try:
+                segment_id = int(path.stem)
+            except ValueError:
+                continue
+            valid_length = self._scan_segment(segment_id, path)
+            if valid_length < path.stat().st_size:
+                # Drop a torn tail left by a crash mid-append
+                with open(path, "r+b") as segment_file:
+                    segment_file.truncate(valid_length)
+            self.segment_sizes[segment_id] = valid_length
+            self.segment_access[segment_id] = path.stat().st_mtime
+
+        if self.segment_sizes:
+            self.active_segment = max(self.segment_sizes)
+
+    def _get(self, digest: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        entry = self.index.get(digest)
+        if entry is None:
+            return None
+
+        view = self._map(entry.segment_id)
+        if view is None:
+            self.index.pop(digest, None)
+            return None
+
+        header_start = entry.offset - RECORD_HEADER.size
+        meta_end = entry.offset + entry.meta_length
+        try:
+            if meta_end + entry.audio_length > len(view):
+                raise ValueError("record extends past end of segment")
+            magic, stored_digest, meta_length, audio_length = RECORD_HEADER.unpack_from(
+                view, header_start
+            )
+            if (
+                magic != RECORD_MAGIC
+                or stored_digest.hex() != digest
+                or (meta_length, audio_length) != (entry.meta_length, entry.audio_length)
+            ):
+                raise ValueError("record header does not match index")
+            metadata = json.loads(view[entry.offset:meta_end])
+        except (ValueError, struct.error) as exc:
+            # Overwritten or damaged on disk; forget the record and resynthesize
+            self.index.pop(digest, None)
+            self.corrupt_records += 1
+            logger.warning("Dropping corrupt TTS cache record", segment=entry.segment_id, error=str(exc))
+            return None
+
+        audio = view[meta_end:meta_end + entry.audio_length]
+        self.segment_access[entry.segment_id] = time.time()
+        return audio, metadata
+
+    def _put(self, digest: str, audio: bytes, metadata: Dict[str, Any]) -> None:
+        if digest in self.index:
+            return
+
+        meta_bytes = json.dumps(metadata).encode("utf-8")
+        record_length = RECORD_HEADER.size + len(meta_bytes) + len(audio)
+        if record_length > self.max_bytes:
+            return
+
+        if self.segment_sizes.get(self.active_segment, 0) + record_length > self.segment_bytes:
+            if self.segment_sizes.get(self.active_segment, 0) > 0:
+                self.active_segment += 1
+
+        segment_id = self.active_segment
+        path = self._segment_path(segment_id)
+        with open(path, "ab") as segment_file:
+            start = segment_file.tell()
+            segment_file.write(
+                RECORD_HEADER.pack(RECORD_MAGIC, bytes.fromhex(digest), len(meta_bytes), len(audio))
+            )
+            segment_file.write(meta_bytes)
+            segment_file.write(audio)
+
+        self.index[digest] = _DiskEntry(
+            segment_id=segment_id,
+            offset=start + RECORD_HEADER.size,
+            meta_length=len(meta_bytes),
+            audio_length=len(audio),
+        )
+        self.segment_sizes[segment_id] = start + record_length
+        self.segment_access[segment_id] = time.time()
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and len(self.segment_sizes) > 1:
+            candidates = [
+                segment_id for segment_id in self.segment_sizes if segment_id != self.active_segment
+            ]
+            victim = min(candidates, key=lambda segment_id: self.segment_access.get(segment_id, 0.0))
+            self._drop_segment(victim)
+
+    def _drop_segment(self, segment_id: int) -> None:
+        mapped = self._maps.pop(segment_id, None)
+        if mapped:
+            mapped[0].close()
+
+        self.index = {
+            digest: entry for digest, entry in self.index.items() if entry.segment_id != segment_id
+        }
+        self.segment_sizes.pop(segment_id, None)
+        self.segment_access.pop(segment_id, None)
+        self._segment_path(segment_id).unlink(missing_ok=True)
+        self.evicted_segments += 1
+
+    def _map(self, segment_id: int) -> Optional[mmap.mmap]:
+        size = self.segment_sizes.get(segment_id, 0)
+        mapped = self._maps.get(segment_id)
+        if mapped and mapped[1] >= size:
+            return mapped[0]
+
+        # Segment grew since it was mapped (active segment); remap at the new size
+        if mapped:
+            mapped[0].close()
+        try:
+            with open(self._segment_path(segment_id), "rb") as segment_file:
+                view = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            self._maps.pop(segment_id, None)
+            return None
+
+        self._maps[segment_id] = (view, len(view))
+        return view
+
+    def _scan_segment(self, segment_id: int, path: Path) -> int:
+        offset = 0
+        with open(path, "rb") as segment_file:
+            data = segment_file.read()
+
+        while offset + RECORD_HEADER.size <= len(data):
+            magic, digest, meta_length, audio_length = RECORD_HEADER.unpack_from(data, offset)
+            end = offset + RECORD_HEADER.size + meta_length + audio_length
+            if magic != RECORD_MAGIC or end > len(data):
+                break
+            self.index[digest.hex()] = _DiskEntry(
+                segment_id=segment_id,
+                offset=offset + RECORD_HEADER.size,
+                meta_length=meta_length,
+                audio_length=audio_length,
+            )
+            offset = end
+        return offset
+
+    def _segment_path(self, segment_id: int) -> Path:
+        return self.cache_dir / f"{segment_id:08d}{SEGMENT_SUFFIX}"
+
+
+class AudioCache:
+    """Two-tier (memory + mmap'd disk segments) cache of synthesized audio."""
+
+    def __init__(
+        self,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+        segment_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.memory_max_bytes = memory_max_bytes
+        self._memory: "OrderedDict[str, Tuple[bytes, Dict[str, Any]]]" = OrderedDict()
+        self.memory_bytes = 0
+
+        self.disk: Optional[_SegmentStore] = None
+        if disk_dir:
+            self.disk = _SegmentStore(disk_dir, disk_max_bytes, segment_bytes)
+        self._disk_lock = asyncio.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.synthesis_seconds_saved = 0.0
+
+    async def initialize(self) -> None:
+        """Load the on-disk index."""
+        if self.disk:
+            await run_in_executor(self.disk.load)
+            logger.info(
+                "TTS audio cache loaded",
+                disk_entries=len(self.disk.index),
+                disk_bytes=self.disk.total_bytes,
+            )
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """Return (audio, metadata) for a key, promoting disk hits into memory."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            self._record_saving(entry)
+            return entry
+
+        if self.disk:
+            try:
+                entry = await run_in_executor(self.disk.get, key)
+            except Exception as exc:
+                logger.warning("TTS disk cache read failed", error=str(exc))
+                entry = None
+            if entry is not None:
+                self.disk_hits += 1
+                self._put_memory(key, entry)
+                self._record_saving(entry)
+                return entry
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, audio: bytes, metadata: Dict[str, Any]) -> None:
+        """Store audio in memory and append it to the disk store."""
+        if not audio:
+            return
+
+        entry = (bytes(audio), dict(metadata))
+        self._put_memory(key, entry)
+
+        if self.disk:
+            async with self._disk_lock:
+                try:
+                    await run_in_executor(self.disk.put, key, entry[0], entry[1])
+                except Exception as exc:
+                    logger.warning("TTS disk cache write failed", error=str(exc))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit ratio, bytes saved and tier sizes."""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": True,
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / max(lookups, 1),
+            "bytes_saved": self.bytes_saved,
+            "synthesis_seconds_saved": self.synthesis_seconds_saved,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self.memory_bytes,
+            "memory_max_bytes": self.memory_max_bytes,
+            "disk_entries": len(self.disk.index) if self.disk else 0,
+            "disk_bytes": self.disk.total_bytes if self.disk else 0,
+            "disk_max_bytes": self.disk.max_bytes if self.disk else 0,
+            "disk_segments": len(self.disk.segment_sizes) if self.disk else 0,
+            "disk_evicted_segments": self.disk.evicted_segments if self.disk else 0,
+            "disk_corrupt_records": self.disk.corrupt_records if self.disk else 0,
+        }
+
+    async def close(self) -> None:
+        if self.disk:
+            async with self._disk_lock:
+                await run_in_executor(self.disk.close)
+
+    def _put_memory(self, key: str, entry: Tuple[bytes, Dict[str, Any]]) -> None:
+        size = len(entry[0])
+        if size > self.memory_max_bytes:
+            return
+
+        existing = self._memory.pop(key, None)
+        if existing is not None:
+            self.memory_bytes -= len(existing[0])
+
+        self._memory[key] = entry
+        self.memory_bytes += size
+
+        while self.memory_bytes > self.memory_max_bytes and self._memory:
+            _, (evicted_audio, _) = self._memory.popitem(last=False)
+            self.memory_bytes -= len(evicted_audio)
+
+    def _record_saving(self, entry: Tuple[bytes, Dict[str, Any]]) -> None:
+        self.bytes_saved += len(entry[0])
+        self.synthesis_seconds_saved += entry[1].get("synthesis_time", 0.0)
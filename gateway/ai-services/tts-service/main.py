@@ -4,7 +4,7 @@ import asyncio
 import io
 import time
 from contextlib import asynccontextmanager
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import structlog
 import uvicorn
@@ -32,7 +32,9 @@ from shared.utils import (
     AsyncTimer,
 )
 
+from .audio_cache import AudioCache, audio_cache_key
 from .piper_engine import PiperEngine
+from .piper_pool import PiperWorkerPool
 from .voice_manager import VoiceManager
 
 logger = structlog.get_logger(__name__)
@@ -42,14 +44,18 @@ piper_engine: Optional[PiperEngine] = None
 voice_manager: Optional[VoiceManager] = None
 redis_client: Optional[RedisManager] = None
 cache_store: Optional[CacheStore] = None
+audio_cache: Optional[AudioCache] = None
 metrics: Optional[Metrics] = None
 health_checker = HealthChecker()
 
+# Chunk size used when replaying cached audio on the streaming endpoint
+STREAM_FRAME_BYTES = 4096
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
-    global piper_engine, voice_manager, redis_client, cache_store, metrics
+    global piper_engine, voice_manager, redis_client, cache_store, audio_cache, metrics
     
     # Initialize configuration and logging
     config = TTSServiceConfig()
@@ -68,6 +74,16 @@ async def lifespan(app: FastAPI):
         # Initialize cache store
         cache_store = CacheStore(redis_client, default_ttl=3600)  # Cache for 1 hour
         
+        # Initialize synthesized audio cache
+        if config.audio_cache_enabled:
+            audio_cache = AudioCache(
+                memory_max_bytes=config.audio_cache_memory_bytes,
+                disk_dir=config.audio_cache_dir,
+                disk_max_bytes=config.audio_cache_disk_bytes,
+                segment_bytes=config.audio_cache_segment_bytes,
+            )
+            await audio_cache.initialize()
+        
         # Initialize voice manager
         voice_manager = VoiceManager(
             models_dir=get_config().models.tts_model_path,
@@ -75,14 +91,33 @@ async def lifespan(app: FastAPI):
         )
         await voice_manager.initialize()
         
+        # Initialize warm Piper worker pool
+        worker_pool = None
+        if config.piper_pool_enabled:
+            worker_pool = PiperWorkerPool(
+                default_size=config.piper_pool_size,
+                voice_sizes=config.piper_pool_voice_sizes,
+                min_workers=config.piper_pool_min_workers,
+                idle_timeout=config.piper_pool_idle_timeout,
+            )
+        
         # Initialize Piper engine
         piper_engine = PiperEngine(
             voice_manager=voice_manager,
             sample_rate=config.sample_rate,
             cache_store=cache_store,
+            worker_pool=worker_pool,
+            ttfb_target_ms=config.streaming_ttfb_target_ms,
+            first_chunk_max_chars=config.streaming_first_chunk_chars,
         )
         await piper_engine.initialize()
         
+        # Load the default voice model before the first request
+        if worker_pool:
+            default_voice_path = await voice_manager.get_voice_model_path(config.default_voice)
+            if default_voice_path:
+                await worker_pool.prewarm(config.default_voice, default_voice_path)
+        
         # Setup health checks
         health_checker.add_check("redis", redis_client.health_check)
         health_checker.add_check("piper", piper_engine.health_check)
@@ -104,6 +139,9 @@ async def lifespan(app: FastAPI):
         if voice_manager:
             await voice_manager.cleanup()
         
+        if audio_cache:
+            await audio_cache.close()
+        
         if redis_client:
             await redis_client.close()
 
@@ -189,6 +227,89 @@ async def list_voices() -> VoicesResponse:
         raise HTTPException(status_code=500, detail=f"Failed to list voices: {str(exc)}")
 
 
+def _prepare_text(request: TTSRequest) -> str:
+    """Validate, clean and normalize request text for synthesis."""
+    cleaned_text = clean_and_validate_text(
+        request.text,
+        max_length=config.max_text_length,
+        min_length=1,
+    )
+    return preprocess_text_for_tts(cleaned_text)
+
+
+def _audio_cache_key(request: TTSRequest, preprocessed_text: str) -> str:
+    """Content address of the audio a request would produce."""
+    return audio_cache_key(
+        text=preprocessed_text,
+        voice=request.voice,
+        speed=request.speed,
+        pitch=request.pitch,
+        volume=request.volume,
+        sample_rate=request.sample_rate,
+        format=request.format.value,
+    )
+
+
+async def _synthesize_with_cache(request: TTSRequest) -> Tuple[bytes, Dict[str, Any], bool]:
+    """Synthesize audio, serving repeated requests from the audio cache.
+    
+    Returns the audio bytes, its metadata (sample_rate, duration) and whether
+    it was a cache hit.
+    """
+    preprocessed_text = _prepare_text(request)
+    
+    logger.info(
+        "Synthesizing speech",
+        text_length=len(preprocessed_text),
+        voice=request.voice,
+        language=request.language,
+    )
+    
+    cache_key = _audio_cache_key(request, preprocessed_text) if audio_cache else None
+    if cache_key:
+        cached = await audio_cache.get(cache_key)
+        if cached:
+            logger.info("Using cached TTS audio", cache_key=cache_key)
+            return cached[0], cached[1], True
+    
+    # Synthesize audio
+    async with AsyncTimer("tts_synthesis") as timer:
+        audio_result = await piper_engine.synthesize(
+            text=preprocessed_text,
+            voice=request.voice,
+            speed=request.speed,
+            pitch=request.pitch,
+            volume=request.volume,
+            format=request.format.value,
+            sample_rate=request.sample_rate,
+        )
+    
+    # Record metrics
+    if metrics:
+        metrics.record_inference(
+            model=request.voice,
+            duration=timer.elapsed,
+            input_tokens=len(preprocessed_text.split()),
+            output_tokens=0,  # Audio doesn't have output tokens
+        )
+        metrics.record_audio_processing(
+            operation="synthesis",
+            duration=timer.elapsed,
+            format=request.format.value,
+            success=True,
+        )
+    
+    metadata = {
+        "sample_rate": audio_result["sample_rate"],
+        "duration": audio_result["duration"],
+        "synthesis_time": timer.elapsed,
+    }
+    if cache_key:
+        await audio_cache.put(cache_key, audio_result["audio_data"], metadata)
+    
+    return audio_result["audio_data"], metadata, False
+
+
 @app.post("/synthesize", response_model=TTSResponse)
 async def synthesize_speech(request: TTSRequest) -> TTSResponse:
     """Synthesize speech from text."""
@@ -198,100 +319,22 @@ async def synthesize_speech(request: TTSRequest) -> TTSResponse:
         raise ModelInferenceError("Piper engine not initialized", "piper")
     
     try:
-        # Validate and clean text
-        cleaned_text = clean_and_validate_text(
-            request.text,
-            max_length=config.max_text_length,
-            min_length=1,
-        )
-        
-        # Preprocess text for better TTS
-        preprocessed_text = preprocess_text_for_tts(cleaned_text)
+        audio_data, metadata, cache_hit = await _synthesize_with_cache(request)
         
-        logger.info(
-            "Synthesizing speech",
-            text_length=len(preprocessed_text),
-            voice=request.voice,
-            language=request.language,
-        )
-        
-        # Check cache first
-        cache_key = cache_store.cache_key(
-            "tts",
-            request.voice,
-            str(request.speed),
-            str(request.pitch),
-            str(request.volume),
-            request.format.value,
-            preprocessed_text[:100]  # Use first 100 chars for cache key
-        ) if cache_store else None
-        
-        cached_result = None
-        if cache_key:
-            cached_result = await cache_store.get(cache_key)
-        
-        if cached_result:
-            logger.info("Using cached TTS result", cache_key=cache_key)
-            return TTSResponse(
-                audio_data=cached_result["audio_data"],
-                format=request.format,
-                sample_rate=cached_result["sample_rate"],
-                duration=cached_result["duration"],
-                processing_time=time.time() - start_time,
-            )
-        
-        # Synthesize audio
-        async with AsyncTimer("tts_synthesis") as timer:
-            audio_result = await piper_engine.synthesize(
-                text=preprocessed_text,
-                voice=request.voice,
-                speed=request.speed,
-                pitch=request.pitch,
-                volume=request.volume,
-                format=request.format.value,
-                sample_rate=request.sample_rate,
-            )
-        
-        # Record metrics
-        if metrics:
-            metrics.record_inference(
-                model=request.voice,
-                duration=timer.elapsed,
-                input_tokens=len(preprocessed_text.split()),
-                output_tokens=0,  # Audio doesn't have output tokens
-            )
-            metrics.record_audio_processing(
-                operation="synthesis",
-                duration=timer.elapsed,
-                format=request.format.value,
-                success=True,
-            )
-        
-        # Encode audio data
-        audio_data_b64 = encode_audio_base64(audio_result["audio_data"])
-        
-        # Build response
         response = TTSResponse(
-            audio_data=audio_data_b64,
+            audio_data=encode_audio_base64(audio_data),
             format=request.format,
-            sample_rate=audio_result["sample_rate"],
-            duration=audio_result["duration"],
+            sample_rate=metadata["sample_rate"],
+            duration=metadata["duration"],
             processing_time=time.time() - start_time,
         )
         
-        # Cache the result
-        if cache_key and cache_store:
-            await cache_store.set(cache_key, {
-                "audio_data": audio_data_b64,
-                "sample_rate": response.sample_rate,
-                "duration": response.duration,
-            }, ttl=1800)  # Cache for 30 minutes
-        
         logger.info(
             "Speech synthesis completed",
             duration=response.duration,
             processing_time=response.processing_time,
-            audio_size=len(audio_result["audio_data"]),
+            audio_size=len(audio_data),
+            cache_hit=cache_hit,
         )
         
         return response
@@ -306,16 +349,13 @@ async def synthesize_speech(request: TTSRequest) -> TTSResponse:
 @app.post("/synthesize-audio")
 async def synthesize_audio_direct(request: TTSRequest) -> Response:
     """Synthesize speech and return audio file directly."""
+    start_time = time.time()
+    
     if not piper_engine:
         raise ModelInferenceError("Piper engine not initialized", "piper")
     
     try:
-        # Get TTS response
-        tts_response = await synthesize_speech(request)
-        
-        # Decode base64 audio data
-        from shared.utils import decode_audio_base64
-        audio_data = decode_audio_base64(tts_response.audio_data)
+        audio_data, metadata, cache_hit = await _synthesize_with_cache(request)
         
         # Determine content type
         content_type_map = {
@@ -331,8 +371,9 @@ async def synthesize_audio_direct(request: TTSRequest) -> Response:
             media_type=content_type,
             headers={
                 "Content-Disposition": f"attachment; filename=synthesis.{request.format.value}",
-                "X-Processing-Time": str(tts_response.processing_time),
-                "X-Duration": str(tts_response.duration),
+                "X-Processing-Time": str(time.time() - start_time),
+                "X-Duration": str(metadata["duration"]),
+                "X-Cache": "HIT" if cache_hit else "MISS",
             },
         )
         
@@ -341,6 +382,24 @@ async def synthesize_audio_direct(request: TTSRequest) -> Response:
         raise HTTPException(status_code=500, detail=f"Audio synthesis failed: {str(exc)}")
 
 
+async def _cache_streamed_wav(cache_key: str, chunks: List[bytes], synthesis_time: float) -> None:
+    """Store a completed pipelined WAV stream as a regular WAV file."""
+    # The streamed header advertises an unknown length; rewrite it with the real one
+    header, pcm = chunks[0][:44], b"".join(chunks)[44:]
+    sample_rate = int.from_bytes(header[24:28], "little")
+    audio_data = piper_engine._create_wav_header(sample_rate, data_length=len(pcm)) + pcm
+    
+    await audio_cache.put(
+        cache_key,
+        audio_data,
+        {
+            "sample_rate": sample_rate,
+            "duration": len(pcm) / (sample_rate * 2),
+            "synthesis_time": synthesis_time,
+        },
+    )
+
+
 @app.post("/synthesize-stream")
 async def synthesize_stream(request: TTSRequest) -> StreamingResponse:
     """Stream synthesized speech as it's generated."""
@@ -357,20 +416,26 @@ async def synthesize_stream(request: TTSRequest) -> StreamingResponse:
         )
     
     try:
-        # Validate and clean text
-        cleaned_text = clean_and_validate_text(
-            request.text,
-            max_length=config.max_text_length,
-            min_length=1,
-        )
-        
-        # Preprocess text
-        preprocessed_text = preprocess_text_for_tts(cleaned_text)
+        preprocessed_text = _prepare_text(request)
         
         logger.info("Starting streaming TTS", text_length=len(preprocessed_text))
         
+        # WAV streams are sentence-pipelined: one header, then raw PCM frames
+        pipelined = request.format.value == "wav"
+        
+        cache_key = _audio_cache_key(request, preprocessed_text) if audio_cache else None
+        cached = await audio_cache.get(cache_key) if cache_key else None
+        
         # Create streaming generator
+        async def generate_cached_audio():
+            audio_data = cached[0]
+            for offset in range(0, len(audio_data), STREAM_FRAME_BYTES):
+                yield audio_data[offset:offset + STREAM_FRAME_BYTES]
+        
         async def generate_audio():
+            # Only a pipelined WAV stream is one well-formed file worth caching
+            captured: Optional[List[bytes]] = [] if cache_key and pipelined else None
+            start_time = time.time()
             try:
                 async for audio_chunk in piper_engine.synthesize_streaming(
                     text=preprocessed_text,
@@ -380,13 +445,23 @@ async def synthesize_stream(request: TTSRequest) -> StreamingResponse:
                     volume=request.volume,
                     format=request.format.value,
                     sample_rate=request.sample_rate,
+                    pipelined=pipelined,
                 ):
+                    if captured is not None:
+                        captured.append(audio_chunk)
                     yield audio_chunk
                     
             except Exception as exc:
                 logger.error("Streaming synthesis failed", error=str(exc))
                 # Yield error information
                 yield b"ERROR: Streaming synthesis failed"
+                return
+            
+            # Reached only when every sentence was synthesized: a failed sentence
+            # raises above, and truncated audio must never be cached (/synthesize
+            # would replay it too)
+            if captured:
+                await _cache_streamed_wav(cache_key, captured, time.time() - start_time)
         
         # Determine content type
         content_type_map = {
@@ -398,11 +473,13 @@ async def synthesize_stream(request: TTSRequest) -> StreamingResponse:
         content_type = content_type_map.get(request.format.value, "audio/wav")
         
         return StreamingResponse(
-            generate_audio(),
+            generate_cached_audio() if cached else generate_audio(),
             media_type=content_type,
             headers={
                 "Content-Disposition": f"attachment; filename=stream.{request.format.value}",
                 "Cache-Control": "no-cache",
+                "X-Stream-Mode": "cached" if cached else ("pipelined" if pipelined else "chunked"),
+                "X-Cache": "HIT" if cached else "MISS",
             },
         )
         
@@ -566,6 +643,9 @@ async def get_system_stats() -> Dict[str, Any]:
                 "default_ttl": cache_store.default_ttl,
             }
         
+        # Synthesized audio cache stats (hit ratio, bytes saved)
+        stats["audio_cache"] = audio_cache.get_stats() if audio_cache else {"enabled": False}
+        
         # Health check results
         health_result = await health_checker.check_health()
         stats["health"] = health_result
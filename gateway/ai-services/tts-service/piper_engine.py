@@ -3,19 +3,29 @@
 import asyncio
 import io
 import json
+import re
 import subprocess
 import tempfile
+import time
 import wave
+from collections import deque
 from pathlib import Path
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
 import structlog
 
 from shared.exceptions import ModelInferenceError
-from shared.utils import AsyncTimer, run_in_executor, chunk_text_by_tokens
+from shared.monitoring import get_metrics
+from shared.utils import AsyncTimer, run_in_executor, chunk_text_by_tokens, split_text_into_sentences
+
+from .piper_pool import PiperWorkerPool
 
 logger = structlog.get_logger(__name__)
 
+# Data length advertised in the single upfront header of a streamed WAV;
+# players read until EOF when the real length is unknown.
+STREAMING_WAV_DATA_LENGTH = 0xFFFFFFFF - 36
+
 
 class PiperEngine:
     """Piper TTS engine for text-to-speech synthesis."""
@@ -25,10 +35,21 @@ class PiperEngine:
         voice_manager=None,
         sample_rate: int = 22050,
         cache_store=None,
+        worker_pool: Optional[PiperWorkerPool] = None,
+        ttfb_target_ms: float = 300.0,
+        first_chunk_max_chars: int = 80,
     ):
         self.voice_manager = voice_manager
         self.sample_rate = sample_rate
         self.cache_store = cache_store
+        self.worker_pool = worker_pool
+        
+        # Pipelined streaming: keep the first synthesized segment short to hit the TTFB target
+        self.ttfb_target_ms = ttfb_target_ms
+        self.first_chunk_max_chars = first_chunk_max_chars
+        self._ttfb_samples: deque = deque(maxlen=1000)
+        self.streaming_requests = 0
+        self.ttfb_target_misses = 0
         self.is_initialized = False
         self.piper_executable = None
         self._synthesis_semaphore = asyncio.Semaphore(4)  # Limit concurrent synthesis
@@ -50,6 +71,10 @@ class PiperEngine:
             # Test Piper installation
             await self._test_piper_installation()
             
+            # Start warm worker pool (idle eviction loop)
+            if self.worker_pool:
+                await self.worker_pool.start()
+            
             self.is_initialized = True
             logger.info("Piper TTS engine initialized successfully")
             
@@ -107,13 +132,17 @@ class PiperEngine:
                     raise ModelInferenceError(f"Voice '{voice}' not found", "piper")
                 
                 # Synthesize audio
-                audio_data = await self._synthesize_with_piper(
+                audio_data, output_sample_rate = await self._synthesize_wav(
                     text=text,
+                    voice=voice,
                     voice_path=voice_path,
                     speed=speed,
                     sample_rate=sample_rate or self.sample_rate,
                 )
                 
+                # Calculate duration from the 16-bit PCM payload (before any re-encoding)
+                duration = max(len(audio_data) - 44, 0) / output_sample_rate / 2
+                
                 # Apply post-processing if needed
                 if pitch != 1.0 or volume != 1.0:
                     audio_data = await self._apply_audio_effects(
@@ -124,12 +153,9 @@ class PiperEngine:
                 if format != "wav":
                     audio_data = await self._convert_audio_format(audio_data, format)
                 
-                # Calculate duration
-                duration = len(audio_data) / (sample_rate or self.sample_rate) / 2  # 16-bit audio
-                
                 return {
                     "audio_data": audio_data,
-                    "sample_rate": sample_rate or self.sample_rate,
+                    "sample_rate": output_sample_rate,
                     "duration": duration,
                     "format": format,
                 }
@@ -148,11 +174,34 @@ class PiperEngine:
         format: str = "wav",
         sample_rate: Optional[int] = None,
         chunk_size: int = 512,
+        pipelined: bool = True,
     ) -> AsyncGenerator[bytes, None]:
-        """Synthesize speech with streaming output."""
+        """Synthesize speech with streaming output.
+        
+        In pipelined mode (WAV only) a single WAV header is followed by raw PCM
+        frames, and sentence N+1 is synthesized while sentence N streams out.
+        Other formats fall back to independently encoded chunks.
+        """
         if not self.is_initialized:
             raise ModelInferenceError("Piper engine not initialized", "piper")
         
+        if pipelined and format == "wav":
+            frames = self._synthesize_streaming_pipelined(
+                text=text,
+                voice=voice,
+                speed=speed,
+                pitch=pitch,
+                volume=volume,
+                sample_rate=sample_rate,
+            )
+            try:
+                async for frame in frames:
+                    yield frame
+            finally:
+                # Stop the sentence producer now if the client went away
+                await frames.aclose()
+            return
+        
         async with self._synthesis_semaphore:  # Limit concurrent streaming
             try:
                 logger.debug("Starting streaming synthesis", voice=voice, text_length=len(text))
@@ -189,9 +238,10 @@ class PiperEngine:
                     try:
                         logger.debug(f"Processing chunk {i + 1}/{len(text_chunks)}", chunk_length=len(chunk_text))
                         
-                        # Synthesize chunk with direct Piper call for better streaming
-                        audio_data = await self._synthesize_with_piper(
+                        # Synthesize chunk on a warm worker when the pool is enabled
+                        audio_data, _ = await self._synthesize_wav(
                             text=chunk_text,
+                            voice=voice,
                             voice_path=voice_path,
                             speed=speed,
                             sample_rate=sample_rate or self.sample_rate,
@@ -246,6 +296,184 @@ class PiperEngine:
                 logger.error("Streaming synthesis failed", error=str(exc), exc_info=True)
                 raise ModelInferenceError(f"Streaming synthesis failed: {str(exc)}", "piper")
     
+    async def _synthesize_streaming_pipelined(
+        self,
+        text: str,
+        voice: str,
+        speed: float = 1.0,
+        pitch: float = 1.0,
+        volume: float = 1.0,
+        sample_rate: Optional[int] = None,
+        frame_bytes: int = 4096,
+        prefetch_sentences: int = 2,
+    ) -> AsyncGenerator[bytes, None]:
+        """Stream one WAV header plus raw PCM while synthesizing ahead by sentence."""
+        request_start = time.perf_counter()
+        
+        async with self._synthesis_semaphore:
+            if not self.voice_manager:
+                raise ModelInferenceError("Voice manager not available", "piper")
+            
+            voice_path = await self.voice_manager.get_voice_model_path(voice)
+            if not voice_path:
+                raise ModelInferenceError(f"Voice '{voice}' not found", "piper")
+            
+            segments = self._split_for_streaming(text)
+            if not segments:
+                logger.warning("No sentences generated for streaming")
+                return
+            
+            queue: asyncio.Queue = asyncio.Queue(maxsize=prefetch_sentences)
+            
+            async def produce() -> None:
+                for i, segment in enumerate(segments):
+                    try:
+                        pcm_data, segment_rate = await self._synthesize_pcm(
+                            text=segment,
+                            voice=voice,
+                            voice_path=voice_path,
+                            speed=speed,
+                            pitch=pitch,
+                            volume=volume,
+                            sample_rate=sample_rate or self.sample_rate,
+                        )
+                    except Exception as exc:
+                        logger.error(
+                            f"Failed to synthesize sentence {i + 1}",
+                            error=str(exc),
+                            sentence=segment[:100],
+                        )
+                        # Dropping the sentence would silently truncate the
+                        # audio, so hand the failure to the consumer instead
+                        await queue.put(
+                            ModelInferenceError(
+                                f"Streaming synthesis failed at sentence {i + 1} of "
+                                f"{len(segments)}: {exc}",
+                                "piper",
+                            )
+                        )
+                        return
+                    await queue.put((pcm_data, segment_rate))
+                await queue.put(None)
+            
+            producer = asyncio.create_task(produce())
+            ttfb = None
+            output_rate = None
+            total_pcm_bytes = 0
+            
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    
+                    pcm_data, segment_rate = item
+                    if output_rate is None:
+                        output_rate = segment_rate
+                        ttfb = time.perf_counter() - request_start
+                        self._record_ttfb(ttfb)
+                        logger.info(
+                            "Streaming synthesis first byte",
+                            voice=voice,
+                            ttfb_ms=ttfb * 1000,
+                            sentences=len(segments),
+                        )
+                        yield self._create_wav_header(
+                            output_rate, data_length=STREAMING_WAV_DATA_LENGTH
+                        )
+                    elif segment_rate != output_rate:
+                        logger.warning(
+                            "Sentence sample rate differs from stream header",
+                            expected=output_rate,
+                            actual=segment_rate,
+                        )
+                    
+                    for offset in range(0, len(pcm_data), frame_bytes):
+                        yield pcm_data[offset:offset + frame_bytes]
+                    total_pcm_bytes += len(pcm_data)
+                    
+            finally:
+                if not producer.done():
+                    producer.cancel()
+                try:
+                    await producer
+                except asyncio.CancelledError:
+                    pass
+            
+            if output_rate is None:
+                raise ModelInferenceError("Streaming synthesis produced no audio", "piper")
+            
+            logger.info(
+                "Pipelined streaming synthesis completed",
+                sentences=len(segments),
+                total_audio_bytes=total_pcm_bytes,
+                audio_duration=total_pcm_bytes / output_rate / 2,
+                ttfb_ms=ttfb * 1000,
+                total_time=time.perf_counter() - request_start,
+            )
+    
+    async def _synthesize_pcm(
+        self,
+        text: str,
+        voice: str,
+        voice_path: str,
+        speed: float = 1.0,
+        pitch: float = 1.0,
+        volume: float = 1.0,
+        sample_rate: int = 22050,
+    ) -> Tuple[bytes, int]:
+        """Synthesize a segment and return raw 16-bit PCM and its sample rate."""
+        audio_data, _ = await self._synthesize_wav(
+            text=text,
+            voice=voice,
+            voice_path=voice_path,
+            speed=speed,
+            sample_rate=sample_rate,
+        )
+        
+        if pitch != 1.0 or volume != 1.0:
+            audio_data = await self._apply_audio_effects(audio_data, pitch=pitch, volume=volume)
+        
+        with wave.open(io.BytesIO(audio_data), "rb") as wav_file:
+            return wav_file.readframes(wav_file.getnframes()), wav_file.getframerate()
+    
+    def _split_for_streaming(self, text: str) -> List[str]:
+        """Split text into sentences, keeping the first segment short for a fast first byte."""
+        sentences = split_text_into_sentences(text)
+        if not sentences:
+            return []
+        
+        first = sentences[0]
+        limit = self.first_chunk_max_chars
+        if limit and len(first) > limit:
+            # Prefer a clause boundary, then a word boundary, inside the limit
+            clause_breaks = [m.end() for m in re.finditer(r"[,;:]\s", first[:limit + 1])]
+            cut = clause_breaks[-1] if clause_breaks else first.rfind(" ", 0, limit)
+            if cut > 0:
+                sentences = [first[:cut].strip(), first[cut:].strip()] + sentences[1:]
+        
+        return [sentence for sentence in sentences if sentence]
+    
+    def _record_ttfb(self, ttfb: float) -> None:
+        """Track time-to-first-byte for streaming requests."""
+        self.streaming_requests += 1
+        self._ttfb_samples.append(ttfb)
+        if ttfb * 1000 > self.ttfb_target_ms:
+            self.ttfb_target_misses += 1
+        
+        metrics = get_metrics()
+        if metrics:
+            metrics.record_streaming_ttfb(ttfb)
+    
+    def _ttfb_percentile(self, percentile: float) -> Optional[float]:
+        if not self._ttfb_samples:
+            return None
+        samples = sorted(self._ttfb_samples)
+        index = min(len(samples) - 1, int(round(percentile * (len(samples) - 1))))
+        return samples[index] * 1000
+    
     async def _find_piper_executable(self) -> Optional[str]:
         """Find Piper executable in system PATH or common locations."""
         
@@ -312,6 +540,49 @@ class PiperEngine:
         except Exception as exc:
             raise ModelInferenceError(f"Piper test failed: {str(exc)}", "piper")
     
+    async def _synthesize_wav(
+        self,
+        text: str,
+        voice: str,
+        voice_path: str,
+        speed: float = 1.0,
+        sample_rate: int = 22050,
+    ) -> Tuple[bytes, int]:
+        """Synthesize a WAV utterance, preferring the warm worker pool over a one-shot process."""
+        if self.worker_pool:
+            try:
+                pcm_data, output_sample_rate = await self.worker_pool.synthesize(
+                    voice=voice,
+                    model_path=voice_path,
+                    text=text,
+                    length_scale=self._length_scale(speed),
+                )
+                if not pcm_data:
+                    raise ModelInferenceError("Piper generated empty audio", "piper")
+                
+                header = self._create_wav_header(output_sample_rate, data_length=len(pcm_data))
+                return header + pcm_data, output_sample_rate
+                
+            except Exception as exc:
+                logger.warning(
+                    "Piper worker pool synthesis failed, falling back to one-shot process",
+                    voice=voice,
+                    error=str(exc),
+                )
+        
+        audio_data = await self._synthesize_with_piper(
+            text=text,
+            voice_path=voice_path,
+            speed=speed,
+            sample_rate=sample_rate,
+        )
+        return audio_data, sample_rate
+    
+    @staticmethod
+    def _length_scale(speed: float) -> float:
+        """Convert a speed multiplier into Piper's length scale."""
+        return 1.0 / max(0.1, min(3.0, speed))
+    
     async def _synthesize_with_piper(
         self,
         text: str,
@@ -347,8 +618,7 @@ class PiperEngine:
                 
                 # Add optional parameters
                 if speed != 1.0:
-                    length_scale = 1.0 / max(0.1, min(3.0, speed))  # Clamp speed and invert
-                    cmd.extend(["--length_scale", str(length_scale)])
+                    cmd.extend(["--length_scale", str(self._length_scale(speed))])
                 
                 if sample_rate != 22050:
                     cmd.extend(["--sample_rate", str(sample_rate)])
@@ -592,6 +862,14 @@ class PiperEngine:
             "concurrent_synthesis_limit": self._synthesis_semaphore._value,
             "available_synthesis_slots": self._synthesis_semaphore._value,
             "sample_rate": self.sample_rate,
+            "worker_pool": self.worker_pool.get_stats() if self.worker_pool else None,
+            "streaming": {
+                "requests": self.streaming_requests,
+                "ttfb_target_ms": self.ttfb_target_ms,
+                "ttfb_target_misses": self.ttfb_target_misses,
+                "ttfb_p50_ms": self._ttfb_percentile(0.5),
+                "ttfb_p95_ms": self._ttfb_percentile(0.95),
+            },
         }
     
     async def validate_piper_installation(self) -> Dict[str, Any]:
@@ -649,5 +927,8 @@ class PiperEngine:
         except asyncio.TimeoutError:
             logger.warning("Some synthesis operations may still be running during cleanup")
         
+        if self.worker_pool:
+            await self.worker_pool.stop()
+        
         self.is_initialized = False
         self.piper_executable = None
\ No newline at end of file
@@ -0,0 +1,493 @@
+"""Pool of warm, long-lived Piper worker processes keyed by voice."""
+
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Set, Tuple
+
+import structlog
+
+from shared.exceptions import ModelInferenceError
+
+from .piper_worker import FRAME_AUDIO, FRAME_DONE, FRAME_ERROR, FRAME_HEADER, FRAME_READY
+
+logger = structlog.get_logger(__name__)
+
+WORKER_SCRIPT = Path(__file__).with_name("piper_worker.py")
+
+
+class PiperWorkerCrashed(ModelInferenceError):
+    """Raised when a worker process dies or stops responding mid-request."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message, "piper")
+
+
+class PiperWorker:
+    """A single warm Piper process serving one voice over stdin/stdout."""
+
+    def __init__(
+        self,
+        voice: str,
+        model_path: str,
+        use_cuda: bool = False,
+        request_timeout: float = 30.0,
+        command: Optional[List[str]] = None,
+    ):
+        self.voice = voice
+        self.model_path = model_path
+        self.use_cuda = use_cuda
+        self.request_timeout = request_timeout
+        self.command = command or [sys.executable, str(WORKER_SCRIPT)]
+
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.sample_rate: Optional[int] = None
+        self.started_at = 0.0
+        self.last_used = 0.0
+        self.requests_served = 0
+        # True while an utterance's frames have not been fully read from the pipe
+        self.in_utterance = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self, startup_timeout: float = 60.0) -> None:
+        """Spawn the worker and wait until the voice model is loaded."""
+        cmd = [*self.command, "--model", self.model_path]
+        if self.use_cuda:
+            cmd.append("--cuda")
+
+        self.process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        self.started_at = time.time()
+
+        try:
+            frame_type, payload = await self._read_frame(timeout=startup_timeout)
+        except PiperWorkerCrashed:
+            await self.stop()
+            raise
+
+        if frame_type != FRAME_READY:
+            await self.stop()
+            raise PiperWorkerCrashed(f"Unexpected startup frame from Piper worker: {frame_type!r}")
+
+        self.sample_rate = json.loads(payload)["sample_rate"]
+        self.last_used = time.time()
+
+        logger.info(
+            "Piper worker started",
+            voice=self.voice,
+            pid=self.process.pid,
+            sample_rate=self.sample_rate,
+            startup_time=self.last_used - self.started_at,
+        )
+
+    async def synthesize_stream(
+        self,
+        text: str,
+        length_scale: float = 1.0,
+    ) -> AsyncGenerator[bytes, None]:
+        """Synthesize text and yield raw 16-bit PCM chunks as they are produced."""
+        if not self.alive:
+            raise PiperWorkerCrashed("Piper worker is not running")
+
+        request = json.dumps({"text": text, "length_scale": length_scale}) + "\n"
+        try:
+            self.process.stdin.write(request.encode("utf-8"))
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as exc:
+            raise PiperWorkerCrashed(f"Piper worker pipe closed: {exc}")
+
+        self.in_utterance = True
+        self.requests_served += 1
+
+        while True:
+            frame_type, payload = await self._read_frame(timeout=self.request_timeout)
+            if frame_type == FRAME_AUDIO:
+                yield payload
+            elif frame_type == FRAME_DONE:
+                self.in_utterance = False
+                break
+            elif frame_type == FRAME_ERROR:
+                self.in_utterance = False
+                raise ModelInferenceError(
+                    f"Piper synthesis failed: {payload.decode('utf-8', errors='replace')}",
+                    "piper",
+                )
+            else:
+                await self.stop()
+                raise PiperWorkerCrashed(f"Unexpected frame from Piper worker: {frame_type!r}")
+
+        self.last_used = time.time()
+
+    async def drain(self) -> None:
+        """Discard the remaining frames of an abandoned utterance."""
+        while self.in_utterance:
+            frame_type, _ = await self._read_frame(timeout=self.request_timeout)
+            if frame_type in (FRAME_DONE, FRAME_ERROR):
+                self.in_utterance = False
+        self.last_used = time.time()
+
+    async def stop(self) -> None:
+        """Terminate the worker process."""
+        if self.process is None or self.process.returncode is not None:
+            return
+
+        try:
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), timeout=2.0)
+        except (asyncio.TimeoutError, ProcessLookupError, BrokenPipeError):
+            try:
+                self.process.kill()
+                await self.process.wait()
+            except ProcessLookupError:
+                pass
+
+    async def _read_frame(self, timeout: float) -> Tuple[bytes, bytes]:
+        try:
+            header = await asyncio.wait_for(
+                self.process.stdout.readexactly(FRAME_HEADER.size), timeout=timeout
+            )
+            frame_type, length = FRAME_HEADER.unpack(header)
+            payload = b""
+            if length:
+                payload = await asyncio.wait_for(
+                    self.process.stdout.readexactly(length), timeout=timeout
+                )
+            return frame_type, payload
+        except asyncio.IncompleteReadError:
+            await self.stop()
+            raise PiperWorkerCrashed(
+                f"Piper worker exited (code {self.process.returncode})"
+            )
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise PiperWorkerCrashed("Piper worker timed out")
+
+
+@dataclass
+class _VoicePool:
+    """Per-voice worker bookkeeping."""
+
+    voice: str
+    model_path: str
+    max_size: int
+    idle: Deque[PiperWorker] = field(default_factory=deque)
+    # Every live worker, idle or checked out, so shutdown can reach all of them
+    workers: Set[PiperWorker] = field(default_factory=set)
+    condition: asyncio.Condition = field(default_factory=asyncio.Condition)
+    total: int = 0  # workers alive or starting
+    waiters: int = 0
+    requests: int = 0
+    spawned: int = 0
+    restarts: int = 0
+    evictions: int = 0
+    total_wait_time: float = 0.0
+    max_queue_depth: int = 0
+    # Set when the pool is replaced or shut down; checked-in workers are stopped
+    retired: bool = False
+
+
+class PiperWorkerPool:
+    """Per-voice pools of warm Piper workers with idle eviction and crash restart."""
+
+    def __init__(
+        self,
+        default_size: int = 2,
+        voice_sizes: Optional[Dict[str, int]] = None,
+        min_workers: int = 1,
+        idle_timeout: float = 300.0,
+        startup_timeout: float = 60.0,
+        request_timeout: float = 30.0,
+        use_cuda: bool = False,
+        worker_command: Optional[List[str]] = None,
+    ):
+        self.default_size = max(1, default_size)
+        self.voice_sizes = voice_sizes or {}
+        self.min_workers = max(0, min_workers)
+        self.idle_timeout = idle_timeout
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        self.use_cuda = use_cuda
+        self.worker_command = worker_command
+
+        self._pools: Dict[str, _VoicePool] = {}
+        self._eviction_task: Optional[asyncio.Task] = None
+        self._background_tasks: set = set()
+
+    async def start(self) -> None:
+        """Start the idle eviction loop."""
+        if self._eviction_task is None:
+            self._eviction_task = asyncio.create_task(self._evict_idle_workers())
+
+    async def stop(self) -> None:
+        """Stop all workers and background tasks."""
+        if self._eviction_task:
+            self._eviction_task.cancel()
+            try:
+                await self._eviction_task
+            except asyncio.CancelledError:
+                pass
+            self._eviction_task = None
+
+        for task in list(self._background_tasks):
+            task.cancel()
+
+        pools = list(self._pools.values())
+        self._pools.clear()
+        await asyncio.gather(
+            *(self._retire(pool, include_busy=True) for pool in pools), return_exceptions=True
+        )
+
+    async def prewarm(self, voice: str, model_path: str) -> None:
+        """Start the minimum number of workers for a voice ahead of traffic."""
+        pool = self._get_pool(voice, model_path)
+        await self._top_up(pool)
+
+    @asynccontextmanager
+    async def acquire(self, voice: str, model_path: str) -> AsyncGenerator[PiperWorker, None]:
+        """Check out a warm worker for a voice, spawning one if under the pool size."""
+        pool = self._get_pool(voice, model_path)
+        worker = await self._checkout(pool)
+        try:
+            yield worker
+        finally:
+            await self._checkin(pool, worker)
+
+    async def synthesize(
+        self,
+        voice: str,
+        model_path: str,
+        text: str,
+        length_scale: float = 1.0,
+    ) -> Tuple[bytes, int]:
+        """Synthesize a full utterance; retries once on a fresh worker if one crashes."""
+        for attempt in range(2):
+            try:
+                async with self.acquire(voice, model_path) as worker:
+                    chunks = [chunk async for chunk in worker.synthesize_stream(text, length_scale)]
+                    return b"".join(chunks), worker.sample_rate
+            except PiperWorkerCrashed as exc:
+                if attempt == 1:
+                    raise
+                logger.warning("Piper worker crashed, retrying on a new worker", voice=voice, error=str(exc))
+        raise PiperWorkerCrashed("Piper synthesis failed after restart")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-voice pool sizes, queue depth and restart counts."""
+        voices = {}
+        for voice, pool in self._pools.items():
+            voices[voice] = {
+                "max_size": pool.max_size,
+                "workers": pool.total,
+                "idle": len(pool.idle),
+                "busy": pool.total - len(pool.idle),
+                "queue_depth": pool.waiters,
+                "max_queue_depth": pool.max_queue_depth,
+                "requests": pool.requests,
+                "spawned": pool.spawned,
+                "restarts": pool.restarts,
+                "evictions": pool.evictions,
+                "avg_wait_ms": pool.total_wait_time / max(pool.requests, 1) * 1000,
+            }
+
+        return {
+            "default_size": self.default_size,
+            "min_workers": self.min_workers,
+            "idle_timeout": self.idle_timeout,
+            "total_workers": sum(pool.total for pool in self._pools.values()),
+            "total_queue_depth": sum(pool.waiters for pool in self._pools.values()),
+            "voices": voices,
+        }
+
+    # Private methods
+
+    def _get_pool(self, voice: str, model_path: str) -> _VoicePool:
+        pool = self._pools.get(voice)
+        if pool is None or pool.model_path != model_path:
+            if pool is not None:
+                logger.info(
+                    "Voice model changed, retiring Piper workers",
+                    voice=voice,
+                    old_model=pool.model_path,
+                    new_model=model_path,
+                )
+                self._run_background(self._retire(pool))
+            pool = _VoicePool(
+                voice=voice,
+                model_path=model_path,
+                max_size=max(1, self.voice_sizes.get(voice, self.default_size)),
+            )
+            self._pools[voice] = pool
+        return pool
+
+    async def _checkout(self, pool: _VoicePool) -> PiperWorker:
+        start_time = time.time()
+
+        async with pool.condition:
+            pool.waiters += 1
+            pool.max_queue_depth = max(pool.max_queue_depth, pool.waiters)
+            try:
+                while True:
+                    if pool.retired:
+                        raise PiperWorkerCrashed(f"Piper pool for voice {pool.voice} was retired")
+
+                    while pool.idle:
+                        worker = pool.idle.pop()  # most recently used stays hot
+                        if worker.alive:
+                            pool.requests += 1
+                            pool.total_wait_time += time.time() - start_time
+                            return worker
+                        pool.workers.discard(worker)
+                        pool.total -= 1
+                        pool.restarts += 1
+
+                    if pool.total < pool.max_size:
+                        pool.total += 1
+                        break
+
+                    await pool.condition.wait()
+            finally:
+                pool.waiters -= 1
+
+        try:
+            worker = await self._spawn(pool)
+        except Exception:
+            async with pool.condition:
+                pool.total -= 1
+                pool.condition.notify()
+            raise
+
+        pool.requests += 1
+        pool.total_wait_time += time.time() - start_time
+        return worker
+
+    async def _retire(self, pool: _VoicePool, include_busy: bool = False) -> None:
+        """Stop the workers of a pool that is no longer served.
+
+        Idle workers stop now; busy ones stop at check-in, or immediately when
+        include_busy is set (shutdown).
+        """
+        async with pool.condition:
+            pool.retired = True
+            workers = list(pool.workers) if include_busy else list(pool.idle)
+            for worker in workers:
+                pool.workers.discard(worker)
+            pool.idle.clear()
+            pool.total -= len(workers)
+            pool.condition.notify_all()
+        await asyncio.gather(*(worker.stop() for worker in workers), return_exceptions=True)
+
+    async def _checkin(self, pool: _VoicePool, worker: PiperWorker) -> None:
+        if pool.retired:
+            async with pool.condition:
+                if worker in pool.workers:
+                    pool.workers.discard(worker)
+                    pool.total -= 1
+            await worker.stop()
+            return
+
+        if worker.alive and worker.in_utterance:
+            # Consumer stopped reading mid-utterance; drain the pipe before reuse
+            self._run_background(self._recycle(pool, worker))
+            return
+
+        async with pool.condition:
+            if worker.alive:
+                pool.idle.append(worker)
+            else:
+                pool.workers.discard(worker)
+                pool.total -= 1
+                pool.restarts += 1
+                logger.warning("Piper worker lost", voice=pool.voice, requests_served=worker.requests_served)
+            pool.condition.notify()
+
+        if not worker.alive:
+            self._run_background(self._top_up(pool))
+
+    async def _recycle(self, pool: _VoicePool, worker: PiperWorker) -> None:
+        try:
+            await worker.drain()
+        except Exception as exc:
+            logger.warning("Failed to drain Piper worker, restarting", voice=pool.voice, error=str(exc))
+            await worker.stop()
+        await self._checkin(pool, worker)
+
+    async def _spawn(self, pool: _VoicePool) -> PiperWorker:
+        worker = PiperWorker(
+            voice=pool.voice,
+            model_path=pool.model_path,
+            use_cuda=self.use_cuda,
+            request_timeout=self.request_timeout,
+            command=self.worker_command,
+        )
+        await worker.start(startup_timeout=self.startup_timeout)
+        if pool.retired:
+            await worker.stop()
+            raise PiperWorkerCrashed(f"Piper pool for voice {pool.voice} was retired")
+        pool.workers.add(worker)
+        pool.spawned += 1
+        return worker
+
+    async def _top_up(self, pool: _VoicePool) -> None:
+        """Restart workers until the voice has its minimum warm count."""
+        target = min(self.min_workers, pool.max_size)
+        while True:
+            async with pool.condition:
+                if pool.retired or pool.total >= target:
+                    return
+                pool.total += 1
+
+            try:
+                worker = await self._spawn(pool)
+            except Exception as exc:
+                async with pool.condition:
+                    pool.total -= 1
+                    pool.condition.notify()
+                logger.error("Failed to start Piper worker", voice=pool.voice, error=str(exc))
+                return
+
+            async with pool.condition:
+                pool.idle.append(worker)
+                pool.condition.notify()
+
+    async def _evict_idle_workers(self) -> None:
+        interval = max(5.0, self.idle_timeout / 4)
+        while True:
+            await asyncio.sleep(interval)
+            now = time.time()
+
+            for pool in list(self._pools.values()):
+                to_stop: List[PiperWorker] = []
+                async with pool.condition:
+                    # Oldest idle workers sit at the left of the deque
+                    while (
+                        pool.idle
+                        and pool.total > self.min_workers
+                        and now - pool.idle[0].last_used > self.idle_timeout
+                    ):
+                        worker = pool.idle.popleft()
+                        pool.workers.discard(worker)
+                        to_stop.append(worker)
+                        pool.total -= 1
+                        pool.evictions += 1
+
+                for worker in to_stop:
+                    await worker.stop()
+
+                if to_stop:
+                    logger.info("Evicted idle Piper workers", voice=pool.voice, count=len(to_stop))
+
+    def _run_background(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
@@ -0,0 +1,85 @@
+"""
+Long-lived Piper worker process.
+
+Loads one ONNX voice model once and then serves synthesis requests over
+stdin/stdout so the model load is paid per worker, not per utterance.
+
+Protocol:
+- Requests are newline-delimited JSON objects on stdin:
+  {"text": "...", "length_scale": 1.0}
+- Responses are framed on stdout as a 1-byte type, a 4-byte little-endian
+  payload length and the payload:
+  H - ready header (JSON with sample_rate), sent once after the model loads
+  A - raw 16-bit mono PCM chunk (one per sentence)
+  D - end of the current utterance
+  E - error message (UTF-8) for the current utterance
+"""
+
+import json
+import os
+import struct
+import sys
+
+FRAME_HEADER = struct.Struct("<cI")
+
+FRAME_READY = b"H"
+FRAME_AUDIO = b"A"
+FRAME_DONE = b"D"
+FRAME_ERROR = b"E"
+
+
+def write_frame(stream, frame_type: bytes, payload: bytes = b"") -> None:
+    """Write a single framed message."""
+    stream.write(FRAME_HEADER.pack(frame_type, len(payload)))
+    if payload:
+        stream.write(payload)
+    stream.flush()
+
+
+def main(argv=None) -> int:
+    """Run the worker loop until stdin closes."""
+    import argparse
+
+    # Keep a private handle on the real stdout for frames and point fd 1 at
+    # stderr, so stray prints from piper/onnxruntime (Python or native) can't
+    # interleave with the framed protocol.
+    stdout = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    from piper import PiperVoice
+
+    parser = argparse.ArgumentParser(description="Persistent Piper synthesis worker")
+    parser.add_argument("--model", required=True, help="Path to the .onnx voice model")
+    parser.add_argument("--config", default=None, help="Path to the voice .json config")
+    parser.add_argument("--cuda", action="store_true", help="Use CUDA execution provider")
+    args = parser.parse_args(argv)
+
+    stdin = sys.stdin.buffer
+
+    voice = PiperVoice.load(args.model, config_path=args.config, use_cuda=args.cuda)
+    write_frame(
+        stdout,
+        FRAME_READY,
+        json.dumps({"sample_rate": voice.config.sample_rate}).encode("utf-8"),
+    )
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            for audio_bytes in voice.synthesize_stream_raw(
+                request["text"],
+                length_scale=request.get("length_scale"),
+            ):
+                write_frame(stdout, FRAME_AUDIO, audio_bytes)
+            write_frame(stdout, FRAME_DONE)
+        except Exception as exc:  # Report and keep serving
+            write_frame(stdout, FRAME_ERROR, str(exc).encode("utf-8", errors="replace"))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -168,8 +168,12 @@ class EventPublisher:
             return False
     
     def _get_subject(self, service: str, event_type: EventType) -> str:
-        """Get NATS subject for event."""
-        return f"{service.replace('-', '_')}.{event_type.value.replace('.', '_')}"
+        """Get NATS subject for event.
+        
+        The first token is the service's domain (``crm-service`` -> ``crm``)
+        so the subject falls under that domain's stream (``crm.>``).
+        """
+        return f"{service.split('-', 1)[0]}.{event_type.value.replace('.', '_')}"
 
 
 class EventSubscriber: